@@ -0,0 +1,25 @@
+# backend/application/runners/archive_runner.py
+from datetime import datetime, timedelta
+from infrastructure.database import archive_processed_observations
+
+class ArchiveRunner:
+    """
+    Runner za hot/cold podjelu: seli obrađene opservacije starije od
+    archive_after_days u ObservationsArchive, jedan mali batch po tick-u.
+    """
+    
+    def __init__(self, archive_after_days: int = 30, batch_size: int = 500):
+        self.archive_after_days = archive_after_days
+        self.batch_size = batch_size
+        self.archived_count = 0
+    
+    def step(self) -> int:
+        """Premjesti jedan batch; vraća broj premještenih opservacija"""
+        older_than = datetime.now() - timedelta(days=self.archive_after_days)
+        moved = archive_processed_observations(older_than, self.batch_size)
+        self.archived_count += moved
+        return moved
+    
+    def has_backlog(self, moved: int) -> bool:
+        """Pun batch znači da vjerovatno ima još za arhivirati"""
+        return moved >= self.batch_size
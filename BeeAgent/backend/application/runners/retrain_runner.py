@@ -1,6 +1,5 @@
 # backend/application/runners/retrain_runner.py
 from typing import Optional
-from domain.entities import SystemSettings
 
 class RetrainAgentRunner:
     
@@ -10,6 +9,7 @@ class RetrainAgentRunner:
     
     def step(self) -> Optional[dict]:
         
+        # Keš postavki (CachedSettingsRepository) - gold brojač bez upita na bazu
         settings = self.settings_repo.get_system_settings()
         
         
@@ -22,10 +22,10 @@ class RetrainAgentRunner:
             return None
         
         
+        consumed = settings.new_gold_since_last_train
         new_version = self.training_service.train_model()
         
-        
-        settings.new_gold_since_last_train = 0
-        self.settings_repo.save_settings(settings)
+        # Oduzmi samo iskorištene primjere - feedback tokom treninga se ne gubi
+        self.settings_repo.consume_new_gold(consumed)
         
         return {"model_version": new_version, "retrained": True}
\ No newline at end of file
@@ -1,12 +1,13 @@
 # backend/application/runners/scoring_runner.py
-from typing import Optional
+from typing import Callable, Optional
 from dataclasses import dataclass
 from domain.entities import ObservationStatus
 from application.services.queue_service import QueueService
 from application.services.scoring_service import ScoringService
+import threading
 import time
 
-@dataclass
+@dataclass(slots=True)
 class ScoringTickResult:
     """Rezultat jednog tick-a"""
     observation_id: int
@@ -34,11 +35,23 @@ class ScoringAgentRunner:
     """
     
     def __init__(self, queue_service: QueueService, 
-                 scoring_service: ScoringService):
+                 scoring_service: ScoringService, latency_tracker=None, monitor=None,
+                 is_active: Optional[Callable[[], bool]] = None):
         self.queue_service = queue_service
         self.scoring_service = scoring_service
+        # Opcionalno: provjera prije ACT (npr. worker još drži leader lease);
+        # False -> preuzeti batch se vraća u red neobrađen
+        self.is_active = is_active
+        # Opcionalno: LatencyTracker za percentile vremena u redu / do rezultata
+        self.latency_tracker = latency_tracker
+        # Opcionalno: ModelMonitor za drift feature-a
+        self.monitor = monitor
         self.processed_count = 0
         self.total_processing_time = 0
+        # step_batch pozivaju consumeri shardova iz više threadova
+        self._stats_lock = threading.Lock()
+        self._idle = threading.Condition(self._stats_lock)
+        self._ticks_in_flight = 0
     
     def step(self) -> Optional[ScoringTickResult]:
         """
@@ -53,14 +66,20 @@ class ScoringAgentRunner:
             return None
         
         # ===== THINK =====
+        model_version = self.scoring_service.model_version
         prediction = self.scoring_service.score_observation(observation)
         
         # ===== ACT =====
         self.queue_service.mark_as_processed(
             observation_id=observation.id,
             action=prediction.action.value,
-            confidence=prediction.confidence
+            confidence=prediction.confidence,
+            review_severity=prediction.review_severity,
+            model_version=model_version,
+            hive_window=prediction.hive_window
         )
+        if self.monitor is not None:
+            self.monitor.record_features([observation.extract_features()])
         
         processing_time = (time.time() - start_time) * 1000  # u ms
         self.processed_count += 1
@@ -75,6 +94,68 @@ class ScoringAgentRunner:
             processing_time_ms=processing_time
         )
     
+    def step_batch(self, batch_size: int = 100, shard: Optional[int] = None) -> int:
+        """
+        Tick nad batch-om: SENSE (jedan UPDATE), THINK (jedan poziv modela),
+        ACT (jedan executemany). Sa shard-om radi samo nad tim shardom reda.
+        Vraća broj obrađenih opservacija.
+        """
+        with self._stats_lock:
+            self._ticks_in_flight += 1
+        try:
+            return self._step_batch(batch_size, shard)
+        finally:
+            with self._stats_lock:
+                self._ticks_in_flight -= 1
+                self._idle.notify_all()
+    
+    def wait_idle(self, timeout_s: Optional[float] = None) -> bool:
+        """Sačekaj da se završe tick-ovi koji su već u toku (zaustavljanje agenta)"""
+        with self._stats_lock:
+            return self._idle.wait_for(lambda: self._ticks_in_flight == 0, timeout_s)
+    
+    def _step_batch(self, batch_size: int, shard: Optional[int]) -> int:
+        start_time = time.time()
+        
+        # ===== SENSE =====
+        batch = self.queue_service.dequeue_batch(batch_size, shard)
+        if len(batch) == 0:
+            return 0
+        
+        # ===== THINK =====
+        model_version = self.scoring_service.model_version
+        predictions = self.scoring_service.score_batch(batch)
+        
+        if self.is_active is not None and not self.is_active():
+            # Agent je zaustavljen dok je batch bio u obradi - rezultat se ne upisuje
+            self.queue_service.release_claims(batch.ids)
+            return 0
+        
+        # ===== ACT =====
+        if not self.queue_service.mark_batch_processed(
+            predictions.observation_ids,
+            predictions.actions,
+            predictions.confidences,
+            predictions.review_severity,
+            model_version,
+            predictions.hive_windows
+        ):
+            # Rezultat nije upisan - batch odmah nazad u red (ne čeka reclaim)
+            self.queue_service.release_claims(batch.ids)
+            return 0
+        if self.monitor is not None:
+            self.monitor.record_features(batch.features)
+        
+        processing_time = (time.time() - start_time) * 1000  # u ms
+        if self.latency_tracker is not None:
+            # Vrijeme do rezultata = čekanje u redu (sat baze) + trajanje tick-a
+            self.latency_tracker.record(batch.queue_wait_ms,
+                                        batch.queue_wait_ms + processing_time)
+        with self._stats_lock:
+            self.processed_count += len(batch)
+            self.total_processing_time += processing_time
+        return len(batch)
+    
     def get_status(self):
         """Vrati status runnera"""
         avg_time = (self.total_processing_time / self.processed_count 
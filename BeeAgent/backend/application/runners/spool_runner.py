@@ -0,0 +1,114 @@
+# backend/application/runners/spool_runner.py
+from datetime import datetime
+from core.circuit_breaker import CircuitBreaker
+from domain.entities import Observation
+from application.services.queue_service import QueueService
+from infrastructure.spool import ObservationSpool
+from infrastructure.database import is_connectivity_error
+import logging
+
+logger = logging.getLogger(__name__)
+
+def observation_to_record(observation: Observation) -> dict:
+    """Opservacija -> zapis za spool (JSON)"""
+    return {
+        "timestamp": observation.timestamp.isoformat(),
+        "temperature": observation.temperature,
+        "humidity": observation.humidity,
+        "frames": observation.frames,
+        "strength": observation.strength,
+        "varoa": observation.varoa,
+        "hive_id": observation.hive_id,
+        "idempotency_key": observation.idempotency_key,
+        "apiary_id": observation.apiary_id,
+        "spooled_at": datetime.now().isoformat()
+    }
+
+def record_to_observation(record: dict) -> Observation:
+    return Observation(
+        timestamp=datetime.fromisoformat(record["timestamp"]),
+        temperature=record["temperature"],
+        humidity=record["humidity"],
+        frames=record["frames"],
+        strength=record["strength"],
+        varoa=bool(record["varoa"]),
+        hive_id=record.get("hive_id"),
+        idempotency_key=record["idempotency_key"],
+        apiary_id=record.get("apiary_id")
+    )
+
+class SpoolReplayRunner:
+    """
+    Prazni spool u bazu kad je baza ponovo dostupna: jedan segment po tick-u,
+    bulk insert u chunk-ovima. Segment se briše tek nakon uspješnog upisa;
+    ponovljen replay je bezopasan (IdempotencyKey). Chunk koji baza odbije
+    zbog podataka ide red po red; redovi koji ne prolaze ni sami idu u dead-letter.
+    """
+    
+    def __init__(self, spool: ObservationSpool, queue_service: QueueService,
+                 breaker: CircuitBreaker, batch_size: int = 500):
+        self.spool = spool
+        self.queue_service = queue_service
+        self.breaker = breaker
+        self.batch_size = batch_size
+        self.replayed_count = 0
+        self.dead_letter_count = 0
+    
+    def step(self) -> int:
+        """Replay jednog segmenta; vraća broj upisanih opservacija"""
+        if self.breaker.is_open:
+            return 0
+        
+        segments = self.spool.pending_segments()
+        if not segments:
+            if not self.spool.rotate():
+                return 0
+            segments = self.spool.pending_segments()
+        
+        if not self.breaker.allow():
+            return 0
+        
+        segment = segments[0]
+        records = self.spool.read_segment(segment)
+        replayed = 0
+        try:
+            for start in range(0, len(records), self.batch_size):
+                replayed += self._replay_chunk(records[start:start + self.batch_size])
+        except Exception as e:
+            self.breaker.record_failure()
+            logger.warning(f"Replay spool-a prekinut, segment ostaje: {e}")
+            return 0
+        
+        self.breaker.record_success()
+        self.spool.remove_segment(segment)
+        self.replayed_count += replayed
+        return replayed
+    
+    def _enqueue(self, chunk: list):
+        self.queue_service.enqueue_many(
+            [record_to_observation(r) for r in chunk],
+            [datetime.fromisoformat(r["spooled_at"]) for r in chunk]
+        )
+    
+    def _replay_chunk(self, chunk: list) -> int:
+        """Upiši chunk; greška konekcije se propagira (segment ostaje za sljedeći tick)"""
+        try:
+            self._enqueue(chunk)
+            return len(chunk)
+        except Exception as e:
+            if is_connectivity_error(e):
+                raise
+            logger.warning(f"Chunk spool-a odbijen ({e!r}), upis red po red")
+        
+        written = 0
+        for record in chunk:
+            try:
+                self._enqueue([record])
+                written += 1
+            except Exception as e:
+                if is_connectivity_error(e):
+                    raise
+                self.spool.dead_letter(record, repr(e))
+                self.dead_letter_count += 1
+                logger.error(f"Zapis iz spool-a premješten u dead-letter: {e!r}")
+        return written
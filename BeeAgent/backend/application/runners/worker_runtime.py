@@ -0,0 +1,660 @@
+# backend/application/runners/worker_runtime.py
+import asyncio
+import os
+import time
+from datetime import datetime
+from typing import Optional
+import logging
+
+from core.circuit_breaker import CircuitBreaker
+from core.logging_config import log_event
+from infrastructure.ml.classifier import BeeClassifier
+from infrastructure.ml.training_store import TrainingSetStore, load_training_set
+from infrastructure.ml.shadow import ShadowScorer, load_shadow_models
+from infrastructure.hive_state import HiveStateStore, hive_features
+from domain.observation_batch import FEATURE_NAMES
+from infrastructure.database import init_database, get_observation_details
+from infrastructure.spool import ObservationSpool
+from infrastructure.coordination import FileLease, DatabaseLease, AgentSnapshotStore
+from infrastructure.coordination import claim_slot, worker_identity
+from infrastructure.settings_repository import CachedSettingsRepository
+from application.services.queue_service import QueueService
+from application.services.scoring_service import ScoringService
+from application.services.training_service import TrainingService
+from application.services.admission_service import AdmissionController
+from application.services.latency_service import LatencyTracker
+from application.services.monitoring_service import ModelMonitor
+from application.runners.scoring_runner import ScoringAgentRunner
+from application.runners.retrain_runner import RetrainAgentRunner
+from application.runners.archive_runner import ArchiveRunner
+from application.runners.spool_runner import SpoolReplayRunner
+
+logger = logging.getLogger(__name__)
+
+RETRAIN_CHECK_INTERVAL_S = 60
+# Označeni primjeri za retrening (memmap kolone, dopunjava se na /feedback)
+TRAINING_SET_DIR = "training_set"
+# Rolling prozor po košnici (delta/mean/slope/std zadnjih HIVE_WINDOW_SIZE očitanja).
+# Uključen: prozor se računa i upisuje uz svaku predikciju, a retrening ide nad
+# HIVE_TRAINING_SET_DIR (osnovni + rolling feature-i); model ih koristi od prve
+# takve verzije. Isključen (podrazumijevano): samo osnovni feature-i
+HIVE_ROLLING_FEATURES = os.environ.get("BEEAGENT_HIVE_FEATURES", "0") == "1"
+HIVE_WINDOW_SIZE = 24
+HIVE_STATE_MAX_HIVES = 10000
+HIVE_TRAINING_SET_DIR = "training_set_hive"
+# Drift feature-a i tačnost po verziji modela (u memoriji leadera)
+MONITOR_SYNC_INTERVAL_S = 30
+SETTINGS_CHECK_INTERVAL_S = 5
+# Kandidati za shadow scoring: linearni modeli u prostoru feature-a primarnog
+# modela (.beemodel ili joblib), zarezom odvojeni u BEEAGENT_SHADOW_MODELS.
+# Joblib model sa scalerom: model_v2.joblib:scaler_v2.joblib. Prazno = bez shadow scoring-a
+SHADOW_MODEL_FILES = [path.strip() for path in
+                      os.environ.get("BEEAGENT_SHADOW_MODELS", "").split(",") if path.strip()]
+# Hot/cold: obrađene opservacije starije od ARCHIVE_AFTER_DAYS idu u arhivu
+ARCHIVE_AFTER_DAYS = 30
+ARCHIVE_BATCH_SIZE = 500
+ARCHIVE_INTERVAL_S = 600
+# Spool: /predict piše lokalno dok je baza nedostupna
+SPOOL_DIR = "spool"
+SPOOL_REPLAY_INTERVAL_S = 5
+# Više uvicorn workera: agenta (scoring, retrain, archive) vrti samo izabrani leader.
+# BEEAGENT_ROLE=api -> worker nikad ne učestvuje u izboru (samo API)
+WORKER_ROLE = os.environ.get("BEEAGENT_ROLE", "auto")
+# "file" = lock fajl (workeri na istom hostu), "database" = lease red (više hostova)
+LEADER_ELECTION = "file"
+LEADER_LOCK_FILE = "agent.lock"
+LEADER_LEASE_TTL_S = 30
+LEADER_CHECK_INTERVAL_S = 5
+# Koliko stop_agent čeka da se završi tick agenta koji je već u toku
+AGENT_STOP_TIMEOUT_S = 30
+# Leader objavljuje svoje stanje (metrike, status agenta, model) u AgentSnapshots;
+# API workeri ga čitaju, a stariji snapshot od SNAPSHOT_MAX_AGE_S znači da leadera nema
+SNAPSHOT_PUBLISH_INTERVAL_S = 5
+SNAPSHOT_MAX_AGE_S = 60
+LEADER_SNAPSHOT = "leader"
+MODEL_SELECTION_REQUEST = "model-selection-request"
+# Broj opservacija po tick-u agenta
+AGENT_BATCH_SIZE = 100
+# Opservacija 'processing' duže od ovoga je ostala iza palog leadera - vraća se u red
+CLAIM_TIMEOUT_S = 300
+CLAIM_RECLAIM_INTERVAL_S = 60
+# Red je podijeljen na QUEUE_SHARDS (hash košnice); leader vrti AGENT_CONSUMERS
+# paralelnih consumera, svaki posjeduje shardove shard % AGENT_CONSUMERS == i
+QUEUE_SHARDS = 16
+AGENT_CONSUMERS = 4
+# Admission control za /predict
+MAX_QUEUE_DEPTH = 5000
+CLIENT_RATE_PER_S = 20.0
+CLIENT_BURST = 40
+# Dubina reda se osvježava u pozadini (admit ne čeka na bazu)
+DEPTH_REFRESH_INTERVAL_S = 1.0
+DEPTH_REFRESH_TIMEOUT_S = 2
+
+class WorkerRuntime:
+    """
+    Jedan uvicorn worker: servisi koje ima svaki worker (red, admission, spool,
+    postavke), izbor leadera i agent (scoring, retrain, archive, monitoring)
+    koji vrti samo leader, sa svim pozadinskim petljama.
+    API sloj (web/main.py) samo čita servise i zove metode.
+    """
+
+    def __init__(self):
+        # Servisi svakog workera (API)
+        self.worker_id: Optional[str] = None
+        self.queue_service = None
+        self.settings_repo = None
+        self.admission = None
+        self.spool = None
+        self.db_breaker = None
+        self.spool_runner = None
+        self.snapshot_store = None
+        self.leader_lease = None
+        self.spool_slot = None
+        # Agent - postoji samo dok je ovaj worker leader
+        self.classifier = None
+        self.scoring_service = None
+        self.runner = None
+        self.training_service = None
+        self.retrain_runner = None
+        self.training_store = None
+        self.shadow_scorer = None
+        self.hive_state = None
+        self.archive_runner = None
+        self.latency_tracker = None
+        self.model_monitor = None
+        self.last_model_selection = None
+        # agent_running: ovaj worker je leader i vrti agenta; worker_running: proces radi
+        self.agent_running = False
+        self.worker_running = False
+        self._worker_tasks = []
+        self._agent_tasks = []
+        self._model_selection_task = None
+
+    # ==============================================
+    # ŽIVOTNI CIKLUS WORKERA
+    # ==============================================
+
+    async def start(self):
+        """Izbor leadera, servisi workera, agent (ako je leader) i pozadinske petlje"""
+        # 0. Izbor leadera: samo jedan proces (od N uvicorn workera) pokreće agenta
+        self.worker_id = worker_identity()
+        self.leader_lease = self._create_leader_lease()
+        won = (self.leader_lease is not None
+               and await asyncio.to_thread(self.leader_lease.try_acquire))
+        logger.info(f"Worker {self.worker_id}: {'leader (agent)' if won else 'samo API'}")
+
+        # 1. Inicijaliziraj bazu (samo leader - migracije se ne izvode iz N procesa)
+        if won:
+            logger.info("Inicijalizacija baze podataka...")
+            db_success = init_database()
+            if not db_success:
+                logger.error("Neuspješna inicijalizacija baze!")
+            else:
+                logger.info("Baza podataka spremna")
+
+        # 2. Servisi koje ima svaki worker (API)
+        logger.info("Kreiranje servisa...")
+        self.queue_service = QueueService(n_shards=QUEUE_SHARDS)
+        self.db_breaker = CircuitBreaker()
+        # Svaki worker ima svoj spool direktorij (rotacija ne smije dirati tuđi fajl)
+        spool_dir, self.spool_slot = claim_slot(SPOOL_DIR)
+        self.spool = ObservationSpool(spool_dir)
+        self.spool_runner = SpoolReplayRunner(self.spool, self.queue_service, self.db_breaker)
+        self.admission = AdmissionController(
+            self._queue_depth,
+            max_queue_depth=MAX_QUEUE_DEPTH,
+            client_rate=CLIENT_RATE_PER_S,
+            client_burst=CLIENT_BURST,
+            depth_refresh_s=DEPTH_REFRESH_INTERVAL_S
+        )
+        self.settings_repo = CachedSettingsRepository()
+        self.snapshot_store = AgentSnapshotStore()
+
+        # 3. Leader pokreće agenta; ostali workeri čitaju njegov snapshot
+        self.worker_running = True
+        if won:
+            try:
+                await self.start_agent()
+            except Exception as e:
+                # Lease ostaje - election loop ponovo pokušava pokrenuti agenta
+                logger.error(f"Agent nije pokrenut: {e}")
+
+        self._worker_tasks = [
+            asyncio.create_task(self.run_leader_election_loop()),
+            asyncio.create_task(self.run_settings_watch_loop()),
+            asyncio.create_task(self.run_spool_replay_loop()),
+            asyncio.create_task(self.run_depth_refresh_loop())
+        ]
+
+    async def stop(self):
+        """Gašenje workera: petlje, agent, pa lease-ovi (sljedeći leader ne čeka)"""
+        self.worker_running = False
+        await _cancel_tasks(*self._worker_tasks)
+        if self.agent_running:
+            await self.stop_agent()
+        for lease in (self.leader_lease, self.spool_slot):
+            if lease:
+                lease.release()
+
+    def _create_leader_lease(self):
+        """Lease po LEADER_ELECTION; None za API-only workere"""
+        if WORKER_ROLE == "api":
+            return None
+        if LEADER_ELECTION == "database":
+            return DatabaseLease(owner=self.worker_id, ttl_s=LEADER_LEASE_TTL_S)
+        return FileLease(LEADER_LOCK_FILE, owner=self.worker_id)
+
+    def _queue_depth(self) -> int:
+        """Dubina reda za admission control (bez čekanja na bazu dok je breaker otvoren)"""
+        if self.db_breaker is not None and self.db_breaker.is_open:
+            raise RuntimeError("Baza nedostupna (circuit breaker otvoren)")
+        return self.queue_service.queue_depth(timeout_s=DEPTH_REFRESH_TIMEOUT_S)
+
+    # ==============================================
+    # AGENT (SAMO LEADER)
+    # ==============================================
+
+    def _build_agent(self):
+        """Učitaj model i kreiraj agent servise (sinhrono - poziva se u threadu)"""
+        logger.info("Učitavanje ML modela...")
+        self.classifier = BeeClassifier()
+        logger.info("ML model spreman")
+        if self.classifier.n_features > len(FEATURE_NAMES) and not HIVE_ROLLING_FEATURES:
+            logger.warning(f"Model očekuje {self.classifier.n_features} feature-a - "
+                           f"uključite BEEAGENT_HIVE_FEATURES")
+
+        shadow_models = load_shadow_models(SHADOW_MODEL_FILES)
+        if shadow_models:
+            self.shadow_scorer = ShadowScorer(self.classifier, shadow_models)
+            logger.info(f"Shadow modeli: {list(shadow_models)}")
+        if HIVE_ROLLING_FEATURES:
+            self.hive_state = HiveStateStore(HIVE_WINDOW_SIZE, HIVE_STATE_MAX_HIVES)
+            try:
+                self.hive_state.rebuild_from_database()
+            except Exception as e:
+                logger.warning(f"Rolling stanje nije obnovljeno iz baze: {e}")
+        self.scoring_service = ScoringService(
+            self.classifier,
+            exploration_rate=self.settings_repo.get_system_settings().exploration_rate,
+            shadow_scorer=self.shadow_scorer,
+            hive_state=self.hive_state
+        )
+
+        logger.info("Kreiranje agent runnera...")
+        self.latency_tracker = LatencyTracker()
+        self.model_monitor = ModelMonitor()
+        self.runner = ScoringAgentRunner(self.queue_service, self.scoring_service,
+                                         self.latency_tracker, self.model_monitor,
+                                         is_active=self.holds_leadership)
+
+        if self.hive_state is not None:
+            self.training_store = TrainingSetStore(
+                HIVE_TRAINING_SET_DIR,
+                n_features=len(FEATURE_NAMES) + self.hive_state.n_window_features)
+        else:
+            self.training_store = TrainingSetStore(TRAINING_SET_DIR)
+        self.refresh_drift_reference()
+        try:
+            self.model_monitor.sync_feedback()
+        except Exception as e:
+            logger.warning(f"Tačnost po verziji modela nije učitana iz baze: {e}")
+        self.training_service = TrainingService(self.classifier,
+                                                training_store=self.training_store,
+                                                is_active=self.holds_leadership)
+        self.retrain_runner = RetrainAgentRunner(self.settings_repo, self.training_service)
+
+        # Promjene postavki stižu bez restarta
+        self.settings_repo.subscribe(self.scoring_service.apply_settings)
+
+        self.archive_runner = ArchiveRunner(ARCHIVE_AFTER_DAYS, ARCHIVE_BATCH_SIZE)
+
+        # Prije consumera: preuzeto a neobrađeno od prethodnog leadera ide nazad u red,
+        # a red koji čeka mora biti podijeljen po trenutnom QUEUE_SHARDS
+        try:
+            requeued = self.queue_service.requeue_stale_claims(CLAIM_TIMEOUT_S)
+            if requeued:
+                logger.info(f"Vraćeno u red {requeued} opservacija prethodnog leadera")
+            moved = self.queue_service.reshard_queued()
+            if moved:
+                logger.info(f"Premješteno {moved} opservacija u nove shardove")
+        except Exception as e:
+            logger.warning(f"Red nije pripremljen (reclaim/reshard): {e}")
+
+    async def start_agent(self):
+        """Ovaj worker postaje leader: pokreni scoring, retrain i archive petlje"""
+        await asyncio.to_thread(self._build_agent)
+
+        logger.info("Pokretanje background agenta...")
+        self.agent_running = True
+        self._agent_tasks = [asyncio.create_task(self.run_agent_loop(consumer))
+                             for consumer in range(AGENT_CONSUMERS)]
+        self._agent_tasks += [
+            asyncio.create_task(self.run_retrain_loop()),
+            asyncio.create_task(self.run_archive_loop()),
+            asyncio.create_task(self.run_monitor_sync_loop()),
+            asyncio.create_task(self.run_snapshot_publish_loop()),
+            asyncio.create_task(self.run_claim_reclaim_loop())
+        ]
+
+    def holds_leadership(self) -> bool:
+        """Consumer provjerava prije ACT - nakon gubitka lease-a rezultat se ne upisuje"""
+        return (self.agent_running and self.leader_lease is not None
+                and self.leader_lease.is_held)
+
+    async def stop_agent(self):
+        """Worker više nije leader: zaustavi agenta i oslobodi sklearn model"""
+        self.agent_running = False
+        await _cancel_tasks(*self._agent_tasks, self._model_selection_task)
+        self._agent_tasks = []
+        # Otkazan task ne zaustavlja thread: tick koji je već u toku završava
+        # (ili vraća batch u red - holds_leadership) prije oslobađanja servisa
+        if self.runner and not await asyncio.to_thread(self.runner.wait_idle,
+                                                       AGENT_STOP_TIMEOUT_S):
+            logger.warning(f"Tick agenta nije završen za {AGENT_STOP_TIMEOUT_S} s")
+        if self.shadow_scorer:
+            await asyncio.to_thread(self.shadow_scorer.recorder.stop)
+        if self.settings_repo and self.scoring_service:
+            self.settings_repo.unsubscribe(self.scoring_service.apply_settings)
+
+        self.classifier = self.scoring_service = self.runner = None
+        self.training_service = self.retrain_runner = self.shadow_scorer = None
+        self.archive_runner = self.latency_tracker = self.training_store = None
+        self.model_monitor = self.hive_state = None
+
+    def refresh_drift_reference(self):
+        """Referenca za drift = training set na kojem je treniran trenutni model"""
+        try:
+            X, _, _ = load_training_set(self.training_store.directory)
+            # Drift se prati nad osnovnim feature-ima (bez rolling prozora)
+            self.model_monitor.set_reference(X[:, :len(FEATURE_NAMES)])
+        except Exception as e:
+            logger.warning(f"Referenca za drift nije učitana: {e}")
+
+    def learn_from_feedback(self, feedback_id: int, observation_id: int,
+                            user_label: str, correct: bool):
+        """Monitor, training set i online trening (blokira - poziva se u threadu)"""
+        obs_details = get_observation_details(observation_id)
+        if not obs_details:
+            return
+        if self.model_monitor:
+            self.model_monitor.record_feedback(feedback_id, obs_details['model_version'],
+                                               correct)
+        features = [
+            obs_details['temperature'],
+            obs_details['humidity'],
+            obs_details['frames'],
+            obs_details['strength'],
+            int(obs_details['varoa'])
+        ]
+        if self.hive_state is not None:
+            # Prozor upisan pri scoringu - isti vektor koji je model vidio
+            features = hive_features(features, obs_details['hive_window'])
+        if self.training_store:
+            self.training_store.append(feedback_id, observation_id, features, user_label)
+
+        # Treniraj model ako je predikcija netočna (model s osnovnim feature-ima
+        # dobija samo njih - rolling feature-i su na kraju vektora)
+        if not correct:
+            self.classifier.train_single(features[:self.classifier.n_features], user_label)
+            logger.info("Model treniran sa feedbackom")
+
+    # ==============================================
+    # SNAPSHOT LEADERA I SELEKCIJA MODELA
+    # ==============================================
+
+    def _build_leader_snapshot(self) -> dict:
+        """Stanje koje postoji samo u leaderu, za API workere (sinhrono - poziva se u threadu)"""
+        return {
+            "worker_id": self.worker_id,
+            "runner": self.runner.get_status(),
+            "service_rate_per_s": self.admission.service_rate,
+            "latency": self.latency_tracker.get_windows(),
+            "drift": self.model_monitor.get_drift_summary(histograms=True),
+            "accuracy": self.model_monitor.get_accuracy_summary(
+                self.scoring_service.model_version),
+            "shadow": self.shadow_scorer.recorder.get_summary() if self.shadow_scorer else None,
+            "hives": self.hive_state_info(),
+            "training_set": self.training_store.get_info(),
+            "model": self.classifier.get_model_info(),
+            "model_selection": self.last_model_selection
+        }
+
+    def hive_state_info(self) -> dict:
+        """Košnice s rolling stanjem u memoriji leadera"""
+        if self.hive_state is None:
+            return {"enabled": False, "hives": 0}
+        return {"enabled": True, **self.hive_state.get_info(),
+                "features": self.hive_state.feature_names()}
+
+    async def leader_snapshot(self) -> Optional[dict]:
+        """API worker: zadnji snapshot leadera; None ako ga nema ili je zastario"""
+        try:
+            return await asyncio.to_thread(self.snapshot_store.get, LEADER_SNAPSHOT,
+                                           SNAPSHOT_MAX_AGE_S)
+        except Exception as e:
+            logger.warning(f"Snapshot leadera nije pročitan: {e}")
+            return None
+
+    async def request_model_selection(self):
+        """API worker predaje zahtjev za selekciju modela leaderu (preko AgentSnapshots)"""
+        await asyncio.to_thread(self.snapshot_store.put, MODEL_SELECTION_REQUEST,
+                                {"worker_id": self.worker_id,
+                                 "requested_at": datetime.now().isoformat()})
+
+    async def select_model(self) -> dict:
+        """Selekcija modela u leaderu; rezultat ide i u snapshot za API workere"""
+        summary = await asyncio.to_thread(self.training_service.select_model)
+        self.last_model_selection = {**summary, "finished_at": datetime.now().isoformat()}
+        if summary["promoted"] and self.model_monitor:
+            await asyncio.to_thread(self.refresh_drift_reference)
+        return summary
+
+    async def _run_requested_model_selection(self, request: dict):
+        """Selekcija koju je zatražio API worker (greška se samo loguje)"""
+        logger.info(f"Selekcija modela na zahtjev workera {request.get('worker_id')}")
+        try:
+            await self.select_model()
+        except Exception as e:
+            logger.error(f"Greška pri selekciji modela: {e}")
+            self.last_model_selection = {"error": str(e),
+                                         "finished_at": datetime.now().isoformat()}
+
+    # ==============================================
+    # PETLJE AGENTA (SAMO LEADER)
+    # ==============================================
+
+    async def run_agent_loop(self, consumer: int = 0):
+        """
+        Petlja jednog consumera - radi u pozadini nad svojim shardovima.
+        Shard drži samo jedan consumer, pa se opservacije košnice obrađuju redom.
+        """
+        shards = list(range(consumer, QUEUE_SHARDS, AGENT_CONSUMERS))
+        logger.info(f"Background agent loop pokrenut (consumer {consumer}, shardovi {shards})")
+
+        try:
+            while self.agent_running and self.runner:
+                try:
+                    processed_round = 0
+                    for shard in shards:
+                        # Pokreni JEDAN tick (Sense→Think→Act) nad batch-om iz sharda;
+                        # u threadu, da se consumeri preklapaju na bazi i NumPy-u
+                        tick_started = time.monotonic()
+                        processed = await asyncio.to_thread(self.runner.step_batch,
+                                                            AGENT_BATCH_SIZE, shard)
+
+                        if processed:
+                            log_event(logger, "agent.tick", consumer=consumer, shard=shard,
+                                      processed=processed)
+                            if self.admission:
+                                # Consumeri rade paralelno - brzina sistema je zbir njihovih
+                                self.admission.record_processed(
+                                    (time.monotonic() - tick_started) / AGENT_CONSUMERS,
+                                    processed)
+                        processed_round += processed
+
+                    if processed_round:
+                        await asyncio.sleep(0.05)  # Kratka pauza
+                    else:
+                        await asyncio.sleep(2)  # Nema posla - duža pauza
+
+                except Exception as e:
+                    logger.error(f"Greška u agent loopu (consumer {consumer}): {e}")
+                    await asyncio.sleep(5)
+
+        except asyncio.CancelledError:
+            logger.info(f"Agent loop prekinut (consumer {consumer})")
+        except Exception as e:
+            logger.error(f"Kritična greška: {e}")
+        finally:
+            logger.info(f"Agent loop završen (consumer {consumer})")
+
+    async def run_retrain_loop(self):
+        """Periodično provjerava da li treba retrenirati model"""
+        logger.info("Retrain loop pokrenut")
+
+        try:
+            while self.agent_running and self.retrain_runner:
+                try:
+                    # Trening se izvršava u zasebnom procesu; ovdje samo čekamo
+                    # u thread-u da event loop (i scoring) ne budu blokirani
+                    result = await asyncio.to_thread(self.retrain_runner.step)
+                    if result:
+                        logger.info(f"Nova verzija modela: {result['model_version']}")
+                        if self.model_monitor:
+                            await asyncio.to_thread(self.refresh_drift_reference)
+                except Exception as e:
+                    logger.error(f"Greška u retrain loopu: {e}")
+
+                await asyncio.sleep(RETRAIN_CHECK_INTERVAL_S)
+
+        except asyncio.CancelledError:
+            logger.info("Retrain loop prekinut")
+
+    async def run_claim_reclaim_loop(self):
+        """Opservacije zaglavljene u 'processing' (npr. nakon pada prethodnog leadera) idu nazad u red"""
+        try:
+            while self.agent_running and self.queue_service:
+                await asyncio.sleep(CLAIM_RECLAIM_INTERVAL_S)
+                try:
+                    requeued = await asyncio.to_thread(self.queue_service.requeue_stale_claims,
+                                                       CLAIM_TIMEOUT_S)
+                    if requeued:
+                        logger.warning(f"Vraćeno u red {requeued} opservacija (claim stariji od "
+                                       f"{CLAIM_TIMEOUT_S}s)")
+                except Exception as e:
+                    logger.warning(f"Zaglavljene opservacije nisu vraćene u red: {e}")
+        except asyncio.CancelledError:
+            logger.info("Reclaim loop prekinut")
+
+    async def run_monitor_sync_loop(self):
+        """Feedback koji su primili API workeri ulazi u tačnost po verziji modela"""
+        try:
+            while self.agent_running and self.model_monitor:
+                await asyncio.sleep(MONITOR_SYNC_INTERVAL_S)
+                try:
+                    await asyncio.to_thread(self.model_monitor.sync_feedback)
+                except Exception as e:
+                    logger.warning(f"Sinhronizacija feedbacka za monitoring nije uspjela: {e}")
+        except asyncio.CancelledError:
+            logger.info("Monitoring loop prekinut")
+
+    async def run_snapshot_publish_loop(self):
+        """
+        Leader objavljuje metrike i status u AgentSnapshots (API workeri ih služe)
+        i preuzima zahtjeve za selekciju modela koje su predali API workeri.
+        """
+        try:
+            while self.agent_running and self.runner:
+                try:
+                    await asyncio.to_thread(
+                        lambda: self.snapshot_store.put(LEADER_SNAPSHOT,
+                                                        self._build_leader_snapshot()))
+                    request = await asyncio.to_thread(self.snapshot_store.take,
+                                                      MODEL_SELECTION_REQUEST)
+                    if request:
+                        if self._model_selection_task and not self._model_selection_task.done():
+                            logger.info("Selekcija modela je već u toku - zahtjev se preskače")
+                        else:
+                            self._model_selection_task = asyncio.create_task(
+                                self._run_requested_model_selection(request))
+                except Exception as e:
+                    logger.warning(f"Snapshot leadera nije objavljen: {e}")
+
+                await asyncio.sleep(SNAPSHOT_PUBLISH_INTERVAL_S)
+
+        except asyncio.CancelledError:
+            logger.info("Snapshot loop prekinut")
+
+    async def run_archive_loop(self):
+        """Arhiviranje u malim batch-evima - svaki batch je zasebna kratka transakcija"""
+        try:
+            while self.agent_running and self.archive_runner:
+                try:
+                    moved = await asyncio.to_thread(self.archive_runner.step)
+                    if moved:
+                        logger.info(f"Arhivirano {moved} opservacija")
+                    if self.archive_runner.has_backlog(moved):
+                        await asyncio.sleep(0.5)  # Ima još - ali pusti scorer da diše
+                        continue
+                except Exception as e:
+                    logger.error(f"Greška u archive loopu: {e}")
+
+                await asyncio.sleep(ARCHIVE_INTERVAL_S)
+
+        except asyncio.CancelledError:
+            logger.info("Archive loop prekinut")
+
+    # ==============================================
+    # PETLJE SVAKOG WORKERA
+    # ==============================================
+
+    async def run_settings_watch_loop(self):
+        """Jeftina RowVer provjera - osvježava keš ako je neko drugi izmijenio postavke"""
+        try:
+            while self.worker_running and self.settings_repo:
+                try:
+                    if await asyncio.to_thread(self.settings_repo.refresh_if_changed):
+                        logger.info("Postavke sistema osvježene")
+                except Exception as e:
+                    logger.warning(f"Provjera postavki nije uspjela: {e}")
+
+                await asyncio.sleep(SETTINGS_CHECK_INTERVAL_S)
+
+        except asyncio.CancelledError:
+            logger.info("Settings watch loop prekinut")
+
+    async def run_depth_refresh_loop(self):
+        """Dubina reda za admission control - upit na bazu nikad nije na putu /predict"""
+        try:
+            while self.worker_running and self.admission:
+                try:
+                    await asyncio.wait_for(asyncio.to_thread(self.admission.refresh_depth),
+                                           DEPTH_REFRESH_TIMEOUT_S + 1)
+                except asyncio.TimeoutError:
+                    logger.warning("Dubina reda nije osvježena na vrijeme - "
+                                   "koristi se zadnja poznata")
+
+                await asyncio.sleep(self.admission.depth_refresh_s)
+
+        except asyncio.CancelledError:
+            logger.info("Depth refresh loop prekinut")
+
+    async def run_spool_replay_loop(self):
+        """Upisuje spool u bazu kad je dostupna (circuit breaker štiti od zatrpavanja)"""
+        try:
+            while self.worker_running and self.spool_runner:
+                try:
+                    if self.spool.has_data():
+                        replayed = await asyncio.to_thread(self.spool_runner.step)
+                        if replayed:
+                            logger.info(f"Iz spool-a upisano {replayed} opservacija")
+                            continue  # Možda ima još segmenata
+                except Exception as e:
+                    logger.error(f"Greška u spool replay loopu: {e}")
+
+                await asyncio.sleep(SPOOL_REPLAY_INTERVAL_S)
+
+        except asyncio.CancelledError:
+            logger.info("Spool replay loop prekinut")
+
+    async def run_leader_election_loop(self):
+        """
+        Leader obnavlja lease; ostali workeri ga preuzimaju kad se oslobodi
+        (pad ili gašenje leadera) i preuzimaju brzinu obrade koju je izmjerio leader.
+        """
+        try:
+            while self.worker_running:
+                await asyncio.sleep(LEADER_CHECK_INTERVAL_S)
+                try:
+                    if self.leader_lease:
+                        held = await asyncio.to_thread(self.leader_lease.try_acquire)
+                        if held and not self.agent_running:
+                            logger.info(f"Worker {self.worker_id} preuzima agenta")
+                            await self.start_agent()
+                        elif not held and self.agent_running:
+                            logger.warning(f"Worker {self.worker_id} je izgubio leader lease "
+                                           f"- agent staje")
+                            await self.stop_agent()
+
+                    if not self.agent_running:
+                        # API worker ne obrađuje red - bez ovoga procjena čekanja
+                        # ostaje na default_service_rate
+                        snapshot = await asyncio.to_thread(self.snapshot_store.get,
+                                                           LEADER_SNAPSHOT, SNAPSHOT_MAX_AGE_S)
+                        if snapshot:
+                            self.admission.apply_service_rate(snapshot["service_rate_per_s"])
+
+                except Exception as e:
+                    logger.error(f"Greška u leader election loopu: {e}")
+
+        except asyncio.CancelledError:
+            logger.info("Leader election loop prekinut")
+
+async def _cancel_tasks(*tasks):
+    for task in tasks:
+        if task:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
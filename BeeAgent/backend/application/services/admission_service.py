@@ -0,0 +1,155 @@
+# backend/application/services/admission_service.py
+import math
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class AdmissionDecision:
+    """Rezultat provjere prijema zahtjeva"""
+    admitted: bool
+    estimated_wait_ms: float
+    status_code: int = 200
+    retry_after_s: int = 0
+    reason: Optional[str] = None
+
+class TokenBucket:
+    """Token bucket: `rate` zahtjeva u sekundi, najviše `burst` odjednom"""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def try_take(self, now: float) -> float:
+        """Uzmi token; vraća 0 ako je uspjelo, inače sekunde do sljedećeg tokena"""
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+class AdmissionController:
+    """
+    Admission control za /predict:
+    - token bucket po klijentu (429 kad klijent šalje prebrzo)
+    - granica backlog-a u redu (503 kad agent ne stiže)
+    - procjena čekanja = dubina reda / izmjerena brzina obrade (EWMA)
+    Dubinu reda iz baze osvježava pozadinska petlja (refresh_depth svakih
+    depth_refresh_s, u threadu); admit čita samo keširanu vrijednost.
+    """
+
+    def __init__(self, queue_depth: Callable[[], int], max_queue_depth: int = 5000,
+                 client_rate: float = 20.0, client_burst: float = 40.0,
+                 default_service_rate: float = 10.0, ewma_alpha: float = 0.1,
+                 depth_refresh_s: float = 1.0, max_clients: int = 10000):
+        self.queue_depth = queue_depth
+        self.max_queue_depth = max_queue_depth
+        self.client_rate = client_rate
+        self.client_burst = client_burst
+        self.ewma_alpha = ewma_alpha
+        self.depth_refresh_s = depth_refresh_s
+        self.max_clients = max_clients
+
+        self._service_time_s = 1.0 / default_service_rate
+        self._depth = 0
+        self._depth_checked = 0.0
+        self._buckets: "OrderedDict[str, TokenBucket]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.rejected = {"rate_limited": 0, "overloaded": 0}
+
+    @property
+    def service_rate(self) -> float:
+        """Izmjerena brzina obrade (opservacija u sekundi)"""
+        return 1.0 / self._service_time_s
+
+    @property
+    def depth(self) -> int:
+        """Zadnja poznata dubina reda (refresh_depth + lokalno brojanje)"""
+        return self._depth
+
+    def estimated_wait_ms(self, depth: Optional[int] = None) -> float:
+        depth = self._depth if depth is None else depth
+        return depth / self.service_rate * 1000
+
+    def record_processed(self, elapsed_s: float, count: int = 1):
+        """Agent javlja trajanje tick-a s poslom (uključujući pauzu petlje)"""
+        with self._lock:
+            per_item = elapsed_s / count
+            self._service_time_s += self.ewma_alpha * (per_item - self._service_time_s)
+            self._depth = max(0, self._depth - count)
+
+    def apply_service_rate(self, rate: float):
+        """API worker: brzina obrade koju je izmjerio (i objavio) leader"""
+        if rate and rate > 0:
+            with self._lock:
+                self._service_time_s = 1.0 / rate
+
+    def admit(self, client_id: str, count: int = 1) -> AdmissionDecision:
+        """Jedan zahtjev (jedan token) s `count` opservacija (toliko ulazi u red)"""
+        now = time.monotonic()
+
+        with self._lock:
+            depth = self._depth
+            wait_s = self._bucket(client_id).try_take(now)
+            if wait_s > 0:
+                self.rejected["rate_limited"] += 1
+                return AdmissionDecision(False, self.estimated_wait_ms(depth), 429,
+                                         max(1, math.ceil(wait_s)), "Too many requests")
+
+            if depth + count > self.max_queue_depth:
+                # Vrijeme da se višak iznad granice obradi
+                excess = depth + count - self.max_queue_depth
+                self.rejected["overloaded"] += 1
+                return AdmissionDecision(False, self.estimated_wait_ms(depth), 503,
+                                         max(1, math.ceil(excess / self.service_rate)),
+                                         "Queue backlog limit reached")
+
+            self._depth = depth + count
+            return AdmissionDecision(True, self.estimated_wait_ms(depth + count))
+
+    def refresh_depth(self) -> bool:
+        """
+        Dubina reda iz baze (blokira - poziva se iz pozadinskog threada).
+        Između osvježavanja admit/record_processed broje lokalno.
+        """
+        try:
+            depth = self.queue_depth()
+        except Exception as e:
+            # Baza nedostupna - zadrži zadnju poznatu dubinu
+            logger.warning(f"Dubina reda nije osvježena: {e}")
+            return False
+        with self._lock:
+            self._depth = depth
+            self._depth_checked = time.monotonic()
+        return True
+
+    def _bucket(self, client_id: str) -> TokenBucket:
+        bucket = self._buckets.get(client_id)
+        if bucket is None:
+            bucket = TokenBucket(self.client_rate, self.client_burst)
+            self._buckets[client_id] = bucket
+            if len(self._buckets) > self.max_clients:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(client_id)
+        return bucket
+
+    def get_status(self) -> dict:
+        return {
+            "queue_depth": self._depth,
+            "queue_depth_age_s": (round(time.monotonic() - self._depth_checked, 3)
+                                  if self._depth_checked else None),
+            "max_queue_depth": self.max_queue_depth,
+            "service_rate_per_s": self.service_rate,
+            "estimated_wait_ms": self.estimated_wait_ms(),
+            "clients": len(self._buckets),
+            "rejected": dict(self.rejected)
+        }
@@ -0,0 +1,112 @@
+# backend/application/services/latency_service.py
+import threading
+import time
+import numpy as np
+from typing import Dict, Iterable, Optional
+
+# Log-skala 1 ms .. 24 h; susjedne granice se razlikuju ~8%
+BIN_EDGES_MS = np.geomspace(1.0, 24 * 3600 * 1000.0, 213)
+PERCENTILES = (50, 90, 95, 99)
+
+class _Histogram:
+    """Histogram po vremenskim bucket-ima (ring buffer) - inkrementalna agregacija"""
+
+    def __init__(self, n_buckets: int):
+        n_bins = len(BIN_EDGES_MS) + 1
+        self.counts = np.zeros((n_buckets, n_bins), dtype=np.int64)
+        self.maxima = np.zeros(n_buckets)
+
+    def add(self, slot: int, values_ms: np.ndarray):
+        bins = np.searchsorted(BIN_EDGES_MS, values_ms)
+        self.counts[slot] += np.bincount(bins, minlength=self.counts.shape[1])
+        self.maxima[slot] = max(self.maxima[slot], float(values_ms.max()))
+
+    def reset(self, slot: int):
+        self.counts[slot] = 0
+        self.maxima[slot] = 0.0
+
+    def window(self, slots: np.ndarray) -> dict:
+        """Zbir bucket-a jednog prozora (JSON - leader ga objavljuje API workerima)"""
+        return {"counts": self.counts[slots].sum(axis=0).tolist(),
+                "max_ms": float(self.maxima[slots].max()) if len(slots) else 0.0}
+
+def summarize_window(window: dict, slo_ms: Optional[float]) -> dict:
+    """Percentili (i udio unutar SLO-a) iz zbira histograma jednog prozora"""
+    counts = np.asarray(window["counts"], dtype=np.int64)
+    total = int(counts.sum())
+    if total == 0:
+        return {"count": 0}
+
+    cumulative = np.cumsum(counts)
+    # Gornja granica bin-a - konzervativno za SLO
+    upper = np.append(BIN_EDGES_MS, np.inf)
+    result = {"count": total, "max_ms": window["max_ms"]}
+    for p in PERCENTILES:
+        idx = int(np.searchsorted(cumulative, total * p / 100))
+        result[f"p{p}_ms"] = float(min(upper[idx], result["max_ms"]))
+    if slo_ms is not None:
+        within = counts[:int(np.searchsorted(BIN_EDGES_MS, slo_ms, side="right"))].sum()
+        result["within_slo"] = float(within / total)
+    return result
+
+def summarize_windows(windows: Dict[str, dict], slo_ms: Optional[float] = None) -> Dict[str, dict]:
+    """Rezultat get_windows -> percentili po prozoru i metrici"""
+    return {window: {name: summarize_window(histogram, slo_ms)
+                     for name, histogram in histograms.items()}
+            for window, histograms in windows.items()}
+
+class LatencyTracker:
+    """
+    Vrijeme u redu (EnqueuedAt -> ClaimedAt) i vrijeme do rezultata
+    (EnqueuedAt -> ProcessedAt) po kliznim prozorima. Memorija je fiksna:
+    jedan histogram po bucket-u od bucket_s sekundi, bez upita na bazu.
+    """
+
+    METRICS = ("queue_wait", "time_to_result")
+
+    def __init__(self, windows_s: Iterable[int] = (60, 300, 3600), bucket_s: int = 10):
+        self.windows_s = sorted(windows_s)
+        self.bucket_s = bucket_s
+        self.n_buckets = self.windows_s[-1] // bucket_s + 1
+        self._histograms = {name: _Histogram(self.n_buckets) for name in self.METRICS}
+        self._bucket_ids = np.full(self.n_buckets, -1, dtype=np.int64)
+        self._lock = threading.Lock()
+
+    def record(self, queue_wait_ms: np.ndarray, time_to_result_ms: np.ndarray):
+        """Jedan batch mjerenja (NaN vrijednosti - npr. redovi bez EnqueuedAt - se preskaču)"""
+        queue_wait_ms = np.asarray(queue_wait_ms, dtype=float)
+        time_to_result_ms = np.asarray(time_to_result_ms, dtype=float)
+        valid = ~np.isnan(queue_wait_ms)
+        if not valid.any():
+            return
+
+        with self._lock:
+            slot = self._current_slot(time.time())
+            self._histograms["queue_wait"].add(slot, np.maximum(queue_wait_ms[valid], 0))
+            self._histograms["time_to_result"].add(slot, np.maximum(time_to_result_ms[valid], 0))
+
+    def _current_slot(self, now: float) -> int:
+        bucket_id = int(now // self.bucket_s)
+        slot = bucket_id % self.n_buckets
+        if self._bucket_ids[slot] != bucket_id:
+            # Bucket je iz prethodnog kruga - isprazni ga
+            for histogram in self._histograms.values():
+                histogram.reset(slot)
+            self._bucket_ids[slot] = bucket_id
+        return slot
+
+    def get_windows(self) -> Dict[str, dict]:
+        """Histogrami po prozoru: {"60s": {"queue_wait": {"counts": [...], "max_ms": ...}}}"""
+        now_bucket = int(time.time() // self.bucket_s)
+        with self._lock:
+            windows = {}
+            for window in self.windows_s:
+                oldest = now_bucket - window // self.bucket_s + 1
+                slots = np.flatnonzero((self._bucket_ids >= oldest) & (self._bucket_ids <= now_bucket))
+                windows[f"{window}s"] = {name: histogram.window(slots)
+                                         for name, histogram in self._histograms.items()}
+            return windows
+
+    def get_summary(self, slo_ms: Optional[float] = None) -> Dict[str, dict]:
+        """Percentili po prozoru: {"60s": {"queue_wait": {...}, "time_to_result": {...}}}"""
+        return summarize_windows(self.get_windows(), slo_ms)
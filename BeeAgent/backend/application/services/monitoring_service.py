@@ -0,0 +1,308 @@
+# backend/application/services/monitoring_service.py
+import threading
+import time
+from collections import deque
+import numpy as np
+from typing import Dict, Iterable, Optional
+from domain.observation_batch import FEATURE_NAMES
+from infrastructure.database import iter_feedback_outcomes, settled_feedback_id
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Fiksne granice histograma po feature-u (opsezi iz forme na frontendu);
+# vrijednosti ispod/iznad idu u krajnje bucket-e
+FEATURE_BIN_EDGES = {
+    "temperature": np.arange(-50.0, 60.1, 5.0),
+    "humidity": np.arange(0.0, 100.1, 5.0),
+    "frames": np.arange(0.0, 50.1, 2.0),
+    "strength": np.arange(0.5, 10.6, 1.0),
+    "varoa": np.array([0.5])
+}
+# PSI iznad ovoga se smatra značajnim driftom
+PSI_DRIFT_THRESHOLD = 0.2
+# Prazan bucket bi dao beskonačan PSI
+_PSI_EPSILON = 1e-4
+# Referenca iz training seta se računa u chunk-ovima (memmap ostaje na disku)
+_REFERENCE_CHUNK_ROWS = 100000
+
+class _Moments:
+    """Welford po feature-u; batch se spaja Chan-ovom formulom (O(F) po batch-u)"""
+
+    __slots__ = ("count", "mean", "m2")
+
+    def __init__(self, n_features: int):
+        self.count = 0
+        self.mean = np.zeros(n_features)
+        self.m2 = np.zeros(n_features)
+
+    def add(self, X: np.ndarray):
+        if len(X):
+            batch_mean = X.mean(axis=0)
+            self.merge(len(X), batch_mean, ((X - batch_mean) ** 2).sum(axis=0))
+
+    def merge(self, count: int, mean: np.ndarray, m2: np.ndarray):
+        if count == 0:
+            return
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean = self.mean + delta * (count / total)
+        self.m2 = self.m2 + m2 + delta ** 2 * (self.count * count / total)
+        self.count = total
+
+    @property
+    def std(self) -> np.ndarray:
+        if self.count < 2:
+            return np.zeros_like(self.mean)
+        return np.sqrt(self.m2 / (self.count - 1))
+
+class _FeatureStats:
+    """Momenti + histogrami svih feature-a (jedan red po feature-u, dopunjen nulama)"""
+
+    __slots__ = ("moments", "histogram")
+
+    def __init__(self, n_features: int, n_bins: int):
+        self.moments = _Moments(n_features)
+        self.histogram = np.zeros((n_features, n_bins), dtype=np.int64)
+
+    def merge(self, other: "_FeatureStats"):
+        self.moments.merge(other.moments.count, other.moments.mean, other.moments.m2)
+        self.histogram += other.histogram
+
+class _AccuracyWindow:
+    """Zadnjih N ishoda (deque) + tekući zbir - O(1) po feedbacku"""
+
+    __slots__ = ("outcomes", "correct", "total", "total_correct", "last_feedback_id")
+
+    def __init__(self, size: int):
+        self.outcomes = deque(maxlen=size)
+        self.correct = 0
+        self.total = 0
+        self.total_correct = 0
+        self.last_feedback_id = 0
+
+    def add(self, feedback_id: int, correct: bool):
+        if len(self.outcomes) == self.outcomes.maxlen:
+            self.correct -= self.outcomes[0]
+        self.outcomes.append(correct)
+        self.correct += correct
+        self.total += 1
+        self.total_correct += correct
+        self.last_feedback_id = max(self.last_feedback_id, feedback_id)
+
+    def summary(self) -> dict:
+        window = len(self.outcomes)
+        return {
+            "rolling_accuracy": self.correct / window if window else None,
+            "rolling_count": window,
+            "accuracy": self.total_correct / self.total if self.total else None,
+            "count": self.total,
+            "last_feedback_id": self.last_feedback_id
+        }
+
+class ModelMonitor:
+    """
+    Online zdravlje modela bez analitičkih upita nad OLTP tabelama:
+    - feature drift: Welford momenti i histogrami fiksnih bucket-a po kliznim
+      prozorima (ring buffer vremenskih bucket-a, kao LatencyTracker), poređeni
+      s referencom - podacima na kojima je model treniran
+    - tačnost po verziji modela iz Feedback.Correct (zadnjih accuracy_window ishoda)
+    """
+
+    def __init__(self, windows_s: Iterable[int] = (3600, 86400), bucket_s: int = 300,
+                 accuracy_window: int = 500, feature_names=FEATURE_NAMES):
+        self.feature_names = tuple(feature_names)
+        self.windows_s = sorted(windows_s)
+        self.bucket_s = bucket_s
+        self.n_buckets = self.windows_s[-1] // bucket_s + 1
+        self.accuracy_window = accuracy_window
+
+        self._edges = [FEATURE_BIN_EDGES[name] for name in self.feature_names]
+        self.n_bins = max(len(edges) for edges in self._edges) + 1
+        self._buckets = [self._new_stats() for _ in range(self.n_buckets)]
+        self._bucket_ids = np.full(self.n_buckets, -1, dtype=np.int64)
+        self._lifetime = self._new_stats()
+        self._reference: Optional[_FeatureStats] = None
+        self._reference_source: Optional[str] = None
+
+        self._accuracy: Dict[str, _AccuracyWindow] = {}
+        # Feedback do ovog Id-a je ubrojan; iznad njega pamte se Id-ovi koje je
+        # /feedback već zabilježio da ih sync ne ubroji ponovo
+        self.synced_feedback_id = 0
+        self._recorded_ids = set()
+        self._lock = threading.Lock()
+
+    def _new_stats(self) -> _FeatureStats:
+        return _FeatureStats(len(self.feature_names), self.n_bins)
+
+    def _histogram(self, X: np.ndarray) -> np.ndarray:
+        histogram = np.zeros((len(self._edges), self.n_bins), dtype=np.int64)
+        for i, edges in enumerate(self._edges):
+            counts = np.bincount(np.searchsorted(edges, X[:, i], side="right"),
+                                 minlength=len(edges) + 1)
+            histogram[i, :len(counts)] = counts
+        return histogram
+
+    def _current_bucket(self, now: float) -> _FeatureStats:
+        bucket_id = int(now // self.bucket_s)
+        slot = bucket_id % self.n_buckets
+        if self._bucket_ids[slot] != bucket_id:
+            # Bucket je iz prethodnog kruga - isprazni ga
+            self._buckets[slot] = self._new_stats()
+            self._bucket_ids[slot] = bucket_id
+        return self._buckets[slot]
+
+    def record_features(self, X: np.ndarray):
+        """Feature-i jednog batch-a (n x F, redoslijed iz extract_features)"""
+        X = np.asarray(X, dtype=float).reshape(-1, len(self.feature_names))
+        if len(X) == 0:
+            return
+        batch = self._new_stats()
+        batch.moments.add(X)
+        batch.histogram = self._histogram(X)
+
+        with self._lock:
+            self._current_bucket(time.time()).merge(batch)
+            self._lifetime.merge(batch)
+
+    def set_reference(self, X: np.ndarray, source: str = "training_set"):
+        """Referentna distribucija (npr. training set modela); X može biti memmap"""
+        reference = self._new_stats()
+        for start in range(0, len(X), _REFERENCE_CHUNK_ROWS):
+            chunk = np.asarray(X[start:start + _REFERENCE_CHUNK_ROWS], dtype=float)
+            chunk = chunk[:, :len(self.feature_names)]
+            reference.moments.add(chunk)
+            reference.histogram += self._histogram(chunk)
+        if reference.moments.count == 0:
+            return
+        with self._lock:
+            self._reference = reference
+            self._reference_source = source
+        logger.info(f"Referenca za drift: {reference.moments.count} primjera ({source})")
+
+    def record_feedback(self, feedback_id: int, model_version: Optional[str],
+                        correct: bool) -> bool:
+        """Ishod jedne predikcije (/feedback); False ako je već ubrojan"""
+        with self._lock:
+            if feedback_id <= self.synced_feedback_id or feedback_id in self._recorded_ids:
+                return False
+            self._recorded_ids.add(feedback_id)
+            self._add_outcome(feedback_id, model_version, correct)
+            return True
+
+    def _add_outcome(self, feedback_id: int, model_version: Optional[str], correct: bool):
+        key = model_version or "unknown"
+        window = self._accuracy.get(key)
+        if window is None:
+            window = self._accuracy[key] = _AccuracyWindow(self.accuracy_window)
+        window.add(feedback_id, bool(correct))
+
+    def sync_feedback(self, chunk_size: int = 1000) -> int:
+        """
+        Feedback koji su primili drugi workeri (keyset od zadnjeg Id-a).
+        Prvi poziv učitava cijelu historiju - tačnost po verziji od početka.
+        Watermark ne prelazi settled_feedback_id; redovi iznad njega se
+        pamte u _recorded_ids i ne ubrajaju ponovo.
+        """
+        settled = settled_feedback_id()
+        added = 0
+        for rows in iter_feedback_outcomes(self.synced_feedback_id, chunk_size):
+            with self._lock:
+                for feedback_id, correct, model_version in rows:
+                    if feedback_id not in self._recorded_ids:
+                        self._recorded_ids.add(feedback_id)
+                        self._add_outcome(feedback_id, model_version, correct)
+                        added += 1
+                self.synced_feedback_id = max(self.synced_feedback_id,
+                                              min(rows[-1][0], settled))
+                self._recorded_ids = {i for i in self._recorded_ids
+                                      if i > self.synced_feedback_id}
+        return added
+
+    def _window_stats(self, window_s: int, now_bucket: int) -> _FeatureStats:
+        oldest = now_bucket - window_s // self.bucket_s + 1
+        stats = self._new_stats()
+        for slot in np.flatnonzero((self._bucket_ids >= oldest) & (self._bucket_ids <= now_bucket)):
+            stats.merge(self._buckets[slot])
+        return stats
+
+    def _feature_drift(self, current: _FeatureStats, reference: _FeatureStats,
+                       histograms: bool) -> dict:
+        result = {}
+        ref_std = reference.moments.std
+        current_std = current.moments.std
+        for i, name in enumerate(self.feature_names):
+            n_bins = len(self._edges[i]) + 1
+            p = current.histogram[i, :n_bins] / current.moments.count
+            q = reference.histogram[i, :n_bins] / reference.moments.count
+            p, q = np.maximum(p, _PSI_EPSILON), np.maximum(q, _PSI_EPSILON)
+            psi = float(((p - q) * np.log(p / q)).sum())
+
+            feature = {
+                "mean": float(current.moments.mean[i]),
+                "std": float(current_std[i]),
+                "reference_mean": float(reference.moments.mean[i]),
+                "reference_std": float(ref_std[i]),
+                # Pomak srednje vrijednosti u jedinicama referentne std
+                "mean_shift": (float((current.moments.mean[i] - reference.moments.mean[i])
+                                     / ref_std[i]) if ref_std[i] > 0 else None),
+                "psi": psi,
+                "drift": psi > PSI_DRIFT_THRESHOLD
+            }
+            if histograms:
+                feature["histogram"] = current.histogram[i, :n_bins].tolist()
+            result[name] = feature
+        return result
+
+    def get_drift_summary(self, histograms: bool = False) -> dict:
+        """Drift po prozoru i feature-u; bez reference se poredi s cijelim radom procesa"""
+        now_bucket = int(time.time() // self.bucket_s)
+        with self._lock:
+            reference = self._reference or self._lifetime
+            summary = {
+                "reference": {
+                    "source": self._reference_source if self._reference else "lifetime",
+                    "count": reference.moments.count
+                },
+                "observed": self._lifetime.moments.count,
+                "windows": {}
+            }
+            if histograms:
+                summary["bin_edges"] = {name: edges.tolist()
+                                        for name, edges in zip(self.feature_names, self._edges)}
+            for window in self.windows_s:
+                current = self._window_stats(window, now_bucket)
+                if current.moments.count == 0 or reference.moments.count == 0:
+                    summary["windows"][f"{window}s"] = {"count": current.moments.count}
+                    continue
+                features = self._feature_drift(current, reference, histograms)
+                summary["windows"][f"{window}s"] = {
+                    "count": current.moments.count,
+                    "drifted": [name for name, f in features.items() if f["drift"]],
+                    "features": features
+                }
+            return summary
+
+    def get_accuracy_summary(self, current_version: Optional[str] = None) -> dict:
+        """Tačnost po verziji modela (rolling zadnjih accuracy_window + ukupno)"""
+        with self._lock:
+            versions = {version: window.summary() for version, window in self._accuracy.items()}
+            synced = self.synced_feedback_id
+        return {
+            "current_version": current_version,
+            "window": self.accuracy_window,
+            "synced_feedback_id": synced,
+            "versions": versions
+        }
+
+def without_histograms(summary: dict) -> dict:
+    """get_drift_summary(histograms=True) -> isti rezultat bez histograma i granica"""
+    windows = {}
+    for name, window in summary["windows"].items():
+        if "features" in window:
+            window = {**window, "features": {
+                feature: {key: value for key, value in stats.items() if key != "histogram"}
+                for feature, stats in window["features"].items()}}
+        windows[name] = window
+    return {**{key: value for key, value in summary.items() if key != "bin_edges"},
+            "windows": windows}
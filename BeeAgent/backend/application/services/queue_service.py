@@ -1,45 +1,300 @@
 # backend/application/services/queue_service.py
-from typing import Optional
+import random
+import threading
+import time
+import zlib
+import numpy as np
+import pyodbc
+from collections import OrderedDict
+from typing import List, Optional, Tuple
 from domain.entities import Observation, ObservationStatus
-from infrastructure.database import get_connection
+from domain.observation_batch import ObservationBatch
+from infrastructure.database import get_connection, commit_with_rollups, retry_on_deadlock
+from infrastructure.hive_state import encode_window
+from core.logging_config import log_event
 import logging
 
 logger = logging.getLogger(__name__)
 
+def shard_for(shard_key: Optional[str], n_shards: int) -> int:
+    """
+    Stabilan hash ključa (crc32) -> shard. Opservacije bez košnice nemaju
+    zahtjev za redoslijedom pa idu u nasumičan shard.
+    """
+    if n_shards <= 1:
+        return 0
+    if shard_key is None:
+        return random.randrange(n_shards)
+    return zlib.crc32(shard_key.encode("utf-8")) % n_shards
+
+def _processed_rollup_deltas(actions, confidences, review_severities) -> List[tuple]:
+    """Batch -> delte za ActionRollups: po akciji broj i zbir confidence-a (processed / review)"""
+    labels, inverse = np.unique(np.asarray(actions).astype(str), return_inverse=True)
+    confidences = np.asarray(confidences, dtype=float)
+    review = np.asarray(review_severities, dtype=float) > 0
+    
+    deltas = []
+    for outcome, mask in (("processed", slice(None)), ("review", review)):
+        counts = np.bincount(inverse[mask], minlength=len(labels))
+        sums = np.bincount(inverse[mask], weights=confidences[mask], minlength=len(labels))
+        deltas.extend((label, outcome, int(count), float(total))
+                      for label, count, total in zip(labels.tolist(), counts, sums) if count)
+    return deltas
+
+def _write_idempotent(conn, write):
+    """
+    write(cursor) u jednoj transakciji. Paralelni retry istog batch-a može
+    upisati iste ključeve između NOT EXISTS i INSERT-a (IntegrityError):
+    tada se transakcija ponavlja jednom - NOT EXISTS sad vidi upisane redove,
+    a Id-ovi se čitaju po ključu.
+    """
+    try:
+        result = write(conn.cursor())
+    except pyodbc.IntegrityError:
+        conn.rollback()
+        log_event(logger, "batch.key_conflict")
+        result = write(conn.cursor())
+    conn.commit()
+    return result
+
 class QueueService:
     """Servis za upravljanje redom (queue) opservacija"""
     
+    def __init__(self, idempotency_ttl_s: float = 600.0, idempotency_max_keys: int = 100000,
+                 n_shards: int = 1):
+        # Red je particionisan na n_shards; jedna košnica je uvijek u istom shardu
+        self.n_shards = n_shards
+        # Keš nedavnih ključeva: key -> (observation_id, istek)
+        # Izvor istine je unique indeks u bazi; keš samo štedi INSERT pri retry-u
+        self.idempotency_ttl_s = idempotency_ttl_s
+        self.idempotency_max_keys = idempotency_max_keys
+        self._recent_keys: "OrderedDict[str, Tuple[int, float]]" = OrderedDict()
+        self._keys_lock = threading.Lock()
+    
     def enqueue(self, observation: Observation) -> Observation:
-        """Stavi opservaciju u red za obradu"""
+        """
+        Stavi opservaciju u red za obradu. Ključ koji već postoji (i u arhivi)
+        diže pyodbc.IntegrityError, kao i unique indeks na hot tabeli.
+        """
         conn = get_connection()
         cursor = conn.cursor()
         
         try:
             cursor.execute("""
                 INSERT INTO Observations 
-                (Timestamp, Temperature, Humidity, Frames, Strength, Varoa, Status)
+                (Timestamp, Temperature, Humidity, Frames, Strength, Varoa, Status, HiveId,
+                 IdempotencyKey, ApiaryId, Shard)
                 OUTPUT INSERTED.Id
-                VALUES (?, ?, ?, ?, ?, ?, ?)
+                SELECT ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?
+                WHERE NOT EXISTS (SELECT 1 FROM ObservationsArchive WHERE IdempotencyKey = ?)
             """, (
                 observation.timestamp, observation.temperature,
                 observation.humidity, observation.frames,
                 observation.strength, observation.varoa,
-                ObservationStatus.QUEUED.value
+                ObservationStatus.QUEUED.value, observation.hive_id,
+                observation.idempotency_key, observation.apiary_id,
+                shard_for(observation.shard_key, self.n_shards),
+                observation.idempotency_key
             ))
             
-            observation.id = cursor.fetchone()[0]
+            row = cursor.fetchone()
+            if row is None:
+                # Unique indeks pokriva samo hot tabelu; arhivirani ključ je isti sudar
+                raise pyodbc.IntegrityError(
+                    "23000", f"IdempotencyKey {observation.idempotency_key} je već arhiviran")
+            observation.id = row[0]
             conn.commit()
             
-            logger.info(f"Opservacija #{observation.id} stavljena u queue")
+            log_event(logger, "observation.enqueued", observation_id=observation.id)
             return observation
             
         except Exception as e:
             conn.rollback()
-            logger.error(f"Greška pri enqueue: {e}")
+            if not isinstance(e, pyodbc.IntegrityError):
+                logger.error(f"Greška pri enqueue: {e}")
+            raise e
+        finally:
+            conn.close()
+    
+    def enqueue_many(self, observations: List[Observation], enqueued_at: List) -> int:
+        """
+        Bulk enqueue (replay spool-a). Svaki red ima IdempotencyKey, pa ponovljen
+        replay istog segmenta ne pravi duplikate. Vraća broj poslanih redova.
+        """
+        conn = get_connection()
+        params = [(
+            obs.timestamp, obs.temperature, obs.humidity, obs.frames,
+            obs.strength, obs.varoa, ObservationStatus.QUEUED.value, obs.hive_id,
+            obs.idempotency_key, queued_at, obs.apiary_id,
+            shard_for(obs.shard_key, self.n_shards), obs.idempotency_key
+        ) for obs, queued_at in zip(observations, enqueued_at)]
+        
+        def write(cursor):
+            cursor.fast_executemany = True
+            cursor.executemany("""
+                INSERT INTO Observations 
+                (Timestamp, Temperature, Humidity, Frames, Strength, Varoa, Status, HiveId,
+                 IdempotencyKey, EnqueuedAt, ApiaryId, Shard)
+                SELECT ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?
+                WHERE NOT EXISTS (SELECT 1 FROM AllObservations WHERE IdempotencyKey = ?)
+            """, params)
+        
+        try:
+            _write_idempotent(conn, write)
+            return len(observations)
+            
+        except Exception as e:
+            conn.rollback()
+            logger.error(f"Greška pri enqueue_many: {e}")
             raise e
         finally:
             conn.close()
     
+    def enqueue_batch(self, observations: List[Observation]) -> List[Optional[int]]:
+        """
+        Bulk enqueue batch-a s gateway-a (jedan executemany, jedan commit).
+        Svaki red ima IdempotencyKey: ponovljen batch ne pravi duplikate, a
+        Id-ovi (i za ranije upisane) se čitaju po ključu. Redoslijed kao ulaz.
+        """
+        conn = get_connection()
+        keys = [obs.idempotency_key for obs in observations]
+        params = [(
+            obs.timestamp, obs.temperature, obs.humidity, obs.frames,
+            obs.strength, obs.varoa, ObservationStatus.QUEUED.value, obs.hive_id,
+            obs.idempotency_key, obs.apiary_id,
+            shard_for(obs.shard_key, self.n_shards), obs.idempotency_key
+        ) for obs in observations]
+        
+        def write(cursor):
+            cursor.fast_executemany = True
+            cursor.executemany("""
+                INSERT INTO Observations 
+                (Timestamp, Temperature, Humidity, Frames, Strength, Varoa, Status, HiveId,
+                 IdempotencyKey, ApiaryId, Shard)
+                SELECT ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?
+                WHERE NOT EXISTS (SELECT 1 FROM AllObservations WHERE IdempotencyKey = ?)
+            """, params)
+            
+            ids = {}
+            # SQL Server dozvoljava najviše 2100 parametara po upitu
+            for start in range(0, len(keys), 1000):
+                chunk = keys[start:start + 1000]
+                cursor.execute(f"""
+                    SELECT IdempotencyKey, Id FROM AllObservations
+                    WHERE IdempotencyKey IN ({", ".join("?" * len(chunk))})
+                """, chunk)
+                ids.update((row[0], row[1]) for row in cursor.fetchall())
+            return ids
+        
+        try:
+            ids = _write_idempotent(conn, write)
+            
+        except Exception as e:
+            conn.rollback()
+            logger.error(f"Greška pri enqueue_batch: {e}")
+            raise e
+        finally:
+            conn.close()
+        
+        for obs in observations:
+            obs.id = ids.get(obs.idempotency_key)
+            if obs.id is not None:
+                self._remember_key(obs.idempotency_key, obs.id)
+        log_event(logger, "batch.enqueued", count=len(observations))
+        return [obs.id for obs in observations]
+    
+    def enqueue_idempotent(self, observation: Observation) -> Tuple[Observation, bool]:
+        """
+        Enqueue s ključem klijenta (retry gateway-a).
+        Vraća (opservacija, duplicate); duplikat vraća originalni Id i status
+        bez novog reda i bez ponovnog scoringa.
+        """
+        key = observation.idempotency_key
+        if not key:
+            return self.enqueue(observation), False
+        
+        cached_id = self._get_cached_key(key)
+        if cached_id is not None:
+            existing = self._find_existing(cached_id=cached_id)
+            if existing:
+                return existing, True
+        
+        try:
+            saved = self.enqueue(observation)
+        except pyodbc.IntegrityError:
+            # Paralelni retry ili ključ stariji od keša - red već postoji
+            existing = self._find_existing(key=key)
+            if not existing:
+                raise
+            self._remember_key(key, existing.id)
+            log_event(logger, "observation.duplicate", key=key, observation_id=existing.id)
+            return existing, True
+        
+        self._remember_key(key, saved.id)
+        return saved, False
+    
+    def _get_cached_key(self, key: str) -> Optional[int]:
+        with self._keys_lock:
+            entry = self._recent_keys.get(key)
+            if entry is None:
+                return None
+            if entry[1] < time.monotonic():
+                del self._recent_keys[key]
+                return None
+            return entry[0]
+    
+    def _remember_key(self, key: str, observation_id: int):
+        with self._keys_lock:
+            self._recent_keys[key] = (observation_id, time.monotonic() + self.idempotency_ttl_s)
+            self._recent_keys.move_to_end(key)
+            while len(self._recent_keys) > self.idempotency_max_keys:
+                self._recent_keys.popitem(last=False)
+    
+    def _find_existing(self, key: Optional[str] = None,
+                       cached_id: Optional[int] = None) -> Optional[Observation]:
+        """Postojeća opservacija po ključu ili Id-u, i arhivirana (samo Id i trenutni status)"""
+        conn = get_connection()
+        try:
+            cursor = conn.cursor()
+            if cached_id is not None:
+                cursor.execute("SELECT Id, Status FROM AllObservations WHERE Id = ?", cached_id)
+            else:
+                cursor.execute(
+                    "SELECT Id, Status FROM AllObservations WHERE IdempotencyKey = ?", key)
+            row = cursor.fetchone()
+            if not row:
+                return None
+            return Observation(id=row[0], status=ObservationStatus(row[1]),
+                               idempotency_key=key)
+        finally:
+            conn.close()
+    
+    def queue_depth(self, timeout_s: Optional[int] = None) -> int:
+        """Broj opservacija koje čekaju na obradu (timeout_s: granica upita u sekundama)"""
+        conn = get_connection()
+        try:
+            if timeout_s:
+                conn.timeout = timeout_s
+            cursor = conn.cursor()
+            cursor.execute("SELECT COUNT(*) FROM Observations WHERE Status = 'queued'")
+            return cursor.fetchone()[0]
+        finally:
+            conn.close()
+    
+    def shard_depths(self) -> dict:
+        """Broj opservacija koje čekaju, po shardu (filtrirani indeks po Shard-u)"""
+        conn = get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT Shard, COUNT(*) FROM Observations
+                WHERE Status = 'queued'
+                GROUP BY Shard
+            """)
+            return {int(row[0]): row[1] for row in cursor.fetchall()}
+        finally:
+            conn.close()
+    
     def dequeue_next(self) -> Optional[Observation]:
         """Uzmi sljedeću opservaciju iz reda"""
         conn = get_connection()
@@ -49,10 +304,11 @@ class QueueService:
             
             cursor.execute("""
                 UPDATE TOP (1) Observations 
-                SET Status = 'processing'
+                SET Status = 'processing',
+                    ClaimedAt = SYSDATETIME()
                 OUTPUT INSERTED.Id, INSERTED.Timestamp, INSERTED.Temperature, 
                        INSERTED.Humidity, INSERTED.Frames, INSERTED.Strength, 
-                       INSERTED.Varoa
+                       INSERTED.Varoa, INSERTED.HiveId, INSERTED.ApiaryId
                 WHERE Status = 'queued'
             """)
             
@@ -70,7 +326,9 @@ class QueueService:
                 frames=row[4],
                 strength=row[5],
                 varoa=bool(row[6]),
-                status=ObservationStatus.PROCESSING
+                status=ObservationStatus.PROCESSING,
+                hive_id=row[7],
+                apiary_id=row[8]
             )
             
         except Exception as e:
@@ -80,27 +338,256 @@ class QueueService:
         finally:
             conn.close()
     
-    def mark_as_processed(self, observation_id: int, action: str, confidence: float):
-        """Označi opservaciju kao obrađenu - POPRAVLJENO!"""
+    def dequeue_batch(self, batch_size: int = 100, shard: Optional[int] = None) -> ObservationBatch:
+        """
+        Uzmi do batch_size najstarijih opservacija (po Id-u) jednim UPDATE-om.
+        Sa shard-om samo iz tog sharda - consumer koji ga posjeduje vidi
+        opservacije svake svoje košnice redom kojim su stigle.
+        """
+        conn = get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            cursor.execute(f"""
+                WITH Claim AS (
+                    SELECT TOP (?) *
+                    FROM Observations
+                    WHERE Status = 'queued'{" AND Shard = ?" if shard is not None else ""}
+                    ORDER BY Id
+                )
+                UPDATE Claim
+                SET Status = 'processing',
+                    ClaimedAt = SYSDATETIME()
+                OUTPUT INSERTED.Id, INSERTED.Timestamp, INSERTED.Temperature, 
+                       INSERTED.Humidity, INSERTED.Frames, INSERTED.Strength, 
+                       INSERTED.Varoa, INSERTED.HiveId,
+                       DATEDIFF(MILLISECOND, INSERTED.EnqueuedAt, INSERTED.ClaimedAt),
+                       INSERTED.ApiaryId
+            """, (batch_size, shard) if shard is not None else (batch_size,))
+            
+            rows = cursor.fetchall()
+            conn.commit()
+            # OUTPUT ne garantuje redoslijed - batch se obrađuje po Id-u
+            rows.sort(key=lambda row: row[0])
+            return ObservationBatch.from_rows(rows)
+            
+        except Exception as e:
+            conn.rollback()
+            logger.error(f"Greška pri dequeue_batch: {e}")
+            return ObservationBatch.empty()
+        finally:
+            conn.close()
+    
+    def requeue_stale_claims(self, timeout_s: float) -> int:
+        """
+        Vrati u red opservacije preuzete prije više od timeout_s (leader je pao
+        ili izgubio lease usred batch-a). Vraća broj vraćenih opservacija.
+        """
         conn = get_connection()
         cursor = conn.cursor()
         
         try:
+            cursor.execute("""
+                UPDATE Observations
+                SET Status = 'queued', ClaimedAt = NULL
+                WHERE Status = 'processing'
+                  AND (ClaimedAt IS NULL OR ClaimedAt < DATEADD(MILLISECOND, ?, SYSDATETIME()))
+            """, (-int(timeout_s * 1000),))
+            requeued = cursor.rowcount
+            conn.commit()
+            if requeued:
+                log_event(logger, "queue.requeued", count=requeued)
+            return requeued
             
+        except Exception as e:
+            conn.rollback()
+            logger.error(f"Greška pri vraćanju preuzetih opservacija u red: {e}")
+            return 0
+        finally:
+            conn.close()
+    
+    def release_claims(self, observation_ids) -> int:
+        """
+        Vrati u red opservacije koje je ovaj consumer preuzeo a neće obraditi
+        (npr. worker je izgubio leader lease usred tick-a). Vraća broj vraćenih.
+        """
+        conn = get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            cursor.fast_executemany = True
+            cursor.executemany("""
+                UPDATE Observations
+                SET Status = 'queued', ClaimedAt = NULL
+                WHERE Id = ? AND Status = 'processing'
+            """, [(int(observation_id),) for observation_id in observation_ids])
+            conn.commit()
+            log_event(logger, "queue.released", count=len(observation_ids))
+            return len(observation_ids)
+            
+        except Exception as e:
+            conn.rollback()
+            # Ostaju 'processing' - novi leader ih vraća nakon CLAIM_TIMEOUT_S
+            logger.error(f"Greška pri vraćanju preuzetih opservacija u red: {e}")
+            return 0
+        finally:
+            conn.close()
+    
+    def reshard_queued(self) -> int:
+        """
+        Preračunaj shard za opservacije koje još čekaju (npr. nakon promjene
+        n_shards). Poziva se prije pokretanja consumera. Vraća broj pomjerenih.
+        """
+        conn = get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            cursor.execute("""
+                SELECT DISTINCT ApiaryId, HiveId FROM Observations
+                WHERE Status = 'queued' AND HiveId IS NOT NULL
+            """)
+            groups = cursor.fetchall()
+            moved = 0
+            for apiary_id, hive_id in groups:
+                shard = shard_for(Observation(hive_id=hive_id, apiary_id=apiary_id).shard_key,
+                                  self.n_shards)
+                cursor.execute("""
+                    UPDATE Observations SET Shard = ?
+                    WHERE Status = 'queued' AND HiveId = ? AND ISNULL(ApiaryId, N'') = ?
+                      AND Shard <> ?
+                """, (shard, hive_id, apiary_id or "", shard))
+                moved += cursor.rowcount
             cursor.execute("""
+                UPDATE Observations SET Shard = Id % ?
+                WHERE Status = 'queued' AND HiveId IS NULL AND Shard >= ?
+            """, (self.n_shards, self.n_shards))
+            moved += cursor.rowcount
+            conn.commit()
+            return moved
+            
+        except Exception as e:
+            conn.rollback()
+            logger.error(f"Greška pri reshard_queued: {e}")
+            raise e
+        finally:
+            conn.close()
+    
+    def mark_batch_processed(self, observation_ids, actions, confidences,
+                             review_severities=None, model_version: Optional[str] = None,
+                             hive_windows=None) -> bool:
+        """
+        Označi cijeli batch kao obrađen (jedan executemany, jedan commit).
+        Vraća False ako upis nije uspio - batch je tada i dalje 'processing'.
+        """
+        if review_severities is None:
+            review_severities = [0.0] * len(observation_ids)
+        if hive_windows is None:
+            hive_windows = [None] * len(observation_ids)
+        try:
+            self._mark_batch_processed(observation_ids, actions, confidences,
+                                       review_severities, model_version, hive_windows)
+            log_event(logger, "batch.processed", count=len(observation_ids))
+            return True
+        except Exception as e:
+            logger.error(f"Greška pri mark_batch_processed: {e}")
+            return False
+    
+    @retry_on_deadlock
+    def _mark_batch_processed(self, observation_ids, actions, confidences,
+                              review_severities, model_version: Optional[str], hive_windows):
+        conn = get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            # Upisuju se samo redovi koji su još 'processing': claim oslobođen, vraćen
+            # u red ili preuzet od drugog consumera (nakon gubitka lease-a) se ne prepisuje.
+            # Koji su redovi stvarno ažurirani zna se iz OUTPUT-a (executemany nema rowcount po redu)
+            cursor.execute("""
+                IF OBJECT_ID('tempdb..#Processed') IS NOT NULL DROP TABLE #Processed
+                CREATE TABLE #Processed (Id INT PRIMARY KEY)
+            """)
+            cursor.fast_executemany = True
+            cursor.executemany("""
                 UPDATE Observations 
                 SET PredictedAction = ?, 
                     Confidence = ?,
-                    Status = 'processed'
-                WHERE Id = ?
-            """, (action, confidence, observation_id))
+                    Status = 'processed',
+                    ReviewSeverity = ?,
+                    ModelVersion = ?,
+                    HiveWindow = ?,
+                    ProcessedAt = SYSDATETIME()
+                OUTPUT INSERTED.Id INTO #Processed
+                WHERE Id = ? AND Status = 'processing'
+            """, [(str(action), float(confidence), float(severity) if severity > 0 else None,
+                   model_version, encode_window(window), int(observation_id))
+                  for observation_id, action, confidence, severity, window
+                  in zip(observation_ids, actions, confidences, review_severities,
+                         hive_windows)])
+            cursor.execute("SELECT Id FROM #Processed")
+            updated = np.isin(np.asarray(observation_ids, dtype=np.int64),
+                              [row[0] for row in cursor.fetchall()])
+            cursor.execute("DROP TABLE #Processed")
             
-            conn.commit()
-            logger.info(f"Opservacija #{observation_id} processed: {action}")
+            if not updated.all():
+                log_event(logger, "batch.stale_claims", level=logging.WARNING,
+                          count=int((~updated).sum()))
+            # Rollup samo za upisane redove - prepisani red bi se brojao dvaput
+            commit_with_rollups(conn, cursor, _processed_rollup_deltas(
+                np.asarray(actions)[updated], np.asarray(confidences)[updated],
+                np.asarray(review_severities)[updated]))
             
-        except Exception as e:
+        except Exception:
             conn.rollback()
+            raise
+            
+        finally:
+            conn.close()
+    
+    def mark_as_processed(self, observation_id: int, action: str, confidence: float,
+                          review_severity: float = 0.0, model_version: Optional[str] = None,
+                          hive_window=None):
+        """Označi opservaciju kao obrađenu; ozbiljnost > 0 je stavlja u inbox za pregled"""
+        try:
+            self._mark_as_processed(observation_id, action, confidence, review_severity,
+                                    model_version, hive_window)
+            log_event(logger, "observation.processed", observation_id=observation_id,
+                      action=action)
+        except Exception as e:
             logger.error(f"Greška pri mark_as_processed: {e}")
+    
+    @retry_on_deadlock
+    def _mark_as_processed(self, observation_id: int, action: str, confidence: float,
+                           review_severity: float, model_version: Optional[str], hive_window):
+        conn = get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            
+            cursor.execute("""
+                UPDATE Observations 
+                SET PredictedAction = ?, 
+                    Confidence = ?,
+                    Status = 'processed',
+                    ReviewSeverity = ?,
+                    ModelVersion = ?,
+                    HiveWindow = ?,
+                    ProcessedAt = SYSDATETIME()
+                WHERE Id = ? AND Status = 'processing'
+            """, (action, confidence, review_severity if review_severity > 0 else None,
+                  model_version, encode_window(hive_window), observation_id))
+            
+            if cursor.rowcount == 0:
+                # Claim više nije naš - rezultat i rollup se ne upisuju
+                log_event(logger, "observation.stale_claim", level=logging.WARNING,
+                          observation_id=observation_id)
+                conn.commit()
+                return
+            commit_with_rollups(conn, cursor, _processed_rollup_deltas(
+                [action], [confidence], [review_severity]))
+            
+        except Exception:
+            conn.rollback()
+            raise
             
         finally:
             conn.close()
\ No newline at end of file
@@ -0,0 +1,193 @@
+# backend/application/services/replay_service.py
+import multiprocessing
+import os
+import time
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional
+from domain.entities import ActionType
+from application.services.review_rules import ReviewRuleEngine
+from infrastructure.replay_source import ReplaySource
+
+# Pseudo-kandidat: predikcije koje su zaista servirane (Observations.PredictedAction)
+RECORDED = "recorded"
+
+ACTIONS = np.array(sorted(action.value for action in ActionType))
+
+class ReplayReport:
+    """Akumulator metrika za jedan model - memorija ne zavisi od broja redova"""
+
+    def __init__(self, model_name: str):
+        self.model_name = model_name
+        n = len(ACTIONS)
+        self.confusion = np.zeros((n, n), dtype=np.int64)
+        self.rows = 0
+        self.skipped = 0
+        self.review_count = 0
+        self.review_known = True
+
+    def add(self, labels: np.ndarray, predictions: np.ndarray,
+            review_mask: Optional[np.ndarray]):
+        true_idx, true_ok = _action_indices(labels)
+        pred_idx, pred_ok = _action_indices(predictions)
+        valid = true_ok & pred_ok
+
+        n = len(ACTIONS)
+        flat = true_idx[valid] * n + pred_idx[valid]
+        self.confusion += np.bincount(flat, minlength=n * n).reshape(n, n)
+        self.rows += int(valid.sum())
+        self.skipped += int((~valid).sum())
+
+        if review_mask is None:
+            self.review_known = False
+        else:
+            self.review_count += int(review_mask[valid].sum())
+
+    def to_dict(self) -> dict:
+        correct = np.diag(self.confusion)
+        support = self.confusion.sum(axis=1)
+        predicted = self.confusion.sum(axis=0)
+
+        per_action = {}
+        for i, action in enumerate(ACTIONS):
+            if support[i] == 0 and predicted[i] == 0:
+                continue
+            per_action[str(action)] = {
+                "support": int(support[i]),
+                "predicted": int(predicted[i]),
+                "precision": float(correct[i] / predicted[i]) if predicted[i] else None,
+                "recall": float(correct[i] / support[i]) if support[i] else None
+            }
+
+        confusion = {
+            str(ACTIONS[t]): {str(ACTIONS[p]): int(self.confusion[t, p])
+                              for p in np.nonzero(self.confusion[t])[0]}
+            for t in np.nonzero(support)[0]
+        }
+
+        return {
+            "model": self.model_name,
+            "rows": self.rows,
+            "skipped": self.skipped,
+            "accuracy": float(correct.sum() / self.rows) if self.rows else None,
+            "review_rate": (self.review_count / self.rows
+                            if self.rows and self.review_known else None),
+            "per_action": per_action,
+            "confusion": confusion
+        }
+
+def _action_indices(labels: np.ndarray):
+    """Vektorizovano mapiranje naziva akcija u indekse (nepoznate -> False)"""
+    labels = labels.astype(str)
+    idx = np.searchsorted(ACTIONS, labels)
+    idx_clipped = np.minimum(idx, len(ACTIONS) - 1)
+    return idx_clipped, ACTIONS[idx_clipped] == labels
+
+def _load_classifier(model_file: str, scaler_file: Optional[str] = None):
+    if model_file.endswith(".beemodel"):
+        if scaler_file:
+            raise ValueError(f"{model_file}: .beemodel nosi svoj scaler - --scaler nije dozvoljen")
+        from infrastructure.ml.numpy_classifier import NumpyBeeClassifier
+        return NumpyBeeClassifier(model_file)
+
+    for path in (model_file, scaler_file):
+        if path and not os.path.exists(path):
+            raise FileNotFoundError(path)
+    from infrastructure.ml.classifier import BeeClassifier
+    return BeeClassifier(model_file, scaler_file)
+
+def replay_candidate(model_file: str, source: ReplaySource, chunk_size: int = 50000,
+                     review_rules: Optional[str] = None,
+                     scaler_file: Optional[str] = None) -> dict:
+    """
+    Izvršava se u worker procesu: jedan prolaz kroz historiju za jedan model.
+    review_rules: JSON pravila za pregled (SystemSettings.ReviewRules); prazno -> podrazumijevana
+    scaler_file: scaler joblib modela (npr. scaler_v2.joblib uz model_v2.joblib)
+    """
+    started = time.perf_counter()
+    report = ReplayReport(model_file)
+    classifier = None if model_file == RECORDED else _load_classifier(model_file, scaler_file)
+    rules = ReviewRuleEngine.from_json(review_rules)
+
+    for features, original, labels in source.iter_chunks(chunk_size):
+        if classifier is None:
+            report.add(labels, original, None)
+            continue
+
+        predictions, confidences = classifier.predict_batch(features)
+        # Isto kao scoring: pregled kad je zbir težina okinutih pravila > 0
+        review = rules.severity(features, confidences) > 0
+        report.add(labels, predictions, review)
+
+    result = report.to_dict()
+    result["elapsed_s"] = time.perf_counter() - started
+    return result
+
+def run_replay(model_files: List[str], source: ReplaySource, chunk_size: int = 50000,
+               max_workers: Optional[int] = None, include_recorded: bool = True,
+               review_rules: Optional[str] = None,
+               scaler_file: Optional[str] = None) -> List[dict]:
+    """
+    Offline evaluacija kandidata nad historijom (Observations + Feedback).
+    Svaki kandidat se izvršava u svom procesu i sam streamuje izvor.
+    Eksploracija se ne simulira - mjeri se čisto ponašanje modela i pravila.
+    scaler_file se primjenjuje na joblib kandidate (.beemodel ima ugrađen scaler).
+    """
+    candidates = ([RECORDED] if include_recorded else []) + list(model_files)
+    workers = max_workers or min(len(candidates), os.cpu_count() or 1)
+
+    ctx = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=ctx) as pool:
+        futures = [pool.submit(replay_candidate, model_file, source, chunk_size, review_rules,
+                               _candidate_scaler(model_file, scaler_file))
+                   for model_file in candidates]
+        return [future.result() for future in futures]
+
+def _candidate_scaler(model_file: str, scaler_file: Optional[str]) -> Optional[str]:
+    if model_file == RECORDED or model_file.endswith(".beemodel"):
+        return None
+    return scaler_file
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+    from core.logging_config import setup_logging
+
+    setup_logging()
+
+    parser = argparse.ArgumentParser(description="Replay evaluacija modela nad historijom")
+    parser.add_argument("models", nargs="*", default=["model.joblib"],
+                        help="joblib ili .beemodel fajlovi")
+    parser.add_argument("--sqlite", default="replay.sqlite3",
+                        help="lokalna kopija baze (default: replay.sqlite3)")
+    parser.add_argument("--sqlserver", action="store_true",
+                        help="čitaj direktno iz SQL Server baze")
+    parser.add_argument("--snapshot", action="store_true",
+                        help="prvo kopiraj Feedback + Observations u --sqlite fajl")
+    parser.add_argument("--scaler", dest="scaler_file", default=None,
+                        help="scaler za joblib modele, npr. scaler_v2.joblib")
+    parser.add_argument("--chunk-size", type=int, default=50000)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--rules", default=None,
+                        help="JSON fajl s pravilima za pregled (default: ReviewRules iz "
+                             "SystemSettings kad se čita baza)")
+    args = parser.parse_args()
+
+    review_rules = None
+    if args.rules:
+        with open(args.rules, encoding="utf-8") as f:
+            review_rules = f.read()
+    elif args.sqlserver or args.snapshot:
+        from infrastructure.settings_repository import SettingsRepository
+        review_rules = SettingsRepository().get_system_settings().review_rules
+
+    if args.snapshot:
+        from infrastructure.replay_source import snapshot_to_sqlite
+        print(f"✓ Snapshot: {snapshot_to_sqlite(args.sqlite, args.chunk_size)} primjera")
+
+    replay_source = (ReplaySource("sqlserver") if args.sqlserver
+                     else ReplaySource("sqlite", args.sqlite))
+    reports = run_replay(args.models, replay_source, args.chunk_size, args.workers,
+                         review_rules=review_rules, scaler_file=args.scaler_file)
+    print(json.dumps(reports, indent=2, ensure_ascii=False))
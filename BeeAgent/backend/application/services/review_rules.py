@@ -0,0 +1,114 @@
+# backend/application/services/review_rules.py
+import json
+import numpy as np
+from dataclasses import dataclass, asdict
+from typing import List, Optional, Union
+from domain.observation_batch import FEATURE_NAMES
+
+# Polja nad kojima pravila rade: feature-i + confidence modela
+RULE_FIELDS = FEATURE_NAMES + ("confidence",)
+
+# NumPy ufunc-ovi (podržavaju out= pa evaluacija ne alocira po pravilu)
+RULE_OPERATORS = {
+    "<": np.less,
+    "<=": np.less_equal,
+    ">": np.greater,
+    ">=": np.greater_equal,
+    "==": np.equal,
+    "!=": np.not_equal
+}
+
+@dataclass(frozen=True)
+class ReviewRule:
+    """
+    Jedno pravilo: opservacija ide na pregled ako `field op value`.
+    severity je težina pravila; ozbiljnost opservacije je zbir težina okinutih pravila.
+    """
+    name: str
+    field: str
+    op: str
+    value: float
+    severity: float = 1.0
+
+    def __post_init__(self):
+        if self.severity <= 0:
+            raise ValueError(f"Pravilo '{self.name}': severity mora biti > 0")
+        if self.field not in RULE_FIELDS:
+            raise ValueError(f"Pravilo '{self.name}': nepoznato polje '{self.field}'")
+        if self.op not in RULE_OPERATORS:
+            raise ValueError(f"Pravilo '{self.name}': nepoznat operator '{self.op}'")
+
+# Podrazumijevana pravila (ista kao ranije hard-kodovana u ScoringService)
+DEFAULT_REVIEW_RULES = [
+    ReviewRule("low_confidence", "confidence", "<", 0.6, severity=1.0),
+    ReviewRule("cold", "temperature", "<", 5, severity=2.0),
+    ReviewRule("hot", "temperature", ">", 40, severity=2.0),
+    ReviewRule("weak_colony", "strength", "<", 3, severity=1.5)
+]
+
+class ReviewRuleEngine:
+    """
+    Pravila kompajlirana u NumPy maske: svako pravilo je jedno poređenje
+    kolone s pragom nad cijelim batch-om, rezultati se OR-uju u isti buffer.
+    """
+
+    def __init__(self, rules: Optional[List[ReviewRule]] = None):
+        self.rules = list(DEFAULT_REVIEW_RULES if rules is None else rules)
+        self._compiled = [(RULE_FIELDS.index(rule.field), RULE_OPERATORS[rule.op],
+                           float(rule.value)) for rule in self.rules]
+        self._weights = [float(rule.severity) for rule in self.rules]
+        self._confidence_column = len(FEATURE_NAMES)
+
+    @classmethod
+    def from_json(cls, text: Optional[str]) -> "ReviewRuleEngine":
+        """Pravila iz JSON liste ({name, field, op, value}); prazno -> podrazumijevana"""
+        if not text:
+            return cls()
+        return cls(parse_rules(json.loads(text)))
+
+    def to_json(self) -> str:
+        return json.dumps([asdict(rule) for rule in self.rules])
+
+    def evaluate(self, features: np.ndarray, confidences: np.ndarray) -> np.ndarray:
+        """Maska opservacija koje trebaju ljudski pregled (n x 5 feature-a, n confidence-a)"""
+        mask = np.zeros(len(confidences), dtype=bool)
+        scratch = np.empty_like(mask)
+        for column, compare, threshold in self._compiled:
+            values = confidences if column == self._confidence_column else features[:, column]
+            compare(values, threshold, out=scratch)
+            mask |= scratch
+        return mask
+
+    def severity(self, features: np.ndarray, confidences: np.ndarray) -> np.ndarray:
+        """Zbir težina okinutih pravila po opservaciji (0 = ne treba pregled)"""
+        total = np.zeros(len(confidences))
+        scratch = np.empty(len(confidences), dtype=bool)
+        for (column, compare, threshold), weight in zip(self._compiled, self._weights):
+            values = confidences if column == self._confidence_column else features[:, column]
+            compare(values, threshold, out=scratch)
+            total += scratch * weight
+        return total
+
+    def fired_rules(self, features: np.ndarray, confidences: np.ndarray) -> List[List[str]]:
+        """Nazivi pravila koja su okinula, po opservaciji (za prikaz/debug)"""
+        fired = [[] for _ in range(len(confidences))]
+        for rule, (column, compare, threshold) in zip(self.rules, self._compiled):
+            values = confidences if column == self._confidence_column else features[:, column]
+            for i in np.flatnonzero(compare(values, threshold)):
+                fired[i].append(rule.name)
+        return fired
+
+def parse_rules(raw: List[Union[dict, ReviewRule]]) -> List[ReviewRule]:
+    """Validacija liste pravila (npr. iz PUT /settings); greška -> ValueError"""
+    rules = []
+    for item in raw:
+        if isinstance(item, ReviewRule):
+            rules.append(item)
+            continue
+        try:
+            rules.append(ReviewRule(name=str(item["name"]), field=item["field"],
+                                    op=item["op"], value=float(item["value"]),
+                                    severity=float(item.get("severity", 1.0))))
+        except (KeyError, TypeError) as e:
+            raise ValueError(f"Neispravno pravilo {item}: {e}")
+    return rules
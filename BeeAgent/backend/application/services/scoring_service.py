@@ -1,14 +1,56 @@
 # backend/application/services/scoring_service.py
-import random
-from typing import Tuple
-from domain.entities import Observation, ActionType, Prediction
+import threading
+import numpy as np
+from typing import Optional, Tuple
+from domain.entities import Observation, ActionType, Prediction, SystemSettings
+from domain.observation_batch import ObservationBatch, BatchPrediction
+from application.services.review_rules import ReviewRuleEngine
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Sve akcije kao sortiran niz - za vektorizovanu eksploraciju (searchsorted)
+ACTION_VALUES = np.sort(np.array([action.value for action in ActionType]))
+ACTION_INDEX = {value: i for i, value in enumerate(ACTION_VALUES)}
+
+# Pravila za ljudski pregled kad u postavkama nema ReviewRules
+DEFAULT_REVIEW_ENGINE = ReviewRuleEngine()
 
 class ScoringService:
     """Servis za scoring - implementira THINK fazu"""
     
-    def __init__(self, classifier, exploration_rate: float = 0.05):
+    def __init__(self, classifier, exploration_rate: float = 0.05, shadow_scorer=None,
+                 review_rules: Optional[ReviewRuleEngine] = None,
+                 seed: Optional[int] = None, hive_state=None):
         self.classifier = classifier
         self.exploration_rate = exploration_rate
+        # Opcionalno: shadow modeli se računaju u istom prolazu kao primarni
+        self.shadow_scorer = shadow_scorer
+        # Opcionalno: rolling stanje po košnici (HiveStateStore)
+        self.hive_state = hive_state
+        self.review_rules = review_rules or DEFAULT_REVIEW_ENGINE
+        self._review_rules_json: Optional[str] = None
+        # Seed -> ponovljiva eksploracija (testovi, replay)
+        self._rng = np.random.default_rng(seed)
+        # Generator nije thread-safe, a consumeri shardova rade paralelno
+        self._rng_lock = threading.Lock()
+    
+    @property
+    def model_version(self) -> Optional[str]:
+        """Verzija primarnog modela (upisuje se uz predikciju)"""
+        return getattr(self.classifier, "model_version", None)
+    
+    def apply_settings(self, settings: SystemSettings):
+        """Primijeni nove postavke bez restarta (poziva keš postavki)"""
+        self.exploration_rate = settings.exploration_rate
+        
+        # Pravila se kompajliraju samo kad se JSON promijeni
+        if settings.review_rules != self._review_rules_json:
+            try:
+                self.review_rules = ReviewRuleEngine.from_json(settings.review_rules)
+                self._review_rules_json = settings.review_rules
+            except ValueError as e:
+                logger.error(f"Neispravna pravila za pregled, zadržana prethodna: {e}")
     
     def score_observation(self, observation: Observation) -> Prediction:
         """
@@ -18,49 +60,114 @@ class ScoringService:
         """
         
         features = observation.extract_features()
+        window = None
+        if self.hive_state is not None and observation.shard_key:
+            window = self.hive_state.update(observation.shard_key, features)
+        model_features = self._model_features(features, window)
         
-        ml_action_str, confidence = self.classifier.predict(features)
+        if self.shadow_scorer is not None:
+            ml_action_str, confidence = self.shadow_scorer.predict(observation.id,
+                                                                   model_features)
+        else:
+            ml_action_str, confidence = self.classifier.predict(model_features)
         ml_action = ActionType(ml_action_str)
         
         
-        is_exploring = random.random() < self.exploration_rate
-        if is_exploring:
-            final_action = self._explore(ml_action)
-            source = "exploration"
-        else:
-            final_action = ml_action
-            source = "ml"
-        
+        with self._rng_lock:
+            is_exploring = self._rng.random() < self.exploration_rate
+            final_action = self._explore(ml_action) if is_exploring else ml_action
         
-        requires_review = self._requires_review(observation, final_action, confidence)
+        review_severity = float(self.review_rules.severity(
+            np.asarray([features], dtype=float),
+            np.asarray([confidence], dtype=float))[0])
         
         return Prediction(
             observation_id=observation.id,
             action=final_action,
             confidence=confidence,
-            requires_review=requires_review,
-            is_exploring=is_exploring
+            requires_review=review_severity > 0,
+            is_exploring=is_exploring,
+            review_severity=review_severity,
+            hive_window=window
         )
     
-    def _explore(self, current_action: ActionType) -> ActionType:
-        """Eksploracija: izaberi nasumičnu drugu akciju"""
-        all_actions = list(ActionType)
-        other_actions = [act for act in all_actions if act != current_action]
-        return random.choice(other_actions) if other_actions else current_action
-    
-    def _requires_review(self, obs: Observation, action: ActionType, 
-                        confidence: float) -> bool:
-        
+    def score_batch(self, batch: ObservationBatch) -> BatchPrediction:
+        """THINK faza za cijeli batch: jedan poziv klasifikatora, pravila nad nizovima"""
+        X, windows = self._batch_features(batch)
         
-        if confidence < 0.6:
-            return True
+        if self.shadow_scorer is not None:
+            ml_actions, confidences = self.shadow_scorer.predict_batch(batch.ids, X)
+        else:
+            ml_actions, confidences = self.classifier.predict_batch(X)
+        ml_actions = np.asarray(ml_actions).astype(ACTION_VALUES.dtype)
+        confidences = np.asarray(confidences, dtype=float)
         
+        final_actions = ml_actions.copy()
+        with self._rng_lock:
+            is_exploring = self._rng.random(len(batch)) < self.exploration_rate
+            if is_exploring.any():
+                final_actions[is_exploring] = self._explore_batch(ml_actions[is_exploring])
         
-        if obs.temperature < 5 or obs.temperature > 40:
-            return True
+        review_severity = self.review_rules.severity(batch.features, confidences)
         
+        return BatchPrediction(
+            observation_ids=batch.ids,
+            actions=final_actions,
+            confidences=confidences,
+            requires_review=review_severity > 0,
+            is_exploring=is_exploring,
+            review_severity=review_severity,
+            hive_windows=windows
+        )
+    
+    def _uses_window(self, n_base: int) -> bool:
+        """Model je treniran na osnovnim + rolling feature-ima košnice"""
+        n_features = getattr(self.classifier, "n_features", n_base)
+        return n_features == n_base + self.hive_state.n_window_features
+    
+    def _model_features(self, features: list, window: Optional[np.ndarray]) -> list:
+        """
+        Osnovni feature-i + rolling feature-i košnice, ako ih model očekuje.
+        Opservacija bez košnice dobija nule (kao u training setu).
+        """
+        if self.hive_state is None or not self._uses_window(len(features)):
+            return features
+        if window is None:
+            return features + [0.0] * self.hive_state.n_window_features
+        return features + window.tolist()
+    
+    def _batch_features(self, batch: ObservationBatch) -> Tuple[np.ndarray, Optional[list]]:
+        """
+        Kao _model_features, ali za batch (rolling stanje se ažurira red po red).
+        Vraća i prozor svake opservacije (None bez košnice) - upisuje se uz predikciju.
+        """
+        X = batch.features
+        if self.hive_state is None:
+            return X, None
         
-        if obs.strength < 3:
-            return True
+        windows = None
+        if batch.hive_keys is not None:
+            windows = [self.hive_state.update(key, row) if key else None
+                       for key, row in zip(batch.hive_keys, X)]
+        if not self._uses_window(X.shape[1]):
+            return X, windows
         
-        return False
\ No newline at end of file
+        extended = np.zeros((len(X), X.shape[1] + self.hive_state.n_window_features))
+        extended[:, :X.shape[1]] = X
+        for i, window in enumerate(windows or ()):
+            if window is not None:
+                extended[i, X.shape[1]:] = window
+        return extended, windows
+    
+    def _explore_batch(self, current_actions: np.ndarray) -> np.ndarray:
+        """Vektorizovana eksploracija: pomak za 1..K-1 uvijek daje drugu akciju"""
+        k = len(ACTION_VALUES)
+        idx = np.searchsorted(ACTION_VALUES, current_actions)
+        shifted = (idx + self._rng.integers(1, k, size=len(idx))) % k
+        return ACTION_VALUES[shifted]
+    
+    def _explore(self, current_action: ActionType) -> ActionType:
+        """Eksploracija: izaberi nasumičnu drugu akciju (isti pomak kao _explore_batch)"""
+        k = len(ACTION_VALUES)
+        shifted = (ACTION_INDEX[current_action.value] + self._rng.integers(1, k)) % k
+        return ActionType(ACTION_VALUES[shifted])
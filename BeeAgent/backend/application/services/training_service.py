@@ -0,0 +1,116 @@
+# backend/application/services/training_service.py
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Optional
+from infrastructure.ml.training import train_from_feedback
+from infrastructure.ml.model_selection import select_best_model
+from infrastructure.ml.training_store import TrainingSetStore
+import logging
+
+logger = logging.getLogger(__name__)
+
+class TrainingService:
+    """
+    Servis za retrening modela.
+    Trening se izvršava u zasebnom procesu, tako da ne dijeli GIL
+    sa scoring petljom; novi model se objavljuje tek kad je gotov.
+    Retrening i selekcija modela idu jedan za drugim (_training_lock) -
+    inače bi stariji trening mogao prepisati upravo promovisan model.
+    """
+
+    def __init__(self, classifier, chunk_size: int = 1000, epochs: int = 1,
+                 training_store: Optional[TrainingSetStore] = None,
+                 is_active: Optional[Callable[[], bool]] = None):
+        self.classifier = classifier
+        self.chunk_size = chunk_size
+        self.epochs = epochs
+        # Training set na disku; bez njega trening čita Feedback iz baze
+        self.training_store = training_store
+        # Opcionalno: provjera prije objave (worker još drži leader lease) -
+        # trening koji završi nakon gubitka lease-a ne prepisuje model novog leadera
+        self.is_active = is_active
+        self.last_result = None
+        self._training_lock = threading.Lock()
+
+    def _may_publish(self, version: str) -> bool:
+        if self.is_active is None or self.is_active():
+            return True
+        logger.warning(f"Model v{version} nije objavljen - worker više nije leader")
+        return False
+    
+    def _prepare_training_set(self) -> Optional[str]:
+        """Dopuni training set iz baze i kompaktiraj ga po potrebi; vraća direktorij"""
+        if self.training_store is None:
+            return None
+        try:
+            self.training_store.sync_from_database(self.chunk_size)
+        except Exception as e:
+            # Trening ide nad onim što je već na disku
+            logger.warning(f"Training set nije sinhronizovan s bazom: {e}")
+        if self.training_store.needs_compaction():
+            self.training_store.compact()
+        return self.training_store.directory
+
+    def train_model(self) -> str:
+        """Istreniraj i objavi novu verziju modela. Vraća verziju."""
+        with self._training_lock:
+            return self._train_model()
+
+    def _train_model(self) -> str:
+        store_dir = self._prepare_training_set()
+        ctx = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as pool:
+            result = pool.submit(
+                train_from_feedback,
+                self.classifier.model_file,
+                self.classifier.scaler_file,
+                self.chunk_size,
+                self.epochs,
+                store_dir
+            ).result()
+
+        if self._may_publish(result["model_version"]):
+            self.classifier.publish(result["model_file"], result["model_version"])
+        self.last_result = result
+
+        logger.info(
+            f"Model v{result['model_version']} istreniran na "
+            f"{result['examples']} primjera"
+        )
+        return result["model_version"]
+
+    def select_model(self, holdout_fraction: float = 0.2) -> dict:
+        """
+        Selekcija modela: mreža kandidata se trenira paralelno u zasebnim
+        procesima, a najbolji (ako nije lošiji od trenutnog) se objavljuje.
+        Čeka retrening koji je u toku.
+        """
+        with self._training_lock:
+            return self._select_model(holdout_fraction)
+
+    def _select_model(self, holdout_fraction: float) -> dict:
+        store_dir = self._prepare_training_set()
+        ctx = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as pool:
+            summary = pool.submit(
+                select_best_model,
+                self.classifier.model_file,
+                self.classifier.scaler_file,
+                self.chunk_size,
+                holdout_fraction,
+                None,
+                store_dir
+            ).result()
+
+        if summary["promoted"] and not self._may_publish(summary["model_version"]):
+            summary = {**summary, "promoted": False}
+        if summary["promoted"]:
+            self.classifier.publish(summary["model_file"], summary["model_version"])
+            logger.info(
+                f"Selekcija modela: v{summary['model_version']} "
+                f"({summary['best_params']}) tačnost {summary['best_accuracy']:.3f}"
+            )
+        else:
+            logger.info("Selekcija modela: trenutni model ostaje")
+        return summary
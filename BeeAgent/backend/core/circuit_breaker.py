@@ -0,0 +1,62 @@
+# backend/core/circuit_breaker.py
+import threading
+import time
+
+class CircuitBreaker:
+    """
+    closed -> (failure_threshold uzastopnih grešaka) -> open
+    open -> (nakon reset_timeout_s) -> half_open: propušta jedan probni poziv
+    half_open -> uspjeh: closed / greška: ponovo open
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 3, reset_timeout_s: float = 10.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout_s = reset_timeout_s
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self) -> bool:
+        """Otvoren i još u periodu čekanja (ne troši probni poziv)"""
+        return (self.state == self.OPEN
+                and time.monotonic() - self.opened_at < self.reset_timeout_s)
+
+    def allow(self) -> bool:
+        """Da li smije poziv prema zaštićenom resursu"""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN:
+                if time.monotonic() - self.opened_at < self.reset_timeout_s:
+                    return False
+                self.state = self.HALF_OPEN
+                self._probe_in_flight = False
+            # half_open: samo jedan probni poziv odjednom
+            if self._probe_in_flight:
+                return False
+            self._probe_in_flight = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._probe_in_flight = False
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+    def get_status(self) -> dict:
+        return {"state": self.state, "failures": self.failures}
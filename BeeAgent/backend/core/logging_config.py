@@ -0,0 +1,164 @@
+# backend/core/logging_config.py
+import atexit
+import json
+import logging
+import queue
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Optional
+
+# Hot-path događaji: `every` = loguj svaki N-ti, `per_second` = najviše N u sekundi
+DEFAULT_SAMPLING = {
+    "observation.enqueued": {"every": 100, "per_second": 5},
+    "observation.processed": {"every": 100, "per_second": 5},
+    "batch.processed": {"per_second": 1},
+    "agent.tick": {"per_second": 1}
+}
+
+_listener: Optional[QueueListener] = None
+_setup_lock = threading.Lock()
+
+class _DeferredQueueHandler(QueueHandler):
+    """
+    QueueHandler koji NE formatira u pozivajućem threadu - zapis ide u red
+    netaknut, a formatiranje i I/O radi QueueListener u pozadini. Izuzetak su
+    %-argumenti: mogu biti mutabilni objekti, pa se poruka spaja odmah.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        if record.args:
+            # log_event ne šalje args, pa hot path ovo ne plaća
+            record.msg = record.getMessage()
+            record.args = None
+        if record.exc_info:
+            # Traceback se mora renderovati dok je exception živ
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+class StructuredFormatter(logging.Formatter):
+    """Događaji (log_event) kao JSON linija ili `event key=value`; ostalo standardno"""
+
+    def __init__(self, json_output: bool = False):
+        super().__init__("%(asctime)s %(levelname)s %(name)s: %(message)s")
+        self.json_output = json_output
+
+    def format(self, record: logging.LogRecord) -> str:
+        event = getattr(record, "event", None)
+        fields = getattr(record, "fields", {})
+
+        if self.json_output:
+            payload = {
+                "ts": record.created,
+                "level": record.levelname,
+                "logger": record.name
+            }
+            if event:
+                payload["event"] = event
+                payload.update(fields)
+            else:
+                payload["message"] = record.getMessage()
+            if record.exc_text:
+                payload["exc"] = record.exc_text
+            return json.dumps(payload, default=str, ensure_ascii=False)
+
+        if event:
+            record.msg = " ".join([event] + [f"{k}={v}" for k, v in fields.items()])
+            record.args = None
+        return super().format(record)
+
+class EventSampler:
+    """Sampling (svaki N-ti) i rate limit (token bucket) po nazivu događaja"""
+
+    def __init__(self, config: Optional[Dict[str, dict]] = None):
+        self._lock = threading.Lock()
+        self._state: Dict[str, list] = {}
+        self.configure(config or {})
+
+    def configure(self, config: Dict[str, dict]):
+        with self._lock:
+            self.config = dict(config)
+            self._state.clear()
+
+    def check(self, event: str) -> int:
+        """0 = odbaci; inače težina zapisa (koliko događaja predstavlja)"""
+        rule = self.config.get(event)
+        if rule is None:
+            return 1
+
+        every = rule.get("every", 1)
+        per_second = rule.get("per_second")
+        now = time.monotonic()
+
+        with self._lock:
+            # [brojač, tokeni, zadnje osvježavanje, preskočeno od zadnjeg zapisa]
+            state = self._state.setdefault(event, [0, per_second or 0.0, now, 0])
+            state[0] += 1
+            if state[0] % every:
+                state[3] += 1
+                return 0
+            if per_second:
+                state[1] = min(per_second, state[1] + (now - state[2]) * per_second)
+                state[2] = now
+                if state[1] < 1:
+                    state[3] += 1
+                    return 0
+                state[1] -= 1
+            weight = state[3] + 1
+            state[3] = 0
+            return weight
+
+_sampler = EventSampler(DEFAULT_SAMPLING)
+
+def log_event(logger: logging.Logger, event: str, level: int = logging.INFO, **fields):
+    """
+    Strukturisan događaj. Provjera nivoa i sampling su prije kreiranja zapisa,
+    pa odbačen događaj košta samo brojač. `sample_weight` kaže koliko
+    događaja zapis predstavlja.
+    """
+    if not logger.isEnabledFor(level):
+        return
+    weight = _sampler.check(event)
+    if not weight:
+        return
+    if weight > 1:
+        fields["sample_weight"] = weight
+    logger.log(level, event, extra={"event": event, "fields": fields})
+
+def configure_sampling(config: Dict[str, dict]):
+    """Zamijeni pravila sampling-a (npr. {"agent.tick": {"per_second": 0.2}})"""
+    _sampler.configure(config)
+
+def setup_logging(level: int = logging.INFO, json_output: bool = False) -> QueueListener:
+    """
+    Root logger -> red -> QueueListener (pozadinski thread) -> stderr.
+    Idempotentno; zamjenjuje logging.basicConfig.
+    """
+    global _listener
+    with _setup_lock:
+        if _listener is not None:
+            return _listener
+
+        log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+        stream_handler = logging.StreamHandler()
+        stream_handler.setFormatter(StructuredFormatter(json_output))
+
+        root = logging.getLogger()
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        root.addHandler(_DeferredQueueHandler(log_queue))
+        root.setLevel(level)
+
+        _listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+        _listener.start()
+        atexit.register(shutdown_logging)
+        return _listener
+
+def shutdown_logging():
+    """Isprazni red i zaustavi pozadinski thread"""
+    global _listener
+    with _setup_lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
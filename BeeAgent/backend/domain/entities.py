@@ -2,7 +2,7 @@
 from dataclasses import dataclass
 from datetime import datetime
 from enum import Enum
-from typing import Optional
+from typing import Any, Optional
 
 class ActionType(str, Enum):
     """Domenski enum za akcije - SVE AKCIJE IZ PROJEKTA"""
@@ -22,6 +22,12 @@ class ActionType(str, Enum):
     COLONY_CLEANING = "ciscenje_zajednice"
     ADDITIONAL_INSPECTION = "dodatna_inspekcija"
 
+def hive_key(hive_id: Optional[str], apiary_id: Optional[str]) -> Optional[str]:
+    """Identitet košnice "pčelinjak/košnica" (ključ sharda reda i rolling prozora)"""
+    if not hive_id:
+        return None
+    return f"{apiary_id or ''}/{hive_id}"
+
 class ObservationStatus(str, Enum):
     """Statusi opservacije za agentički ciklus"""
     QUEUED = "queued"
@@ -29,7 +35,7 @@ class ObservationStatus(str, Enum):
     PROCESSED = "processed"
     REVIEW_NEEDED = "review_needed"
 
-@dataclass
+@dataclass(slots=True)
 class Observation:
     """Domenska entitet - Opservacija"""
     id: Optional[int] = None
@@ -42,20 +48,35 @@ class Observation:
     predicted_action: Optional[ActionType] = None
     confidence: Optional[float] = None
     status: ObservationStatus = ObservationStatus.QUEUED
+    hive_id: Optional[str] = None
+    idempotency_key: Optional[str] = None
+    apiary_id: Optional[str] = None
     
     @classmethod
     def create_new(cls, temperature: float, humidity: float, frames: int, 
-                   strength: int, varoa: bool) -> 'Observation':
-        """Factory metoda za kreiranje nove opservacije"""
+                   strength: int, varoa: bool,
+                   hive_id: Optional[str] = None,
+                   idempotency_key: Optional[str] = None,
+                   apiary_id: Optional[str] = None,
+                   timestamp: Optional[datetime] = None) -> 'Observation':
+        """Factory metoda za kreiranje nove opservacije (timestamp: vrijeme mjerenja, ako je poznato)"""
         return cls(
-            timestamp=datetime.now(),
+            timestamp=timestamp or datetime.now(),
             temperature=temperature,
             humidity=humidity,
             frames=frames,
             strength=strength,
-            varoa=bool(varoa)
+            varoa=bool(varoa),
+            hive_id=hive_id,
+            idempotency_key=idempotency_key,
+            apiary_id=apiary_id
         )
     
+    @property
+    def shard_key(self) -> Optional[str]:
+        """Ključ particije reda: sve opservacije jedne košnice idu u isti shard"""
+        return hive_key(self.hive_id, self.apiary_id)
+    
     def extract_features(self) -> list:
         """Ekstraktuj features za ML model"""
         return [
@@ -66,7 +87,7 @@ class Observation:
             int(self.varoa)
         ]
 
-@dataclass
+@dataclass(slots=True)
 class Prediction:
     """Domenski entitet - Predikcija agenta"""
     observation_id: int
@@ -74,6 +95,9 @@ class Prediction:
     confidence: float
     requires_review: bool = False
     is_exploring: bool = False
+    review_severity: float = 0.0
+    # Rolling feature-i košnice (None bez košnice ili kad je prozor isključen)
+    hive_window: Optional[Any] = None
 
 @dataclass
 class SystemSettings:
@@ -82,4 +106,6 @@ class SystemSettings:
     gold_threshold: int = 10
     enable_retraining: bool = True
     new_gold_since_last_train: int = 0
-    exploration_rate: float = 0.05
\ No newline at end of file
+    exploration_rate: float = 0.05
+    # JSON lista pravila za ljudski pregled (None -> podrazumijevana pravila)
+    review_rules: Optional[str] = None
\ No newline at end of file
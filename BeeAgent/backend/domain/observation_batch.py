@@ -0,0 +1,91 @@
+# backend/domain/observation_batch.py
+import numpy as np
+from typing import List, Optional, Sequence
+from domain.entities import hive_key
+
+# Redoslijed feature-a isti kao Observation.extract_features
+FEATURE_NAMES = ("temperature", "humidity", "frames", "strength", "varoa")
+
+OBSERVATION_DTYPE = np.dtype([
+    ("id", "i8"),
+    ("timestamp", "M8[ms]"),
+    ("features", "f8", (len(FEATURE_NAMES),)),
+    # EnqueuedAt -> ClaimedAt u ms (NaN ako nije poznato)
+    ("queue_wait_ms", "f8")
+])
+
+class ObservationBatch:
+    """
+    Kolonski batch opservacija (NumPy structured array).
+    Puni se direktno iz redova kursora i predaje klasifikatoru bez
+    međukoraka dict -> Observation -> list po opservaciji.
+    """
+
+    __slots__ = ("data", "hive_keys")
+
+    def __init__(self, data: np.ndarray, hive_keys: Optional[List[Optional[str]]] = None):
+        self.data = data
+        # Ključ košnice (Observation.shard_key) je rijedak i promjenljive dužine -
+        # drži se odvojeno od niza
+        self.hive_keys = hive_keys
+
+    @classmethod
+    def from_rows(cls, rows: Sequence) -> "ObservationBatch":
+        """
+        Redovi (Id, Timestamp, Temperature, Humidity, Frames, Strength, Varoa
+        [, HiveId[, QueueWaitMs[, ApiaryId]]]) -> jedan prealociran niz.
+        """
+        if rows and len(rows[0]) > 8:
+            values = ((row[0], row[1], row[2:7], np.nan if row[8] is None else row[8])
+                      for row in rows)
+        else:
+            values = ((row[0], row[1], row[2:7], np.nan) for row in rows)
+        data = np.fromiter(values, dtype=OBSERVATION_DTYPE, count=len(rows))
+        hive_keys = None
+        if rows and len(rows[0]) > 7 and any(row[7] for row in rows):
+            has_apiary = len(rows[0]) > 9
+            hive_keys = [hive_key(row[7], row[9] if has_apiary else None) for row in rows]
+        return cls(data, hive_keys)
+
+    @classmethod
+    def empty(cls) -> "ObservationBatch":
+        return cls(np.empty(0, dtype=OBSERVATION_DTYPE))
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    @property
+    def ids(self) -> np.ndarray:
+        return self.data["id"]
+
+    @property
+    def features(self) -> np.ndarray:
+        """n x 5 pogled na feature-e (bez kopiranja)"""
+        return self.data["features"]
+
+    @property
+    def queue_wait_ms(self) -> np.ndarray:
+        return self.data["queue_wait_ms"]
+
+
+class BatchPrediction:
+    """Rezultat scoringa jednog batch-a (kolone, ne lista Prediction objekata)"""
+
+    __slots__ = ("observation_ids", "actions", "confidences", "requires_review",
+                 "is_exploring", "review_severity", "hive_windows")
+
+    def __init__(self, observation_ids: np.ndarray, actions: np.ndarray,
+                 confidences: np.ndarray, requires_review: np.ndarray,
+                 is_exploring: np.ndarray, review_severity: Optional[np.ndarray] = None,
+                 hive_windows: Optional[List[Optional[np.ndarray]]] = None):
+        self.observation_ids = observation_ids
+        self.actions = actions
+        self.confidences = confidences
+        self.requires_review = requires_review
+        self.is_exploring = is_exploring
+        self.review_severity = review_severity
+        # Rolling feature-i po opservaciji (None bez košnice); None = prozor isključen
+        self.hive_windows = hive_windows
+
+    def __len__(self) -> int:
+        return len(self.observation_ids)
@@ -0,0 +1,307 @@
+# backend/infrastructure/coordination.py
+import json
+import os
+import socket
+import time
+import pyodbc
+from typing import Optional, Tuple
+from infrastructure.database import get_connection, create_database_if_not_exists
+import logging
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+logger = logging.getLogger(__name__)
+
+def worker_identity() -> str:
+    """Jedinstven naziv procesa (host:pid)"""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+def _lock_file(f):
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    else:
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+
+def _unlock_file(f):
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+    else:
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+class FileLease:
+    """
+    Ekskluzivni lock na lokalnom fajlu (flock / msvcrt.locking).
+    OS ga oslobađa čim proces umre, pa ga drugi worker preuzima odmah,
+    bez čekanja na istek. Važi samo za workere na istom hostu.
+    """
+
+    def __init__(self, path: str, owner: Optional[str] = None):
+        self.path = path
+        self.owner = owner or worker_identity()
+        self._file = None
+
+    @property
+    def is_held(self) -> bool:
+        return self._file is not None
+
+    def try_acquire(self) -> bool:
+        """Preuzmi lock ako je slobodan (ne blokira); vlasnik samo potvrđuje"""
+        if self._file is not None:
+            return True
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        f = open(self.path, "a+")
+        try:
+            _lock_file(f)
+        except OSError:
+            f.close()
+            return False
+        # Naziv vlasnika - samo informativno (GET /agent/leader)
+        f.seek(0)
+        f.truncate()
+        f.write(self.owner)
+        f.flush()
+        self._file = f
+        return True
+
+    def release(self):
+        if self._file is None:
+            return
+        try:
+            _unlock_file(self._file)
+        finally:
+            self._file.close()
+            self._file = None
+
+    def get_holder(self) -> Optional[dict]:
+        """Zadnji vlasnik zapisan u fajlu (može biti zastario ako je proces pao)"""
+        try:
+            with open(self.path) as f:
+                owner = f.read().strip()
+        except OSError:
+            return None
+        return {"owner": owner} if owner else None
+
+class DatabaseLease:
+    """
+    Lease red u tabeli AgentLeases - radi i između hostova.
+    Vlasnik ga obnavlja prije isteka (try_acquire); ako proces stane,
+    drugi worker ga preuzima nakon ttl_s. Vrijeme je uvijek vrijeme SQL servera.
+    """
+
+    def __init__(self, name: str = "scoring-agent", owner: Optional[str] = None,
+                 ttl_s: float = 30.0):
+        self.name = name
+        self.owner = owner or worker_identity()
+        self.ttl_s = ttl_s
+        # Lokalni rok važenja: vlasnik odstupa sam ako ne uspije obnoviti lease
+        self._valid_until = 0.0
+        self._table_ready = False
+
+    @property
+    def is_held(self) -> bool:
+        return time.monotonic() < self._valid_until
+
+    def _ensure_table(self, cursor):
+        if self._table_ready:
+            return
+        cursor.execute("""
+            IF OBJECT_ID('AgentLeases', 'U') IS NULL
+            CREATE TABLE AgentLeases (
+                Name NVARCHAR(64) PRIMARY KEY,
+                Owner NVARCHAR(256) NOT NULL,
+                ExpiresAt DATETIME2(3) NOT NULL
+            )
+        """)
+        self._table_ready = True
+
+    def try_acquire(self) -> bool:
+        """
+        Obnovi vlastiti ili preuzmi istekli lease (jedan atomski UPDATE).
+        Greška baze ne oduzima lease odmah - vlasnik ga drži do lokalnog isteka.
+        """
+        started = time.monotonic()
+        ttl_ms = int(self.ttl_s * 1000)
+        if not self._table_ready and not create_database_if_not_exists():
+            return self.is_held
+
+        conn = None
+        try:
+            conn = get_connection()
+            cursor = conn.cursor()
+            self._ensure_table(cursor)
+            cursor.execute("""
+                UPDATE AgentLeases
+                SET Owner = ?, ExpiresAt = DATEADD(MILLISECOND, ?, SYSUTCDATETIME())
+                WHERE Name = ? AND (Owner = ? OR ExpiresAt < SYSUTCDATETIME())
+            """, (self.owner, ttl_ms, self.name, self.owner))
+            acquired = cursor.rowcount == 1
+            if not acquired:
+                cursor.execute("""
+                    INSERT INTO AgentLeases (Name, Owner, ExpiresAt)
+                    SELECT ?, ?, DATEADD(MILLISECOND, ?, SYSUTCDATETIME())
+                    WHERE NOT EXISTS (SELECT 1 FROM AgentLeases WHERE Name = ?)
+                """, (self.name, self.owner, ttl_ms, self.name))
+                acquired = cursor.rowcount == 1
+            conn.commit()
+
+        except pyodbc.IntegrityError:
+            # Drugi worker je istovremeno ubacio red
+            conn.rollback()
+            acquired = False
+        except Exception as e:
+            logger.warning(f"Lease '{self.name}' nije obnovljen: {e}")
+            return self.is_held
+        finally:
+            if conn:
+                conn.close()
+
+        # Rok se računa od početka upita - nikad ne prelazi rok u bazi
+        self._valid_until = started + self.ttl_s if acquired else 0.0
+        return acquired
+
+    def release(self):
+        """Oslobodi lease (graceful shutdown) - sljedeći worker ne čeka ttl_s"""
+        if not self.is_held:
+            return
+        self._valid_until = 0.0
+        conn = None
+        try:
+            conn = get_connection()
+            cursor = conn.cursor()
+            cursor.execute("DELETE FROM AgentLeases WHERE Name = ? AND Owner = ?",
+                           (self.name, self.owner))
+            conn.commit()
+        except Exception as e:
+            logger.warning(f"Lease '{self.name}' nije oslobođen: {e}")
+        finally:
+            if conn:
+                conn.close()
+
+    def get_holder(self) -> Optional[dict]:
+        conn = None
+        try:
+            conn = get_connection()
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT Owner, ExpiresAt, CASE WHEN ExpiresAt > SYSUTCDATETIME() THEN 1 ELSE 0 END
+                FROM AgentLeases WHERE Name = ?
+            """, (self.name,))
+            row = cursor.fetchone()
+        except Exception:
+            return None
+        finally:
+            if conn:
+                conn.close()
+        if not row:
+            return None
+        return {"owner": row[0], "expires_at": row[1].isoformat(), "active": bool(row[2])}
+
+def claim_slot(directory: str, max_slots: int = 64) -> Tuple[str, FileLease]:
+    """
+    Prvi slobodan slot `directory/worker-<i>` (lock fajl po slotu).
+    Nakon restarta workeri ponovo zauzimaju iste slotove, pa ništa ne ostaje napušteno.
+    """
+    for i in range(max_slots):
+        lease = FileLease(os.path.join(directory, f"worker-{i}.lock"))
+        if lease.try_acquire():
+            return os.path.join(directory, f"worker-{i}"), lease
+    raise RuntimeError(f"Nema slobodnog slota u {directory} (max {max_slots})")
+
+class AgentSnapshotStore:
+    """
+    Stanje koje postoji samo u leaderu (metrike, status agenta, info o modelu)
+    objavljeno u tabeli AgentSnapshots kao JSON - API workeri ga čitaju
+    umjesto da vraćaju 503 ili prazne podatke. Isti red služi i za zahtjeve
+    prema leaderu (put/take), npr. selekcija modela pokrenuta na API workeru.
+    """
+
+    def __init__(self, cache_ttl_s: float = 2.0):
+        self.cache_ttl_s = cache_ttl_s
+        self._cache = {}
+        self._table_ready = False
+
+    def _ensure_table(self, cursor):
+        if self._table_ready:
+            return
+        cursor.execute("""
+            IF OBJECT_ID('AgentSnapshots', 'U') IS NULL
+            CREATE TABLE AgentSnapshots (
+                Name NVARCHAR(64) PRIMARY KEY,
+                Payload NVARCHAR(MAX) NOT NULL,
+                UpdatedAt DATETIME2(3) NOT NULL DEFAULT SYSUTCDATETIME()
+            )
+        """)
+        self._table_ready = True
+
+    def put(self, name: str, payload: dict):
+        """Upiši (ili zamijeni) snapshot"""
+        data = json.dumps(payload, default=str)
+        conn = get_connection()
+        try:
+            cursor = conn.cursor()
+            self._ensure_table(cursor)
+            cursor.execute("""
+                UPDATE AgentSnapshots SET Payload = ?, UpdatedAt = SYSUTCDATETIME()
+                WHERE Name = ?
+            """, (data, name))
+            if cursor.rowcount == 0:
+                try:
+                    cursor.execute("INSERT INTO AgentSnapshots (Name, Payload) VALUES (?, ?)",
+                                   (name, data))
+                except pyodbc.IntegrityError:
+                    # Drugi proces je istovremeno ubacio red - zadnji upis pobjeđuje
+                    cursor.execute("""
+                        UPDATE AgentSnapshots SET Payload = ?, UpdatedAt = SYSUTCDATETIME()
+                        WHERE Name = ?
+                    """, (data, name))
+            conn.commit()
+        finally:
+            conn.close()
+
+    def get(self, name: str, max_age_s: Optional[float] = None) -> Optional[dict]:
+        """
+        Snapshot i njegova starost u sekundama (vrijeme SQL servera);
+        None ako ne postoji ili je stariji od max_age_s (leader ne objavljuje).
+        """
+        now = time.monotonic()
+        cached = self._cache.get(name)
+        if cached and now - cached[0] < self.cache_ttl_s:
+            payload, age_s = cached[1], cached[2] + (now - cached[0])
+        else:
+            conn = get_connection()
+            try:
+                cursor = conn.cursor()
+                self._ensure_table(cursor)
+                cursor.execute("""
+                    SELECT Payload, DATEDIFF_BIG(MILLISECOND, UpdatedAt, SYSUTCDATETIME())
+                    FROM AgentSnapshots WHERE Name = ?
+                """, (name,))
+                row = cursor.fetchone()
+            finally:
+                conn.close()
+            payload, age_s = (json.loads(row[0]), row[1] / 1000) if row else (None, 0.0)
+            self._cache[name] = (now, payload, age_s)
+        if payload is None or (max_age_s is not None and age_s > max_age_s):
+            return None
+        return {**payload, "snapshot_age_s": round(age_s, 3)}
+
+    def take(self, name: str) -> Optional[dict]:
+        """Preuzmi i obriši zapis (jedan atomski DELETE - samo jedan čitač ga dobija)"""
+        conn = get_connection()
+        try:
+            cursor = conn.cursor()
+            self._ensure_table(cursor)
+            cursor.execute("DELETE FROM AgentSnapshots OUTPUT DELETED.Payload WHERE Name = ?",
+                           (name,))
+            row = cursor.fetchone()
+            conn.commit()
+        finally:
+            conn.close()
+        self._cache.pop(name, None)
+        return json.loads(row[0]) if row else None
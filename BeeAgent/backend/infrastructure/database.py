@@ -1,17 +1,27 @@
 # backend/infrastructure/database.py
+import asyncio
+import functools
 import pyodbc
-from datetime import datetime
-from typing import Optional, Dict, Any
+import time
+from datetime import datetime, timedelta
+from typing import Optional, Dict, Any, Iterator, List, Tuple
 import logging
 
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
 DB_SERVER = "localhost"
 DB_NAME = "BeeAgent"
 
+# Kolone koje se sele iz Observations u ObservationsArchive (isti redoslijed u obje)
+ARCHIVE_COLUMNS = [
+    "Id", "Timestamp", "Temperature", "Humidity", "Frames", "Strength",
+    "Varoa", "PredictedAction", "Status", "Confidence", "HiveId", "IdempotencyKey",
+    "ReviewSeverity", "ReviewedAt", "EnqueuedAt", "ClaimedAt", "ProcessedAt",
+    "ApiaryId", "Shard", "ModelVersion", "HiveWindow"
+]
+
 def create_database_if_not_exists():
     """
     Kreiraj bazu 'BeeAgent' ako ne postoji.
@@ -53,6 +63,36 @@ def create_database_if_not_exists():
         logger.error(f"Greška pri kreiranju baze: {e}")
         return False
 
+def is_connectivity_error(error: Exception) -> bool:
+    """Baza nedostupna (mreža, login, timeout) - za razliku od grešaka u podacima"""
+    # asyncio.wait_for na Pythonu < 3.11 diže asyncio.TimeoutError (nije builtin TimeoutError)
+    return isinstance(error, (TimeoutError, asyncio.TimeoutError,
+                              pyodbc.OperationalError, pyodbc.InterfaceError))
+
+def is_deadlock(error: Exception) -> bool:
+    """Transakcija je izabrana kao deadlock žrtva (SQLSTATE 40001) - može se ponoviti"""
+    return isinstance(error, pyodbc.Error) and bool(error.args) and error.args[0] == "40001"
+
+# Koliko puta se transakcija ponavlja nakon deadlock-a
+DEADLOCK_RETRIES = 3
+
+def retry_on_deadlock(func):
+    """
+    Ponovi cijelu transakciju ako je SQL Server izabere kao deadlock žrtvu.
+    Funkcija otvara svoju konekciju i mora podići grešku (nakon rollback-a).
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        for attempt in range(1, DEADLOCK_RETRIES + 1):
+            try:
+                return func(*args, **kwargs)
+            except pyodbc.Error as e:
+                if not is_deadlock(e) or attempt == DEADLOCK_RETRIES:
+                    raise
+                logger.warning(f"{func.__name__}: deadlock, pokušaj {attempt + 1}/{DEADLOCK_RETRIES}")
+                time.sleep(0.05 * attempt)
+    return wrapper
+
 def get_connection():
     """Vrati konekciju za BeeAgent bazu"""
     conn_str = (
@@ -147,6 +187,124 @@ def init_database():
         """)
         
  
+        cursor.execute("""
+            IF NOT EXISTS (SELECT * FROM INFORMATION_SCHEMA.TABLES 
+                          WHERE TABLE_NAME = 'ShadowPredictions')
+            BEGIN
+                CREATE TABLE ShadowPredictions (
+                    Id BIGINT IDENTITY(1,1) PRIMARY KEY,
+                    ObservationId INT NOT NULL,
+                    ModelName NVARCHAR(255) NOT NULL,
+                    PredictedAction NVARCHAR(50) NOT NULL,
+                    Confidence FLOAT NULL,
+                    PrimaryAction NVARCHAR(50) NOT NULL,
+                    CreatedAt DATETIME DEFAULT GETDATE()
+                )
+                CREATE INDEX IX_ShadowPredictions_ObservationId
+                    ON ShadowPredictions (ObservationId)
+                PRINT 'Tabela ShadowPredictions kreirana'
+            END
+        """)
+        
+        # Arhiva obrađenih opservacija (hot/cold podjela) - ista šema, bez IDENTITY
+        cursor.execute("""
+            IF NOT EXISTS (SELECT * FROM INFORMATION_SCHEMA.TABLES 
+                          WHERE TABLE_NAME = 'ObservationsArchive')
+            BEGIN
+                CREATE TABLE ObservationsArchive (
+                    Id INT NOT NULL PRIMARY KEY,
+                    Timestamp DATETIME NOT NULL,
+                    Temperature FLOAT NOT NULL,
+                    Humidity FLOAT NOT NULL,
+                    Frames INT NOT NULL,
+                    Strength INT NOT NULL,
+                    Varoa BIT NOT NULL,
+                    PredictedAction NVARCHAR(50) NULL,
+                    Status NVARCHAR(20) NULL,
+                    Confidence FLOAT NULL,
+                    ArchivedAt DATETIME NOT NULL DEFAULT GETDATE()
+                )
+                PRINT 'Tabela ObservationsArchive kreirana'
+            END
+        """)
+        
+        # Identitet košnice: shard reda i rolling prozor po košnici
+        ensure_observation_column(cursor, "HiveId", "NVARCHAR(64) NULL")
+        cursor.execute("""
+            IF NOT EXISTS (SELECT * FROM sys.indexes 
+                          WHERE name = 'IX_Observations_HiveId')
+                CREATE INDEX IX_Observations_HiveId
+                    ON Observations (HiveId, Id) WHERE HiveId IS NOT NULL
+        """)
+        
+        # Idempotentan ingest: isti ključ klijenta -> ista opservacija
+        ensure_observation_column(cursor, "IdempotencyKey", "NVARCHAR(128) NULL")
+        cursor.execute("""
+            IF NOT EXISTS (SELECT * FROM sys.indexes 
+                          WHERE name = 'UX_Observations_IdempotencyKey')
+                CREATE UNIQUE INDEX UX_Observations_IdempotencyKey
+                    ON Observations (IdempotencyKey) WHERE IdempotencyKey IS NOT NULL
+        """)
+        # Ključ arhivirane opservacije i dalje važi (retry nakon arhiviranja)
+        cursor.execute("""
+            IF NOT EXISTS (SELECT * FROM sys.indexes 
+                          WHERE name = 'UX_ObservationsArchive_IdempotencyKey')
+                CREATE UNIQUE INDEX UX_ObservationsArchive_IdempotencyKey
+                    ON ObservationsArchive (IdempotencyKey) WHERE IdempotencyKey IS NOT NULL
+        """)
+        
+        # Ishod pregleda: ReviewSeverity NULL = nije označena, ReviewedAt = riješena
+        ensure_observation_column(cursor, "ReviewSeverity", "FLOAT NULL")
+        ensure_observation_column(cursor, "ReviewedAt", "DATETIME NULL")
+        cursor.execute("""
+            IF NOT EXISTS (SELECT * FROM sys.indexes 
+                          WHERE name = 'IX_Observations_ReviewInbox')
+                CREATE INDEX IX_Observations_ReviewInbox
+                    ON Observations (ReviewSeverity DESC, Id)
+                    INCLUDE (Timestamp, PredictedAction, Confidence, HiveId)
+                    WHERE ReviewSeverity IS NOT NULL AND ReviewedAt IS NULL
+        """)
+        
+        # Životni ciklus opservacije (sat baze): u red -> preuzeta -> obrađena
+        ensure_observation_column(cursor, "EnqueuedAt", "DATETIME2(3) NULL DEFAULT SYSDATETIME()")
+        ensure_observation_column(cursor, "ClaimedAt", "DATETIME2(3) NULL")
+        ensure_observation_column(cursor, "ProcessedAt", "DATETIME2(3) NULL")
+        
+        # Shardovani red: consumer uzima batch iz svog sharda po Id-u
+        ensure_observation_column(cursor, "ApiaryId", "NVARCHAR(64) NULL")
+        ensure_observation_column(cursor, "Shard", "SMALLINT NOT NULL DEFAULT 0")
+        cursor.execute("""
+            IF NOT EXISTS (SELECT * FROM sys.indexes 
+                          WHERE name = 'IX_Observations_ShardQueue')
+                CREATE INDEX IX_Observations_ShardQueue
+                    ON Observations (Shard, Id) WHERE Status = 'queued'
+        """)
+        
+        # Verzija modela koja je dala predikciju - tačnost po verziji iz feedbacka
+        ensure_observation_column(cursor, "ModelVersion", "NVARCHAR(32) NULL")
+        # Rolling feature-i košnice u trenutku scoringa (hive_state.encode_window)
+        ensure_observation_column(cursor, "HiveWindow", "VARBINARY(256) NULL")
+        
+        # Indeks za queue i arhiviranje (Status + starost)
+        cursor.execute("""
+            IF NOT EXISTS (SELECT * FROM sys.indexes 
+                          WHERE name = 'IX_Observations_Status_Timestamp')
+                CREATE INDEX IX_Observations_Status_Timestamp
+                    ON Observations (Status, Timestamp)
+        """)
+        
+        # Pravila za ljudski pregled (JSON) - mijenjaju se bez deploy-a
+        cursor.execute("""
+            IF COL_LENGTH('SystemSettings', 'ReviewRules') IS NULL
+                ALTER TABLE SystemSettings ADD ReviewRules NVARCHAR(MAX) NULL
+        """)
+        
+        # RowVer se mijenja pri svakoj izmjeni reda - jeftina provjera za keš postavki
+        cursor.execute("""
+            IF COL_LENGTH('SystemSettings', 'RowVer') IS NULL
+                ALTER TABLE SystemSettings ADD RowVer ROWVERSION
+        """)
+        
         cursor.execute("""
             IF NOT EXISTS (SELECT * FROM SystemSettings WHERE Id = 1)
             BEGIN
@@ -157,6 +315,9 @@ def init_database():
                 PRINT 'SystemSettings već ima podatke'
         """)
         
+        _create_all_observations_view(cursor)
+        _create_action_rollups(cursor)
+        
         conn.commit()
         logger.info("Baza potpuno inicijalizirana!")
         return True
@@ -175,6 +336,75 @@ def init_database():
         if conn:
             conn.close()
 
+def ensure_observation_column(cursor, column: str, definition: str):
+    """Dodaj kolonu u Observations i ObservationsArchive (ako ne postoji)"""
+    for table in ("Observations", "ObservationsArchive"):
+        cursor.execute(f"""
+            IF COL_LENGTH('{table}', '{column}') IS NULL
+                ALTER TABLE {table} ADD {column} {definition}
+        """)
+
+def _create_action_rollups(cursor):
+    """
+    Rollup po satu/danu x akciji x ishodu (processed / review / correct / incorrect).
+    Pri kreiranju se jednom popuni iz historije; dalje ga održavaju
+    mark_*_processed i save_feedback u istoj transakciji kao izvorni upis.
+    """
+    cursor.execute("SELECT OBJECT_ID('ActionRollups', 'U')")
+    if cursor.fetchone()[0] is not None:
+        return
+    
+    cursor.execute("""
+        CREATE TABLE ActionRollups (
+            Granularity CHAR(1) NOT NULL,
+            BucketStart DATETIME2(0) NOT NULL,
+            Action NVARCHAR(50) NOT NULL,
+            Outcome VARCHAR(16) NOT NULL,
+            EventCount INT NOT NULL,
+            ConfidenceSum FLOAT NOT NULL,
+            CONSTRAINT PK_ActionRollups PRIMARY KEY (Granularity, BucketStart, Action, Outcome)
+        )
+    """)
+    cursor.execute("""
+        WITH Events AS (
+            SELECT ISNULL(ProcessedAt, Timestamp) AS At, PredictedAction AS Action,
+                   'processed' AS Outcome, ISNULL(Confidence, 0) AS Confidence
+            FROM AllObservations
+            WHERE Status = 'processed' AND PredictedAction IS NOT NULL
+            UNION ALL
+            SELECT ISNULL(ProcessedAt, Timestamp), PredictedAction, 'review', ISNULL(Confidence, 0)
+            FROM AllObservations
+            WHERE Status = 'processed' AND PredictedAction IS NOT NULL
+                  AND ReviewSeverity IS NOT NULL
+            UNION ALL
+            SELECT f.CreatedAt, ISNULL(o.PredictedAction, 'unknown'),
+                   CASE WHEN f.Correct = 1 THEN 'correct' ELSE 'incorrect' END,
+                   ISNULL(o.Confidence, 0)
+            FROM Feedback f
+            JOIN AllObservations o ON o.Id = f.ObservationId
+        )
+        INSERT INTO ActionRollups
+            (Granularity, BucketStart, Action, Outcome, EventCount, ConfidenceSum)
+        SELECT b.Granularity, b.BucketStart, e.Action, e.Outcome, COUNT(*), SUM(e.Confidence)
+        FROM Events e
+        CROSS APPLY (VALUES
+            ('H', DATEADD(HOUR, DATEDIFF(HOUR, 0, e.At), 0)),
+            ('D', DATEADD(DAY, DATEDIFF(DAY, 0, e.At), 0))
+        ) AS b(Granularity, BucketStart)
+        GROUP BY b.Granularity, b.BucketStart, e.Action, e.Outcome
+    """)
+    logger.info(f"ActionRollups kreiran i popunjen iz historije ({cursor.rowcount} redova)")
+
+def _create_all_observations_view(cursor):
+    """View preko hot i cold tabele - za analitiku i export"""
+    columns = ", ".join(ARCHIVE_COLUMNS)
+    cursor.execute(f"""
+        CREATE OR ALTER VIEW AllObservations AS
+            SELECT {columns} FROM Observations
+            UNION ALL
+            SELECT {columns} FROM ObservationsArchive
+    """)
+
 def save_observation(temperature: float, humidity: float, frames: int, 
                      strength: int, varoa: bool, predicted_action: str, 
                      confidence: float = None) -> Optional[int]:
@@ -212,30 +442,162 @@ def save_observation(temperature: float, humidity: float, frames: int,
             conn.close()
 
 def save_feedback(observation_id: int, user_label: str, 
-                  correct: bool, comment: str = None) -> bool:
-    """Sačuvaj feedback u bazu"""
-    conn = None
+                  correct: bool, comment: str = None) -> Optional[int]:
+    """Sačuvaj feedback u bazu; vraća Feedback.Id (None ako nije uspjelo)"""
+    try:
+        feedback_id = _insert_feedback(observation_id, user_label, correct, comment)
+        logger.debug(f"Feedback sačuvan za opservaciju #{observation_id}")
+        return feedback_id
+    except Exception as e:
+        logger.error(f"Greška pri čuvanju feedbacka: {e}")
+        return None
+
+@retry_on_deadlock
+def _insert_feedback(observation_id: int, user_label: str, correct: bool,
+                     comment: Optional[str]) -> int:
+    conn = get_connection()
     try:
-        conn = get_connection()
         cursor = conn.cursor()
         
+        # Feedback za arhiviranu opservaciju - vrati je u hot tabelu (FK)
+        restore_from_archive(cursor, observation_id)
+        
         cursor.execute("""
             INSERT INTO Feedback (ObservationId, UserLabel, Correct, Comment)
+            OUTPUT INSERTED.Id
             VALUES (?, ?, ?, ?)
         """, (observation_id, user_label, int(correct), comment))
+        feedback_id = cursor.fetchone()[0]
         
-        conn.commit()
-        logger.debug(f"Feedback sačuvan za opservaciju #{observation_id}")
-        return True
+        # Tačnost po predviđenoj akciji (rollup)
+        cursor.execute("SELECT PredictedAction, Confidence FROM Observations WHERE Id = ?",
+                       observation_id)
+        row = cursor.fetchone()
+        action, confidence = (row[0], row[1]) if row else (None, None)
         
-    except Exception as e:
-        logger.error(f"Greška pri čuvanju feedbacka: {e}")
-        if conn:
-            conn.rollback()
-        return False
+        # Feedback rješava pregled - opservacija izlazi iz inbox-a
+        cursor.execute("""
+            UPDATE Observations SET ReviewedAt = GETDATE()
+            WHERE Id = ? AND ReviewSeverity IS NOT NULL AND ReviewedAt IS NULL
+        """, observation_id)
+        
+        commit_with_rollups(conn, cursor, [(action or "unknown",
+                                            "correct" if correct else "incorrect",
+                                            1, float(confidence or 0.0))])
+        return feedback_id
+    except Exception:
+        conn.rollback()
+        raise
     finally:
-        if conn:
-            conn.close()
+        conn.close()
+
+# Rollup: naziv granularnosti u API-ju -> oznaka u tabeli
+ROLLUP_GRANULARITIES = {"hour": "H", "day": "D"}
+# Consumeri leadera i /feedback na svim workerima mijenjaju iste redove rollup-a.
+# Transakcijski app lock u bazi (ne lock procesa) ih redom pušta do MERGE-a;
+# drži se samo od MERGE-a do commit-a
+ROLLUP_APPLOCK = "ActionRollups"
+ROLLUP_APPLOCK_TIMEOUT_MS = 10000
+
+def apply_rollup_deltas(cursor, deltas: List[tuple]):
+    """
+    Delte (Action, Outcome, broj, zbir confidence-a) u bucket trenutnog sata
+    i dana (vrijeme baze) - jedan MERGE za cijeli batch.
+    """
+    if not deltas:
+        return
+    values = ", ".join("(?, ?, ?, ?)" for _ in deltas)
+    cursor.execute(f"""
+        MERGE ActionRollups WITH (HOLDLOCK) AS t
+        USING (
+            SELECT b.Granularity, b.BucketStart, v.Action, v.Outcome,
+                   v.EventCount, v.ConfidenceSum
+            FROM (VALUES {values}) AS v(Action, Outcome, EventCount, ConfidenceSum)
+            CROSS APPLY (VALUES
+                ('H', DATEADD(HOUR, DATEDIFF(HOUR, 0, SYSDATETIME()), 0)),
+                ('D', DATEADD(DAY, DATEDIFF(DAY, 0, SYSDATETIME()), 0))
+            ) AS b(Granularity, BucketStart)
+        ) AS s
+        ON t.Granularity = s.Granularity AND t.BucketStart = s.BucketStart
+           AND t.Action = s.Action AND t.Outcome = s.Outcome
+        WHEN MATCHED THEN
+            UPDATE SET EventCount = t.EventCount + s.EventCount,
+                       ConfidenceSum = t.ConfidenceSum + s.ConfidenceSum
+        WHEN NOT MATCHED THEN
+            INSERT (Granularity, BucketStart, Action, Outcome, EventCount, ConfidenceSum)
+            VALUES (s.Granularity, s.BucketStart, s.Action, s.Outcome,
+                    s.EventCount, s.ConfidenceSum);
+    """, [value for delta in deltas for value in delta])
+
+def commit_with_rollups(conn, cursor, deltas: List[tuple]):
+    """
+    Rollup delte u istoj transakciji kao izvorni upis, pa commit.
+    sp_getapplock serijalizuje MERGE-ove svih procesa, pa se dvije transakcije
+    ne mogu zaključati na redovima rollup-a; commit oslobađa lock.
+    """
+    if deltas:
+        cursor.execute("""
+            DECLARE @result INT;
+            EXEC @result = sp_getapplock @Resource = ?, @LockMode = 'Exclusive',
+                                         @LockOwner = 'Transaction', @LockTimeout = ?;
+            IF @result < 0 THROW 50001, 'ActionRollups app lock nije dobijen', 1;
+        """, (ROLLUP_APPLOCK, ROLLUP_APPLOCK_TIMEOUT_MS))
+        apply_rollup_deltas(cursor, deltas)
+    conn.commit()
+
+def get_action_rollups(granularity: str = "hour", since: Optional[datetime] = None,
+                       until: Optional[datetime] = None, action: Optional[str] = None,
+                       by_action: bool = True) -> List[Dict[str, Any]]:
+    """
+    Serije za dashboard iz ActionRollups - cijena zavisi od broja bucket-a
+    u opsegu, ne od veličine Observations/Feedback.
+    Podrazumijevano: zadnjih 48 h (hour) ili 30 dana (day).
+    """
+    code = ROLLUP_GRANULARITIES[granularity]
+    until = until or datetime.now()
+    since = since or until - (timedelta(hours=48) if code == "H" else timedelta(days=30))
+    
+    group = "BucketStart, Action" if by_action else "BucketStart"
+    query = f"""
+        SELECT {group},
+               SUM(CASE WHEN Outcome = 'processed' THEN EventCount ELSE 0 END),
+               SUM(CASE WHEN Outcome = 'processed' THEN ConfidenceSum ELSE 0 END),
+               SUM(CASE WHEN Outcome = 'review' THEN EventCount ELSE 0 END),
+               SUM(CASE WHEN Outcome = 'correct' THEN EventCount ELSE 0 END),
+               SUM(CASE WHEN Outcome = 'incorrect' THEN EventCount ELSE 0 END)
+        FROM ActionRollups
+        WHERE Granularity = ? AND BucketStart >= ? AND BucketStart < ?
+    """
+    params = [code, since, until]
+    if action:
+        query += " AND Action = ?"
+        params.append(action)
+    query += f" GROUP BY {group} ORDER BY {group}"
+    
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute(query, params)
+        rows = cursor.fetchall()
+    finally:
+        conn.close()
+    
+    results = []
+    for row in rows:
+        processed, confidence_sum, review, correct, incorrect = row[-5:]
+        item = {"bucket": row[0].isoformat()}
+        if by_action:
+            item["action"] = row[1]
+        item.update({
+            "processed": processed,
+            "review_flagged": review,
+            "avg_confidence": confidence_sum / processed if processed else None,
+            "correct": correct,
+            "incorrect": incorrect,
+            "accuracy": correct / (correct + incorrect) if correct + incorrect else None
+        })
+        results.append(item)
+    return results
 
 def get_next_queued_observation() -> Optional[Dict[str, Any]]:
     """Dohvati sljedeću opservaciju za obradu (QUEUE)"""
@@ -320,12 +682,16 @@ def get_database_info() -> Dict[str, Any]:
         cursor.execute("SELECT COUNT(*) FROM Feedback")
         feedback_count = cursor.fetchone()[0]
         
+        cursor.execute("SELECT COUNT(*) FROM ObservationsArchive")
+        archived_count = cursor.fetchone()[0]
+        
         return {
             "database": DB_NAME,
             "server": DB_SERVER,
             "observations": obs_count,
             "queued": queued_count,
-            "feedback": feedback_count
+            "feedback": feedback_count,
+            "archived": archived_count
         }
         
     except Exception as e:
@@ -337,6 +703,8 @@ def get_database_info() -> Dict[str, Any]:
 
 # Auto-inicijalizacija kada se modul učitava
 if __name__ == "__main__":
+    from core.logging_config import setup_logging
+    setup_logging()
     print("Pokrećem inicijalizaciju baze...")
     success = init_database()
     if success:
@@ -345,6 +713,21 @@ if __name__ == "__main__":
         print("Inicijalizacija nije uspjela")
 
 
+# SQL Server dozvoljava najviše 2100 parametara po upitu
+STATUS_LOOKUP_CHUNK = 1000
+
+def _status_row_to_dict(row) -> Dict[str, Any]:
+    return {
+        'id': row[0],
+        'timestamp': row[1],
+        'predicted_action': row[2],
+        'confidence': row[3],
+        'status': row[4],
+        'review_severity': row[5],
+        'processed_at': row[6],
+        'time_to_result_ms': row[7]
+    }
+
 def get_observation_status(observation_id: int) -> Optional[Dict[str, Any]]:
     """Dohvati status i rezultat opservacije"""
     conn = None
@@ -352,22 +735,15 @@ def get_observation_status(observation_id: int) -> Optional[Dict[str, Any]]:
         conn = get_connection()
         cursor = conn.cursor()
         
-        cursor.execute("""
-            SELECT Id, Timestamp, PredictedAction, Confidence, Status
-            FROM Observations 
+        row = _fetch_with_archive_fallback(cursor, """
+            SELECT Id, Timestamp, PredictedAction, Confidence, Status, ReviewSeverity,
+                   ProcessedAt, DATEDIFF(MILLISECOND, EnqueuedAt, ProcessedAt)
+            FROM {table}
             WHERE Id = ?
         """, observation_id)
         
-        row = cursor.fetchone()
-        
         if row:
-            return {
-                'id': row[0],
-                'timestamp': row[1],
-                'predicted_action': row[2],
-                'confidence': row[3],
-                'status': row[4]
-            }
+            return _status_row_to_dict(row)
         return None
         
     except Exception as e:
@@ -384,15 +760,14 @@ def get_observation_details(observation_id: int) -> Optional[Dict[str, Any]]:
         conn = get_connection()
         cursor = conn.cursor()
         
-        cursor.execute("""
+        row = _fetch_with_archive_fallback(cursor, """
             SELECT Id, Timestamp, Temperature, Humidity, Frames, 
-                   Strength, Varoa, PredictedAction, Confidence, Status
-            FROM Observations 
+                   Strength, Varoa, PredictedAction, Confidence, Status, ModelVersion,
+                   HiveWindow
+            FROM {table}
             WHERE Id = ?
         """, observation_id)
         
-        row = cursor.fetchone()
-        
         if row:
             return {
                 'id': row[0],
@@ -404,7 +779,9 @@ def get_observation_details(observation_id: int) -> Optional[Dict[str, Any]]:
                 'varoa': bool(row[6]),
                 'predicted_action': row[7],
                 'confidence': row[8],
-                'status': row[9]
+                'status': row[9],
+                'model_version': row[10],
+                'hive_window': row[11]
             }
         return None
         
@@ -413,4 +790,341 @@ def get_observation_details(observation_id: int) -> Optional[Dict[str, Any]]:
         return None
     finally:
         if conn:
-            conn.close()
\ No newline at end of file
+            conn.close()
+
+def get_observation_statuses(observation_ids: List[int]) -> Dict[int, Dict[str, Any]]:
+    """
+    Status i rezultat za više opservacija odjednom (WHERE Id IN, po chunk-ovima).
+    Id-evi kojih nema u hot tabeli traže se u arhivi. Nepostojeći se izostavljaju.
+    """
+    results: Dict[int, Dict[str, Any]] = {}
+    pending = list(dict.fromkeys(observation_ids))
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        for table in ("Observations", "ObservationsArchive"):
+            for start in range(0, len(pending), STATUS_LOOKUP_CHUNK):
+                chunk = pending[start:start + STATUS_LOOKUP_CHUNK]
+                placeholders = ", ".join("?" * len(chunk))
+                cursor.execute(f"""
+                    SELECT Id, Timestamp, PredictedAction, Confidence, Status, ReviewSeverity,
+                           ProcessedAt, DATEDIFF(MILLISECOND, EnqueuedAt, ProcessedAt)
+                    FROM {table}
+                    WHERE Id IN ({placeholders})
+                """, chunk)
+                for row in cursor.fetchall():
+                    results[row[0]] = _status_row_to_dict(row)
+            pending = [i for i in pending if i not in results]
+            if not pending:
+                break
+        return results
+    finally:
+        conn.close()
+
+def pending_barrier(cursor) -> Optional[int]:
+    """
+    Najmanji Id koji je još u redu (queued/processing) ili None.
+    Opservacije se ne obrađuju redom po Id-u, pa keyset po Id-u nad obrađenim
+    redovima smije ići samo do ove granice - inače bi kasnije obrađen red
+    s manjim Id-om ostao iza watermark-a klijenta.
+    """
+    cursor.execute("""
+        SELECT MIN(Id) FROM Observations WHERE Status IN ('queued', 'processing')
+    """)
+    row = cursor.fetchone()
+    return row[0] if row and row[0] is not None else None
+
+def iter_processed_results(after_id: int = 0, limit: Optional[int] = None,
+                           chunk_size: int = 1000) -> Iterator[Dict[str, Any]]:
+    """
+    Obrađene opservacije (hot + arhiva) sa Id > after_id, keyset paginacija po Id.
+    Stream staje ispred najstarije neobrađene opservacije (pending_barrier), pa je
+    zadnji primljeni Id siguran after_id za sljedeći poziv.
+    """
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        barrier = pending_barrier(cursor)
+        barrier_sql = "AND Id < ?" if barrier is not None else ""
+        last_id = after_id
+        remaining = limit
+        while remaining is None or remaining > 0:
+            size = chunk_size if remaining is None else min(chunk_size, remaining)
+            params = [size, last_id] + ([barrier] if barrier is not None else [])
+            cursor.execute(f"""
+                SELECT TOP (?) Id, Timestamp, PredictedAction, Confidence, Status, ReviewSeverity,
+                       ProcessedAt, DATEDIFF(MILLISECOND, EnqueuedAt, ProcessedAt)
+                FROM AllObservations
+                WHERE Id > ? {barrier_sql} AND Status = 'processed'
+                ORDER BY Id
+            """, params)
+
+            rows = cursor.fetchall()
+            if not rows:
+                break
+            last_id = rows[-1][0]
+            if remaining is not None:
+                remaining -= len(rows)
+            for row in rows:
+                yield _status_row_to_dict(row)
+
+            if len(rows) < size:
+                break
+    finally:
+        conn.close()
+
+def _fetch_with_archive_fallback(cursor, query: str, observation_id: int):
+    """Traži red u hot tabeli, pa u arhivi (query sadrži {table})"""
+    for table in ("Observations", "ObservationsArchive"):
+        cursor.execute(query.format(table=table), observation_id)
+        row = cursor.fetchone()
+        if row:
+            return row
+    return None
+
+def restore_from_archive(cursor, observation_id: int):
+    """Vrati opservaciju iz arhive u Observations (u tekućoj transakciji)"""
+    columns = ", ".join(ARCHIVE_COLUMNS)
+    cursor.execute(f"""
+        IF NOT EXISTS (SELECT 1 FROM Observations WHERE Id = ?)
+           AND EXISTS (SELECT 1 FROM ObservationsArchive WHERE Id = ?)
+        BEGIN
+            SET IDENTITY_INSERT Observations ON;
+            INSERT INTO Observations ({columns})
+                SELECT {columns} FROM ObservationsArchive WHERE Id = ?;
+            SET IDENTITY_INSERT Observations OFF;
+            DELETE FROM ObservationsArchive WHERE Id = ?;
+        END
+    """, (observation_id, observation_id, observation_id, observation_id))
+
+def archive_processed_observations(older_than: datetime, batch_size: int = 500) -> int:
+    """
+    Premjesti JEDAN batch obrađenih opservacija starijih od older_than u arhivu.
+    DELETE ... OUTPUT INTO je jedna kratka atomska transakcija - scorer se
+    ne blokira. Opservacije s feedbackom ostaju u hot tabeli (FK).
+    Vraća broj premještenih redova.
+    """
+    conn = None
+    try:
+        conn = get_connection()
+        cursor = conn.cursor()
+        
+        columns = ", ".join(ARCHIVE_COLUMNS)
+        deleted = ", ".join(f"DELETED.{c}" for c in ARCHIVE_COLUMNS)
+        cursor.execute(f"""
+            DELETE TOP (?) FROM Observations
+            OUTPUT {deleted} INTO ObservationsArchive ({columns})
+            WHERE Status = 'processed'
+              AND Timestamp < ?
+              AND (ReviewSeverity IS NULL OR ReviewedAt IS NOT NULL)
+              AND NOT EXISTS (SELECT 1 FROM Feedback f
+                              WHERE f.ObservationId = Observations.Id)
+        """, (batch_size, older_than))
+        
+        moved = cursor.rowcount
+        conn.commit()
+        return max(moved, 0)
+        
+    except Exception as e:
+        logger.error(f"Greška pri arhiviranju: {e}")
+        if conn:
+            conn.rollback()
+        return 0
+    finally:
+        if conn:
+            conn.close()
+
+def get_review_inbox(limit: int = 50, after_severity: Optional[float] = None,
+                     after_id: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Neriješene opservacije za pregled, najteže prvo (ReviewSeverity DESC, Id).
+    Keyset po (severity, id) - svaka stranica je seek u filtriranom indeksu.
+    """
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        keyset = ""
+        params: list = [limit]
+        if after_severity is not None and after_id is not None:
+            keyset = "AND (ReviewSeverity < ? OR (ReviewSeverity = ? AND Id > ?))"
+            params += [after_severity, after_severity, after_id]
+        
+        cursor.execute(f"""
+            SELECT TOP (?) Id, Timestamp, Temperature, Humidity, Frames, Strength, Varoa,
+                   PredictedAction, Confidence, HiveId, ReviewSeverity
+            FROM Observations
+            WHERE ReviewSeverity IS NOT NULL AND ReviewedAt IS NULL {keyset}
+            ORDER BY ReviewSeverity DESC, Id
+        """, params)
+        
+        return [{
+            'id': row[0],
+            'timestamp': row[1],
+            'temperature': row[2],
+            'humidity': row[3],
+            'frames': row[4],
+            'strength': row[5],
+            'varoa': bool(row[6]),
+            'predicted_action': row[7],
+            'confidence': row[8],
+            'hive_id': row[9],
+            'review_severity': row[10]
+        } for row in cursor.fetchall()]
+    finally:
+        conn.close()
+
+def iter_labelled_examples(chunk_size: int = 1000,
+                           after_id: int = 0) -> Iterator[Tuple[int, list, list]]:
+    """
+    Streamuj označene primjere (Feedback JOIN Observations) u chunk-ovima.
+    Keyset paginacija po Feedback.Id - u memoriji je uvijek samo jedan chunk.
+    Vraća: (zadnji Feedback.Id, lista feature vektora, lista labela)
+    """
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        last_id = after_id
+        
+        while True:
+            cursor.execute("""
+                SELECT TOP (?) f.Id, o.Temperature, o.Humidity, o.Frames,
+                       o.Strength, o.Varoa, f.UserLabel
+                FROM Feedback f
+                JOIN Observations o ON o.Id = f.ObservationId
+                WHERE f.Id > ?
+                ORDER BY f.Id
+            """, (chunk_size, last_id))
+            
+            rows = cursor.fetchall()
+            if not rows:
+                break
+            
+            last_id = rows[-1][0]
+            features = [[row[1], row[2], row[3], row[4], int(row[5])] for row in rows]
+            labels = [row[6] for row in rows]
+            yield last_id, features, labels
+            
+            if len(rows) < chunk_size:
+                break
+    finally:
+        conn.close()
+
+# Feedback.Id se dodjeljuje pri INSERT-u, a commit može stići kasnije - red s
+# manjim Id-om postaje vidljiv poslije reda s većim. Watermark sinhronizacije
+# zato ide samo do redova starijih od ovoga (duže transakcije na Feedback nema)
+FEEDBACK_SETTLE_S = 60
+
+def settled_feedback_id(settle_s: float = FEEDBACK_SETTLE_S) -> int:
+    """
+    Najveći Feedback.Id upisan prije više od settle_s sekundi (0 ako ga nema).
+    Do njega su sve transakcije završene, pa keyset watermark smije preći samo njega.
+    """
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        # Skenira se samo rep tabele (redovi unutar settle_s) unazad po PK-u
+        cursor.execute("""
+            SELECT TOP 1 Id FROM Feedback
+            WHERE CreatedAt < DATEADD(MILLISECOND, ?, GETDATE())
+            ORDER BY Id DESC
+        """, (-int(settle_s * 1000),))
+        row = cursor.fetchone()
+        return row[0] if row else 0
+    finally:
+        conn.close()
+
+def iter_feedback_rows(after_id: int = 0, chunk_size: int = 1000) -> Iterator[list]:
+    """
+    Feedback redovi noviji od after_id, za inkrementalni training set.
+    Uključuje i arhivirane opservacije (AllObservations).
+    Vraća chunk-ove redova (FeedbackId, ObservationId, Temperature, Humidity,
+    Frames, Strength, Varoa, UserLabel, HiveWindow).
+    """
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        last_id = after_id
+        
+        while True:
+            cursor.execute("""
+                SELECT TOP (?) f.Id, f.ObservationId, o.Temperature, o.Humidity,
+                       o.Frames, o.Strength, o.Varoa, f.UserLabel, o.HiveWindow
+                FROM Feedback f
+                JOIN AllObservations o ON o.Id = f.ObservationId
+                WHERE f.Id > ?
+                ORDER BY f.Id
+            """, (chunk_size, last_id))
+            
+            rows = cursor.fetchall()
+            if not rows:
+                break
+            
+            last_id = rows[-1][0]
+            yield rows
+            
+            if len(rows) < chunk_size:
+                break
+    finally:
+        conn.close()
+
+def iter_feedback_outcomes(after_id: int = 0, chunk_size: int = 1000) -> Iterator[list]:
+    """
+    Ishodi predikcija noviji od after_id (keyset po Feedback.Id), za praćenje
+    tačnosti po verziji modela. Chunk-ovi redova (FeedbackId, Correct, ModelVersion).
+    """
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        last_id = after_id
+        
+        while True:
+            cursor.execute("""
+                SELECT TOP (?) f.Id, f.Correct, o.ModelVersion
+                FROM Feedback f
+                JOIN AllObservations o ON o.Id = f.ObservationId
+                WHERE f.Id > ?
+                ORDER BY f.Id
+            """, (chunk_size, last_id))
+            
+            rows = cursor.fetchall()
+            if not rows:
+                break
+            
+            last_id = rows[-1][0]
+            yield [(row[0], bool(row[1]), row[2]) for row in rows]
+            
+            if len(rows) < chunk_size:
+                break
+    finally:
+        conn.close()
+
+def iter_recent_hive_history(per_hive: int, chunk_size: int = 10000) -> Iterator[list]:
+    """
+    Zadnjih per_hive obrađenih opservacija svake košnice (pčelinjak + košnica),
+    po košnici i Id-u. Koristi se samo pri startu za rebuild rolling stanja.
+    Vraća chunk-ove redova (ApiaryId, HiveId, Temperature, Humidity, Frames,
+    Strength, Varoa).
+    """
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT ApiaryId, HiveId, Temperature, Humidity, Frames, Strength, Varoa
+            FROM (
+                SELECT ApiaryId, HiveId, Id, Temperature, Humidity, Frames, Strength, Varoa,
+                       ROW_NUMBER() OVER (PARTITION BY ApiaryId, HiveId
+                                          ORDER BY Id DESC) AS Rn
+                FROM Observations
+                WHERE HiveId IS NOT NULL AND Status NOT IN ('queued', 'processing')
+            ) recent
+            WHERE Rn <= ?
+            ORDER BY ApiaryId, HiveId, Id
+        """, per_hive)
+        
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            yield rows
+    finally:
+        conn.close()
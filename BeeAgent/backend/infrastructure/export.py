@@ -0,0 +1,278 @@
+# backend/infrastructure/export.py
+import json
+import os
+from collections import OrderedDict
+from typing import Dict, Iterator, List, Optional
+from infrastructure.database import get_connection, pending_barrier
+import logging
+
+# pyarrow je opcionalan - potreban samo za export
+try:
+    import pyarrow as pa
+    import pyarrow.ipc as pa_ipc
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+logger = logging.getLogger(__name__)
+
+WATERMARK_FILE = "_watermark.json"
+FORMATS = ("parquet", "arrow")
+
+# Kolone po tabeli: (naziv, arrow tip kao string)
+EXPORT_TABLES = {
+    "observations": {
+        "source": "AllObservations",
+        "columns": [
+            ("Id", "int64"), ("Timestamp", "timestamp[ms]"), ("Temperature", "float64"),
+            ("Humidity", "float64"), ("Frames", "int32"), ("Strength", "int32"),
+            ("Varoa", "bool"), ("PredictedAction", "string"), ("Status", "string"),
+            ("Confidence", "float64"), ("HiveId", "string")
+        ],
+        "day_column": "Timestamp"
+    },
+    "feedback": {
+        "source": "Feedback",
+        "columns": [
+            ("Id", "int64"), ("ObservationId", "int64"), ("UserLabel", "string"),
+            ("Correct", "bool"), ("Comment", "string"), ("CreatedAt", "timestamp[ms]")
+        ],
+        "day_column": "CreatedAt"
+    }
+}
+
+def _require_pyarrow():
+    if pa is None:
+        raise RuntimeError("Export zahtijeva pyarrow (pip install pyarrow)")
+
+def arrow_schema(table: str) -> "pa.Schema":
+    _require_pyarrow()
+    return pa.schema([(name, pa.type_for_alias(type_name))
+                      for name, type_name in EXPORT_TABLES[table]["columns"]])
+
+def _export_barrier(cursor, table: str) -> Optional[int]:
+    """
+    Opservacije se exportuju tek kad su obrađene. Watermark ne smije preći
+    najstariju opservaciju koja je još u redu, inače bi je nightly job preskočio.
+    """
+    if table != "observations":
+        return None
+    return pending_barrier(cursor)
+
+def iter_export_chunks(table: str, after_id: int = 0, chunk_size: int = 50000,
+                       limit: Optional[int] = None) -> Iterator[List[tuple]]:
+    """Keyset paginacija po Id - u memoriji je uvijek samo jedan chunk redova"""
+    spec = EXPORT_TABLES[table]
+    columns = ", ".join(name for name, _ in spec["columns"])
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        barrier = _export_barrier(cursor, table)
+        barrier_sql = "AND Id < ?" if barrier is not None else ""
+        last_id = after_id
+        remaining = limit
+
+        while remaining is None or remaining > 0:
+            size = chunk_size if remaining is None else min(chunk_size, remaining)
+            params = [size, last_id] + ([barrier] if barrier is not None else [])
+            cursor.execute(f"""
+                SELECT TOP (?) {columns}
+                FROM {spec["source"]}
+                WHERE Id > ? {barrier_sql}
+                ORDER BY Id
+            """, params)
+
+            rows = cursor.fetchall()
+            if not rows:
+                break
+            last_id = rows[-1][0]
+            if remaining is not None:
+                remaining -= len(rows)
+            yield [tuple(row) for row in rows]
+
+            if len(rows) < size:
+                break
+    finally:
+        conn.close()
+
+def rows_to_batch(table: str, rows: List[tuple]) -> "pa.RecordBatch":
+    """Redovi -> Arrow RecordBatch (kolona po kolona)"""
+    schema = arrow_schema(table)
+    columns = list(zip(*rows)) if rows else [[] for _ in schema]
+    arrays = [pa.array(column, type=field.type) for column, field in zip(columns, schema)]
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+class _ChunkSink:
+    """File-like objekat koji skuplja bajtove dok ih stream ne preuzme"""
+
+    def __init__(self):
+        self.chunks: List[bytes] = []
+        self.closed = False
+
+    def write(self, data) -> int:
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks.clear()
+        return data
+
+def stream_arrow_ipc(table: str, after_id: int = 0, chunk_size: int = 50000,
+                     limit: Optional[int] = None) -> Iterator[bytes]:
+    """Arrow IPC stream u komadima - za HTTP StreamingResponse"""
+    sink = _ChunkSink()
+    writer = pa_ipc.new_stream(sink, arrow_schema(table))
+
+    for rows in iter_export_chunks(table, after_id, chunk_size, limit):
+        writer.write_batch(rows_to_batch(table, rows))
+        yield sink.drain()
+
+    writer.close()
+    yield sink.drain()
+
+
+class _PartitionWriters:
+    """
+    Otvoreni writer-i po particiji (danu). Najviše max_open ih je otvoreno -
+    najduže nekorišten se zatvara i objavljuje (dan koji je keyset prošao).
+    Ako taj dan ponovo dobije redove (Timestamp ne prati Id), piše se novi dio.
+    """
+
+    def __init__(self, base_dir: str, table: str, fmt: str, first_id: int,
+                 max_open: int = 8):
+        self.base_dir = base_dir
+        self.table = table
+        self.fmt = fmt
+        self.first_id = first_id
+        self.max_open = max_open
+        self.schema = arrow_schema(table)
+        self.writers: "OrderedDict[Optional[str], tuple]" = OrderedDict()
+        self.parts: Dict[Optional[str], int] = {}
+        self.files: List[str] = []
+
+    def write(self, partition: Optional[str], batch: "pa.RecordBatch"):
+        if partition in self.writers:
+            self.writers.move_to_end(partition)
+        else:
+            if len(self.writers) >= self.max_open:
+                self._close(*self.writers.popitem(last=False)[1])
+            self.writers[partition] = self._open(partition)
+
+        path, writer = self.writers[partition]
+        if self.fmt == "parquet":
+            writer.write_table(pa.Table.from_batches([batch]))
+        else:
+            writer.write_batch(batch)
+
+    def _open(self, partition: Optional[str]) -> tuple:
+        directory = os.path.join(self.base_dir, self.table)
+        if partition is not None:
+            directory = os.path.join(directory, f"date={partition}")
+        os.makedirs(directory, exist_ok=True)
+        part = self.parts.get(partition, 0)
+        self.parts[partition] = part + 1
+        suffix = f"-{part}" if part else ""
+        path = os.path.join(directory, f"part-{self.first_id + 1}{suffix}.{self.fmt}.tmp")
+        if self.fmt == "parquet":
+            writer = pq.ParquetWriter(path, self.schema)
+        else:
+            writer = pa_ipc.new_file(pa.OSFile(path, "wb"), self.schema)
+        return path, writer
+
+    def _close(self, path: str, writer):
+        """Zatvori writer i atomski objavi fajl (bez .tmp)"""
+        writer.close()
+        final_path = path[:-len(".tmp")]
+        os.replace(path, final_path)
+        self.files.append(final_path)
+
+    def close(self) -> List[str]:
+        """Zatvori preostale writer-e; vraća sve objavljene fajlove"""
+        while self.writers:
+            self._close(*self.writers.popitem(last=False)[1])
+        return self.files
+
+
+def read_watermark(output_dir: str) -> Dict[str, int]:
+    path = os.path.join(output_dir, WATERMARK_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+def write_watermark(output_dir: str, watermark: Dict[str, int]):
+    path = os.path.join(output_dir, WATERMARK_FILE)
+    with open(f"{path}.tmp", "w") as f:
+        json.dump(watermark, f)
+    os.replace(f"{path}.tmp", path)
+
+def export_table(table: str, output_dir: str, fmt: str = "parquet",
+                 partition_by_day: bool = False, after_id: Optional[int] = None,
+                 chunk_size: int = 50000, max_open_partitions: int = 8) -> dict:
+    """
+    Inkrementalni export jedne tabele u Parquet/Arrow fajlove.
+    Bez after_id nastavlja od watermark-a iz prethodnog exporta.
+    """
+    _require_pyarrow()
+    if fmt not in FORMATS:
+        raise ValueError(f"Nepodržan format: {fmt}")
+
+    watermark = read_watermark(output_dir)
+    start_id = after_id if after_id is not None else watermark.get(table, 0)
+    day_index = [name for name, _ in EXPORT_TABLES[table]["columns"]].index(
+        EXPORT_TABLES[table]["day_column"])
+
+    writers = _PartitionWriters(output_dir, table, fmt, start_id, max_open_partitions)
+    last_id, exported = start_id, 0
+
+    for rows in iter_export_chunks(table, start_id, chunk_size):
+        if partition_by_day:
+            by_day: Dict[str, List[tuple]] = {}
+            for row in rows:
+                day = row[day_index].date().isoformat() if row[day_index] else "unknown"
+                by_day.setdefault(day, []).append(row)
+            for day, day_rows in by_day.items():
+                writers.write(day, rows_to_batch(table, day_rows))
+        else:
+            writers.write(None, rows_to_batch(table, rows))
+
+        last_id = rows[-1][0]
+        exported += len(rows)
+
+    files = writers.close()
+    if exported:
+        watermark[table] = last_id
+        os.makedirs(output_dir, exist_ok=True)
+        write_watermark(output_dir, watermark)
+
+    logger.info(f"Export {table}: {exported} redova, watermark {last_id}")
+    return {"table": table, "rows": exported, "from_id": start_id,
+            "watermark": last_id, "files": files}
+
+
+if __name__ == "__main__":
+    import argparse
+    from core.logging_config import setup_logging
+
+    setup_logging()
+
+    parser = argparse.ArgumentParser(description="Export opservacija i feedbacka")
+    parser.add_argument("output_dir")
+    parser.add_argument("--format", choices=FORMATS, default="parquet")
+    parser.add_argument("--partition-by-day", action="store_true")
+    parser.add_argument("--tables", nargs="+", choices=list(EXPORT_TABLES),
+                        default=list(EXPORT_TABLES))
+    parser.add_argument("--chunk-size", type=int, default=50000)
+    args = parser.parse_args()
+
+    for table_name in args.tables:
+        result = export_table(table_name, args.output_dir, args.format,
+                              args.partition_by_day, chunk_size=args.chunk_size)
+        print(f"✓ {table_name}: {result['rows']} redova -> {len(result['files'])} fajl(ova)")
@@ -0,0 +1,165 @@
+# backend/infrastructure/hive_state.py
+import threading
+import numpy as np
+from collections import OrderedDict
+from typing import List, Optional
+from domain.entities import hive_key
+from domain.observation_batch import FEATURE_NAMES
+from infrastructure.database import iter_recent_hive_history
+import logging
+
+logger = logging.getLogger(__name__)
+
+WINDOW_STATS = ["delta", "mean", "slope", "std"]
+N_WINDOW_FEATURES = len(WINDOW_STATS) * len(FEATURE_NAMES)
+# Prozor se uz predikciju upisuje u Observations.HiveWindow (float64, little-endian),
+# pa trening vidi iste vrijednosti koje je model imao pri scoringu
+WINDOW_DTYPE = np.dtype("<f8")
+
+def encode_window(window: Optional[np.ndarray]) -> Optional[bytes]:
+    """Rolling feature-i -> HiveWindow (None ako opservacija nema košnicu)"""
+    if window is None:
+        return None
+    return np.ascontiguousarray(window, dtype=WINDOW_DTYPE).tobytes()
+
+def decode_window(data: Optional[bytes]) -> np.ndarray:
+    """HiveWindow -> rolling feature-i; bez historije košnice su nule"""
+    if not data:
+        return np.zeros(N_WINDOW_FEATURES)
+    return np.frombuffer(data, dtype=WINDOW_DTYPE).astype(float)
+
+def hive_features(features: List[float], hive_window: Optional[bytes]) -> List[float]:
+    """Osnovni feature-i + rolling feature-i košnice (isti redoslijed kao kod scoringa)"""
+    return list(features) + decode_window(hive_window).tolist()
+
+class RollingWindow:
+    """
+    Ring buffer zadnjih `size` očitanja jedne košnice.
+    Održava sume (Σy, Σy², Σt·y) pa su srednja vrijednost, std i nagib
+    regresione prave O(1) po novom očitanju, nezavisno od veličine prozora.
+    """
+
+    # Povremeno preračunavanje suma iz buffera (sprečava numerički drift)
+    RECOMPUTE_EVERY = 10000
+
+    def __init__(self, size: int, n_features: int):
+        self.size = size
+        self.buffer = np.zeros((size, n_features))
+        self.count = 0          # broj očitanja u prozoru
+        self.total = 0          # ukupno očitanja (apsolutni indeks t)
+        self.sum_y = np.zeros(n_features)
+        self.sum_yy = np.zeros(n_features)
+        self.sum_ty = np.zeros(n_features)
+
+    def push(self, y: np.ndarray) -> Optional[np.ndarray]:
+        """Dodaj očitanje; vraća prethodno očitanje (ili None)"""
+        t = self.total
+        slot = t % self.size
+        previous = self.buffer[(t - 1) % self.size].copy() if self.count else None
+
+        if self.count == self.size:
+            old = self.buffer[slot]
+            self.sum_y -= old
+            self.sum_yy -= old * old
+            self.sum_ty -= (t - self.size) * old
+        else:
+            self.count += 1
+
+        self.buffer[slot] = y
+        self.sum_y += y
+        self.sum_yy += y * y
+        self.sum_ty += t * y
+        self.total += 1
+
+        if self.total % self.RECOMPUTE_EVERY == 0:
+            self._recompute()
+        return previous
+
+    def _recompute(self):
+        n, last = self.count, self.total - 1
+        t = np.arange(last - n + 1, last + 1)
+        values = self.buffer[t % self.size]
+        self.sum_y = values.sum(axis=0)
+        self.sum_yy = (values * values).sum(axis=0)
+        self.sum_ty = (t[:, None] * values).sum(axis=0)
+
+    def stats(self, current: np.ndarray, previous: Optional[np.ndarray]) -> np.ndarray:
+        """[delta | mean | slope | std] za sve feature-e"""
+        n = self.count
+        mean = self.sum_y / n
+        variance = np.maximum(self.sum_yy / n - mean * mean, 0.0)
+        delta = current - previous if previous is not None else np.zeros_like(current)
+
+        if n > 1:
+            # Relativni indeksi 0..n-1 unutar prozora
+            first = self.total - n
+            s_ty = self.sum_ty - first * self.sum_y
+            s_t = n * (n - 1) / 2
+            s_tt = (n - 1) * n * (2 * n - 1) / 6
+            slope = (n * s_ty - s_t * self.sum_y) / (n * s_tt - s_t * s_t)
+        else:
+            slope = np.zeros_like(current)
+
+        return np.concatenate([delta, mean, slope, np.sqrt(variance)])
+
+
+class HiveStateStore:
+    """
+    Rolling stanje po košnici u memoriji (LRU - neaktivne košnice se izbacuju).
+    Scoring ne radi upit na historiju: svako očitanje ažurira prozor u O(1).
+    """
+
+    def __init__(self, window_size: int = 24, max_hives: int = 10000):
+        self.window_size = window_size
+        self.max_hives = max_hives
+        self._windows: "OrderedDict[str, RollingWindow]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.evicted = 0
+
+    @staticmethod
+    def feature_names() -> List[str]:
+        return [f"{name}_{stat}" for stat in WINDOW_STATS for name in FEATURE_NAMES]
+
+    @property
+    def n_window_features(self) -> int:
+        return N_WINDOW_FEATURES
+
+    def update(self, key: str, features: List[float]) -> np.ndarray:
+        """
+        Dodaj očitanje košnice i vrati rolling feature-e (uključujući njega).
+        key je ključ košnice "pčelinjak/košnica" (Observation.shard_key) -
+        iste oznake košnica u različitim pčelinjacima imaju odvojene prozore.
+        """
+        y = np.asarray(features, dtype=float)
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None:
+                window = RollingWindow(self.window_size, len(y))
+                self._windows[key] = window
+                if len(self._windows) > self.max_hives:
+                    self._windows.popitem(last=False)
+                    self.evicted += 1
+            else:
+                self._windows.move_to_end(key)
+
+            previous = window.push(y)
+            return window.stats(y, previous)
+
+    def rebuild_from_database(self) -> int:
+        """Napuni prozore zadnjim očitanjima iz baze (poziva se pri startu)"""
+        loaded = 0
+        for rows in iter_recent_hive_history(self.window_size):
+            for row in rows:
+                self.update(hive_key(row[1], row[0]),
+                            [row[2], row[3], row[4], row[5], int(row[6])])
+            loaded += len(rows)
+        logger.info(f"Rolling stanje: {loaded} očitanja, {len(self._windows)} košnica")
+        return loaded
+
+    def get_info(self) -> dict:
+        return {
+            "hives": len(self._windows),
+            "window_size": self.window_size,
+            "max_hives": self.max_hives,
+            "evicted": self.evicted
+        }
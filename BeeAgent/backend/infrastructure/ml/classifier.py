@@ -2,36 +2,92 @@
 import joblib
 import numpy as np
 import os
+import shutil
+import threading
 from typing import List, Tuple, Optional
 from sklearn.linear_model import SGDClassifier
+from infrastructure.ml.linear_model import LinearModel
 
 class BeeClassifier:
     """ML klasa - infrastruktura (crna kutija)"""
     
-    def __init__(self, model_file: str = "model.joblib"):
+    def __init__(self, model_file: str = "model.joblib", scaler_file: Optional[str] = None,
+                 n_features: Optional[int] = None):
         self.model_file = model_file
+        self.scaler_file = scaler_file
+        # Broj feature-a novog modela (npr. osnovni + rolling prozor); None = osnovni
+        self._initial_features = n_features
         self.model: Optional[SGDClassifier] = None
+        self.scaler = None
+        self.model_version: Optional[str] = None
+        # Trening, objava nove verzije i /feedback trening ne smiju se preklapati
+        self._lock = threading.Lock()
+        # Linearni model sa ugrađenim scalerom (None za nelinearne modele)
+        self._linear: Optional[LinearModel] = None
         self.classes = [
             "nista", "priorihrana", "provjera_varoe", "preseljenje", "berba",
             "zalivanje", "hranjivanje", "prskanje", "povecanje_ramova",
             "smanjenje_ramova", "kontrola_stetocina", "promjena_lokacije",
             "provjera_zdravlja", "ciscenje_zajednice", "dodatna_inspekcija"
         ]
+        self._load_scaler()
         self._load_or_create_model()
+        self._refresh_linear(verify=True)
+    
+    def _load_scaler(self):
+        """Učitaj scaler ako je zadan (npr. scaler_v2.joblib)"""
+        if self.scaler_file:
+            self.scaler = joblib.load(self.scaler_file)
+            print(f"✓ Scaler učitan iz {self.scaler_file}")
     
     def _load_or_create_model(self):
         """Učitaj postojeći model ili kreiraj novi"""
         if os.path.exists(self.model_file):
             self.model = joblib.load(self.model_file)
+            self.model_version = self._read_version()
             print(f"✓ Model učitan iz {self.model_file}")
+            if self.scaler is not None and self.scaler.n_features_in_ != self.model.n_features_in_:
+                raise ValueError(
+                    f"Scaler očekuje {self.scaler.n_features_in_} feature-a, "
+                    f"model {self.model.n_features_in_}"
+                )
         else:
             self.model = SGDClassifier(max_iter=1000, random_state=42)
             self._initialize_with_examples()
             joblib.dump(self.model, self.model_file)
             print(f"✓ Model inicijaliziran")
     
+    def _version_file(self) -> str:
+        return f"{self.model_file}.version"
+    
+    def _read_version(self) -> Optional[str]:
+        """Verzija modela se čuva u malom fajlu pored modela"""
+        if os.path.exists(self._version_file()):
+            with open(self._version_file()) as f:
+                return f.read().strip() or None
+        return None
+    
+    def _write_version(self, version: str):
+        tmp_path = f"{self._version_file()}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write(version)
+        os.replace(tmp_path, self._version_file())
+    
     def _initialize_with_examples(self):
         """Inicijalizacija s osnovnim primjerima"""
+        X_init, y_init = self.initial_examples(self._initial_features)
+        if self.scaler is not None and self.scaler.n_features_in_ != X_init.shape[1]:
+            raise ValueError(
+                f"Scaler očekuje {self.scaler.n_features_in_} feature-a, "
+                f"model {X_init.shape[1]}"
+            )
+        self.model.partial_fit(self._scale(X_init), y_init, classes=self.classes)
+    
+    def initial_examples(self, n_features: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Osnovni primjeri - po jedan za svaku akciju.
+        Feature-i preko osnovnih (rolling prozor košnice) su nule, kao bez historije.
+        """
         X_init = []
         y_init = []
         
@@ -60,10 +116,43 @@ class BeeClassifier:
             
             y_init.append(action)
         
-        self.model.partial_fit(np.array(X_init), np.array(y_init), classes=self.classes)
+        X_init = np.array(X_init, dtype=float)
+        if n_features is not None and n_features > X_init.shape[1]:
+            X_init = np.hstack([X_init, np.zeros((len(X_init), n_features - X_init.shape[1]))])
+        return X_init, np.array(y_init)
+    
+    @property
+    def n_features(self) -> int:
+        """Broj feature-a koje model očekuje"""
+        return int(self.model.n_features_in_)
+    
+    @property
+    def linear_model(self) -> Optional[LinearModel]:
+        """Trenutni linearni model (sa ugrađenim scalerom); None za nelinearne"""
+        return self._linear
+    
+    def _scale(self, X: np.ndarray) -> np.ndarray:
+        """Standardizacija za trening i nelinearne modele"""
+        return self.scaler.transform(X) if self.scaler is not None else X
+    
+    def _refresh_linear(self, verify: bool = False):
+        """
+        Ugradi scaler u težine linearnog modela (poziva se nakon svakog treninga).
+        verify_fusion se radi samo pri učitavanju i objavi verzije (verify=True) -
+        partial_fit ne mijenja scaler, pa provjera po chunk-u ne donosi ništa.
+        """
+        if hasattr(self.model, "coef_"):
+            self._linear = LinearModel.from_estimator(
+                self.model, self.scaler, model_version=self.model_version
+            ).fused(verify=verify)
+        else:
+            self._linear = None
     
     def predict(self, features: List[float]) -> Tuple[str, float]:
         """Napravi predikciju za date features"""
+        if self.scaler is not None:
+            return self._predict_scaled(features)
+        
         x = np.array(features).reshape(1, -1)
         prediction = self.model.predict(x)[0]
         
@@ -76,25 +165,86 @@ class BeeClassifier:
         
         return prediction, float(confidence)
     
+    def _predict_scaled(self, features: List[float]) -> Tuple[str, float]:
+        """Predikcija kroz scaler + model pipeline"""
+        labels, confidences = self.predict_batch(np.array(features).reshape(1, -1))
+        return str(labels[0]), float(confidences[0])
+    
+    def predict_batch(self, X: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Predikcije za cijeli batch (n x F) bez sklearn validacije po pozivu"""
+        if self._linear is not None:
+            # Scaler je već ugrađen u težine - jedan matmul + bias
+            return self._linear.predict_batch(X)
+        
+        X = self._scale(np.asarray(X, dtype=float))
+        labels = self.model.predict(X)
+        if hasattr(self.model, "predict_proba"):
+            proba = self.model.predict_proba(X)
+            return labels, proba.max(axis=1)
+        return labels, np.ones(len(labels))
+    
+    def export_linear(self, output_file: str, scaler_file: Optional[str] = None):
+        """
+        Exportuj trenutni model u .beemodel format (za NumpyBeeClassifier), sa
+        ugrađenim scalerom (self.scaler, osim ako je zadan scaler_file)
+        """
+        scaler = joblib.load(scaler_file) if scaler_file else self.scaler
+        with self._lock:
+            LinearModel.from_estimator(self.model, scaler,
+                                       model_version=self.model_version).fused().save(output_file)
+        print(f"✓ Model exportovan u {output_file}")
+    
     def train_single(self, features: List[float], label: str):
         """Treniraj model s jednim primjerom"""
         X = np.array(features).reshape(1, -1)
         y = np.array([label])
-        self.model.partial_fit(X, y, classes=self.classes)
-        joblib.dump(self.model, self.model_file)
+        with self._lock:
+            self.model.partial_fit(self._scale(X), y, classes=self.classes)
+            self._refresh_linear()
+            joblib.dump(self.model, self.model_file)
         print(f"✓ Model treniran za: {label}")
     
-    def train_batch(self, X_batch: np.ndarray, y_batch: np.ndarray):
-        """Treniraj model s batch-om podataka"""
-        self.model.partial_fit(X_batch, y_batch, classes=self.classes)
-        joblib.dump(self.model, self.model_file)
-        print(f"✓ Model treniran na {len(y_batch)} primjera")
+    def train_batch(self, X_batch: np.ndarray, y_batch: np.ndarray, save: bool = True):
+        """Treniraj model s batch-om podataka (save=False za chunk-ovani trening)"""
+        with self._lock:
+            self.model.partial_fit(self._scale(X_batch), y_batch, classes=self.classes)
+            self._refresh_linear()
+            if save:
+                joblib.dump(self.model, self.model_file)
+        if save:
+            print(f"✓ Model treniran na {len(y_batch)} primjera")
+    
+    def save(self, version: Optional[str] = None):
+        """Sačuvaj model (i verziju) u model_file"""
+        with self._lock:
+            joblib.dump(self.model, self.model_file)
+            if version:
+                self._write_version(version)
+                self.model_version = version
+    
+    def publish(self, source_file: str, version: str):
+        """
+        Objavi novu verziju modela: atomski zamijeni model_file
+        i učitaj novi model bez restarta procesa.
+        """
+        with self._lock:
+            tmp_path = f"{self.model_file}.tmp"
+            shutil.copyfile(source_file, tmp_path)
+            os.replace(tmp_path, self.model_file)
+            self._write_version(version)
+            self.model = joblib.load(self.model_file)
+            self.model_version = version
+            self._refresh_linear(verify=True)
+        print(f"✓ Objavljena verzija modela {version}")
     
     def get_model_info(self):
         """Vrati informacije o modelu"""
         return {
-            "model_type": "SGDClassifier",
+            "model_type": type(self.model).__name__,
             "classes": self.classes,
             "model_file": self.model_file,
+            "scaler_file": self.scaler_file,
+            "scaler_fused": self._linear is not None and self._linear.scaler_fused,
+            "model_version": self.model_version,
             "exists": os.path.exists(self.model_file)
         }
\ No newline at end of file
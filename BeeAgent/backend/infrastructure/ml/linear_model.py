@@ -0,0 +1,293 @@
+# backend/infrastructure/ml/linear_model.py
+import json
+import os
+import struct
+import numpy as np
+from typing import List, Optional, Tuple
+
+# Format fajla (.beemodel):
+#   [prefix: magic(8s) | verzija(uint32) | duzina JSON headera(uint32)]
+#   [JSON header] [padding do 64B]
+#   [coef (C x F) | intercept (C) | mean (F) | scale (F)]  -- float64, little-endian
+MAGIC = b"BEEMODEL"
+FORMAT_VERSION = 1
+_PREFIX = struct.Struct("<8sII")
+_ALIGN = 64
+_DTYPE = np.dtype("<f8")
+
+SUPPORTED_LOSSES = ("hinge", "log_loss", "log", "modified_huber",
+                    "squared_hinge", "perceptron")
+
+
+class LinearModel:
+    """Čisti NumPy linearni model - inferencija bez sklearn-a"""
+
+    def __init__(self, coef: np.ndarray, intercept: np.ndarray, classes: List[str],
+                 loss: str = "hinge", mean: Optional[np.ndarray] = None,
+                 scale: Optional[np.ndarray] = None, model_version: Optional[str] = None,
+                 scaler_fused: bool = False):
+        self.coef = np.atleast_2d(coef)
+        self.intercept = np.atleast_1d(intercept)
+        self.classes = np.asarray(classes)
+        self.loss = loss
+        self.mean = mean
+        self.scale = scale
+        self.model_version = model_version
+        self.scaler_fused = scaler_fused
+
+        if self.coef.shape[0] != self.intercept.shape[0]:
+            raise ValueError("coef i intercept nemaju isti broj redova")
+        if self.mean is not None and self.mean.shape[0] != self.n_features:
+            raise ValueError(
+                f"Scaler ima {self.mean.shape[0]} feature-a, model {self.n_features}"
+            )
+
+    @property
+    def n_features(self) -> int:
+        return self.coef.shape[1]
+
+    @property
+    def has_scaler(self) -> bool:
+        return self.mean is not None
+
+    @classmethod
+    def from_estimator(cls, model, scaler=None,
+                       model_version: Optional[str] = None) -> "LinearModel":
+        """Izvuci parametre iz istreniranog sklearn linearnog modela (i scalera)"""
+        if not hasattr(model, "coef_") or not hasattr(model, "intercept_"):
+            raise ValueError(f"{type(model).__name__} nije linearni model")
+
+        loss = getattr(model, "loss", "hinge")
+        if loss not in SUPPORTED_LOSSES:
+            raise ValueError(f"Nepodržan loss: {loss}")
+
+        mean = scale = None
+        if scaler is not None:
+            n = scaler.n_features_in_
+            mean = (np.asarray(scaler.mean_, dtype=_DTYPE)
+                    if getattr(scaler, "mean_", None) is not None and scaler.with_mean
+                    else np.zeros(n, dtype=_DTYPE))
+            scale = (np.asarray(scaler.scale_, dtype=_DTYPE)
+                     if getattr(scaler, "scale_", None) is not None and scaler.with_std
+                     else np.ones(n, dtype=_DTYPE))
+
+        return cls(
+            coef=np.asarray(model.coef_, dtype=_DTYPE),
+            intercept=np.asarray(model.intercept_, dtype=_DTYPE),
+            classes=[str(c) for c in model.classes_],
+            loss=loss,
+            mean=mean,
+            scale=scale,
+            model_version=model_version
+        )
+
+    def fused(self, verify: bool = True) -> "LinearModel":
+        """
+        Ugradi standardizaciju u težine:
+            W·((x - μ) / σ) + b  =  (W / σ)·x + (b - (W / σ)·μ)
+        Inferencija tada ostaje jedan matmul + bias, bez međurezultata.
+        """
+        if not self.has_scaler:
+            return self
+
+        coef = self.coef / self.scale
+        intercept = self.intercept - coef @ self.mean
+        fused = LinearModel(coef, intercept, self.classes, loss=self.loss,
+                            model_version=self.model_version, scaler_fused=True)
+        if verify:
+            verify_fusion(self, fused)
+        return fused
+
+    # ===== INFERENCIJA =====
+
+    def decision_function(self, X: np.ndarray) -> np.ndarray:
+        """Sirovi skorovi (n x C)"""
+        X = np.asarray(X, dtype=_DTYPE)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if self.mean is not None:
+            X = (X - self.mean) / self.scale
+        scores = X @ self.coef.T
+        scores += self.intercept
+        return scores
+
+    def predict_batch(self, X: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Predikcije i confidence za cijeli batch"""
+        scores = self.decision_function(X)
+
+        if scores.shape[1] == 1:
+            # Binarni slučaj: jedna kolona skorova za klasu [1]
+            s = scores[:, 0]
+            indices = (s > 0).astype(np.intp)
+            proba_pos = self._binary_proba(s)
+            if proba_pos is None:
+                return self.classes[indices], np.ones(len(s))
+            confidence = np.where(indices == 1, proba_pos, 1.0 - proba_pos)
+            return self.classes[indices], confidence
+
+        indices = scores.argmax(axis=1)
+        proba = self.scores_to_proba(scores)
+        if proba is None:
+            # Kao i sklearn: hinge i slični nemaju predict_proba
+            return self.classes[indices], np.ones(len(indices))
+        return self.classes[indices], proba[np.arange(len(indices)), indices]
+
+    def predict(self, features: List[float]) -> Tuple[str, float]:
+        labels, confidences = self.predict_batch(np.asarray(features).reshape(1, -1))
+        return str(labels[0]), float(confidences[0])
+
+    def _binary_proba(self, s: np.ndarray) -> Optional[np.ndarray]:
+        if self.loss in ("log_loss", "log"):
+            return 1.0 / (1.0 + np.exp(-s))
+        if self.loss == "modified_huber":
+            return (np.clip(s, -1, 1) + 1) / 2
+        return None
+
+    def scores_to_proba(self, scores: np.ndarray) -> Optional[np.ndarray]:
+        """One-vs-rest normalizacija, ista kao u SGDClassifier.predict_proba"""
+        if self.loss in ("log_loss", "log"):
+            proba = 1.0 / (1.0 + np.exp(-scores))
+        elif self.loss == "modified_huber":
+            proba = (np.clip(scores, -1, 1) + 1) / 2
+        else:
+            return None
+
+        sums = proba.sum(axis=1, keepdims=True)
+        zero = sums[:, 0] == 0
+        proba[zero] = 1.0 / proba.shape[1]
+        sums[zero] = 1.0
+        proba /= sums
+        return proba
+
+    # ===== SERIJALIZACIJA =====
+
+    def save(self, path: str):
+        """Zapiši model u verzionirani, memorijski mapabilan fajl"""
+        n_classes, n_features = self.coef.shape
+        header = {
+            "classes": [str(c) for c in self.classes],
+            "loss": self.loss,
+            "n_classes": n_classes,
+            "n_features": n_features,
+            "has_scaler": self.has_scaler,
+            "model_version": self.model_version,
+            "dtype": _DTYPE.str
+        }
+        header_bytes = json.dumps(header).encode("utf-8")
+        data_offset = _data_offset(len(header_bytes))
+
+        blocks = [self.coef, self.intercept]
+        if self.has_scaler:
+            blocks += [self.mean, self.scale]
+
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(_PREFIX.pack(MAGIC, FORMAT_VERSION, len(header_bytes)))
+            f.write(header_bytes)
+            f.write(b"\0" * (data_offset - f.tell()))
+            for block in blocks:
+                f.write(np.ascontiguousarray(block, dtype=_DTYPE).tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True, fuse: bool = False) -> "LinearModel":
+        """
+        Učitaj model; s mmap=True stranice se dijele između procesa.
+        Export (export_linear_model, BeeClassifier.export_linear) zapisuje već
+        fuzionisan model, pa je mapirani fajl odmah jedan matmul. fuse=True
+        ugrađuje scaler iz starijih fajlova u nove nizove u memoriji procesa.
+        """
+        with open(path, "rb") as f:
+            magic, version, header_len = _PREFIX.unpack(f.read(_PREFIX.size))
+            if magic != MAGIC:
+                raise ValueError(f"{path} nije BeeAgent model fajl")
+            if version != FORMAT_VERSION:
+                raise ValueError(f"Nepodržana verzija formata: {version}")
+            header = json.loads(f.read(header_len).decode("utf-8"))
+
+        n_classes, n_features = header["n_classes"], header["n_features"]
+        n_values = n_classes * n_features + n_classes
+        if header["has_scaler"]:
+            n_values += 2 * n_features
+
+        offset = _data_offset(header_len)
+        if mmap:
+            data = np.memmap(path, dtype=header["dtype"], mode="r",
+                             offset=offset, shape=(n_values,))
+        else:
+            with open(path, "rb") as f:
+                f.seek(offset)
+                data = np.fromfile(f, dtype=header["dtype"], count=n_values)
+
+        end = n_classes * n_features
+        coef = data[:end].reshape(n_classes, n_features)
+        intercept = data[end:end + n_classes]
+        mean = scale = None
+        if header["has_scaler"]:
+            start = end + n_classes
+            mean = data[start:start + n_features]
+            scale = data[start + n_features:start + 2 * n_features]
+
+        model = cls(coef, intercept, header["classes"], loss=header["loss"],
+                    mean=mean, scale=scale, model_version=header.get("model_version"))
+        return model.fused() if fuse else model
+
+
+def _data_offset(header_len: int) -> int:
+    raw = _PREFIX.size + header_len
+    return (raw + _ALIGN - 1) // _ALIGN * _ALIGN
+
+
+def verify_fusion(pipeline: LinearModel, fused: LinearModel,
+                  X: Optional[np.ndarray] = None, rtol: float = 1e-7,
+                  atol: float = 1e-9):
+    """Provjeri da fuzionisani model daje iste skorove kao scaler + model"""
+    if X is None:
+        rng = np.random.default_rng(0)
+        X = pipeline.mean + pipeline.scale * rng.standard_normal((256, pipeline.n_features))
+
+    expected = pipeline.decision_function(X)
+    actual = fused.decision_function(X)
+    if not np.allclose(actual, expected, rtol=rtol, atol=atol):
+        max_err = float(np.max(np.abs(actual - expected)))
+        raise ValueError(f"Fuzionisani model odstupa od pipeline-a (max greška {max_err:.3e})")
+
+    labels_expected, _ = pipeline.predict_batch(X)
+    labels_actual, _ = fused.predict_batch(X)
+    if not np.array_equal(labels_expected, labels_actual):
+        raise ValueError("Fuzionisani model daje drugačije predikcije od pipeline-a")
+
+
+def export_linear_model(model_file: str, output_file: str,
+                        scaler_file: Optional[str] = None,
+                        model_version: Optional[str] = None) -> LinearModel:
+    """
+    Export joblib SGD modela u .beemodel format; scaler (ako je zadan) se
+    ugrađuje u težine prije zapisa, pa fajl ne nosi mean/scale.
+    """
+    import joblib
+
+    model = joblib.load(model_file)
+    scaler = joblib.load(scaler_file) if scaler_file else None
+    linear = LinearModel.from_estimator(model, scaler, model_version=model_version).fused()
+    linear.save(output_file)
+    return linear
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Export BeeAgent modela u NumPy format")
+    parser.add_argument("model_file", help="npr. model.joblib")
+    parser.add_argument("output_file", help="npr. model.beemodel")
+    parser.add_argument("--scaler", dest="scaler_file", default=None,
+                        help="npr. scaler_v2.joblib")
+    parser.add_argument("--version", dest="model_version", default=None)
+    args = parser.parse_args()
+
+    exported = export_linear_model(args.model_file, args.output_file,
+                                   args.scaler_file, args.model_version)
+    print(f"✓ Model exportovan u {args.output_file} "
+          f"({len(exported.classes)} klasa, {exported.n_features} feature-a)")
@@ -0,0 +1,196 @@
+# backend/infrastructure/ml/model_selection.py
+import itertools
+import multiprocessing
+import os
+import joblib
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Tuple
+from sklearn.base import clone
+from sklearn.linear_model import SGDClassifier
+from sklearn.preprocessing import StandardScaler
+from sklearn.utils.class_weight import compute_class_weight
+from infrastructure.ml.classifier import BeeClassifier
+from infrastructure.ml.linear_model import LinearModel
+from infrastructure.ml.training import new_model_version, versioned_model_path
+from infrastructure.ml.training import iter_training_chunks
+
+# Mreža kandidata: 3 x 4 x 2 x 2 = 48 modela
+CANDIDATE_GRID = {
+    "loss": ("hinge", "log_loss", "modified_huber"),
+    "alpha": (1e-5, 1e-4, 1e-3, 1e-2),
+    "class_weight": (None, "balanced"),
+    "scaled": (False, True),
+}
+MIN_EXAMPLES = 20
+
+def candidate_grid() -> List[dict]:
+    """Svi kandidati iz CANDIDATE_GRID"""
+    keys = list(CANDIDATE_GRID)
+    return [dict(zip(keys, values))
+            for values in itertools.product(*CANDIDATE_GRID.values())]
+
+def default_workers() -> int:
+    """Sve jezgre osim jedne - ta ostaje scoring petlji"""
+    return max(1, (os.cpu_count() or 2) - 1)
+
+def load_labelled_dataset(known_labels: List[str], chunk_size: int = 1000,
+                          store_dir: Optional[str] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """Skupi sve Feedback primjere (iz training seta na disku ili chunk-ovano iz baze)"""
+    X_chunks, y_chunks = [], []
+    for _, X, y in iter_training_chunks(chunk_size, store_dir):
+        mask = np.isin(y, known_labels)
+        X_chunks.append(X[mask])
+        y_chunks.append(y[mask])
+
+    if not X_chunks:
+        return np.empty((0, 5)), np.empty(0, dtype=str)
+    return np.concatenate(X_chunks), np.concatenate(y_chunks)
+
+def holdout_split(X: np.ndarray, y: np.ndarray, holdout_fraction: float = 0.2,
+                  seed: int = 42) -> Tuple[np.ndarray, ...]:
+    """Nasumična podjela na trening i holdout"""
+    order = np.random.default_rng(seed).permutation(len(y))
+    n_holdout = max(1, int(len(y) * holdout_fraction))
+    holdout, train = order[:n_holdout], order[n_holdout:]
+    return X[train], y[train], X[holdout], y[holdout]
+
+def holdout_accuracy(model: LinearModel, X: np.ndarray, y: np.ndarray) -> float:
+    """Vektorizovana tačnost: jedan matmul za cijeli holdout"""
+    labels, _ = model.predict_batch(X)
+    return float(np.mean(labels == y))
+
+def explicit_class_weight(class_weight, y: np.ndarray):
+    """
+    "balanced" -> eksplicitne težine po klasi izračunate iz y. Objavljeni model
+    dalje uči kroz partial_fit, a SGDClassifier ne prihvata "balanced" u partial_fit.
+    """
+    if class_weight != "balanced":
+        return class_weight
+    classes = np.unique(y)
+    weights = compute_class_weight("balanced", classes=classes, y=y)
+    return {label: float(weight) for label, weight in zip(classes.tolist(), weights)}
+
+def build_estimator(params: dict, X: np.ndarray, y: np.ndarray):
+    """Istreniraj jednog kandidata; vraća (model, scaler ili None)"""
+    scaler = StandardScaler().fit(X) if params["scaled"] else None
+    model = SGDClassifier(
+        loss=params["loss"],
+        alpha=params["alpha"],
+        class_weight=explicit_class_weight(params["class_weight"], y),
+        max_iter=1000,
+        tol=1e-3,
+        random_state=42
+    )
+    model.fit(scaler.transform(X) if scaler is not None else X, y)
+    return model, scaler
+
+# Podaci se šalju svakom worker procesu jednom (initializer), ne po kandidatu
+_worker_data = {}
+
+def _init_worker(X_train, y_train, X_holdout, y_holdout):
+    _worker_data.update(X_train=X_train, y_train=y_train,
+                        X_holdout=X_holdout, y_holdout=y_holdout)
+
+def _evaluate_candidate(params: dict) -> dict:
+    model, scaler = build_estimator(params, _worker_data["X_train"], _worker_data["y_train"])
+    linear = LinearModel.from_estimator(model, scaler).fused()
+    accuracy = holdout_accuracy(linear, _worker_data["X_holdout"], _worker_data["y_holdout"])
+    return {"params": params, "accuracy": accuracy}
+
+def incumbent_accuracy(classifier: BeeClassifier, X_train: np.ndarray, y_train: np.ndarray,
+                       X_holdout: np.ndarray, y_holdout: np.ndarray) -> float:
+    """
+    Tačnost konfiguracije trenutnog modela pod istim uslovima kao kandidati:
+    ista podešavanja, trening samo na X_train. Živi model je već vidio holdout
+    (feedback ulazi u trening), pa bi njegova tačnost bila pristrasno visoka.
+    """
+    model = clone(classifier.model)
+    class_weight = getattr(model, "class_weight", None)
+    if isinstance(class_weight, dict):
+        # Težine izračunate iz ranijih podataka - samo klase koje postoje u X_train
+        present = set(np.unique(y_train).tolist())
+        model.set_params(class_weight={label: weight for label, weight in class_weight.items()
+                                       if label in present})
+    scaler = classifier.scaler
+    model.fit(scaler.transform(X_train) if scaler is not None else X_train, y_train)
+    if hasattr(model, "coef_"):
+        return holdout_accuracy(LinearModel.from_estimator(model, scaler).fused(),
+                                X_holdout, y_holdout)
+    labels = model.predict(scaler.transform(X_holdout) if scaler is not None else X_holdout)
+    return float(np.mean(labels == y_holdout))
+
+def _to_classifier_space(model, scaler, classifier: BeeClassifier) -> SGDClassifier:
+    """
+    Prebaci težine kandidata u prostor feature-a koje BeeClassifier daje modelu:
+    scaler kandidata se ugrađuje u težine, a scaler BeeClassifier-a (ako postoji)
+    se "izvlači" iz njih, tako da model radi bez ikakve izmjene klasifikatora.
+    """
+    raw = LinearModel.from_estimator(model, scaler).fused()
+    coef, intercept = raw.coef, raw.intercept
+
+    if classifier.scaler is not None:
+        target = LinearModel.from_estimator(model, classifier.scaler)
+        intercept = intercept + coef @ target.mean
+        coef = coef * target.scale
+
+    model.coef_ = np.ascontiguousarray(coef)
+    model.intercept_ = np.ascontiguousarray(intercept)
+    return model
+
+def select_best_model(model_file: str, scaler_file: Optional[str] = None,
+                      chunk_size: int = 1000, holdout_fraction: float = 0.2,
+                      max_workers: Optional[int] = None,
+                      store_dir: Optional[str] = None) -> dict:
+    """
+    Izvršava se u ZASEBNOM procesu (TrainingService.select_model).
+    Trenira sve kandidate paralelno na process pool-u, bira najboljeg
+    po holdout tačnosti i zapisuje ga kao novu verziju modela.
+    """
+    classifier = BeeClassifier(model_file=model_file, scaler_file=scaler_file)
+    X, y = load_labelled_dataset(classifier.classes, chunk_size, store_dir)
+    if len(y) < MIN_EXAMPLES:
+        raise ValueError(f"Premalo označenih primjera za selekciju modela: {len(y)}")
+
+    X_train, y_train, X_holdout, y_holdout = holdout_split(X, y, holdout_fraction)
+
+    # Osnovni primjeri garantuju da svaki kandidat zna sve klase
+    X_init, y_init = classifier.initial_examples(X.shape[1])
+    X_train = np.vstack([X_init, X_train])
+    y_train = np.concatenate([y_init, y_train])
+
+    ctx = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=max_workers or default_workers(), mp_context=ctx,
+                             initializer=_init_worker,
+                             initargs=(X_train, y_train, X_holdout, y_holdout)) as pool:
+        results = list(pool.map(_evaluate_candidate, candidate_grid()))
+
+    results.sort(key=lambda r: r["accuracy"], reverse=True)
+    best = results[0]
+
+    current_accuracy = incumbent_accuracy(classifier, X_train, y_train, X_holdout, y_holdout)
+
+    summary = {
+        "best_params": best["params"],
+        "best_accuracy": best["accuracy"],
+        "current_accuracy": current_accuracy,
+        "examples": int(len(y)),
+        "candidates": len(results),
+        "leaderboard": results[:5],
+        "promoted": False
+    }
+    if best["accuracy"] < current_accuracy:
+        return summary
+
+    # Pobjednik se trenira na svim podacima (trening + holdout)
+    model, scaler = build_estimator(best["params"], np.vstack([X_train, X_holdout]),
+                                    np.concatenate([y_train, y_holdout]))
+    model = _to_classifier_space(model, scaler, classifier)
+
+    version = new_model_version()
+    output_file = versioned_model_path(model_file, version)
+    os.makedirs(os.path.dirname(output_file), exist_ok=True)
+    joblib.dump(model, output_file)
+
+    summary.update(promoted=True, model_version=version, model_file=output_file)
+    return summary
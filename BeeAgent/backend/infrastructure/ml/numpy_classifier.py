@@ -0,0 +1,44 @@
+# backend/infrastructure/ml/numpy_classifier.py
+import os
+import numpy as np
+from typing import List, Tuple
+from infrastructure.ml.linear_model import LinearModel
+
+class NumpyBeeClassifier:
+    """
+    Inference-only varijanta BeeClassifier-a (nema train_single/train_batch -
+    trening zahtijeva BeeClassifier).
+    Model se memorijski mapira iz .beemodel fajla (export_linear_model) -
+    nema sklearn-a; koristi ga offline replay.
+    """
+
+    def __init__(self, model_file: str = "model.beemodel"):
+        self.model_file = model_file
+        self.model = LinearModel.load(model_file)
+        self.classes = [str(c) for c in self.model.classes]
+        print(f"✓ NumPy model učitan iz {self.model_file}")
+
+    @property
+    def n_features(self) -> int:
+        """Broj feature-a koje model očekuje"""
+        return self.model.n_features
+
+    def predict(self, features: List[float]) -> Tuple[str, float]:
+        """Napravi predikciju za date features"""
+        return self.model.predict(features)
+
+    def predict_batch(self, X: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Predikcije za cijeli batch (n x F)"""
+        return self.model.predict_batch(X)
+
+    def get_model_info(self):
+        """Vrati informacije o modelu"""
+        return {
+            "model_type": "LinearModel (NumPy)",
+            "loss": self.model.loss,
+            "classes": self.classes,
+            "model_file": self.model_file,
+            "model_version": self.model.model_version,
+            "scaler_fused": self.model.scaler_fused,
+            "exists": os.path.exists(self.model_file)
+        }
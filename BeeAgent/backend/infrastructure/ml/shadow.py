@@ -0,0 +1,251 @@
+# backend/infrastructure/ml/shadow.py
+import os
+import queue
+import threading
+import time
+import numpy as np
+from typing import Dict, List, Optional, Tuple
+from infrastructure.ml.linear_model import LinearModel
+from infrastructure.database import get_connection
+import logging
+
+logger = logging.getLogger(__name__)
+
+def parse_shadow_entry(entry: str) -> Tuple[str, Optional[str]]:
+    """
+    'model_path[:scaler_path]' -> (model_path, scaler_path). Dvotačka iza
+    slova diska (C:\\...) nije separator.
+    """
+    start = 2 if entry[1:2] == ":" else 0
+    separator = entry.find(":", start)
+    if separator < 0:
+        return entry, None
+    return entry[:separator], entry[separator + 1:] or None
+
+def load_shadow_models(model_entries: List[str]) -> Dict[str, LinearModel]:
+    """
+    Učitaj kandidate za shadow scoring (.beemodel ili joblib linearni modeli).
+    Joblib model treniran na skaliranim feature-ima zadaje se kao
+    'model.joblib:scaler.joblib' - scaler se ugrađuje u težine kao u .beemodel.
+    Nelinearni modeli ili modeli koji se ne mogu učitati se preskaču.
+    """
+    models = {}
+    for entry in model_entries:
+        path, scaler_path = parse_shadow_entry(entry)
+        missing = [p for p in (path, scaler_path) if p and not os.path.exists(p)]
+        if missing:
+            logger.warning(f"Shadow model {entry}: {missing[0]} ne postoji - preskočen")
+            continue
+        try:
+            if path.endswith(".beemodel"):
+                if scaler_path:
+                    raise ValueError(".beemodel nosi svoj scaler - zasebni scaler nije dozvoljen")
+                # Težine se ionako kopiraju u složenu matricu - scaler mora biti ugrađen
+                models[path] = LinearModel.load(path, fuse=True)
+            else:
+                import joblib
+                scaler = joblib.load(scaler_path) if scaler_path else None
+                models[path] = LinearModel.from_estimator(joblib.load(path), scaler).fused()
+        except Exception as e:
+            logger.warning(f"Shadow model {entry} preskočen: {e}")
+    return models
+
+class StackedLinearModels:
+    """
+    Primarni + shadow linearni modeli složeni u jednu matricu (M*C x F).
+    Cijeli batch se za sve modele izračuna jednim matmul-om.
+    """
+
+    def __init__(self, primary: LinearModel, shadows: Dict[str, LinearModel]):
+        self.classes = primary.classes
+        self.names = ["primary"] + list(shadows)
+        models = [primary] + list(shadows.values())
+
+        coefs, intercepts = [], []
+        for name, model in zip(self.names, models):
+            if model.n_features != primary.n_features:
+                raise ValueError(f"{name}: {model.n_features} feature-a, "
+                                 f"primarni {primary.n_features}")
+            if set(model.classes) != set(self.classes) or model.coef.shape[0] != len(self.classes):
+                raise ValueError(f"{name}: klase se ne poklapaju s primarnim modelom")
+            # Redoslijed klasa poravnat s primarnim modelom
+            order = [list(model.classes).index(c) for c in self.classes]
+            coefs.append(model.coef[order])
+            intercepts.append(model.intercept[order])
+
+        self.n_models = len(models)
+        self.n_classes = len(self.classes)
+        self.coef = np.ascontiguousarray(np.vstack(coefs))
+        self.intercept = np.concatenate(intercepts)
+        self._models = models
+
+    def predict_batch(self, X: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Vraća (labele, confidence), oba oblika (M x n); red 0 je primarni model"""
+        X = np.asarray(X, dtype=float)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+
+        scores = X @ self.coef.T
+        scores += self.intercept
+        scores = scores.reshape(len(X), self.n_models, self.n_classes).transpose(1, 0, 2)
+
+        indices = scores.argmax(axis=2)
+        confidences = np.ones(indices.shape)
+        rows = np.arange(len(X))
+        for m, model in enumerate(self._models):
+            proba = model.scores_to_proba(scores[m].copy())
+            if proba is not None:
+                confidences[m] = proba[rows, indices[m]]
+        return self.classes[indices], confidences
+
+
+class ShadowRecorder:
+    """
+    Asinhrono upisivanje shadow predikcija u bazu (zaseban thread, batch insert).
+    U red ide jedna gotova lista redova po scoring batch-u. Scoring nikad ne
+    čeka: ako bi red prešao max_pending redova, lista se odbacuje.
+    """
+
+    def __init__(self, batch_size: int = 500, flush_interval_s: float = 1.0,
+                 max_pending: int = 10000):
+        self.batch_size = batch_size
+        self.flush_interval_s = flush_interval_s
+        self.max_pending = max_pending
+        self._queue: "queue.Queue[List[tuple]]" = queue.Queue()
+        self._pending = 0
+        self.dropped = 0
+        self._stats: Dict[str, Dict[str, int]] = {}
+        self._stats_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="shadow-recorder", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout_s: Optional[float] = 10.0):
+        """Upiši zapise koji već čekaju i zaustavi thread (npr. worker više nije leader)"""
+        self._stop.set()
+        self._thread.join(timeout_s)
+
+    def record(self, observation_id: int, primary_action: str,
+               names: List[str], actions: np.ndarray, confidences: np.ndarray):
+        """Jedna opservacija: actions/confidences po shadow modelu"""
+        self.record_batch([observation_id], np.asarray([primary_action]), names,
+                          np.asarray(actions).reshape(-1, 1),
+                          np.asarray(confidences).reshape(-1, 1))
+
+    def record_batch(self, observation_ids, primary_actions: np.ndarray, names: List[str],
+                     actions: np.ndarray, confidences: np.ndarray):
+        """Cijeli batch: actions/confidences oblika (shadow modeli x n)"""
+        agreements = (actions == primary_actions).sum(axis=1).tolist()
+        n = len(primary_actions)
+        observation_ids = np.asarray(observation_ids).tolist()
+        primary = primary_actions.astype(str).tolist()
+        rows = [row for name, model_actions, model_confidences
+                in zip(names, actions.astype(str).tolist(), np.asarray(confidences).tolist())
+                for row in zip(observation_ids, [name] * n, model_actions,
+                               model_confidences, primary)]
+
+        with self._stats_lock:
+            for name, agreed in zip(names, agreements):
+                stats = self._stats.setdefault(name, {"predictions": 0, "agreements": 0})
+                stats["predictions"] += n
+                stats["agreements"] += agreed
+            if self._pending + len(rows) > self.max_pending:
+                self.dropped += len(rows)
+                return
+            self._pending += len(rows)
+        self._queue.put_nowait(rows)
+
+    def get_summary(self) -> dict:
+        """Slaganje shadow modela s primarnim (iz memorije)"""
+        with self._stats_lock:
+            models = {
+                name: {**stats, "agreement_rate": stats["agreements"] / stats["predictions"]}
+                for name, stats in self._stats.items() if stats["predictions"]
+            }
+        return {"models": models, "pending": self._pending, "dropped": self.dropped}
+
+    def _run(self):
+        while not (self._stop.is_set() and self._queue.empty()):
+            batch = []
+            deadline = time.monotonic() + self.flush_interval_s
+            while len(batch) < self.batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.extend(self._queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+            if batch:
+                with self._stats_lock:
+                    self._pending -= len(batch)
+                self._flush(batch)
+
+    def _flush(self, batch: List[tuple]):
+        conn = None
+        try:
+            conn = get_connection()
+            cursor = conn.cursor()
+            cursor.fast_executemany = True
+            cursor.executemany("""
+                INSERT INTO ShadowPredictions
+                (ObservationId, ModelName, PredictedAction, Confidence, PrimaryAction)
+                VALUES (?, ?, ?, ?, ?)
+            """, batch)
+            conn.commit()
+        except Exception as e:
+            logger.error(f"Greška pri upisu shadow predikcija: {e}")
+            if conn:
+                conn.rollback()
+        finally:
+            if conn:
+                conn.close()
+
+
+class ShadowScorer:
+    """
+    Primarni model + shadow kandidati u istom vektorizovanom prolazu.
+    Servirani rezultat uvijek dolazi samo od primarnog modela.
+    """
+
+    def __init__(self, classifier, shadow_models: Dict[str, LinearModel],
+                 recorder: Optional[ShadowRecorder] = None):
+        self.classifier = classifier
+        self.shadow_models = shadow_models
+        self.recorder = recorder or ShadowRecorder()
+        self._stack: Optional[StackedLinearModels] = None
+        self._stack_primary: Optional[LinearModel] = None
+
+    def _get_stack(self) -> Optional[StackedLinearModels]:
+        """Stack se ponovo gradi samo kad klasifikator objavi novi model"""
+        primary = self.classifier.linear_model
+        if primary is None or not self.shadow_models:
+            return None
+        if primary is not self._stack_primary:
+            self._stack = StackedLinearModels(primary, self.shadow_models)
+            self._stack_primary = primary
+        return self._stack
+
+    def predict_batch(self, observation_ids: np.ndarray,
+                      X: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Batch varijanta predict - jedan matmul za sve modele i sve opservacije"""
+        stack = self._get_stack()
+        if stack is None:
+            return self.classifier.predict_batch(X)
+        
+        labels, confidences = stack.predict_batch(X)
+        self.recorder.record_batch(observation_ids, labels[0], stack.names[1:],
+                                   labels[1:], confidences[1:])
+        return labels[0], confidences[0]
+
+    def predict(self, observation_id: int, features: List[float]) -> Tuple[str, float]:
+        """Predikcija primarnog modela; shadow rezultati se bilježe asinhrono"""
+        stack = self._get_stack()
+        if stack is None:
+            return self.classifier.predict(features)
+
+        labels, confidences = stack.predict_batch(np.asarray(features).reshape(1, -1))
+        primary_action = str(labels[0, 0])
+        self.recorder.record(observation_id, primary_action, stack.names[1:],
+                             labels[1:, 0], confidences[1:, 0])
+        return primary_action, float(confidences[0, 0])
@@ -0,0 +1,72 @@
+# backend/infrastructure/ml/training.py
+import os
+import numpy as np
+from datetime import datetime
+from typing import Optional
+from infrastructure.ml.classifier import BeeClassifier
+from infrastructure.database import iter_labelled_examples
+from infrastructure.ml.training_store import load_training_set, training_set_features
+
+MODELS_DIR = "models"
+
+def new_model_version() -> str:
+    """Verzija modela = vremenska oznaka treninga"""
+    return datetime.now().strftime("%Y%m%d%H%M%S")
+
+def versioned_model_path(model_file: str, version: str) -> str:
+    """npr. model.joblib -> models/model_20240101120000.joblib"""
+    directory = os.path.join(os.path.dirname(model_file), MODELS_DIR)
+    name, ext = os.path.splitext(os.path.basename(model_file))
+    return os.path.join(directory, f"{name}_{version}{ext}")
+
+def iter_training_chunks(chunk_size: int, store_dir: Optional[str] = None):
+    """
+    (zadnji Feedback.Id, X, y) po chunk-ovima: iz training seta na disku
+    (memmap, bez upita na bazu) ili, bez store_dir, direktno iz baze.
+    """
+    if store_dir is None:
+        for last_id, features, labels in iter_labelled_examples(chunk_size):
+            yield last_id, np.array(features, dtype=float), np.array(labels)
+        return
+
+    X, y, synced_id = load_training_set(store_dir)
+    for start in range(0, len(y), chunk_size):
+        yield synced_id, X[start:start + chunk_size], y[start:start + chunk_size]
+
+def train_from_feedback(model_file: str, scaler_file: Optional[str] = None,
+                        chunk_size: int = 1000, epochs: int = 1,
+                        store_dir: Optional[str] = None) -> dict:
+    """
+    Izvršava se u ZASEBNOM procesu (TrainingService).
+    Trenira novi model iz početnih primjera + svih Feedback labela,
+    chunk po chunk preko partial_fit - memorija ne raste s historijom.
+    Vraća putanju verzioniranog fajla; objavu radi roditeljski proces.
+    """
+    version = new_model_version()
+    output_file = versioned_model_path(model_file, version)
+    os.makedirs(os.path.dirname(output_file), exist_ok=True)
+
+    # Novi fajl ne postoji -> BeeClassifier kreira svjež model s početnim primjerima,
+    # širine training seta (osnovni ili + rolling feature-i košnice)
+    n_features = training_set_features(store_dir) if store_dir is not None else None
+    classifier = BeeClassifier(model_file=output_file, scaler_file=scaler_file,
+                               n_features=n_features)
+    known_labels = set(classifier.classes)
+
+    examples = 0
+    last_feedback_id = 0
+    for _ in range(epochs):
+        for last_feedback_id, X, y in iter_training_chunks(chunk_size, store_dir):
+            mask = np.isin(y, list(known_labels))
+            if not mask.any():
+                continue
+            classifier.train_batch(X[mask], y[mask], save=False)
+            examples += int(mask.sum())
+
+    classifier.save(version)
+    return {
+        "model_version": version,
+        "model_file": output_file,
+        "examples": examples,
+        "last_feedback_id": last_feedback_id
+    }
@@ -0,0 +1,296 @@
+# backend/infrastructure/ml/training_store.py
+import json
+import os
+import shutil
+import struct
+import threading
+import numpy as np
+from typing import List, Sequence, Tuple
+from domain.observation_batch import FEATURE_NAMES
+from infrastructure.database import iter_feedback_rows, settled_feedback_id
+from infrastructure.hive_state import hive_features
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Format (direktorij):
+#   header.bin: [magic(8s) | verzija(uint32) | broj redova(uint64) |
+#                sinhronizovano do Feedback.Id (uint64) | dužina JSON-a(uint32)] [JSON]
+#   gen-<n>/<kolona>.bin: kolone bez headera, little-endian, red i u svakoj koloni
+# Pisac samo dodaje na kraj kolona pa ažurira broj redova u prefiksu; čitalac
+# mapira tačno toliko redova. Kompakcija piše novu generaciju i zamjenjuje header.
+MAGIC = b"BEETRAIN"
+FORMAT_VERSION = 1
+_PREFIX = struct.Struct("<8sIQQI")
+HEADER_FILE = "header.bin"
+# Kompakcija kad ima bar ovoliko (ili +25%) redova od zadnje
+COMPACT_MIN_ROWS = 1000
+
+COLUMNS = {
+    "feedback_id": np.dtype("<i8"),
+    "observation_id": np.dtype("<i8"),
+    "features": np.dtype("<f8"),
+    "label": np.dtype("<i2")
+}
+
+def _read_header(directory: str) -> Tuple[int, int, dict]:
+    with open(os.path.join(directory, HEADER_FILE), "rb") as f:
+        magic, version, count, synced_id, json_len = _PREFIX.unpack(f.read(_PREFIX.size))
+        if magic != MAGIC:
+            raise ValueError(f"{directory} nije BeeAgent training set")
+        if version != FORMAT_VERSION:
+            raise ValueError(f"Nepodržana verzija formata: {version}")
+        meta = json.loads(f.read(json_len).decode("utf-8"))
+    return count, synced_id, meta
+
+def _write_header(directory: str, count: int, synced_id: int, meta: dict):
+    """Cijeli header (tmp + os.replace) - kod nove klase i kompakcije"""
+    meta_bytes = json.dumps(meta).encode("utf-8")
+    path = os.path.join(directory, HEADER_FILE)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(_PREFIX.pack(MAGIC, FORMAT_VERSION, count, synced_id, len(meta_bytes)))
+        f.write(meta_bytes)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+def _column_path(directory: str, generation: int, column: str) -> str:
+    return os.path.join(directory, f"gen-{generation}", f"{column}.bin")
+
+def _map_columns(directory: str, count: int, meta: dict) -> dict:
+    n_features = meta["n_features"]
+    columns = {}
+    for name, dtype in COLUMNS.items():
+        shape = (count, n_features) if name == "features" else (count,)
+        if count == 0:
+            columns[name] = np.empty(shape, dtype=dtype)
+        else:
+            columns[name] = np.memmap(_column_path(directory, meta["generation"], name),
+                                      dtype=dtype, mode="r", shape=shape)
+    return columns
+
+def load_training_set(directory: str) -> Tuple[np.ndarray, np.ndarray, int]:
+    """
+    Cijeli training set bez upita na bazu: X je memmap (n x F, bez kopiranja),
+    y su labele (stringovi). Vraća i Id do kojeg je set sinhronizovan s bazom.
+    Poziva se i iz trening procesa.
+    """
+    for attempt in range(2):
+        count, synced_id, meta = _read_header(directory)
+        try:
+            columns = _map_columns(directory, count, meta)
+            break
+        except FileNotFoundError:
+            # Kompakcija je upravo zamijenila generaciju - pročitaj novi header
+            if attempt:
+                raise
+    classes = np.asarray(meta["classes"])
+    labels = classes[columns["label"]] if count else np.empty(0, dtype=classes.dtype)
+    return columns["features"], labels, synced_id
+
+def training_set_features(directory: str) -> int:
+    """Broj feature-a u training setu (osnovni ili osnovni + rolling prozor košnice)"""
+    return _read_header(directory)[2]["n_features"]
+
+class TrainingSetStore:
+    """
+    Označeni primjeri (feature vektor + indeks labele) u memorijski mapiranim
+    kolonama na disku. /feedback dodaje red odmah; sync_from_database dohvata
+    samo Feedback redove novije od zadnjeg sinhronizovanog Id-a (npr. feedback
+    koji su primili drugi workeri). Jedan pisac po direktoriju (leader).
+    Lock se drži samo oko upisa kolona i headera - upiti na bazu i prepisivanje
+    generacije kod kompakcije idu bez njega.
+    Sa n_features većim od osnovnih, red nosi i rolling feature-e košnice
+    (Observations.HiveWindow), isto kao vektor koji je model dobio pri scoringu.
+    """
+
+    def __init__(self, directory: str = "training_set", n_features: int = len(FEATURE_NAMES)):
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._compact_lock = threading.Lock()
+
+        if os.path.exists(os.path.join(directory, HEADER_FILE)):
+            self.count, self.synced_feedback_id, self.meta = _read_header(directory)
+            if self.meta["n_features"] != n_features:
+                raise ValueError(f"Training set ima {self.meta['n_features']} feature-a, "
+                                 f"očekivano {n_features}")
+            self._truncate_to_count()
+        else:
+            os.makedirs(os.path.join(directory, "gen-0"), exist_ok=True)
+            self.count, self.synced_feedback_id = 0, 0
+            self.meta = {"n_features": n_features, "classes": [], "generation": 0,
+                         "compacted_count": 0}
+            for name in COLUMNS:
+                open(_column_path(directory, 0, name), "wb").close()
+            _write_header(directory, 0, 0, self.meta)
+
+        self._class_index = {label: i for i, label in enumerate(self.meta["classes"])}
+        # Najveći Feedback.Id po opservaciji iznad watermark-a: sync preskače red
+        # koji je već dodan ili ga je noviji feedback iste opservacije zamijenio
+        # (kompakcija uklanja zamijenjene redove, pa se ne traže u kolonama)
+        self._latest_feedback = {}
+        columns = _map_columns(directory, self.count, self.meta)
+        above = columns["feedback_id"] > self.synced_feedback_id
+        self._track_latest(columns["feedback_id"][above].tolist(),
+                           columns["observation_id"][above].tolist())
+        del columns, above
+
+    def _track_latest(self, feedback_ids, observation_ids):
+        for feedback_id, observation_id in zip(feedback_ids, observation_ids):
+            if feedback_id > self._latest_feedback.get(observation_id, self.synced_feedback_id):
+                self._latest_feedback[observation_id] = feedback_id
+
+    def _advance_watermark(self, feedback_id: int):
+        if feedback_id > self.synced_feedback_id:
+            self.synced_feedback_id = feedback_id
+            self._latest_feedback = {observation_id: latest for observation_id, latest
+                                     in self._latest_feedback.items() if latest > feedback_id}
+        self._update_count()
+
+    def _truncate_to_count(self):
+        """Nakon pada: redovi upisani poslije zadnjeg ažuriranja headera se odbacuju"""
+        for name, dtype in COLUMNS.items():
+            width = self.meta["n_features"] if name == "features" else 1
+            path = _column_path(self.directory, self.meta["generation"], name)
+            size = self.count * width * dtype.itemsize
+            if os.path.getsize(path) > size:
+                with open(path, "r+b") as f:
+                    f.truncate(size)
+
+    def _update_count(self):
+        """Prefiks headera na mjestu (broj redova + sync Id), nakon upisa kolona"""
+        with open(os.path.join(self.directory, HEADER_FILE), "r+b") as f:
+            magic, version, _, _, json_len = _PREFIX.unpack(f.read(_PREFIX.size))
+            f.seek(0)
+            f.write(_PREFIX.pack(magic, version, self.count, self.synced_feedback_id, json_len))
+
+    def _label_indices(self, labels: Sequence[str]) -> np.ndarray:
+        new_labels = [label for label in dict.fromkeys(labels) if label not in self._class_index]
+        if new_labels:
+            for label in new_labels:
+                self._class_index[label] = len(self.meta["classes"])
+                self.meta["classes"].append(label)
+            _write_header(self.directory, self.count, self.synced_feedback_id, self.meta)
+        return np.fromiter((self._class_index[label] for label in labels),
+                           dtype=COLUMNS["label"], count=len(labels))
+
+    def _append_locked(self, feedback_ids, observation_ids, features, labels) -> int:
+        n = len(labels)
+        if n == 0:
+            return 0
+        features = np.asarray(features, dtype=COLUMNS["features"]).reshape(n, self.meta["n_features"])
+        values = {
+            "feedback_id": np.asarray(feedback_ids, dtype=COLUMNS["feedback_id"]),
+            "observation_id": np.asarray(observation_ids, dtype=COLUMNS["observation_id"]),
+            "features": features,
+            "label": self._label_indices(labels)
+        }
+        try:
+            for name, array in values.items():
+                with open(_column_path(self.directory, self.meta["generation"], name), "ab") as f:
+                    f.write(np.ascontiguousarray(array).tobytes())
+        except OSError:
+            # Djelimičan upis bi pomjerio kolone jednu u odnosu na drugu
+            self._truncate_to_count()
+            raise
+        self.count += n
+        self._update_count()
+        self._track_latest(values["feedback_id"].tolist(), values["observation_id"].tolist())
+        return n
+
+    def append(self, feedback_id: int, observation_id: int, features: List[float], label: str):
+        """Jedan novi primjer (poziva se iz /feedback)"""
+        with self._lock:
+            self._append_locked([feedback_id], [observation_id], [features], [label])
+
+    def sync_from_database(self, chunk_size: int = 1000) -> int:
+        """
+        Dodaj Feedback redove kojih još nema (keyset od zadnjeg sinhronizovanog Id-a).
+        Watermark ne prelazi settled_feedback_id - red čija je transakcija još
+        otvorena (manji Id, vidljiv kasnije) ulazi u sljedeću sinhronizaciju.
+        Chunk-ovi se čitaju bez lock-a; /feedback u međuvremenu dodaje redove.
+        """
+        settled = settled_feedback_id()
+        added = 0
+        for rows in iter_feedback_rows(self.synced_feedback_id, chunk_size):
+            with self._lock:
+                new_rows = [row for row in rows
+                            if row[0] > self._latest_feedback.get(row[1], self.synced_feedback_id)]
+                added += self._append_locked(
+                    [row[0] for row in new_rows],
+                    [row[1] for row in new_rows],
+                    [self._row_features(row) for row in new_rows],
+                    [row[7] for row in new_rows]
+                )
+                self._advance_watermark(min(rows[-1][0], settled))
+        if added:
+            logger.info(f"Training set: {added} novih primjera iz baze")
+        return added
+
+    def _row_features(self, row) -> List[float]:
+        features = [row[2], row[3], row[4], row[5], int(row[6])]
+        if self.meta["n_features"] == len(FEATURE_NAMES):
+            return features
+        return hive_features(features, row[8])
+
+    def needs_compaction(self) -> bool:
+        """Dovoljno novih redova od zadnje kompakcije (min COMPACT_MIN_ROWS ili +25%)"""
+        compacted = self.meta["compacted_count"]
+        return self.count - compacted >= max(COMPACT_MIN_ROWS, compacted // 4)
+
+    def compact(self) -> int:
+        """
+        Deduplikacija: po opservaciji ostaje samo zadnji feedback (najveći Id).
+        Nova generacija se piše bez lock-a iz redova postojećih na početku;
+        redovi dodani u međuvremenu se prenose (bez deduplikacije) pod lock-om,
+        pa se header zamijeni atomski. Čitaoci koji još mapiraju staru
+        generaciju ne smetaju. Vraća broj uklonjenih redova.
+        """
+        with self._compact_lock:
+            with self._lock:
+                count, meta = self.count, dict(self.meta)
+            columns = _map_columns(self.directory, count, meta)
+            observation_ids = columns["observation_id"]
+            order = np.lexsort((columns["feedback_id"], observation_ids))
+            is_last = np.ones(len(order), dtype=bool)
+            is_last[:-1] = observation_ids[order][1:] != observation_ids[order][:-1]
+            # Redoslijed pristizanja ostaje isti
+            keep = np.sort(order[is_last])
+
+            old_generation = meta["generation"]
+            generation = old_generation + 1
+            os.makedirs(os.path.join(self.directory, f"gen-{generation}"), exist_ok=True)
+            for name, array in columns.items():
+                with open(_column_path(self.directory, generation, name), "wb") as f:
+                    f.write(np.ascontiguousarray(array[keep]).tobytes())
+            del columns, observation_ids
+
+            with self._lock:
+                tail = _map_columns(self.directory, self.count, self.meta)
+                for name, array in tail.items():
+                    with open(_column_path(self.directory, generation, name), "ab") as f:
+                        f.write(np.ascontiguousarray(array[count:]).tobytes())
+                        f.flush()
+                        os.fsync(f.fileno())
+                new_count = len(keep) + self.count - count
+                meta = dict(self.meta, generation=generation, compacted_count=new_count)
+                _write_header(self.directory, new_count, self.synced_feedback_id, meta)
+
+                removed = self.count - new_count
+                self.count, self.meta = new_count, meta
+                del tail
+            shutil.rmtree(os.path.join(self.directory, f"gen-{old_generation}"),
+                          ignore_errors=True)
+            logger.info(f"Training set kompaktiran: {new_count} redova, uklonjeno {removed}")
+            return removed
+
+    def get_info(self) -> dict:
+        return {
+            "directory": self.directory,
+            "rows": self.count,
+            "classes": len(self.meta["classes"]),
+            "synced_feedback_id": self.synced_feedback_id,
+            "generation": self.meta["generation"],
+            "needs_compaction": self.needs_compaction()
+        }
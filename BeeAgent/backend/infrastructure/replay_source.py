@@ -0,0 +1,147 @@
+# backend/infrastructure/replay_source.py
+import sqlite3
+import numpy as np
+from typing import Iterator, Optional, Tuple
+from infrastructure.database import get_connection
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Kolone koje replay čita: Feedback.Id, 5 feature-a, originalna predikcija, labela
+_SQLSERVER_QUERY = """
+    SELECT TOP (?) f.Id, o.Temperature, o.Humidity, o.Frames, o.Strength, o.Varoa,
+           o.PredictedAction, f.UserLabel
+    FROM Feedback f
+    JOIN Observations o ON o.Id = f.ObservationId
+    WHERE f.Id > ?
+    ORDER BY f.Id
+"""
+
+_SQLITE_QUERY = """
+    SELECT f.Id, o.Temperature, o.Humidity, o.Frames, o.Strength, o.Varoa,
+           o.PredictedAction, f.UserLabel
+    FROM Feedback f
+    JOIN Observations o ON o.Id = f.ObservationId
+    WHERE f.Id > ?
+    ORDER BY f.Id
+    LIMIT ?
+"""
+
+_SQLITE_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS Observations (
+        Id INTEGER PRIMARY KEY,
+        Timestamp TEXT,
+        Temperature REAL NOT NULL,
+        Humidity REAL NOT NULL,
+        Frames INTEGER NOT NULL,
+        Strength INTEGER NOT NULL,
+        Varoa INTEGER NOT NULL,
+        PredictedAction TEXT,
+        Status TEXT,
+        Confidence REAL
+    );
+    CREATE TABLE IF NOT EXISTS Feedback (
+        Id INTEGER PRIMARY KEY,
+        ObservationId INTEGER NOT NULL,
+        UserLabel TEXT NOT NULL,
+        Correct INTEGER NOT NULL,
+        Comment TEXT,
+        CreatedAt TEXT
+    );
+"""
+
+ReplayChunk = Tuple[np.ndarray, np.ndarray, np.ndarray]
+
+class ReplaySource:
+    """
+    Izvor za replay: Feedback JOIN Observations, keyset paginacija po Feedback.Id.
+    kind = "sqlite" (lokalna kopija baze) ili "sqlserver" (produkcijska baza).
+    Objekat je mali i može se poslati u drugi proces.
+    """
+
+    def __init__(self, kind: str = "sqlite", path: Optional[str] = None):
+        if kind not in ("sqlite", "sqlserver"):
+            raise ValueError(f"Nepoznat izvor: {kind}")
+        if kind == "sqlite" and not path:
+            raise ValueError("SQLite izvor zahtijeva putanju")
+        self.kind = kind
+        self.path = path
+
+    def iter_chunks(self, chunk_size: int = 50000) -> Iterator[ReplayChunk]:
+        """Vraća (features n x 5, originalne predikcije, labele) po chunk-u"""
+        conn = sqlite3.connect(self.path) if self.kind == "sqlite" else get_connection()
+        try:
+            cursor = conn.cursor()
+            last_id = 0
+            while True:
+                if self.kind == "sqlite":
+                    cursor.execute(_SQLITE_QUERY, (last_id, chunk_size))
+                else:
+                    cursor.execute(_SQLSERVER_QUERY, (chunk_size, last_id))
+
+                rows = cursor.fetchall()
+                if not rows:
+                    break
+
+                last_id = rows[-1][0]
+                features = np.array([tuple(row[1:6]) for row in rows], dtype=float)
+                original = np.array([row[6] or "" for row in rows])
+                labels = np.array([row[7] for row in rows])
+                yield features, original, labels
+
+                if len(rows) < chunk_size:
+                    break
+        finally:
+            conn.close()
+
+
+def snapshot_to_sqlite(path: str, chunk_size: int = 50000) -> int:
+    """
+    Napravi lokalnu SQLite kopiju (samo opservacije s feedbackom) za replay.
+    Čita SQL Server u chunk-ovima, tako da memorija ne raste s historijom.
+    """
+    target = sqlite3.connect(path)
+    target.executescript(_SQLITE_SCHEMA)
+    source = get_connection()
+    copied = 0
+
+    try:
+        cursor = source.cursor()
+        last_id = 0
+        while True:
+            cursor.execute("""
+                SELECT TOP (?) f.Id, f.ObservationId, f.UserLabel, f.Correct,
+                       o.Timestamp, o.Temperature, o.Humidity, o.Frames,
+                       o.Strength, o.Varoa, o.PredictedAction, o.Status, o.Confidence
+                FROM Feedback f
+                JOIN Observations o ON o.Id = f.ObservationId
+                WHERE f.Id > ?
+                ORDER BY f.Id
+            """, (chunk_size, last_id))
+
+            rows = cursor.fetchall()
+            if not rows:
+                break
+            last_id = rows[-1][0]
+
+            target.executemany(
+                "INSERT OR REPLACE INTO Observations VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [(r[1], str(r[4]), r[5], r[6], r[7], r[8], int(r[9]), r[10], r[11], r[12])
+                 for r in rows]
+            )
+            target.executemany(
+                "INSERT OR REPLACE INTO Feedback (Id, ObservationId, UserLabel, Correct) "
+                "VALUES (?, ?, ?, ?)",
+                [(r[0], r[1], r[2], int(r[3])) for r in rows]
+            )
+            target.commit()
+            copied += len(rows)
+            logger.info(f"Snapshot: kopirano {copied} primjera")
+
+            if len(rows) < chunk_size:
+                break
+    finally:
+        source.close()
+        target.close()
+
+    return copied
@@ -0,0 +1,201 @@
+# backend/infrastructure/settings_repository.py
+import dataclasses
+import threading
+from typing import Callable, List, Optional, Tuple
+from domain.entities import SystemSettings
+from infrastructure.database import get_connection
+import logging
+
+logger = logging.getLogger(__name__)
+
+class SettingsRepository:
+    """Repozitorij za SystemSettings tabelu (jedan red, Id = 1)"""
+
+    def get_system_settings(self) -> SystemSettings:
+        """Dohvati postavke sistema"""
+        return self.get_versioned_settings()[0]
+
+    def get_versioned_settings(self) -> Tuple[SystemSettings, Optional[bytes]]:
+        """Postavke i RowVer istim SELECT-om (RowVer uvijek pripada pročitanom redu)"""
+        conn = get_connection()
+        cursor = conn.cursor()
+
+        try:
+            cursor.execute("""
+                SELECT Id, GoldThreshold, EnableRetraining,
+                       NewGoldSinceLastTrain, ExplorationRate, ReviewRules, RowVer
+                FROM SystemSettings
+                WHERE Id = 1
+            """)
+
+            row = cursor.fetchone()
+            if not row:
+                return SystemSettings(), None
+
+            return SystemSettings(
+                id=row[0],
+                gold_threshold=row[1],
+                enable_retraining=bool(row[2]),
+                new_gold_since_last_train=row[3],
+                exploration_rate=row[4],
+                review_rules=row[5]
+            ), bytes(row[6])
+        finally:
+            conn.close()
+
+    def get_row_version(self) -> Optional[bytes]:
+        """Jeftina provjera da li se red promijenio (ROWVERSION)"""
+        conn = get_connection()
+        cursor = conn.cursor()
+
+        try:
+            cursor.execute("SELECT RowVer FROM SystemSettings WHERE Id = 1")
+            row = cursor.fetchone()
+            return bytes(row[0]) if row else None
+        finally:
+            conn.close()
+
+    def save_settings(self, settings: SystemSettings):
+        """
+        Sačuvaj admin postavke. NewGoldSinceLastTrain se ne upisuje - mijenja se
+        samo atomski (increment/consume); upis iz snapshot-a bi poništio feedback
+        pristigao između čitanja i upisa.
+        """
+        conn = get_connection()
+        cursor = conn.cursor()
+
+        try:
+            cursor.execute("""
+                UPDATE SystemSettings
+                SET GoldThreshold = ?,
+                    EnableRetraining = ?,
+                    ExplorationRate = ?,
+                    ReviewRules = ?
+                WHERE Id = 1
+            """, (settings.gold_threshold, int(settings.enable_retraining),
+                  settings.exploration_rate, settings.review_rules))
+            conn.commit()
+
+        except Exception as e:
+            conn.rollback()
+            logger.error(f"Greška pri čuvanju postavki: {e}")
+            raise e
+        finally:
+            conn.close()
+
+    def increment_new_gold(self, count: int = 1):
+        """Novi gold primjer (feedback) - atomski inkrement brojača"""
+        self._add_new_gold(count)
+
+    def consume_new_gold(self, count: int):
+        """
+        Oduzmi primjere iskorištene u treningu.
+        Feedback pristigao tokom treninga ostaje u brojaču.
+        """
+        self._add_new_gold(-count)
+
+    def _add_new_gold(self, delta: int):
+        conn = get_connection()
+        cursor = conn.cursor()
+
+        try:
+            cursor.execute("""
+                UPDATE SystemSettings
+                SET NewGoldSinceLastTrain =
+                    CASE WHEN NewGoldSinceLastTrain + ? < 0 THEN 0
+                         ELSE NewGoldSinceLastTrain + ? END
+                WHERE Id = 1
+            """, (delta, delta))
+            conn.commit()
+
+        except Exception as e:
+            conn.rollback()
+            logger.error(f"Greška pri ažuriranju gold brojača: {e}")
+            raise e
+        finally:
+            conn.close()
+
+
+class CachedSettingsRepository:
+    """
+    Keš iznad SettingsRepository-ja: čitanja su iz memorije.
+    Snapshot se osvježava kad se RowVer promijeni (refresh_if_changed)
+    ili odmah nakon admin izmjene; pretplatnici dobijaju nove postavke.
+    Gold brojač (NewGoldSinceLastTrain) mijenja RowVer pri svakom feedbacku,
+    ali sam po sebi ne obavještava pretplatnike - čita se iz snapshot-a.
+    """
+
+    def __init__(self, repository: Optional[SettingsRepository] = None):
+        self.repository = repository or SettingsRepository()
+        self._snapshot = SystemSettings()
+        self._row_version: Optional[bytes] = None
+        self._subscribers: List[Callable[[SystemSettings], None]] = []
+        self._lock = threading.Lock()
+
+        try:
+            self._reload()
+        except Exception as e:
+            logger.warning(f"Postavke nisu učitane, koriste se podrazumijevane: {e}")
+
+    def subscribe(self, callback: Callable[[SystemSettings], None]):
+        """Registruj callback koji prima nove postavke (odmah dobija trenutne)"""
+        self._subscribers.append(callback)
+        callback(self.get_system_settings())
+
+    def unsubscribe(self, callback: Callable[[SystemSettings], None]):
+        """Ukloni callback (npr. kad worker prestane biti leader)"""
+        if callback in self._subscribers:
+            self._subscribers.remove(callback)
+
+    def get_system_settings(self) -> SystemSettings:
+        """Kopija snapshot-a - bez pristupa bazi"""
+        return dataclasses.replace(self._snapshot)
+
+    def refresh_if_changed(self) -> bool:
+        """Provjeri RowVer; ako se promijenio, učitaj red i obavijesti pretplatnike"""
+        if self.repository.get_row_version() == self._row_version:
+            return False
+        self._reload()
+        return True
+
+    def save_settings(self, settings: SystemSettings):
+        """Admin izmjena: upiši u bazu i odmah proširi nove postavke"""
+        self.repository.save_settings(settings)
+        self._reload()
+
+    def increment_new_gold(self, count: int = 1):
+        self.repository.increment_new_gold(count)
+        self._adjust_new_gold(count)
+
+    def consume_new_gold(self, count: int):
+        self.repository.consume_new_gold(count)
+        self._adjust_new_gold(-count)
+
+    def _adjust_new_gold(self, delta: int):
+        with self._lock:
+            snapshot = dataclasses.replace(self._snapshot)
+            snapshot.new_gold_since_last_train = max(
+                0, snapshot.new_gold_since_last_train + delta
+            )
+            self._snapshot = snapshot
+
+    @staticmethod
+    def _without_counter(settings: SystemSettings) -> SystemSettings:
+        return dataclasses.replace(settings, new_gold_since_last_train=0)
+
+    def _reload(self):
+        with self._lock:
+            snapshot, row_version = self.repository.get_versioned_settings()
+            changed = (self._row_version is None
+                       or self._without_counter(snapshot) != self._without_counter(self._snapshot))
+            self._snapshot = snapshot
+            self._row_version = row_version
+        if changed:
+            self._notify(snapshot)
+
+    def _notify(self, settings: SystemSettings):
+        for callback in self._subscribers:
+            try:
+                callback(dataclasses.replace(settings))
+            except Exception as e:
+                logger.error(f"Greška u pretplatniku postavki: {e}")
@@ -0,0 +1,153 @@
+# backend/infrastructure/spool.py
+import glob
+import json
+import os
+import threading
+import time
+from typing import List, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+CURRENT_SEGMENT = "current.jsonl"
+# Zapisi koje baza odbija sami po sebi (npr. predugačko polje) - ne ponavljaju se
+DEAD_LETTER_FILE = "dead-letter.jsonl"
+
+class ObservationSpool:
+    """
+    Lokalni append-only spool (JSON linije) za opservacije kad baza nije dostupna.
+    Group commit: pozivaoci pišu u isti fajl, pozadinski thread radi jedan
+    fsync za sve zapise pristigle dok je prethodni fsync trajao; append se
+    vraća tek kad je zapis na disku. fsync_interval_s > 0 dodatno čeka da se
+    skupi više zapisa (manje fsync-ova, veća latencija).
+    Pun segment se zatvara (rotate) i replayer ga prazni u bazu.
+    """
+
+    def __init__(self, directory: str = "spool", max_segment_bytes: int = 16 * 1024 * 1024,
+                 fsync_interval_s: float = 0.0):
+        self.directory = directory
+        self.max_segment_bytes = max_segment_bytes
+        self.fsync_interval_s = fsync_interval_s
+        os.makedirs(directory, exist_ok=True)
+
+        self._cond = threading.Condition()
+        self._written_seq = 0
+        self._durable_seq = 0
+        self._file = self._open_current()
+        self._thread = threading.Thread(target=self._run, name="spool-fsync", daemon=True)
+        self._thread.start()
+
+    def _open_current(self):
+        path = os.path.join(self.directory, CURRENT_SEGMENT)
+        f = open(path, "ab")
+        # Nakon pada zadnja linija može biti prekinuta - nova počinje u novom redu
+        if f.tell() > 0:
+            with open(path, "rb") as existing:
+                existing.seek(-1, os.SEEK_END)
+                if existing.read(1) != b"\n":
+                    f.write(b"\n")
+        return f
+
+    def append(self, record: dict):
+        """Upiši zapis i sačekaj fsync (dijeljen s ostalim zapisima iz istog prozora)"""
+        self.append_many([record])
+
+    def append_many(self, records: List[dict]):
+        """Više zapisa jednim upisom i jednim čekanjem na fsync (batch s gateway-a)"""
+        data = b"".join((json.dumps(record, default=str, ensure_ascii=False) + "\n").encode("utf-8")
+                        for record in records)
+        with self._cond:
+            self._file.write(data)
+            self._written_seq += 1
+            seq = self._written_seq
+            if self._file.tell() >= self.max_segment_bytes:
+                self._rotate_locked()
+            self._cond.notify_all()
+            while self._durable_seq < seq:
+                self._cond.wait()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._written_seq == self._durable_seq:
+                    self._cond.wait()
+                if self.fsync_interval_s:
+                    self._cond.wait(self.fsync_interval_s)
+                target = self._written_seq
+                f = self._file
+                f.flush()
+            try:
+                # fsync van lock-a - pisci mogu nastaviti dodavati zapise
+                os.fsync(f.fileno())
+            except (OSError, ValueError):
+                # Segment je u međuvremenu rotiran (rotate radi svoj fsync)
+                pass
+            with self._cond:
+                self._durable_seq = max(self._durable_seq, target)
+                self._cond.notify_all()
+
+    def _rotate_locked(self) -> Optional[str]:
+        if self._file.tell() == 0:
+            return None
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.close()
+        self._durable_seq = self._written_seq
+
+        segment = os.path.join(self.directory, f"segment-{time.time_ns()}.jsonl")
+        os.replace(os.path.join(self.directory, CURRENT_SEGMENT), segment)
+        self._file = self._open_current()
+        return segment
+
+    def rotate(self) -> Optional[str]:
+        """Zatvori tekući segment da ga replayer može preuzeti"""
+        with self._cond:
+            segment = self._rotate_locked()
+            self._cond.notify_all()
+            return segment
+
+    def pending_segments(self) -> List[str]:
+        """Zatvoreni segmenti, najstariji prvi"""
+        return sorted(glob.glob(os.path.join(self.directory, "segment-*.jsonl")))
+
+    def has_data(self) -> bool:
+        with self._cond:
+            current_bytes = self._file.tell()
+        return current_bytes > 0 or bool(self.pending_segments())
+
+    @staticmethod
+    def read_segment(path: str) -> List[dict]:
+        """Zapisi iz segmenta; prekinute/oštećene linije se preskaču"""
+        records = []
+        with open(path, "rb") as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    logger.warning(f"Preskočena oštećena linija u {path}")
+        return records
+
+    @staticmethod
+    def remove_segment(path: str):
+        os.remove(path)
+
+    def dead_letter(self, record: dict, error: str):
+        """Sačuvaj odbijen zapis s razlogom (za ručnu provjeru) umjesto beskonačnog replay-a"""
+        line = json.dumps({"record": record, "error": error}, default=str, ensure_ascii=False)
+        with open(os.path.join(self.directory, DEAD_LETTER_FILE), "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def get_info(self) -> dict:
+        segments = self.pending_segments()
+        with self._cond:
+            current_bytes = self._file.tell()
+        dead_letter_path = os.path.join(self.directory, DEAD_LETTER_FILE)
+        return {
+            "directory": self.directory,
+            "pending_segments": len(segments),
+            "pending_bytes": current_bytes + sum(os.path.getsize(s) for s in segments),
+            "dead_letter_bytes": (os.path.getsize(dead_letter_path)
+                                  if os.path.exists(dead_letter_path) else 0)
+        }
@@ -0,0 +1,35 @@
+# backend/tests/conftest.py
+import importlib
+import os
+import sys
+import types
+
+# Testovi importuju module backend-a kao top-level pakete (kao web.main)
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+def _pyodbc_stub() -> types.ModuleType:
+    """
+    Zamjena za pyodbc kad ODBC driver nije instaliran: samo hijerarhija grešaka
+    (is_connectivity_error, retry_on_deadlock). Testovi ne otvaraju konekcije.
+    """
+    module = types.ModuleType("pyodbc")
+    module.Error = type("Error", (Exception,), {})
+    module.InterfaceError = type("InterfaceError", (module.Error,), {})
+    module.DatabaseError = type("DatabaseError", (module.Error,), {})
+    for name in ("OperationalError", "DataError", "IntegrityError",
+                 "ProgrammingError", "InternalError", "NotSupportedError"):
+        setattr(module, name, type(name, (module.DatabaseError,), {}))
+
+    def connect(*args, **kwargs):
+        raise module.InterfaceError("IM002", "pyodbc stub: nema ODBC drivera")
+
+    module.connect = connect
+    return module
+
+try:
+    # Pravi modul se učitava samo radi provjere (ImportError i kad nema libodbc)
+    importlib.import_module("pyodbc")
+except ImportError:
+    sys.modules["pyodbc"] = _pyodbc_stub()
@@ -0,0 +1,86 @@
+# backend/tests/test_admission_service.py
+import pytest
+from application.services import admission_service
+from application.services.admission_service import AdmissionController, TokenBucket
+
+class Clock:
+    """Zamjena za time.monotonic (testovi pomjeraju vrijeme ručno)"""
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(admission_service.time, "monotonic", clock)
+    return clock
+
+def make_controller(depth=0, **kwargs) -> AdmissionController:
+    controller = AdmissionController(queue_depth=lambda: depth, **kwargs)
+    controller.refresh_depth()
+    return controller
+
+def test_token_bucket_refills_at_rate():
+    bucket = TokenBucket(rate=2.0, burst=1.0)
+    now = bucket.updated
+    assert bucket.try_take(now) == 0.0
+    assert bucket.try_take(now) == pytest.approx(0.5)
+    assert bucket.try_take(now + 0.5) == 0.0
+
+def test_client_over_burst_gets_429_with_retry_after(clock):
+    controller = make_controller(client_rate=1.0, client_burst=2.0)
+    assert controller.admit("a").admitted
+    assert controller.admit("a").admitted
+
+    decision = controller.admit("a")
+    assert (decision.admitted, decision.status_code, decision.retry_after_s) == (False, 429, 1)
+    assert controller.admit("b").admitted
+    assert controller.rejected["rate_limited"] == 1
+
+    clock.now += 1.0
+    assert controller.admit("a").admitted
+
+def test_backlog_over_limit_gets_503(clock):
+    controller = make_controller(depth=95, max_queue_depth=100, default_service_rate=10.0)
+    assert controller.admit("a", count=5).admitted
+
+    decision = controller.admit("b", count=25)
+    assert (decision.admitted, decision.status_code) == (False, 503)
+    # 25 opservacija iznad granice pri 10/s
+    assert decision.retry_after_s == 3
+    assert controller.rejected["overloaded"] == 1
+    assert controller.get_status()["queue_depth"] == 100
+
+def test_admit_estimates_wait_from_depth_and_service_rate(clock):
+    controller = make_controller(depth=40, default_service_rate=20.0)
+    decision = controller.admit("a", count=10)
+    assert decision.estimated_wait_ms == pytest.approx(50 / 20.0 * 1000)
+
+def test_refresh_depth_replaces_local_count_and_survives_db_errors(clock):
+    depths = [10]
+    def queue_depth():
+        if not depths:
+            raise ConnectionError("baza nedostupna")
+        return depths.pop()
+
+    controller = AdmissionController(queue_depth=queue_depth)
+    assert controller.refresh_depth()
+    controller.admit("a", count=5)
+    assert controller.get_status()["queue_depth"] == 15
+
+    assert not controller.refresh_depth()
+    assert controller.get_status()["queue_depth"] == 15
+
+def test_record_processed_and_apply_service_rate(clock):
+    controller = make_controller(depth=10, default_service_rate=10.0, ewma_alpha=0.5)
+    controller.record_processed(elapsed_s=1.0, count=2)
+    # EWMA: 0.1 + 0.5 * (0.5 - 0.1)
+    assert controller.service_rate == pytest.approx(1 / 0.3)
+    assert controller.get_status()["queue_depth"] == 8
+
+    controller.apply_service_rate(50.0)
+    assert controller.service_rate == pytest.approx(50.0)
+    controller.apply_service_rate(0)
+    assert controller.service_rate == pytest.approx(50.0)
@@ -0,0 +1,129 @@
+# backend/tests/test_archive.py
+import copy
+from datetime import datetime, timedelta
+import pyodbc
+import pytest
+from application.runners.archive_runner import ArchiveRunner
+from infrastructure import database
+
+OLD = datetime.now() - timedelta(days=90)
+
+class FakeDb:
+    """Observations, ObservationsArchive i Feedback u memoriji"""
+    def __init__(self):
+        self.observations = {}
+        self.archive = {}
+        self.feedback = []
+
+    def add(self, id_, timestamp=OLD, status="processed", review_severity=None,
+            reviewed_at=None):
+        self.observations[id_] = {"Id": id_, "Timestamp": timestamp, "Status": status,
+                                  "PredictedAction": "feed", "Confidence": 0.9,
+                                  "ReviewSeverity": review_severity, "ReviewedAt": reviewed_at}
+
+class FakeCursor:
+    """Interpretira samo upite arhiviranja, vraćanja iz arhive i feedbacka"""
+    def __init__(self, conn):
+        self.conn = conn
+        self.db = conn.db
+        self.rowcount = -1
+        self._row = None
+
+    def execute(self, sql, params=()):
+        params = params if isinstance(params, tuple) else (params,)
+        if "DELETE TOP" in sql:
+            self._archive(*params)
+        elif "FROM ObservationsArchive WHERE Id" in sql and "IDENTITY_INSERT" in sql:
+            observation_id = params[0]
+            if observation_id not in self.db.observations and observation_id in self.db.archive:
+                self.db.observations[observation_id] = self.db.archive.pop(observation_id)
+        elif "INSERT INTO Feedback" in sql:
+            observation_id = params[0]
+            if observation_id not in self.db.observations:
+                raise pyodbc.IntegrityError("23000", "FK_Feedback_Observations")
+            self.db.feedback.append(observation_id)
+            self._row = (len(self.db.feedback),)
+        elif "SELECT PredictedAction, Confidence" in sql:
+            row = self.db.observations.get(params[0])
+            self._row = (row["PredictedAction"], row["Confidence"]) if row else None
+        elif "SET ReviewedAt" in sql:
+            row = self.db.observations[params[0]]
+            if row["ReviewSeverity"] is not None and row["ReviewedAt"] is None:
+                row["ReviewedAt"] = datetime.now()
+        elif "sp_getapplock" in sql or "MERGE ActionRollups" in sql:
+            pass
+        else:
+            raise AssertionError(f"Neočekivan upit: {sql}")
+
+    def _archive(self, batch_size, older_than):
+        eligible = [row for id_, row in sorted(self.db.observations.items())
+                    if row["Status"] == "processed" and row["Timestamp"] < older_than
+                    and (row["ReviewSeverity"] is None or row["ReviewedAt"] is not None)
+                    and id_ not in self.db.feedback][:batch_size]
+        for row in eligible:
+            self.db.archive[row["Id"]] = self.db.observations.pop(row["Id"])
+        self.rowcount = len(eligible)
+
+    def fetchone(self):
+        return self._row
+
+class FakeConnection:
+    """Rollback vraća stanje s početka transakcije"""
+    def __init__(self, db):
+        self.db = db
+        self._saved = copy.deepcopy(vars(db))
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def commit(self):
+        self._saved = copy.deepcopy(vars(self.db))
+
+    def rollback(self):
+        vars(self.db).update(copy.deepcopy(self._saved))
+
+    def close(self):
+        pass
+
+@pytest.fixture
+def db(monkeypatch):
+    db = FakeDb()
+    monkeypatch.setattr(database, "get_connection", lambda: FakeConnection(db))
+    return db
+
+def test_runner_skips_rows_with_feedback_or_open_review(db):
+    db.add(1)
+    db.add(2)
+    db.add(3, review_severity=2.0)
+    db.add(4, review_severity=2.0, reviewed_at=OLD)
+    db.add(5, timestamp=datetime.now())
+    db.add(6, status="queued")
+    db.feedback.append(2)
+
+    assert ArchiveRunner(archive_after_days=30).step() == 2
+    assert sorted(db.archive) == [1, 4]
+    assert sorted(db.observations) == [2, 3, 5, 6]
+
+def test_runner_moves_rows_in_batches(db):
+    for id_ in range(1, 6):
+        db.add(id_)
+    runner = ArchiveRunner(archive_after_days=30, batch_size=2)
+
+    moved = [runner.step() for _ in range(4)]
+
+    assert moved == [2, 2, 1, 0]
+    assert [runner.has_backlog(m) for m in moved] == [True, True, False, False]
+    assert runner.archived_count == 5
+    assert sorted(db.archive) == [1, 2, 3, 4, 5] and db.observations == {}
+
+def test_feedback_on_archived_observation_restores_it(db):
+    db.add(1, review_severity=1.0, reviewed_at=OLD)
+    db.add(2)
+    ArchiveRunner(archive_after_days=30).step()
+
+    assert database.save_feedback(1, "feed", correct=True) == 1
+
+    assert sorted(db.observations) == [1] and sorted(db.archive) == [2]
+    assert db.feedback == [1]
+    # Restorirana opservacija s feedbackom više se ne arhivira
+    assert ArchiveRunner(archive_after_days=30).step() == 0
@@ -0,0 +1,238 @@
+# backend/tests/test_coordination.py
+import json
+import os
+import subprocess
+import sys
+import pyodbc
+import pytest
+from infrastructure import coordination
+from infrastructure.coordination import (AgentSnapshotStore, DatabaseLease, FileLease,
+                                         claim_slot)
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def test_file_lease_acquire_renew_and_release(tmp_path):
+    path = str(tmp_path / "agent.lock")
+    first, second = FileLease(path, owner="w1"), FileLease(path, owner="w2")
+
+    assert first.try_acquire() and first.is_held
+    assert first.try_acquire()  # vlasnik samo potvrđuje
+    assert not second.try_acquire() and not second.is_held
+    assert second.get_holder() == {"owner": "w1"}
+
+    first.release()
+    assert not first.is_held
+    assert second.try_acquire()
+    assert first.get_holder() == {"owner": "w2"}
+    second.release()
+
+def test_file_lease_is_taken_over_when_holder_dies(tmp_path):
+    path = str(tmp_path / "agent.lock")
+    holder = subprocess.Popen(
+        [sys.executable, "-c",
+         "import sys, tests.conftest; from infrastructure.coordination import FileLease; "
+         f"lease = FileLease({path!r}, owner='dead'); print(lease.try_acquire(), flush=True); "
+         "sys.stdin.read()"],
+        cwd=BACKEND_DIR,
+        stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True)
+    try:
+        assert holder.stdout.readline().strip() == "True"
+        lease = FileLease(path, owner="w2")
+        assert not lease.try_acquire()
+    finally:
+        holder.kill()
+        holder.wait(5)
+
+    assert lease.try_acquire()
+    assert lease.get_holder() == {"owner": "w2"}
+    lease.release()
+
+def test_claim_slot_reuses_released_slots(tmp_path):
+    directory = str(tmp_path / "spool")
+    first_dir, first = claim_slot(directory)
+    second_dir, second = claim_slot(directory)
+    assert (first_dir, second_dir) == (os.path.join(directory, "worker-0"),
+                                      os.path.join(directory, "worker-1"))
+
+    first.release()
+    again_dir, again = claim_slot(directory)
+    assert again_dir == first_dir
+    with pytest.raises(RuntimeError):
+        claim_slot(directory, max_slots=2)
+    second.release()
+    again.release()
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+class FakeLeaseDb:
+    """AgentLeases u memoriji; sat baze je isti kao lokalni (Clock)"""
+    def __init__(self, clock):
+        self.clock = clock
+        self.rows = {}
+        self.down = False
+
+class FakeLeaseCursor:
+    def __init__(self, db):
+        self.db = db
+        self.rowcount = -1
+        self._row = None
+
+    def execute(self, sql, params=()):
+        now = self.db.clock()
+        if "CREATE TABLE" in sql:
+            return
+        if sql.strip().startswith("UPDATE AgentLeases"):
+            owner, ttl_ms, name, _ = params
+            row = self.db.rows.get(name)
+            self.rowcount = 0
+            if row and (row["owner"] == owner or row["expires"] < now):
+                self.db.rows[name] = {"owner": owner, "expires": now + ttl_ms / 1000}
+                self.rowcount = 1
+        elif "INSERT INTO AgentLeases" in sql:
+            name, owner, ttl_ms, _ = params
+            self.rowcount = 0
+            if name not in self.db.rows:
+                self.db.rows[name] = {"owner": owner, "expires": now + ttl_ms / 1000}
+                self.rowcount = 1
+        elif sql.startswith("DELETE FROM AgentLeases"):
+            name, owner = params
+            if self.db.rows.get(name, {}).get("owner") == owner:
+                del self.db.rows[name]
+        else:
+            raise AssertionError(f"Neočekivan upit: {sql}")
+
+class FakeConnection:
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def cursor(self):
+        return self._cursor
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+@pytest.fixture
+def lease_db(monkeypatch):
+    clock = Clock()
+    db = FakeLeaseDb(clock)
+    def connect():
+        if db.down:
+            raise pyodbc.OperationalError("08S01", "baza nedostupna")
+        return FakeConnection(FakeLeaseCursor(db))
+    monkeypatch.setattr(coordination.time, "monotonic", clock)
+    monkeypatch.setattr(coordination, "get_connection", connect)
+    monkeypatch.setattr(coordination, "create_database_if_not_exists", lambda: True)
+    return db
+
+def test_database_lease_renewal_and_expiry_takeover(lease_db):
+    first = DatabaseLease(owner="w1", ttl_s=30)
+    second = DatabaseLease(owner="w2", ttl_s=30)
+
+    assert first.try_acquire() and first.is_held
+    assert not second.try_acquire()
+
+    lease_db.clock.now += 20
+    assert first.try_acquire()  # obnova pomjera rok
+    lease_db.clock.now += 20
+    assert not second.try_acquire()
+    assert first.is_held
+
+    # Vlasnik ne obnavlja: nakon ttl_s lease preuzima drugi worker
+    lease_db.clock.now += 31
+    assert not first.is_held
+    assert second.try_acquire()
+    assert lease_db.rows["scoring-agent"]["owner"] == "w2"
+    assert not first.try_acquire()
+
+def test_database_lease_survives_db_error_until_local_expiry(lease_db):
+    lease = DatabaseLease(owner="w1", ttl_s=30)
+    assert lease.try_acquire()
+
+    lease_db.down = True
+    lease_db.clock.now += 10
+    assert lease.try_acquire()
+    lease_db.clock.now += 25
+    assert not lease.try_acquire() and not lease.is_held
+
+def test_database_lease_release_frees_it_immediately(lease_db):
+    first, second = DatabaseLease(owner="w1"), DatabaseLease(owner="w2")
+    assert first.try_acquire()
+    first.release()
+    assert not first.is_held
+    assert lease_db.rows == {}
+    assert second.try_acquire()
+
+class FakeSnapshotCursor:
+    """AgentSnapshots u memoriji: Name -> (Payload, starost u ms)"""
+    def __init__(self, table):
+        self.table = table
+        self.rowcount = -1
+        self._row = None
+
+    def execute(self, sql, params=()):
+        if "CREATE TABLE" in sql:
+            return
+        sql = sql.strip()
+        if sql.startswith("UPDATE AgentSnapshots"):
+            data, name = params
+            self.rowcount = int(name in self.table)
+            if name in self.table:
+                self.table[name] = (data, 0)
+        elif sql.startswith("INSERT INTO AgentSnapshots"):
+            name, data = params
+            self.table[name] = (data, 0)
+        elif sql.startswith("SELECT Payload"):
+            self._row = self.table.get(params[0])
+        elif sql.startswith("DELETE FROM AgentSnapshots"):
+            row = self.table.pop(params[0], None)
+            self._row = (row[0],) if row else None
+        else:
+            raise AssertionError(f"Neočekivan upit: {sql}")
+
+    def fetchone(self):
+        return self._row
+
+@pytest.fixture
+def snapshot_table(monkeypatch):
+    table = {}
+    monkeypatch.setattr(coordination, "get_connection",
+                        lambda: FakeConnection(FakeSnapshotCursor(table)))
+    return table
+
+def test_snapshot_round_trip(snapshot_table):
+    store = AgentSnapshotStore(cache_ttl_s=0)
+    store.put("leader", {"worker_id": "w1", "runner": {"processed_count": 3}})
+    store.put("leader", {"worker_id": "w1", "runner": {"processed_count": 5}})
+
+    snapshot = store.get("leader", max_age_s=60)
+    assert snapshot == {"worker_id": "w1", "runner": {"processed_count": 5},
+                        "snapshot_age_s": 0.0}
+    assert json.loads(snapshot_table["leader"][0])["runner"]["processed_count"] == 5
+    assert store.get("missing") is None
+
+def test_stale_snapshot_is_treated_as_missing(snapshot_table):
+    store = AgentSnapshotStore(cache_ttl_s=0)
+    store.put("leader", {"worker_id": "w1"})
+    snapshot_table["leader"] = (snapshot_table["leader"][0], 90000)
+
+    assert store.get("leader", max_age_s=60) is None
+    assert store.get("leader")["snapshot_age_s"] == 90.0
+
+def test_take_returns_request_once(snapshot_table):
+    store = AgentSnapshotStore()
+    store.put("model-selection-request", {"worker_id": "w2"})
+
+    assert store.take("model-selection-request") == {"worker_id": "w2"}
+    assert store.take("model-selection-request") is None
+    assert store.get("model-selection-request") is None
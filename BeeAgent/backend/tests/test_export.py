@@ -0,0 +1,106 @@
+# backend/tests/test_export.py
+import os
+from datetime import datetime, timedelta
+import pytest
+from infrastructure import export
+
+# pyarrow je opcionalna zavisnost (requirments.txt) - bez nje se export testovi preskaču
+pa_ipc = pytest.importorskip("pyarrow.ipc")
+pq = pytest.importorskip("pyarrow.parquet")
+
+DAY = datetime(2026, 5, 1, 12, 0)
+
+def observation_row(id_: int, day_offset: int) -> tuple:
+    return (id_, DAY + timedelta(days=day_offset), 34.0, 60.0, 10, 7, False,
+            "feed", "processed", 0.9, "h1")
+
+class FakeCursor:
+    """SELECT TOP (?) ... WHERE Id > ? [AND Id < ?] ORDER BY Id nad redovima u memoriji"""
+    def __init__(self, rows):
+        self.rows = rows
+        self.result = []
+
+    def execute(self, sql, params):
+        size, last_id = params[0], params[1]
+        barrier = params[2] if len(params) > 2 else None
+        matching = [row for row in self.rows
+                    if row[0] > last_id and (barrier is None or row[0] < barrier)]
+        self.result = sorted(matching)[:size]
+
+    def fetchall(self):
+        return self.result
+
+class FakeConnection:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def cursor(self):
+        return FakeCursor(self.rows)
+
+    def close(self):
+        pass
+
+@pytest.fixture
+def table(monkeypatch):
+    """Redovi tabele i barrier (Id najstarije opservacije u redu; None = nema ih)"""
+    state = {"rows": [], "barrier": None}
+    monkeypatch.setattr(export, "get_connection", lambda: FakeConnection(state["rows"]))
+    monkeypatch.setattr(export, "pending_barrier", lambda cursor: state["barrier"])
+    return state
+
+def exported_ids(files, fmt="parquet"):
+    ids = []
+    for path in files:
+        if fmt == "parquet":
+            ids.extend(pq.read_table(path).column("Id").to_pylist())
+        else:
+            ids.extend(pa_ipc.open_file(path).read_all().column("Id").to_pylist())
+    return sorted(ids)
+
+def test_export_resumes_from_watermark(table, tmp_path):
+    table["rows"] = [observation_row(i, 0) for i in range(1, 6)]
+    first = export.export_table("observations", str(tmp_path), chunk_size=2)
+    assert (first["rows"], first["watermark"]) == (5, 5)
+    assert exported_ids(first["files"]) == [1, 2, 3, 4, 5]
+    assert export.read_watermark(str(tmp_path)) == {"observations": 5}
+
+    table["rows"].extend(observation_row(i, 0) for i in range(6, 9))
+    second = export.export_table("observations", str(tmp_path), chunk_size=2)
+    assert (second["from_id"], second["rows"], second["watermark"]) == (5, 3, 8)
+    assert exported_ids(second["files"]) == [6, 7, 8]
+    assert all(os.path.basename(path).startswith("part-6") for path in second["files"])
+
+def test_watermark_stops_before_pending_observation(table, tmp_path):
+    table["rows"] = [observation_row(i, 0) for i in range(1, 6)]
+    table["barrier"] = 3
+    result = export.export_table("observations", str(tmp_path))
+    assert (result["rows"], result["watermark"]) == (2, 2)
+
+    # Opservacija 3 je obrađena - sljedeći export je ne preskače
+    table["barrier"] = None
+    result = export.export_table("observations", str(tmp_path))
+    assert exported_ids(result["files"]) == [3, 4, 5]
+
+def test_empty_export_keeps_watermark(table, tmp_path):
+    result = export.export_table("observations", str(tmp_path))
+    assert (result["rows"], result["files"]) == (0, [])
+    assert export.read_watermark(str(tmp_path)) == {}
+
+@pytest.mark.parametrize("fmt", export.FORMATS)
+def test_partition_by_day_with_evicted_writers(table, tmp_path, fmt):
+    # Dani se vraćaju (Timestamp ne prati Id); max_open=1 zatvara writer pri svakoj promjeni dana
+    days = [0, 0, 1, 0, 2, 1]
+    table["rows"] = [observation_row(i + 1, day) for i, day in enumerate(days)]
+    result = export.export_table("observations", str(tmp_path), fmt=fmt,
+                                 partition_by_day=True, chunk_size=2, max_open_partitions=1)
+
+    by_day = {}
+    for path in result["files"]:
+        assert not path.endswith(".tmp")
+        day = os.path.basename(os.path.dirname(path))
+        by_day.setdefault(day, []).append(os.path.basename(path))
+    assert sorted(by_day) == ["date=2026-05-01", "date=2026-05-02", "date=2026-05-03"]
+    assert sorted(by_day["date=2026-05-01"]) == [f"part-1-1.{fmt}", f"part-1.{fmt}"]
+    assert sorted(by_day["date=2026-05-02"]) == [f"part-1-1.{fmt}", f"part-1.{fmt}"]
+    assert exported_ids(result["files"], fmt) == [1, 2, 3, 4, 5, 6]
+    assert not any(name.endswith(".tmp") for _, _, names in os.walk(tmp_path) for name in names)
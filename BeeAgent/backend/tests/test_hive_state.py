@@ -0,0 +1,174 @@
+# backend/tests/test_hive_state.py
+import joblib
+import numpy as np
+from application.services.scoring_service import ScoringService
+from domain.entities import Observation
+from domain.observation_batch import ObservationBatch
+from infrastructure import hive_state
+from infrastructure.hive_state import (N_WINDOW_FEATURES, HiveStateStore, RollingWindow,
+                                       decode_window, encode_window)
+from infrastructure.ml import training_store
+from infrastructure.ml.training import train_from_feedback
+from infrastructure.ml.training_store import TrainingSetStore, load_training_set
+
+N_BASE = 5
+N_HIVE = N_BASE + N_WINDOW_FEATURES
+
+def reading(i: int) -> np.ndarray:
+    return np.array([20.0 + i, 60.0 - 0.5 * i, 10 + i % 3, 7, i % 2], dtype=float)
+
+def expected_stats(values: np.ndarray) -> np.ndarray:
+    """delta | mean | slope | std direktno iz prozora"""
+    delta = values[-1] - values[-2] if len(values) > 1 else np.zeros(values.shape[1])
+    t = np.arange(len(values))
+    slope = (np.polyfit(t, values, 1)[0] if len(values) > 1
+             else np.zeros(values.shape[1]))
+    return np.concatenate([delta, values.mean(axis=0), slope, values.std(axis=0)])
+
+def test_rolling_window_matches_direct_computation():
+    window = RollingWindow(size=4, n_features=N_BASE)
+    history = []
+    for i in range(11):
+        y = reading(i)
+        previous = window.push(y)
+        history.append(y)
+        stats = window.stats(y, previous)
+        np.testing.assert_allclose(stats, expected_stats(np.array(history[-4:])), atol=1e-9)
+
+def test_store_evicts_least_recently_used_hive():
+    store = HiveStateStore(window_size=3, max_hives=2)
+    store.update("a", reading(0))
+    store.update("b", reading(0))
+    store.update("a", reading(1))
+    store.update("c", reading(0))
+
+    assert store.get_info()["hives"] == 2 and store.evicted == 1
+    # "b" je izbačen - počinje bez historije (delta = 0)
+    assert store.update("b", reading(5))[:N_BASE].tolist() == [0.0] * N_BASE
+    assert len(store.feature_names()) == N_WINDOW_FEATURES
+
+def test_rebuild_from_database_fills_windows(monkeypatch):
+    rows = [("p1", "a", *reading(i)[:4], bool(reading(i)[4])) for i in range(3)]
+    rows.append(("p2", "a", *reading(9)[:4], True))
+    monkeypatch.setattr(hive_state, "iter_recent_hive_history",
+                        lambda per_hive: iter([rows[:2], rows[2:]]))
+    store = HiveStateStore(window_size=3)
+
+    assert store.rebuild_from_database() == 4
+    assert store.get_info()["hives"] == 2
+    stats = store.update("p1/a", reading(3))
+    np.testing.assert_allclose(stats, expected_stats(np.array([reading(i) for i in (1, 2, 3)])),
+                               atol=1e-9)
+
+def test_window_encoding_round_trip():
+    window = np.arange(N_WINDOW_FEATURES, dtype=float)
+    assert decode_window(encode_window(window)).tolist() == window.tolist()
+    assert encode_window(None) is None
+    assert decode_window(None).tolist() == [0.0] * N_WINDOW_FEATURES
+
+class RecordingClassifier:
+    def __init__(self, n_features):
+        self.n_features = n_features
+        self.seen = []
+
+    def predict(self, features):
+        self.seen.append(list(features))
+        return "nista", 0.9
+
+    def predict_batch(self, X):
+        self.seen.append(np.array(X))
+        return np.array(["nista"] * len(X)), np.full(len(X), 0.9)
+
+def make_batch(hive_ids, apiary_id="p1"):
+    rows = [(i + 1, np.datetime64("2026-05-01"), *reading(i), hive_id, 0.0, apiary_id)
+            for i, hive_id in enumerate(hive_ids)]
+    return ObservationBatch.from_rows(rows)
+
+def test_model_with_window_features_gets_extended_batch():
+    classifier = RecordingClassifier(N_HIVE)
+    service = ScoringService(classifier, exploration_rate=0.0, hive_state=HiveStateStore())
+    service.score_batch(make_batch(["a", "a"]))
+
+    predictions = service.score_batch(make_batch(["a", None]))
+
+    X = classifier.seen[-1]
+    assert X.shape == (2, N_HIVE)
+    assert X[0, N_BASE:].tolist() == predictions.hive_windows[0].tolist()
+    assert X[1, N_BASE:].tolist() == [0.0] * N_WINDOW_FEATURES
+    assert predictions.hive_windows[1] is None
+
+def test_same_hive_id_in_different_apiaries_has_separate_windows():
+    store = HiveStateStore()
+    service = ScoringService(RecordingClassifier(N_BASE), exploration_rate=0.0,
+                             hive_state=store)
+    service.score_batch(make_batch(["1", "1"], apiary_id="p1"))
+
+    predictions = service.score_batch(make_batch(["1"], apiary_id="p2"))
+
+    assert make_batch(["1"], apiary_id="p2").hive_keys == ["p2/1"]
+    assert store.get_info()["hives"] == 2
+    # Prvo očitanje košnice 1 u p2 - bez historije, delta = 0
+    assert predictions.hive_windows[0][:N_BASE].tolist() == [0.0] * N_BASE
+
+def test_base_model_gets_base_features_but_window_is_kept():
+    classifier = RecordingClassifier(N_BASE)
+    service = ScoringService(classifier, exploration_rate=0.0, hive_state=HiveStateStore())
+
+    predictions = service.score_batch(make_batch(["a"]))
+
+    assert classifier.seen[-1].shape == (1, N_BASE)
+    assert len(predictions.hive_windows[0]) == N_WINDOW_FEATURES
+
+def test_batch_without_hives_is_padded_for_window_model():
+    classifier = RecordingClassifier(N_HIVE)
+    service = ScoringService(classifier, exploration_rate=0.0, hive_state=HiveStateStore())
+
+    predictions = service.score_batch(make_batch([None, None]))
+
+    assert classifier.seen[-1].shape == (2, N_HIVE)
+    assert predictions.hive_windows is None
+
+def test_single_observation_uses_same_window():
+    classifier = RecordingClassifier(N_HIVE)
+    service = ScoringService(classifier, exploration_rate=0.0, hive_state=HiveStateStore())
+    observation = Observation(id=1, temperature=30.0, humidity=55.0, frames=10, strength=7,
+                              hive_id="a", apiary_id="p1")
+
+    prediction = service.score_observation(observation)
+
+    assert list(service.hive_state._windows) == ["p1/a"]
+    assert classifier.seen[-1] == observation.extract_features() + prediction.hive_window.tolist()
+
+def hive_feedback_rows():
+    window = np.linspace(-1, 1, N_WINDOW_FEATURES)
+    # (Id, ObservationId, temperature, humidity, frames, strength, varoa, label, HiveWindow)
+    return [(1, 100, 30.0, 50.0, 10, 7, False, "zalivanje", encode_window(window)),
+            (2, 101, 20.0, 60.0, 10, 5, False, "nista", None)], window
+
+def test_hive_training_set_keeps_window_from_scoring(tmp_path, monkeypatch):
+    rows, window = hive_feedback_rows()
+    monkeypatch.setattr(training_store, "iter_feedback_rows",
+                        lambda after_id, chunk_size: iter([rows]))
+    monkeypatch.setattr(training_store, "settled_feedback_id", lambda: 2)
+    store = TrainingSetStore(str(tmp_path / "ts"), n_features=N_HIVE)
+
+    assert store.sync_from_database() == 2
+
+    X, y, _ = load_training_set(store.directory)
+    assert X.shape == (2, N_HIVE)
+    assert X[0, :N_BASE].tolist() == [30.0, 50.0, 10.0, 7.0, 0.0]
+    np.testing.assert_array_equal(X[0, N_BASE:], window)
+    assert X[1, N_BASE:].tolist() == [0.0] * N_WINDOW_FEATURES
+
+def test_retrain_on_hive_training_set_gives_window_model(tmp_path, monkeypatch):
+    rows, _ = hive_feedback_rows()
+    monkeypatch.setattr(training_store, "iter_feedback_rows",
+                        lambda after_id, chunk_size: iter([rows]))
+    monkeypatch.setattr(training_store, "settled_feedback_id", lambda: 2)
+    store = TrainingSetStore(str(tmp_path / "ts"), n_features=N_HIVE)
+    store.sync_from_database()
+
+    result = train_from_feedback(str(tmp_path / "model.joblib"), store_dir=store.directory)
+
+    assert result["examples"] == 2
+    assert joblib.load(result["model_file"]).n_features_in_ == N_HIVE
@@ -0,0 +1,67 @@
+# backend/tests/test_latency_service.py
+import types
+import numpy as np
+import pytest
+from application.services import latency_service
+from application.services.latency_service import LatencyTracker, summarize_windows
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Ručno pomjeran sat (time.time) za bucket-e trackera"""
+    now = [1_000_000.0]
+    monkeypatch.setattr(latency_service, "time", types.SimpleNamespace(time=lambda: now[0]))
+    return now
+
+def test_empty_tracker(clock):
+    summary = LatencyTracker().get_summary(slo_ms=100)
+    assert summary["60s"] == {"queue_wait": {"count": 0}, "time_to_result": {"count": 0}}
+
+def test_percentiles_and_slo(clock):
+    tracker = LatencyTracker(windows_s=(60,), bucket_s=10)
+    queue_wait = np.arange(1, 101, dtype=float)
+    tracker.record(queue_wait, queue_wait * 10)
+
+    summary = tracker.get_summary(slo_ms=50)["60s"]
+    wait = summary["queue_wait"]
+    assert wait["count"] == 100
+    assert wait["max_ms"] == 100.0
+    # Log-skala bin-ova: gornja granica je najviše ~8% iznad stvarne vrijednosti
+    for p in (50, 90, 95, 99):
+        assert p <= wait[f"p{p}_ms"] <= p * 1.09
+    assert wait["within_slo"] == pytest.approx(0.5, abs=0.05)
+    assert summary["time_to_result"]["within_slo"] == pytest.approx(0.04, abs=0.01)
+    assert summary["time_to_result"]["p99_ms"] <= 1000.0
+
+def test_nan_rows_are_skipped(clock):
+    tracker = LatencyTracker(windows_s=(60,))
+    tracker.record([np.nan, 5.0, np.nan], [np.nan, 20.0, np.nan])
+    tracker.record([np.nan], [np.nan])
+    summary = tracker.get_summary()["60s"]
+    assert summary["queue_wait"]["count"] == 1
+    assert summary["time_to_result"]["max_ms"] == 20.0
+    assert "within_slo" not in summary["queue_wait"]
+
+def test_sliding_windows_expire_old_buckets(clock):
+    tracker = LatencyTracker(windows_s=(60, 300), bucket_s=10)
+    tracker.record([10.0, 10.0], [10.0, 10.0])
+    clock[0] += 120
+    tracker.record([20.0], [20.0])
+
+    summary = tracker.get_summary()
+    assert summary["60s"]["queue_wait"]["count"] == 1
+    assert summary["300s"]["queue_wait"]["count"] == 3
+
+    # Bucket iz prethodnog kruga ring buffer-a se prazni pri ponovnoj upotrebi
+    clock[0] += 310
+    tracker.record([30.0], [30.0])
+    summary = tracker.get_summary()
+    assert summary["300s"]["queue_wait"]["count"] == 1
+    assert summary["300s"]["queue_wait"]["max_ms"] == 30.0
+
+def test_summary_from_published_windows_matches(clock):
+    tracker = LatencyTracker()
+    rng = np.random.default_rng(0)
+    wait = rng.exponential(200, 1000)
+    tracker.record(wait, wait + rng.exponential(50, 1000))
+    # API workeri računaju percentile iz histograma koje leader objavi
+    assert summarize_windows(tracker.get_windows(), 250) == tracker.get_summary(slo_ms=250)
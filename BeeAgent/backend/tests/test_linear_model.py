@@ -0,0 +1,127 @@
+# backend/tests/test_linear_model.py
+import numpy as np
+import pytest
+from sklearn.linear_model import SGDClassifier
+from infrastructure.ml.linear_model import LinearModel, _PREFIX
+
+def make_data(n: int = 300, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    X = np.column_stack([rng.normal(30, 5, n), rng.normal(60, 10, n),
+                         rng.integers(1, 20, n), rng.integers(1, 10, n),
+                         rng.integers(0, 2, n)]).astype(float)
+    y = np.where(X[:, 0] > 32, "zalivanje", np.where(X[:, 4] > 0, "provjera_varoe", "nista"))
+    return X, y
+
+def standardized(X):
+    return (X - X.mean(axis=0)) / X.std(axis=0)
+
+def fit(loss: str, X, y) -> SGDClassifier:
+    return SGDClassifier(loss=loss, max_iter=50, tol=None, random_state=0).fit(X, y)
+
+@pytest.mark.parametrize("loss", ["hinge", "log_loss", "modified_huber"])
+def test_matches_sklearn(loss):
+    X, y = make_data()
+    X = standardized(X)
+    model = fit(loss, X, y)
+    linear = LinearModel.from_estimator(model)
+
+    labels, confidences = linear.predict_batch(X)
+    assert np.array_equal(labels, model.predict(X))
+    np.testing.assert_allclose(linear.decision_function(X), model.decision_function(X))
+    if loss != "hinge":
+        np.testing.assert_allclose(confidences, model.predict_proba(X).max(axis=1))
+    else:
+        assert (confidences == 1.0).all()
+
+def test_binary_model_matches_sklearn():
+    X, y = make_data()
+    X = standardized(X)
+    model = fit("log_loss", X, y == "zalivanje")
+    linear = LinearModel.from_estimator(model)
+    labels, confidences = linear.predict_batch(X)
+    assert labels.tolist() == [str(label) for label in model.predict(X)]
+    np.testing.assert_allclose(confidences, model.predict_proba(X).max(axis=1))
+
+@pytest.mark.parametrize("mmap", [True, False])
+def test_save_load_round_trip(tmp_path, mmap):
+    X, y = make_data()
+    X = standardized(X)
+    linear = LinearModel.from_estimator(fit("log_loss", X, y), model_version="v7")
+    path = str(tmp_path / "model.beemodel")
+    linear.save(path)
+
+    loaded = LinearModel.load(path, mmap=mmap)
+    assert isinstance(loaded.coef, np.memmap) == mmap
+    assert loaded.classes.tolist() == linear.classes.tolist()
+    assert loaded.model_version == "v7"
+    assert loaded.loss == "log_loss"
+    np.testing.assert_array_equal(loaded.decision_function(X), linear.decision_function(X))
+
+def test_load_rejects_foreign_file(tmp_path):
+    path = tmp_path / "model.beemodel"
+    path.write_bytes(_PREFIX.pack(b"NOTAMODL", 1, 0))
+    with pytest.raises(ValueError):
+        LinearModel.load(str(path))
+
+def test_from_estimator_rejects_unsupported_loss():
+    X, y = make_data()
+    model = SGDClassifier(loss="squared_error", max_iter=5, tol=None).fit(X, y)
+    with pytest.raises(ValueError):
+        LinearModel.from_estimator(model)
+
+def fit_scaled(loss: str = "log_loss"):
+    from sklearn.preprocessing import StandardScaler
+    X, y = make_data()
+    scaler = StandardScaler().fit(X)
+    return X, fit(loss, scaler.transform(X), y), scaler
+
+def test_fused_model_matches_scaler_pipeline():
+    X, model, scaler = fit_scaled()
+    pipeline = LinearModel.from_estimator(model, scaler)
+    fused = pipeline.fused()
+    assert fused.scaler_fused and not fused.has_scaler
+    np.testing.assert_allclose(fused.decision_function(X),
+                               model.decision_function(scaler.transform(X)), rtol=1e-9)
+    assert np.array_equal(fused.predict_batch(X)[0], model.predict(scaler.transform(X)))
+
+def test_export_writes_fused_model(tmp_path):
+    import joblib
+    from infrastructure.ml.linear_model import export_linear_model
+    X, model, scaler = fit_scaled()
+    joblib.dump(model, tmp_path / "model.joblib")
+    joblib.dump(scaler, tmp_path / "scaler.joblib")
+    path = str(tmp_path / "model.beemodel")
+    export_linear_model(str(tmp_path / "model.joblib"), path, str(tmp_path / "scaler.joblib"))
+
+    # Mapiran fajl je već jedan matmul - bez mean/scale i bez kopiranja težina
+    loaded = LinearModel.load(path)
+    assert not loaded.has_scaler
+    assert isinstance(loaded.coef, np.memmap)
+    np.testing.assert_allclose(loaded.decision_function(X),
+                               model.decision_function(scaler.transform(X)), rtol=1e-9)
+
+def test_load_fuses_legacy_scaler_file_on_request(tmp_path):
+    X, model, scaler = fit_scaled()
+    path = str(tmp_path / "legacy.beemodel")
+    LinearModel.from_estimator(model, scaler).save(path)
+
+    assert LinearModel.load(path).has_scaler
+    fused = LinearModel.load(path, fuse=True)
+    assert fused.scaler_fused
+    np.testing.assert_allclose(fused.decision_function(X),
+                               LinearModel.load(path).decision_function(X), rtol=1e-9)
+
+def test_classifier_export_uses_own_scaler(tmp_path):
+    import joblib
+    from infrastructure.ml.classifier import BeeClassifier
+    X, model, scaler = fit_scaled()
+    joblib.dump(model, tmp_path / "model.joblib")
+    joblib.dump(scaler, tmp_path / "scaler.joblib")
+    classifier = BeeClassifier(str(tmp_path / "model.joblib"), str(tmp_path / "scaler.joblib"))
+
+    path = str(tmp_path / "model.beemodel")
+    classifier.export_linear(path)
+    exported = LinearModel.load(path)
+    assert exported.predict_batch(X)[0].tolist() == classifier.predict_batch(X)[0].tolist()
+    np.testing.assert_allclose(exported.decision_function(X),
+                               model.decision_function(scaler.transform(X)), rtol=1e-9)
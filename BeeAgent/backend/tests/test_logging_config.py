@@ -0,0 +1,31 @@
+# backend/tests/test_logging_config.py
+import logging
+import queue
+from core.logging_config import _DeferredQueueHandler
+
+def make_logger(name: str):
+    log_queue = queue.Queue()
+    logger = logging.getLogger(name)
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    logger.handlers = [_DeferredQueueHandler(log_queue)]
+    return logger, log_queue
+
+def test_args_are_merged_before_enqueue():
+    logger, log_queue = make_logger("test.deferred.args")
+    pending = [1, 2]
+    logger.info("pending: %s", pending)
+    pending.append(3)
+
+    record = log_queue.get_nowait()
+    assert record.args is None
+    assert record.getMessage() == "pending: [1, 2]"
+
+def test_record_without_args_is_left_untouched():
+    logger, log_queue = make_logger("test.deferred.plain")
+    fields = {"count": 1}
+    logger.info("batch.processed", extra={"event": "batch.processed", "fields": fields})
+
+    record = log_queue.get_nowait()
+    assert record.msg == "batch.processed"
+    assert record.fields is fields
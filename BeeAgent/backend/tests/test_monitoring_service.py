@@ -0,0 +1,113 @@
+# backend/tests/test_monitoring_service.py
+import types
+import numpy as np
+import pytest
+from application.services import monitoring_service
+from application.services.monitoring_service import ModelMonitor, without_histograms
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Ručno pomjeran sat (time.time) za bucket-e monitora"""
+    now = [1_000_000.0]
+    monkeypatch.setattr(monitoring_service, "time", types.SimpleNamespace(time=lambda: now[0]))
+    return now
+
+def make_features(n: int, temperature: float, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    return np.column_stack([
+        rng.normal(temperature, 2.0, n),
+        rng.normal(60.0, 5.0, n),
+        rng.integers(5, 15, n),
+        rng.integers(3, 9, n),
+        rng.integers(0, 2, n)
+    ]).astype(float)
+
+def test_drift_flags_shifted_feature(clock):
+    monitor = ModelMonitor(windows_s=(3600,), bucket_s=300)
+    monitor.set_reference(make_features(5000, temperature=34.0), source="test")
+    monitor.record_features(make_features(2000, temperature=22.0, seed=1))
+
+    summary = monitor.get_drift_summary()
+    assert summary["reference"] == {"source": "test", "count": 5000}
+    window = summary["windows"]["3600s"]
+    assert window["count"] == 2000
+    assert window["drifted"] == ["temperature"]
+    temperature = window["features"]["temperature"]
+    assert temperature["mean"] == pytest.approx(22.0, abs=0.3)
+    assert temperature["mean_shift"] == pytest.approx(-6.0, abs=0.5)
+    assert window["features"]["humidity"]["psi"] < 0.05
+
+def test_drift_without_reference_uses_lifetime(clock):
+    monitor = ModelMonitor(windows_s=(3600,))
+    assert monitor.get_drift_summary()["windows"]["3600s"] == {"count": 0}
+    monitor.record_features(make_features(500, temperature=34.0))
+    summary = monitor.get_drift_summary()
+    assert summary["reference"]["source"] == "lifetime"
+    assert summary["windows"]["3600s"]["drifted"] == []
+
+def test_window_moments_match_numpy(clock):
+    monitor = ModelMonitor(windows_s=(3600,), bucket_s=300)
+    X = make_features(900, temperature=34.0)
+    for start in range(0, 900, 300):
+        monitor.record_features(X[start:start + 300])
+        clock[0] += 300
+    clock[0] -= 300
+    features = monitor.get_drift_summary()["windows"]["3600s"]["features"]
+    assert features["humidity"]["mean"] == pytest.approx(X[:, 1].mean())
+    assert features["humidity"]["std"] == pytest.approx(X[:, 1].std(ddof=1))
+
+def test_without_histograms_matches_plain_summary(clock):
+    monitor = ModelMonitor(windows_s=(3600, 86400))
+    monitor.set_reference(make_features(1000, temperature=34.0))
+    monitor.record_features(make_features(200, temperature=30.0, seed=1))
+
+    full = monitor.get_drift_summary(histograms=True)
+    assert "bin_edges" in full
+    assert "histogram" in full["windows"]["3600s"]["features"]["temperature"]
+    assert without_histograms(full) == monitor.get_drift_summary()
+
+def test_record_feedback_counts_each_id_once(clock):
+    monitor = ModelMonitor(accuracy_window=2)
+    assert monitor.record_feedback(1, "v1", True)
+    assert not monitor.record_feedback(1, "v1", True)
+    assert monitor.record_feedback(2, "v1", False)
+    assert monitor.record_feedback(3, "v1", False)
+    assert monitor.record_feedback(4, None, True)
+
+    versions = monitor.get_accuracy_summary("v1")["versions"]
+    assert versions["v1"]["rolling_accuracy"] == 0.0
+    assert versions["v1"]["rolling_count"] == 2
+    assert versions["v1"]["accuracy"] == pytest.approx(1 / 3)
+    assert versions["v1"]["last_feedback_id"] == 3
+    assert versions["unknown"]["count"] == 1
+
+def test_sync_feedback_picks_up_late_commit(clock, monkeypatch):
+    # Red 2 je još u otvorenoj transakciji kad prvi sync vidi redove 1 i 3
+    rows = [(1, True, "v1"), (3, False, "v1")]
+    calls = []
+
+    def fake_iter_feedback_outcomes(after_id, chunk_size):
+        calls.append(after_id)
+        pending = sorted(row for row in rows if row[0] > after_id)
+        for start in range(0, len(pending), chunk_size):
+            yield pending[start:start + chunk_size]
+
+    monkeypatch.setattr(monitoring_service, "iter_feedback_outcomes", fake_iter_feedback_outcomes)
+    monkeypatch.setattr(monitoring_service, "settled_feedback_id", lambda: 1)
+
+    monitor = ModelMonitor()
+    # /feedback na ovom workeru je već zabilježio red 3
+    assert monitor.record_feedback(3, "v1", False)
+    assert monitor.sync_feedback() == 1
+    assert monitor.synced_feedback_id == 1
+
+    rows.append((2, True, "v1"))
+    monkeypatch.setattr(monitoring_service, "settled_feedback_id", lambda: 10)
+    assert monitor.sync_feedback(chunk_size=1) == 1
+    assert calls == [0, 1]
+    assert monitor.synced_feedback_id == 3
+    assert not monitor.record_feedback(3, "v1", False)
+
+    v1 = monitor.get_accuracy_summary()["versions"]["v1"]
+    assert v1["count"] == 3
+    assert v1["accuracy"] == pytest.approx(2 / 3)
@@ -0,0 +1,130 @@
+# backend/tests/test_packed.py
+from datetime import datetime
+import numpy as np
+import pytest
+from web.packed import (PACKED_RECORD_DTYPE, MAX_CLOCK_SKEW_MS, PackedFormatError,
+                        _HEADER, decode_packed, encode_packed)
+
+NOW_MS = 1_700_000_000_000
+
+def make_records(n: int) -> np.ndarray:
+    """n ispravnih zapisa"""
+    records = np.zeros(n, dtype=PACKED_RECORD_DTYPE)
+    records["timestamp_ms"] = NOW_MS
+    records["temperature"] = 34.5
+    records["humidity"] = 60.0
+    records["frames"] = 10
+    records["strength"] = 7
+    records["varoa"] = 0
+    records["hive_id"] = b"hive-1"
+    return records
+
+def test_valid_batch_round_trip():
+    batch = decode_packed(encode_packed(make_records(3)), max_records=10, now_ms=NOW_MS)
+    assert len(batch) == 3
+    assert batch.accepted == 3
+    assert batch.rejected == []
+    assert batch.accepted_indices == [0, 1, 2]
+
+@pytest.mark.parametrize("field, value", [
+    ("temperature", -50.1), ("temperature", 60.1),
+    ("humidity", -0.5), ("humidity", 100.5),
+    ("frames", 0), ("frames", 51),
+    ("strength", 0), ("strength", 11),
+    ("varoa", 2)
+])
+def test_out_of_range_field_is_rejected(field, value):
+    records = make_records(3)
+    records[field][1] = value
+    batch = decode_packed(encode_packed(records), max_records=10, now_ms=NOW_MS)
+    assert batch.accepted_indices == [0, 2]
+    assert batch.rejected == [{"index": 1, "fields": [field]}]
+
+def test_range_bounds_are_inclusive():
+    records = make_records(2)
+    records["temperature"] = [-50.0, 60.0]
+    records["humidity"] = [0.0, 100.0]
+    records["frames"] = [1, 50]
+    records["strength"] = [1, 10]
+    records["varoa"] = [0, 1]
+    batch = decode_packed(encode_packed(records), max_records=10, now_ms=NOW_MS)
+    assert batch.accepted == 2
+
+@pytest.mark.parametrize("value", [np.nan, np.inf, -np.inf])
+def test_non_finite_float_is_rejected(value):
+    records = make_records(1)
+    records["humidity"][0] = value
+    batch = decode_packed(encode_packed(records), max_records=10, now_ms=NOW_MS)
+    assert batch.rejected == [{"index": 0, "fields": ["humidity"]}]
+
+def test_multiple_failures_listed_per_record():
+    records = make_records(2)
+    records["temperature"][0] = np.nan
+    records["varoa"][0] = 5
+    batch = decode_packed(encode_packed(records), max_records=10, now_ms=NOW_MS)
+    assert batch.rejected == [{"index": 0, "fields": ["temperature", "varoa"]}]
+    assert batch.accepted_indices == [1]
+
+def test_timestamp_bounds():
+    records = make_records(4)
+    records["timestamp_ms"] = [-1, NOW_MS + MAX_CLOCK_SKEW_MS,
+                               NOW_MS + MAX_CLOCK_SKEW_MS + 1, 0]
+    batch = decode_packed(encode_packed(records), max_records=10, now_ms=NOW_MS)
+    assert batch.accepted_indices == [1, 3]
+    assert [r["index"] for r in batch.rejected] == [0, 2]
+    assert all(r["fields"] == ["timestamp_ms"] for r in batch.rejected)
+
+def _body_with_header(**overrides) -> bytes:
+    body = encode_packed(make_records(2))
+    fields = dict(zip(("magic", "version", "record_size", "count"), _HEADER.unpack_from(body)))
+    fields.update(overrides)
+    return _HEADER.pack(*fields.values()) + body[_HEADER.size:]
+
+@pytest.mark.parametrize("body", [
+    b"BEE",
+    _body_with_header(magic=b"NOPE"),
+    _body_with_header(version=2),
+    _body_with_header(record_size=PACKED_RECORD_DTYPE.itemsize + 1),
+    _body_with_header(count=3),
+    encode_packed(make_records(2))[:-1]
+])
+def test_malformed_header_rejects_whole_batch(body):
+    with pytest.raises(PackedFormatError):
+        decode_packed(body, max_records=10, now_ms=NOW_MS)
+
+def test_max_records_limit():
+    body = encode_packed(make_records(5))
+    with pytest.raises(PackedFormatError):
+        decode_packed(body, max_records=4, now_ms=NOW_MS)
+    assert decode_packed(body, max_records=5, now_ms=NOW_MS).accepted == 5
+
+def test_to_observations_keys_and_timestamps():
+    records = make_records(3)
+    records["timestamp_ms"][1] = 0
+    records["idempotency_key"][2] = b"gw-42"
+    records["apiary_id"][0] = b"apiary-a"
+    records["frames"][2] = 0  # odbijen - ne ulazi u opservacije
+    batch = decode_packed(encode_packed(records), max_records=10, now_ms=NOW_MS)
+
+    received_at = datetime(2026, 1, 1, 12, 0, 0)
+    observations = batch.to_observations(received_at)
+    assert len(observations) == 2
+
+    first, second = observations
+    assert first.timestamp == datetime.fromtimestamp(NOW_MS / 1000)
+    assert second.timestamp == received_at
+    assert first.hive_id == "hive-1"
+    assert first.apiary_id == "apiary-a"
+    assert second.apiary_id is None
+    assert first.temperature == 34.5
+
+    keys = [o.idempotency_key for o in observations]
+    assert all(key.startswith("auto-") for key in keys)
+    assert keys[0].rsplit("-", 1)[0] == keys[1].rsplit("-", 1)[0]
+    assert keys[0] != keys[1]
+
+def test_to_observations_keeps_explicit_key():
+    records = make_records(1)
+    records["idempotency_key"][0] = b"gw-42"
+    batch = decode_packed(encode_packed(records), max_records=10, now_ms=NOW_MS)
+    assert batch.to_observations()[0].idempotency_key == "gw-42"
@@ -0,0 +1,166 @@
+# backend/tests/test_queue_service.py
+import pyodbc
+import pytest
+from application.services import queue_service
+from application.services.queue_service import QueueService
+from domain.entities import Observation
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+        self._rows = []
+
+    def executemany(self, sql, params):
+        if self.conn.conflicts:
+            self.conn.conflicts -= 1
+            raise pyodbc.IntegrityError("23000", "UX_Observations_IdempotencyKey")
+        for row in params:
+            key = row[8]
+            if key not in self.conn.keys:
+                self.conn.pending[key] = len(self.conn.keys) + len(self.conn.pending) + 1
+
+    def execute(self, sql, params=()):
+        known = {**self.conn.keys, **self.conn.pending}
+        if "OUTPUT INSERTED.Id" in sql:
+            key = params[-1]
+            self._rows = [] if key in self.conn.archived else [(len(known) + 1,)]
+        else:
+            self._rows = [(key, known[key]) for key in params if key in known]
+
+    def fetchone(self):
+        return self._rows[0] if self._rows else None
+
+    def fetchall(self):
+        return self._rows
+
+class FakeConnection:
+    """Tabela ključeva u memoriji; conflicts = koliko executemany-ja diže IntegrityError"""
+    def __init__(self, keys=None, conflicts=0, archived=()):
+        self.keys = dict(keys or {})
+        self.pending = {}
+        self.conflicts = conflicts
+        self.archived = set(archived)
+        self.rollbacks = 0
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def commit(self):
+        self.keys.update(self.pending)
+        self.pending = {}
+
+    def rollback(self):
+        self.rollbacks += 1
+        self.pending = {}
+
+    def close(self):
+        pass
+
+def observations(*keys):
+    return [Observation.create_new(34.0, 60.0, 10, 7, False, hive_id="h1",
+                                   idempotency_key=key) for key in keys]
+
+def test_enqueue_batch_retries_after_concurrent_key_conflict(monkeypatch):
+    conn = FakeConnection(keys={"a": 1}, conflicts=1)
+    monkeypatch.setattr(queue_service, "get_connection", lambda: conn)
+    ids = QueueService().enqueue_batch(observations("a", "b"))
+    assert ids == [1, 2]
+    assert conn.rollbacks == 1
+    assert conn.keys == {"a": 1, "b": 2}
+
+def test_enqueue_batch_gives_up_after_second_conflict(monkeypatch):
+    conn = FakeConnection(conflicts=2)
+    monkeypatch.setattr(queue_service, "get_connection", lambda: conn)
+    with pytest.raises(pyodbc.IntegrityError):
+        QueueService().enqueue_batch(observations("a"))
+    assert conn.keys == {}
+
+def test_enqueue_of_archived_key_is_a_key_conflict(monkeypatch):
+    conn = FakeConnection(archived={"old"})
+    monkeypatch.setattr(queue_service, "get_connection", lambda: conn)
+    with pytest.raises(pyodbc.IntegrityError):
+        QueueService().enqueue(observations("old")[0])
+    assert conn.rollbacks == 1
+
+def test_shard_for_is_stable_and_in_range():
+    keys = [f"apiary/hive-{i}" for i in range(200)]
+    shards = [queue_service.shard_for(key, 4) for key in keys]
+    assert shards == [queue_service.shard_for(key, 4) for key in keys]
+    assert set(shards) == {0, 1, 2, 3}
+    assert queue_service.shard_for("apiary/hive-1", 1) == 0
+
+def test_observations_of_one_hive_share_a_shard():
+    first, second = observations("a", "b")
+    assert first.shard_key == second.shard_key == "/h1"
+    assert 0 <= queue_service.shard_for(None, 4) < 4
+
+class ClaimCursor:
+    """Observations.Status po Id-u; UPDATE ... WHERE Status = 'processing' kao u bazi"""
+    def __init__(self, statuses):
+        self.statuses = statuses
+        self.processed = []
+        self.rowcount = -1
+
+    def _update(self, observation_id):
+        if self.statuses.get(observation_id) != "processing":
+            return 0
+        self.statuses[observation_id] = "processed"
+        self.processed.append(observation_id)
+        return 1
+
+    def executemany(self, sql, params):
+        assert "Status = 'processing'" in sql and "OUTPUT INSERTED.Id INTO #Processed" in sql
+        for row in params:
+            self._update(row[-1])
+
+    def execute(self, sql, params=()):
+        if sql.strip().startswith("UPDATE Observations"):
+            assert "Status = 'processing'" in sql
+            self.rowcount = self._update(params[-1])
+
+    def fetchall(self):
+        return [(observation_id,) for observation_id in self.processed]
+
+class ClaimConnection:
+    def __init__(self, cursor):
+        self._cursor = cursor
+        self.commits = 0
+
+    def cursor(self):
+        return self._cursor
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+@pytest.fixture
+def claims(monkeypatch):
+    cursor = ClaimCursor({1: "processing", 2: "queued", 3: "processing"})
+    rollups = []
+    monkeypatch.setattr(queue_service, "get_connection", lambda: ClaimConnection(cursor))
+    monkeypatch.setattr(queue_service, "commit_with_rollups",
+                        lambda conn, cursor, deltas: rollups.append(deltas))
+    return cursor, rollups
+
+def test_batch_result_skips_released_claims_and_their_rollups(claims):
+    cursor, rollups = claims
+    assert QueueService().mark_batch_processed([1, 2, 3], ["feed", "feed", "inspect"],
+                                               [0.5, 0.9, 0.25], [0.0, 0.0, 1.0])
+
+    # Red 2 je vraćen u red (i možda preuzet ponovo) - ne prepisuje se
+    assert cursor.statuses == {1: "processed", 2: "queued", 3: "processed"}
+    assert rollups == [[("feed", "processed", 1, 0.5), ("inspect", "processed", 1, 0.25),
+                        ("inspect", "review", 1, 0.25)]]
+
+def test_single_result_for_lost_claim_is_not_written(claims):
+    cursor, rollups = claims
+    QueueService().mark_as_processed(2, "feed", 0.9)
+    QueueService().mark_as_processed(1, "feed", 0.9)
+
+    assert cursor.statuses[2] == "queued"
+    assert rollups == [[("feed", "processed", 1, 0.9)]]
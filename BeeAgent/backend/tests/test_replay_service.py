@@ -0,0 +1,83 @@
+# backend/tests/test_replay_service.py
+import sqlite3
+import joblib
+import numpy as np
+from sklearn.linear_model import SGDClassifier
+from sklearn.preprocessing import StandardScaler
+from application.services.replay_service import RECORDED, replay_candidate
+from infrastructure.replay_source import _SQLITE_SCHEMA, ReplaySource
+
+class FakeSource:
+    """Chunk-ovi (features, originalne predikcije, labele) iz memorije"""
+    def __init__(self, chunks):
+        self.chunks = chunks
+
+    def iter_chunks(self, chunk_size=50000):
+        yield from self.chunks
+
+def make_data(n: int = 400, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    X = np.column_stack([rng.normal(30, 5, n), rng.normal(60, 10, n),
+                         rng.integers(1, 20, n), rng.integers(1, 10, n),
+                         rng.integers(0, 2, n)]).astype(float)
+    y = np.where(X[:, 0] > 32, "zalivanje", "nista")
+    return X, y
+
+def test_recorded_predictions_give_accuracy_and_confusion():
+    features = np.zeros((3, 5))
+    source = FakeSource([
+        (features, np.array(["nista", "zalivanje", "nista"]),
+         np.array(["nista", "zalivanje", "zalivanje"])),
+        (features[:2], np.array(["berba", ""]), np.array(["berba", "nista"])),
+    ])
+
+    report = replay_candidate(RECORDED, source)
+
+    assert (report["rows"], report["skipped"]) == (4, 1)
+    assert report["accuracy"] == 0.75
+    assert report["review_rate"] is None
+    assert report["confusion"] == {"berba": {"berba": 1}, "nista": {"nista": 1},
+                                   "zalivanje": {"nista": 1, "zalivanje": 1}}
+    assert report["per_action"]["zalivanje"] == {"support": 2, "predicted": 1,
+                                                 "precision": 1.0, "recall": 0.5}
+
+def test_joblib_candidate_is_scored_through_its_scaler(tmp_path):
+    X, y = make_data()
+    scaler = StandardScaler().fit(X)
+    model = SGDClassifier(max_iter=50, tol=None, random_state=0).fit(scaler.transform(X), y)
+    model_file, scaler_file = tmp_path / "model_v2.joblib", tmp_path / "scaler_v2.joblib"
+    joblib.dump(model, model_file)
+    joblib.dump(scaler, scaler_file)
+    source = FakeSource([(X[:250], y[:250], y[:250]), (X[250:], y[250:], y[250:])])
+
+    report = replay_candidate(str(model_file), source, review_rules="[]",
+                              scaler_file=str(scaler_file))
+
+    predictions = model.predict(scaler.transform(X))
+    assert report["rows"] == len(X)
+    assert report["accuracy"] == float((predictions == y).mean())
+    assert report["confusion"]["nista"].get("nista", 0) == int(
+        ((y == "nista") & (predictions == "nista")).sum())
+    assert report["review_rate"] == 0.0
+
+def test_sqlite_source_pages_by_feedback_id(tmp_path):
+    path = str(tmp_path / "replay.sqlite3")
+    conn = sqlite3.connect(path)
+    conn.executescript(_SQLITE_SCHEMA)
+    conn.executemany("INSERT INTO Observations (Id, Temperature, Humidity, Frames, Strength, "
+                     "Varoa, PredictedAction) VALUES (?, ?, 60, 10, 7, 0, ?)",
+                     [(1, 30.0, "nista"), (2, 35.0, None), (3, 36.0, "zalivanje")])
+    conn.executemany("INSERT INTO Feedback (Id, ObservationId, UserLabel, Correct) "
+                     "VALUES (?, ?, ?, 1)", [(5, 3, "zalivanje"), (6, 1, "nista"),
+                                             (9, 2, "zalivanje")])
+    conn.commit()
+    conn.close()
+
+    chunks = list(ReplaySource("sqlite", path).iter_chunks(chunk_size=2))
+
+    assert [len(chunk[0]) for chunk in chunks] == [2, 1]
+    features = np.vstack([chunk[0] for chunk in chunks])
+    assert features[:, 0].tolist() == [36.0, 30.0, 35.0]
+    assert np.concatenate([chunk[1] for chunk in chunks]).tolist() == ["zalivanje", "nista", ""]
+    assert np.concatenate([chunk[2] for chunk in chunks]).tolist() == [
+        "zalivanje", "nista", "zalivanje"]
@@ -0,0 +1,51 @@
+# backend/tests/test_review_rules.py
+import json
+import numpy as np
+import pytest
+from application.services.review_rules import (ReviewRule, ReviewRuleEngine,
+                                               DEFAULT_REVIEW_RULES, parse_rules)
+
+# temperature, humidity, frames, strength, varoa
+FEATURES = np.array([
+    [34.0, 60.0, 10, 7, 0],   # ništa ne okida
+    [2.0, 60.0, 10, 7, 0],    # cold
+    [45.0, 60.0, 10, 2, 0],   # hot + weak_colony
+    [34.0, 60.0, 10, 7, 0],   # low_confidence
+    [3.0, 60.0, 10, 1, 1],    # cold + weak_colony + low_confidence
+], dtype=float)
+CONFIDENCES = np.array([0.9, 0.9, 0.9, 0.5, 0.3])
+
+def test_severity_sums_weights_of_fired_rules():
+    severity = ReviewRuleEngine().severity(FEATURES, CONFIDENCES)
+    np.testing.assert_allclose(severity, [0.0, 2.0, 3.5, 1.0, 4.5])
+
+def test_severity_agrees_with_evaluate_and_fired_rules():
+    engine = ReviewRuleEngine()
+    severity = engine.severity(FEATURES, CONFIDENCES)
+    np.testing.assert_array_equal(severity > 0, engine.evaluate(FEATURES, CONFIDENCES))
+
+    weights = {rule.name: rule.severity for rule in DEFAULT_REVIEW_RULES}
+    fired = engine.fired_rules(FEATURES, CONFIDENCES)
+    np.testing.assert_allclose(severity, [sum(weights[name] for name in names)
+                                          for names in fired])
+
+def test_custom_rules_round_trip_through_json():
+    engine = ReviewRuleEngine([ReviewRule("humid", "humidity", ">=", 60, severity=0.5)])
+    restored = ReviewRuleEngine.from_json(engine.to_json())
+    assert restored.rules == engine.rules
+    np.testing.assert_allclose(restored.severity(FEATURES, CONFIDENCES), [0.5] * 5)
+
+def test_empty_rules_never_flag():
+    engine = ReviewRuleEngine.from_json("[]")
+    assert not engine.severity(FEATURES, CONFIDENCES).any()
+    assert ReviewRuleEngine.from_json(None).rules == DEFAULT_REVIEW_RULES
+
+@pytest.mark.parametrize("raw", [
+    {"name": "x", "field": "unknown", "op": "<", "value": 1},
+    {"name": "x", "field": "temperature", "op": "~", "value": 1},
+    {"name": "x", "field": "temperature", "op": "<", "value": 1, "severity": 0},
+    {"name": "x", "field": "temperature", "op": "<"},
+])
+def test_invalid_rules_are_rejected(raw):
+    with pytest.raises(ValueError):
+        parse_rules(json.loads(json.dumps([raw])))
@@ -0,0 +1,64 @@
+# backend/tests/test_reviews.py
+import asyncio
+from datetime import datetime
+import pytest
+from fastapi import HTTPException
+from infrastructure import database
+from web import main
+
+def inbox_row(id_: int, severity: float) -> tuple:
+    return (id_, datetime(2026, 5, 1), 4.0, 60.0, 10, 2, 1, "feed", 0.55, "h1", severity)
+
+class FakeCursor:
+    """Bilježi upit inbox-a i vraća unaprijed zadane redove"""
+    def __init__(self, rows):
+        self.rows = rows
+        self.params = None
+
+    def execute(self, sql, params):
+        self.sql, self.params = sql, params
+
+    def fetchall(self):
+        return self.rows
+
+class FakeConnection:
+    def __init__(self, cursor):
+        self._cursor = cursor
+        self.closed = False
+
+    def cursor(self):
+        return self._cursor
+
+    def close(self):
+        self.closed = True
+
+@pytest.fixture
+def inbox_cursor(monkeypatch):
+    cursor = FakeCursor([inbox_row(7, 3.5), inbox_row(9, 1.0)])
+    monkeypatch.setattr(database, "get_connection", lambda: FakeConnection(cursor))
+    return cursor
+
+def test_first_page_has_no_keyset(inbox_cursor):
+    rows = database.get_review_inbox(limit=2)
+
+    assert inbox_cursor.params == [2]
+    assert "ReviewSeverity <" not in inbox_cursor.sql
+    assert [(row["id"], row["review_severity"]) for row in rows] == [(7, 3.5), (9, 1.0)]
+    assert rows[0]["varoa"] is True
+
+def test_next_page_seeks_after_severity_and_id(inbox_cursor):
+    database.get_review_inbox(limit=2, after_severity=1.0, after_id=9)
+
+    assert inbox_cursor.params == [2, 1.0, 1.0, 9]
+    assert "ReviewSeverity < ?" in inbox_cursor.sql
+
+@pytest.mark.parametrize("severity", [3.5, 0.1 + 0.2, 1e-7])
+def test_cursor_round_trip(severity):
+    cursor = main._encode_review_cursor({"review_severity": severity, "id": 42})
+    assert main._decode_review_cursor(cursor) == (severity, 42)
+
+@pytest.mark.parametrize("cursor", ["abc", "1.5", "1.5:x", "1:2:3", "nan:4", "inf:4"])
+def test_malformed_cursor_is_rejected_with_400(cursor):
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(main.get_reviews(limit=10, cursor=cursor))
+    assert error.value.status_code == 400
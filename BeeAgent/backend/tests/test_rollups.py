@@ -0,0 +1,132 @@
+# backend/tests/test_rollups.py
+from datetime import datetime, timedelta
+import pyodbc
+import pytest
+from application.services.queue_service import _processed_rollup_deltas
+from infrastructure import database
+
+class RecordingCursor:
+    """Bilježi upite; fetchall vraća zadane redove"""
+    def __init__(self, rows=()):
+        self.rows = list(rows)
+        self.executed = []
+
+    def execute(self, sql, params=()):
+        self.executed.append((sql, params))
+
+    def fetchall(self):
+        return self.rows
+
+class RecordingConnection:
+    def __init__(self, cursor=None):
+        self._cursor = cursor or RecordingCursor()
+        self.commits = 0
+
+    def cursor(self):
+        return self._cursor
+
+    def commit(self):
+        self.commits += 1
+
+    def close(self):
+        pass
+
+def test_processed_deltas_are_grouped_by_action_and_outcome():
+    deltas = _processed_rollup_deltas(["feed", "inspect", "feed", "feed"],
+                                      [0.5, 0.9, 0.25, 1.0], [0.0, 0.0, 2.0, 1.5])
+
+    assert deltas == [("feed", "processed", 3, 1.75), ("inspect", "processed", 1, 0.9),
+                      ("feed", "review", 2, 1.25)]
+    assert all(type(count) is int and type(total) is float for _, _, count, total in deltas)
+
+def test_deltas_merge_into_hour_and_day_buckets():
+    cursor = RecordingCursor()
+    database.apply_rollup_deltas(cursor, [("feed", "processed", 3, 1.75),
+                                          ("feed", "review", 1, 0.25)])
+
+    sql, params = cursor.executed[0]
+    assert "MERGE ActionRollups" in sql
+    assert "('H', DATEADD(HOUR" in sql and "('D', DATEADD(DAY" in sql
+    assert params == ["feed", "processed", 3, 1.75, "feed", "review", 1, 0.25]
+
+def test_commit_with_rollups_takes_app_lock_before_merge():
+    conn = RecordingConnection()
+    database.commit_with_rollups(conn, conn.cursor(), [("feed", "correct", 1, 0.9)])
+
+    statements = [sql for sql, _ in conn.cursor().executed]
+    assert "sp_getapplock" in statements[0] and "MERGE ActionRollups" in statements[1]
+    assert conn.cursor().executed[0][1] == (database.ROLLUP_APPLOCK,
+                                            database.ROLLUP_APPLOCK_TIMEOUT_MS)
+    assert conn.commits == 1
+
+def test_commit_without_deltas_skips_lock():
+    conn = RecordingConnection()
+    database.commit_with_rollups(conn, conn.cursor(), [])
+    assert conn.cursor().executed == [] and conn.commits == 1
+
+@pytest.fixture
+def no_sleep(monkeypatch):
+    monkeypatch.setattr(database.time, "sleep", lambda s: None)
+
+def failing(errors):
+    calls = []
+    @database.retry_on_deadlock
+    def write():
+        calls.append(1)
+        if len(calls) <= errors:
+            raise pyodbc.Error("40001", "deadlock victim")
+        return "ok"
+    return write, calls
+
+def test_deadlock_victim_is_retried(no_sleep):
+    write, calls = failing(errors=database.DEADLOCK_RETRIES - 1)
+    assert write() == "ok"
+    assert len(calls) == database.DEADLOCK_RETRIES
+
+def test_deadlock_retries_are_bounded(no_sleep):
+    write, calls = failing(errors=database.DEADLOCK_RETRIES)
+    with pytest.raises(pyodbc.Error):
+        write()
+    assert len(calls) == database.DEADLOCK_RETRIES
+
+def test_other_errors_are_not_retried(no_sleep):
+    calls = []
+    @database.retry_on_deadlock
+    def write():
+        calls.append(1)
+        raise pyodbc.IntegrityError("23000", "duplicate key")
+    with pytest.raises(pyodbc.IntegrityError):
+        write()
+    assert len(calls) == 1
+
+def test_rollup_series_by_day(monkeypatch):
+    bucket = datetime(2026, 5, 1)
+    cursor = RecordingCursor([(bucket, 4, 3.0, 1, 3, 1),
+                              (bucket + timedelta(days=1), 0, 0.0, 0, 0, 0)])
+    monkeypatch.setattr(database, "get_connection", lambda: RecordingConnection(cursor))
+    until = datetime(2026, 5, 10)
+
+    series = database.get_action_rollups("day", until=until, by_action=False)
+
+    sql, params = cursor.executed[0]
+    assert params == ["D", until - timedelta(days=30), until]
+    assert "GROUP BY BucketStart ORDER BY BucketStart" in sql
+    assert series[0] == {"bucket": "2026-05-01T00:00:00", "processed": 4, "review_flagged": 1,
+                         "avg_confidence": 0.75, "correct": 3, "incorrect": 1,
+                         "accuracy": 0.75}
+    assert series[1]["avg_confidence"] is None and series[1]["accuracy"] is None
+
+def test_rollup_series_by_hour_and_action(monkeypatch):
+    bucket = datetime(2026, 5, 1, 13)
+    cursor = RecordingCursor([(bucket, "feed", 2, 1.0, 0, 0, 0)])
+    monkeypatch.setattr(database, "get_connection", lambda: RecordingConnection(cursor))
+    until = datetime(2026, 5, 2)
+
+    series = database.get_action_rollups("hour", until=until, action="feed")
+
+    sql, params = cursor.executed[0]
+    assert params == ["H", until - timedelta(hours=48), until, "feed"]
+    assert "GROUP BY BucketStart, Action" in sql
+    assert series == [{"bucket": "2026-05-01T13:00:00", "action": "feed", "processed": 2,
+                       "review_flagged": 0, "avg_confidence": 0.5, "correct": 0,
+                       "incorrect": 0, "accuracy": None}]
@@ -0,0 +1,102 @@
+# backend/tests/test_scoring_runner.py
+import threading
+from datetime import datetime
+import numpy as np
+from application.runners.scoring_runner import ScoringAgentRunner
+from domain.observation_batch import BatchPrediction, ObservationBatch
+
+def make_batch(ids) -> ObservationBatch:
+    return ObservationBatch.from_rows([(i, datetime(2026, 5, 1), 34.0, 60.0, 10, 7, 0, None, 25.0)
+                                       for i in ids])
+
+class FakeQueue:
+    """Shardovi reda u memoriji; bilježi upisane i vraćene opservacije"""
+    def __init__(self, shards, fail_writes=False):
+        self.shards = {shard: list(ids) for shard, ids in shards.items()}
+        self.fail_writes = fail_writes
+        self.processed = []
+        self.released = []
+
+    def dequeue_batch(self, batch_size, shard=None):
+        ids = self.shards.get(shard, [])
+        claimed, self.shards[shard] = ids[:batch_size], ids[batch_size:]
+        return make_batch(claimed) if claimed else ObservationBatch.empty()
+
+    def mark_batch_processed(self, ids, actions, confidences, review_severity, model_version,
+                             hive_windows=None):
+        if self.fail_writes:
+            return False
+        self.processed.append((list(ids), model_version))
+        return True
+
+    def release_claims(self, ids):
+        self.released.extend(int(i) for i in ids)
+
+class FakeScoring:
+    model_version = "v1"
+
+    def __init__(self, on_score=None):
+        self.on_score = on_score
+
+    def score_batch(self, batch):
+        if self.on_score:
+            self.on_score()
+        n = len(batch)
+        return BatchPrediction(batch.ids, np.array(["feed"] * n), np.full(n, 0.9),
+                               np.zeros(n, dtype=bool), np.zeros(n, dtype=bool), np.zeros(n))
+
+class FakeLatency:
+    def __init__(self):
+        self.recorded = []
+
+    def record(self, queue_wait_ms, end_to_end_ms):
+        self.recorded.append((queue_wait_ms, end_to_end_ms))
+
+def test_step_batch_processes_only_its_shard():
+    queue = FakeQueue({0: [1, 2, 3], 1: [10, 11]})
+    latency = FakeLatency()
+    runner = ScoringAgentRunner(queue, FakeScoring(), latency_tracker=latency)
+
+    assert runner.step_batch(batch_size=2, shard=1) == 2
+    assert queue.processed == [([10, 11], "v1")]
+    assert queue.shards[0] == [1, 2, 3]
+    assert runner.step_batch(batch_size=2, shard=1) == 0
+    assert runner.get_status()["processed_count"] == 2
+    np.testing.assert_array_equal(latency.recorded[0][0], [25.0, 25.0])
+
+def test_inactive_worker_releases_claimed_batch():
+    queue = FakeQueue({0: [1, 2]})
+    runner = ScoringAgentRunner(queue, FakeScoring(), is_active=lambda: False)
+
+    assert runner.step_batch(batch_size=10, shard=0) == 0
+    assert queue.processed == []
+    assert queue.released == [1, 2]
+    assert runner.processed_count == 0
+
+def test_failed_write_releases_batch_without_stats():
+    queue = FakeQueue({0: [1, 2]}, fail_writes=True)
+    latency = FakeLatency()
+    runner = ScoringAgentRunner(queue, FakeScoring(), latency_tracker=latency)
+
+    assert runner.step_batch(batch_size=10, shard=0) == 0
+    assert queue.released == [1, 2]
+    assert latency.recorded == []
+    assert runner.get_status()["processed_count"] == 0
+
+def test_wait_idle_waits_for_tick_in_flight():
+    scoring_started, release = threading.Event(), threading.Event()
+    def block():
+        scoring_started.set()
+        release.wait(5)
+
+    queue = FakeQueue({0: [1]})
+    runner = ScoringAgentRunner(queue, FakeScoring(on_score=block))
+    worker = threading.Thread(target=runner.step_batch, kwargs={"shard": 0})
+    worker.start()
+    scoring_started.wait(5)
+
+    assert not runner.wait_idle(timeout_s=0.05)
+    release.set()
+    assert runner.wait_idle(timeout_s=5)
+    worker.join(5)
+    assert queue.processed == [([1], "v1")]
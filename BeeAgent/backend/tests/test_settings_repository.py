@@ -0,0 +1,100 @@
+# backend/tests/test_settings_repository.py
+import dataclasses
+from domain.entities import SystemSettings
+from infrastructure.settings_repository import CachedSettingsRepository
+
+class FakeRepository:
+    """SettingsRepository u memoriji; RowVer raste pri svakoj izmjeni reda"""
+
+    def __init__(self):
+        self.settings = SystemSettings()
+        self.row_version = 1
+        self.reads = 0
+
+    def _bump(self):
+        self.row_version += 1
+
+    def get_row_version(self):
+        return self.row_version.to_bytes(8, "big")
+
+    def get_versioned_settings(self):
+        self.reads += 1
+        return dataclasses.replace(self.settings), self.get_row_version()
+
+    def get_system_settings(self):
+        return self.get_versioned_settings()[0]
+
+    def save_settings(self, settings):
+        self.settings = dataclasses.replace(
+            settings, new_gold_since_last_train=self.settings.new_gold_since_last_train)
+        self._bump()
+
+    def increment_new_gold(self, count=1):
+        self.settings.new_gold_since_last_train += count
+        self._bump()
+
+    def consume_new_gold(self, count):
+        self.settings.new_gold_since_last_train = max(
+            0, self.settings.new_gold_since_last_train - count)
+        self._bump()
+
+def test_refresh_only_when_row_version_changes():
+    repository = FakeRepository()
+    cache = CachedSettingsRepository(repository)
+    assert not cache.refresh_if_changed()
+    assert repository.reads == 1
+
+    repository.settings.exploration_rate = 0.2
+    repository._bump()
+    assert cache.refresh_if_changed()
+    assert cache.get_system_settings().exploration_rate == 0.2
+
+def test_subscribers_get_admin_changes():
+    repository = FakeRepository()
+    cache = CachedSettingsRepository(repository)
+    received = []
+    cache.subscribe(received.append)
+    assert len(received) == 1
+
+    cache.save_settings(SystemSettings(gold_threshold=50, review_rules="[]"))
+    assert received[-1].gold_threshold == 50
+    assert received[-1].review_rules == "[]"
+    assert len(received) == 2
+
+def test_gold_counter_does_not_notify_subscribers():
+    repository = FakeRepository()
+    cache = CachedSettingsRepository(repository)
+    received = []
+    cache.subscribe(received.append)
+
+    cache.increment_new_gold()
+    assert cache.get_system_settings().new_gold_since_last_train == 1
+    # Drugi worker je dodao feedback: RowVer se promijenio, snapshot se osvježava tiho
+    repository.increment_new_gold(2)
+    assert cache.refresh_if_changed()
+    assert cache.get_system_settings().new_gold_since_last_train == 3
+    cache.consume_new_gold(3)
+    assert cache.get_system_settings().new_gold_since_last_train == 0
+    assert len(received) == 1
+
+def test_returned_snapshot_is_a_copy():
+    cache = CachedSettingsRepository(FakeRepository())
+    cache.get_system_settings().gold_threshold = 999
+    assert cache.get_system_settings().gold_threshold == 10
+
+def test_retrain_runner_reads_counter_from_cache():
+    from application.runners.retrain_runner import RetrainAgentRunner
+
+    class FakeTrainingService:
+        def train_model(self):
+            return "v2"
+
+    repository = FakeRepository()
+    cache = CachedSettingsRepository(repository)
+    runner = RetrainAgentRunner(cache, FakeTrainingService())
+    assert runner.step() is None
+
+    repository.increment_new_gold(10)
+    cache.refresh_if_changed()
+    assert runner.step() == {"model_version": "v2", "retrained": True}
+    assert repository.settings.new_gold_since_last_train == 0
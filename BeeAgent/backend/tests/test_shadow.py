@@ -0,0 +1,73 @@
+# backend/tests/test_shadow.py
+import joblib
+import numpy as np
+import pytest
+from sklearn.linear_model import SGDClassifier
+from sklearn.preprocessing import StandardScaler
+from infrastructure.ml.shadow import ShadowRecorder, load_shadow_models, parse_shadow_entry
+
+class CapturingRecorder(ShadowRecorder):
+    """Umjesto baze skuplja redove u memoriji"""
+    def __init__(self, **kwargs):
+        self.flushed = []
+        super().__init__(**kwargs)
+
+    def _flush(self, batch):
+        self.flushed.extend(batch)
+
+def test_record_batch_counts_agreements_and_flushes_rows():
+    recorder = CapturingRecorder(flush_interval_s=0.05)
+    primary = np.array(["inspect", "feed", "ignore"])
+    actions = np.array([["inspect", "feed", "feed"],
+                        ["ignore", "ignore", "ignore"]])
+    confidences = np.array([[0.9, 0.8, 0.7], [0.6, 0.5, 0.4]])
+    recorder.record_batch(np.array([10, 11, 12]), primary, ["a", "b"], actions, confidences)
+    recorder.stop()
+
+    summary = recorder.get_summary()
+    assert summary["models"]["a"]["predictions"] == 3
+    assert summary["models"]["a"]["agreements"] == 2
+    assert summary["models"]["b"]["agreements"] == 1
+    assert summary["pending"] == 0
+    assert sorted(recorder.flushed) == sorted([
+        (10, "a", "inspect", 0.9, "inspect"), (11, "a", "feed", 0.8, "feed"),
+        (12, "a", "feed", 0.7, "ignore"), (10, "b", "ignore", 0.6, "inspect"),
+        (11, "b", "ignore", 0.5, "feed"), (12, "b", "ignore", 0.4, "ignore"),
+    ])
+    assert all(type(row[0]) is int and type(row[3]) is float for row in recorder.flushed)
+
+def test_batch_over_max_pending_is_dropped_whole():
+    recorder = CapturingRecorder(max_pending=3, flush_interval_s=0.05)
+    recorder.record_batch([1, 2], np.array(["feed", "feed"]), ["a", "b"],
+                          np.array([["feed", "feed"], ["feed", "feed"]]), np.ones((2, 2)))
+    recorder.stop()
+    assert recorder.dropped == 4
+    assert recorder.flushed == []
+    assert recorder.get_summary()["models"]["a"]["predictions"] == 2
+
+@pytest.mark.parametrize("entry, expected", [
+    ("model_v2.joblib", ("model_v2.joblib", None)),
+    ("model_v2.joblib:scaler_v2.joblib", ("model_v2.joblib", "scaler_v2.joblib")),
+    ("C:\\m\\model.joblib:C:\\m\\scaler.joblib", ("C:\\m\\model.joblib", "C:\\m\\scaler.joblib")),
+    ("C:\\m\\model.beemodel", ("C:\\m\\model.beemodel", None)),
+])
+def test_parse_shadow_entry(entry, expected):
+    assert parse_shadow_entry(entry) == expected
+
+def test_joblib_shadow_with_scaler_scores_scaled_features(tmp_path):
+    rng = np.random.default_rng(0)
+    X = np.column_stack([rng.normal(30, 5, 300), rng.normal(60, 10, 300)])
+    y = np.where(X[:, 0] > 31, "feed", "ignore")
+    scaler = StandardScaler().fit(X)
+    model = SGDClassifier(max_iter=50, tol=None, random_state=0).fit(scaler.transform(X), y)
+    joblib.dump(model, tmp_path / "model.joblib")
+    joblib.dump(scaler, tmp_path / "scaler.joblib")
+
+    models = load_shadow_models([f"{tmp_path / 'model.joblib'}:{tmp_path / 'scaler.joblib'}"])
+
+    labels, _ = models[str(tmp_path / "model.joblib")].predict_batch(X)
+    assert np.array_equal(labels, model.predict(scaler.transform(X)))
+
+def test_missing_scaler_file_skips_shadow(tmp_path):
+    joblib.dump(SGDClassifier().fit([[0.0], [1.0]], ["a", "b"]), tmp_path / "model.joblib")
+    assert load_shadow_models([f"{tmp_path / 'model.joblib'}:{tmp_path / 'none.joblib'}"]) == {}
@@ -0,0 +1,185 @@
+# backend/tests/test_spool.py
+import asyncio
+import os
+import threading
+import time
+import types
+import pyodbc
+import pytest
+from application.services.admission_service import AdmissionDecision
+from core.circuit_breaker import CircuitBreaker
+from domain.entities import Observation
+from infrastructure.database import is_connectivity_error
+from infrastructure.spool import CURRENT_SEGMENT, DEAD_LETTER_FILE, ObservationSpool
+from application.runners.spool_runner import (SpoolReplayRunner, observation_to_record,
+                                              record_to_observation)
+from web.dtos import ObservationRequest
+
+def make_record(key: str, hive_id: str = "hive-1") -> dict:
+    observation = Observation.create_new(temperature=34.5, humidity=60.0, frames=10,
+                                         strength=7, varoa=False, hive_id=hive_id,
+                                         idempotency_key=key)
+    return observation_to_record(observation)
+
+class FakeQueueService:
+    """enqueue_many kao QueueService; `fail` odlučuje grešku po batch-u"""
+
+    def __init__(self, fail=None):
+        self.fail = fail
+        self.enqueued = []
+
+    def enqueue_many(self, observations, received_at):
+        assert len(observations) == len(received_at)
+        if self.fail:
+            error = self.fail(observations)
+            if error:
+                raise error
+        self.enqueued.extend(observations)
+
+def test_append_and_rotate(tmp_path):
+    spool = ObservationSpool(str(tmp_path))
+    assert not spool.has_data()
+    assert spool.rotate() is None
+
+    spool.append(make_record("a"))
+    spool.append_many([make_record("b"), make_record("c")])
+    assert spool.has_data()
+    assert spool.pending_segments() == []
+
+    segment = spool.rotate()
+    assert os.path.basename(segment).startswith("segment-")
+    assert spool.pending_segments() == [segment]
+    assert os.path.getsize(os.path.join(str(tmp_path), CURRENT_SEGMENT)) == 0
+
+    records = ObservationSpool.read_segment(segment)
+    assert [r["idempotency_key"] for r in records] == ["a", "b", "c"]
+    assert record_to_observation(records[0]).hive_id == "hive-1"
+
+def test_rotates_when_segment_is_full(tmp_path):
+    spool = ObservationSpool(str(tmp_path), max_segment_bytes=1)
+    spool.append(make_record("a"))
+    spool.append(make_record("b"))
+    segments = spool.pending_segments()
+    assert len(segments) == 2
+    assert [ObservationSpool.read_segment(s)[0]["idempotency_key"] for s in segments] == ["a", "b"]
+
+def test_read_segment_skips_corrupt_lines(tmp_path):
+    path = tmp_path / "segment-1.jsonl"
+    path.write_text('{"idempotency_key": "a"}\nnije json\n{"idempotency_key": "b"}\n{"idemp',
+                    encoding="utf-8")
+    records = ObservationSpool.read_segment(str(path))
+    assert [r["idempotency_key"] for r in records] == ["a", "b"]
+
+def test_reopen_after_torn_write_starts_new_line(tmp_path):
+    (tmp_path / CURRENT_SEGMENT).write_bytes(b'{"idempotency_key": "a"}\n{"idemp')
+    spool = ObservationSpool(str(tmp_path))
+    spool.append(make_record("b"))
+    records = ObservationSpool.read_segment(spool.rotate())
+    assert [r["idempotency_key"] for r in records] == ["a", "b"]
+
+def test_replay_writes_segment_and_removes_it(tmp_path):
+    spool = ObservationSpool(str(tmp_path))
+    spool.append_many([make_record(key) for key in "abcde"])
+    queue = FakeQueueService()
+    runner = SpoolReplayRunner(spool, queue, CircuitBreaker(), batch_size=2)
+
+    # Nema zatvorenih segmenata - runner sam rotira tekući
+    assert runner.step() == 5
+    assert [o.idempotency_key for o in queue.enqueued] == list("abcde")
+    assert spool.pending_segments() == []
+    assert runner.replayed_count == 5
+    assert not spool.has_data()
+    assert runner.step() == 0
+
+def test_replay_keeps_segment_on_connectivity_error(tmp_path):
+    spool = ObservationSpool(str(tmp_path))
+    spool.append(make_record("a"))
+    segment = spool.rotate()
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout_s=60)
+    queue = FakeQueueService(fail=lambda observations: pyodbc.OperationalError("08S01", "link"))
+    runner = SpoolReplayRunner(spool, queue, breaker)
+
+    assert runner.step() == 0
+    assert spool.pending_segments() == [segment]
+    assert breaker.is_open
+    assert runner.replayed_count == 0
+    # Otvoren breaker - sljedeći tick ne dira bazu
+    queue.fail = None
+    assert runner.step() == 0
+    assert queue.enqueued == []
+
+def test_replay_dead_letters_only_rejected_rows(tmp_path):
+    spool = ObservationSpool(str(tmp_path))
+    spool.append_many([make_record("a"), make_record("b", hive_id="x" * 100), make_record("c")])
+
+    def reject_long_hive_id(observations):
+        if any(len(o.hive_id) > 50 for o in observations):
+            return pyodbc.DataError("22001", "String or binary data would be truncated")
+
+    queue = FakeQueueService(fail=reject_long_hive_id)
+    runner = SpoolReplayRunner(spool, queue, CircuitBreaker())
+
+    assert runner.step() == 2
+    assert [o.idempotency_key for o in queue.enqueued] == ["a", "c"]
+    assert runner.dead_letter_count == 1
+    assert spool.pending_segments() == []
+
+    dead = ObservationSpool.read_segment(str(tmp_path / DEAD_LETTER_FILE))
+    assert [d["record"]["idempotency_key"] for d in dead] == ["b"]
+    assert "DataError" in dead[0]["error"]
+    assert spool.get_info()["dead_letter_bytes"] > 0
+
+@pytest.mark.parametrize("error", [TimeoutError(), asyncio.TimeoutError(),
+                                   pyodbc.OperationalError("08S01", "link"),
+                                   pyodbc.InterfaceError("IM002", "driver")])
+def test_connectivity_errors_are_spooled(error):
+    assert is_connectivity_error(error)
+
+def test_data_errors_are_not_connectivity_errors():
+    assert not is_connectivity_error(pyodbc.DataError("22001", "truncated"))
+    assert not is_connectivity_error(ValueError("bad"))
+
+class SlowCommitQueue:
+    """Observations po IdempotencyKey; enqueue završi (commit) tek nakon budžeta /predict"""
+
+    def __init__(self, delay_s):
+        self.delay_s = delay_s
+        self.rows = {}
+        self.committed = threading.Event()
+
+    def enqueue_idempotent(self, observation):
+        # Parametri INSERT-a su vezani prije nego što upis stigne do commit-a
+        key = observation.idempotency_key
+        time.sleep(self.delay_s)
+        self.rows.setdefault(key, observation)
+        self.committed.set()
+        return observation, False
+
+    def enqueue_many(self, observations, received_at):
+        # WHERE NOT EXISTS (... IdempotencyKey = ?)
+        for observation in observations:
+            self.rows.setdefault(observation.idempotency_key, observation)
+
+class AdmitAll:
+    def admit(self, client_id):
+        return AdmissionDecision(admitted=True, estimated_wait_ms=0.0)
+
+def test_timed_out_enqueue_that_commits_is_not_replayed_twice(tmp_path, monkeypatch):
+    from web import main
+    queue = SlowCommitQueue(delay_s=0.2)
+    spool = ObservationSpool(str(tmp_path))
+    breaker = CircuitBreaker()
+    monkeypatch.setattr(main, "ENQUEUE_BUDGET_S", 0.01)
+    for name, value in {"queue_service": queue, "admission": AdmitAll(),
+                        "db_breaker": breaker, "spool": spool}.items():
+        monkeypatch.setattr(main.runtime, name, value)
+    request = types.SimpleNamespace(client=None)
+    body = ObservationRequest(temperature=34.5, humidity=60.0, frames=10, strength=7, varoa=0)
+
+    response = asyncio.run(main.predict(body, request, idempotency_key=None, client_id=None))
+
+    assert response.status == "spooled" and response.idempotency_key.startswith("auto-")
+    # Prekinuti enqueue je ipak upisao red
+    assert queue.committed.wait(5)
+    assert SpoolReplayRunner(spool, queue, CircuitBreaker()).step() == 1
+    assert list(queue.rows) == [response.idempotency_key]
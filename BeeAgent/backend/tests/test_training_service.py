@@ -0,0 +1,98 @@
+# backend/tests/test_training_service.py
+import threading
+import time
+from application.services import training_service
+from application.services.training_service import TrainingService
+
+class FakeClassifier:
+    model_file = "model.joblib"
+    scaler_file = None
+
+    def __init__(self):
+        self.published = []
+
+    def publish(self, model_file, version):
+        self.published.append(version)
+
+class InlinePool:
+    """ProcessPoolExecutor zamjena: posao se izvršava odmah u istom threadu"""
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def submit(self, func, *args):
+        from concurrent.futures import Future
+        future = Future()
+        future.set_result(func(*args))
+        return future
+
+def test_retrain_and_selection_do_not_overlap(monkeypatch):
+    running, overlaps = [], []
+
+    def job(name, result):
+        def run(*args):
+            if running:
+                overlaps.append((running[0], name))
+            running.append(name)
+            time.sleep(0.05)
+            running.remove(name)
+            return result
+        return run
+
+    monkeypatch.setattr(training_service, "ProcessPoolExecutor", InlinePool)
+    monkeypatch.setattr(training_service, "train_from_feedback", job("retrain", {
+        "model_version": "r1", "model_file": "r1.joblib", "examples": 1}))
+    monkeypatch.setattr(training_service, "select_best_model", job("selection", {
+        "promoted": True, "model_version": "s1", "model_file": "s1.joblib",
+        "best_params": {}, "best_accuracy": 1.0}))
+
+    classifier = FakeClassifier()
+    service = TrainingService(classifier)
+    threads = [threading.Thread(target=service.train_model),
+               threading.Thread(target=service.select_model)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert overlaps == []
+    assert sorted(classifier.published) == ["r1", "s1"]
+
+def test_inactive_worker_does_not_publish(monkeypatch):
+    monkeypatch.setattr(training_service, "ProcessPoolExecutor", InlinePool)
+    monkeypatch.setattr(training_service, "select_best_model", lambda *args: {
+        "promoted": True, "model_version": "s1", "model_file": "s1.joblib",
+        "best_params": {}, "best_accuracy": 1.0})
+    classifier = FakeClassifier()
+    summary = TrainingService(classifier, is_active=lambda: False).select_model()
+    assert summary["promoted"] is False
+    assert classifier.published == []
+
+def test_incumbent_is_scored_without_seeing_the_holdout(tmp_path):
+    import numpy as np
+    from infrastructure.ml.classifier import BeeClassifier
+    from infrastructure.ml.model_selection import holdout_split, incumbent_accuracy
+
+    rng = np.random.default_rng(0)
+    X = np.column_stack([rng.normal(30, 5, 400), rng.normal(60, 10, 400),
+                         rng.integers(1, 20, 400), rng.integers(1, 10, 400),
+                         rng.integers(0, 2, 400)]).astype(float)
+    y = np.where(X[:, 0] > 32, "zalivanje", "nista")
+    X_train, y_train, X_holdout, y_holdout = holdout_split(X, y)
+
+    fresh = BeeClassifier(str(tmp_path / "fresh.joblib"))
+    # Živi model je već treniran na holdout-u (feedback)
+    trained = BeeClassifier(str(tmp_path / "trained.joblib"))
+    trained.train_batch(X_holdout, y_holdout)
+    live_model = trained.model
+
+    # Ocjena zavisi samo od konfiguracije i X_train, ne od onoga što je živi model vidio
+    assert (incumbent_accuracy(trained, X_train, y_train, X_holdout, y_holdout)
+            == incumbent_accuracy(fresh, X_train, y_train, X_holdout, y_holdout))
+    assert trained.model is live_model
@@ -0,0 +1,172 @@
+# backend/tests/test_training_store.py
+import os
+import numpy as np
+import pytest
+from infrastructure.ml import training_store
+from infrastructure.ml.training_store import (COLUMNS, TrainingSetStore, _column_path,
+                                              load_training_set)
+
+def features(value: float) -> list:
+    return [value, 50.0, 10.0, 7.0, 0.0]
+
+def test_append_and_reopen(tmp_path):
+    directory = str(tmp_path / "ts")
+    store = TrainingSetStore(directory)
+    store.append(1, 100, features(30.0), "healthy")
+    store.append(2, 101, features(40.0), "varroa")
+    store.append(3, 102, features(35.0), "healthy")
+
+    reopened = TrainingSetStore(directory)
+    assert reopened.count == 3
+    assert reopened.meta["classes"] == ["healthy", "varroa"]
+
+    X, y, synced_id = load_training_set(directory)
+    assert X.shape == (3, 5)
+    assert X[:, 0].tolist() == [30.0, 40.0, 35.0]
+    assert y.tolist() == ["healthy", "varroa", "healthy"]
+    assert synced_id == 0
+
+def test_rejects_different_feature_count(tmp_path):
+    directory = str(tmp_path / "ts")
+    TrainingSetStore(directory)
+    with pytest.raises(ValueError):
+        TrainingSetStore(directory, n_features=4)
+
+def test_reopen_truncates_rows_past_header(tmp_path):
+    directory = str(tmp_path / "ts")
+    store = TrainingSetStore(directory)
+    store.append(1, 100, features(30.0), "healthy")
+
+    # Pad između upisa kolona i ažuriranja headera: kolone imaju višak bajtova
+    generation = store.meta["generation"]
+    with open(_column_path(directory, generation, "feedback_id"), "ab") as f:
+        f.write(np.asarray([2], dtype=COLUMNS["feedback_id"]).tobytes())
+    with open(_column_path(directory, generation, "features"), "ab") as f:
+        f.write(b"\x00" * 3)
+
+    reopened = TrainingSetStore(directory)
+    assert reopened.count == 1
+    for name, dtype in COLUMNS.items():
+        width = 5 if name == "features" else 1
+        assert os.path.getsize(_column_path(directory, generation, name)) == width * dtype.itemsize
+
+    reopened.append(2, 101, features(40.0), "varroa")
+    X, y, _ = load_training_set(directory)
+    assert X[:, 0].tolist() == [30.0, 40.0]
+    assert y.tolist() == ["healthy", "varroa"]
+
+def test_compact_keeps_last_feedback_per_observation(tmp_path):
+    directory = str(tmp_path / "ts")
+    store = TrainingSetStore(directory)
+    store.append(1, 100, features(30.0), "healthy")
+    store.append(2, 101, features(31.0), "healthy")
+    store.append(3, 100, features(32.0), "varroa")
+    store.append(4, 102, features(33.0), "healthy")
+    store.append(5, 101, features(34.0), "varroa")
+
+    assert store.compact() == 2
+    assert store.count == 3
+    assert store.meta["generation"] == 1
+    assert not os.path.exists(os.path.join(directory, "gen-0"))
+
+    X, y, _ = load_training_set(directory)
+    # Redoslijed pristizanja zadnjih feedback-a: 3, 4, 5
+    assert X[:, 0].tolist() == [32.0, 33.0, 34.0]
+    assert y.tolist() == ["varroa", "healthy", "varroa"]
+
+    reopened = TrainingSetStore(directory)
+    assert reopened.count == 3
+    assert reopened.meta["compacted_count"] == 3
+
+def test_needs_compaction(tmp_path, monkeypatch):
+    monkeypatch.setattr(training_store, "COMPACT_MIN_ROWS", 3)
+    store = TrainingSetStore(str(tmp_path / "ts"))
+    store.append(1, 100, features(30.0), "healthy")
+    store.append(2, 100, features(31.0), "healthy")
+    assert not store.needs_compaction()
+    store.append(3, 100, features(32.0), "healthy")
+    assert store.needs_compaction()
+    store.compact()
+    assert not store.needs_compaction()
+
+def feedback_row(feedback_id: int, observation_id: int, temperature: float, label: str) -> tuple:
+    # (Id, ObservationId, temperature, humidity, frames, strength, varoa, label)
+    return (feedback_id, observation_id, temperature, 50.0, 10, 7, False, label)
+
+def test_sync_from_database_picks_up_late_commit_without_duplicates(tmp_path, monkeypatch):
+    # Red 2 je još u otvorenoj transakciji kad prvi sync vidi redove 1 i 3
+    rows = [feedback_row(1, 100, 30.0, "healthy"), feedback_row(3, 102, 32.0, "healthy")]
+    calls = []
+
+    def fake_iter_feedback_rows(after_id, chunk_size):
+        calls.append(after_id)
+        pending = sorted(row for row in rows if row[0] > after_id)
+        for start in range(0, len(pending), chunk_size):
+            yield pending[start:start + chunk_size]
+
+    monkeypatch.setattr(training_store, "iter_feedback_rows", fake_iter_feedback_rows)
+    monkeypatch.setattr(training_store, "settled_feedback_id", lambda: 1)
+
+    store = TrainingSetStore(str(tmp_path / "ts"))
+    # /feedback je već dodao red 3
+    store.append(3, 102, features(32.0), "healthy")
+
+    assert store.sync_from_database() == 1
+    assert store.count == 2
+    # Red 3 je iznad settled granice - watermark ostaje na 1
+    assert store.synced_feedback_id == 1
+
+    rows.append(feedback_row(2, 101, 31.0, "varroa"))
+    monkeypatch.setattr(training_store, "settled_feedback_id", lambda: 10)
+    assert store.sync_from_database(chunk_size=1) == 1
+    assert calls == [0, 1]
+    assert store.synced_feedback_id == 3
+
+    X, y, synced_id = load_training_set(store.directory)
+    assert X[:, 0].tolist() == [32.0, 30.0, 31.0]
+    assert y.tolist() == ["healthy", "healthy", "varroa"]
+    assert synced_id == 3
+
+def test_sync_after_compaction_does_not_restore_superseded_rows(tmp_path, monkeypatch):
+    rows = [feedback_row(1, 100, 30.0, "healthy"), feedback_row(2, 100, 31.0, "varroa")]
+    monkeypatch.setattr(training_store, "iter_feedback_rows",
+                        lambda after_id, chunk_size: iter([[row for row in rows if row[0] > after_id]]))
+    # Nijedan red još nije settled - watermark ostaje na 0
+    monkeypatch.setattr(training_store, "settled_feedback_id", lambda: 0)
+
+    directory = str(tmp_path / "ts")
+    store = TrainingSetStore(directory)
+    store.append(1, 100, features(30.0), "healthy")
+    store.append(2, 100, features(31.0), "varroa")
+    assert store.compact() == 1
+
+    # Red 1 je zamijenjen redom 2 iste opservacije - ni sync ni novi proces ga ne vraćaju
+    assert store.sync_from_database() == 0
+    assert TrainingSetStore(directory).sync_from_database() == 0
+    _, y, _ = load_training_set(directory)
+    assert y.tolist() == ["varroa"]
+
+def test_compact_carries_rows_appended_during_rewrite(tmp_path, monkeypatch):
+    store = TrainingSetStore(str(tmp_path / "ts"))
+    store.append(1, 100, features(30.0), "healthy")
+    store.append(2, 100, features(31.0), "healthy")
+
+    # /feedback dodaje red dok se nova generacija piše (bez lock-a)
+    original_map = training_store._map_columns
+    appended = []
+
+    def map_and_append(directory, count, meta):
+        columns = original_map(directory, count, meta)
+        if not appended:
+            appended.append(True)
+            store.append(3, 101, features(32.0), "varroa")
+        return columns
+
+    monkeypatch.setattr(training_store, "_map_columns", map_and_append)
+    assert store.compact() == 1
+    monkeypatch.setattr(training_store, "_map_columns", original_map)
+
+    X, y, _ = load_training_set(store.directory)
+    assert X[:, 0].tolist() == [31.0, 32.0]
+    assert y.tolist() == ["healthy", "varroa"]
+    assert TrainingSetStore(store.directory).count == 2
@@ -1,5 +1,5 @@
 # backend/web/dtos.py
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Optional, List
 
 # Stari DTO-ovi (zadržati za kompatibilnost)
@@ -9,6 +9,10 @@ class ObservationRequest(BaseModel):
     frames: int
     strength: int
     varoa: int
+    hive_id: Optional[str] = Field(None, max_length=64)
+    idempotency_key: Optional[str] = Field(None, max_length=128)
+    # Pčelinjak; zajedno s hive_id određuje shard reda (redoslijed po košnici)
+    apiary_id: Optional[str] = Field(None, max_length=64)
 
 class FeedbackRequest(BaseModel):
     obs_id: int
@@ -23,6 +27,7 @@ class QueueResponse(BaseModel):
     message: str
     timestamp: str
     estimated_wait_time_ms: Optional[float] = None
+    duplicate: bool = False
 
 class PredictionResultResponse(BaseModel):
     observation_id: int
@@ -33,6 +38,27 @@ class PredictionResultResponse(BaseModel):
     processing_time_ms: Optional[float] = None
     error: Optional[str] = None
 
+class PredictionQueryRequest(BaseModel):
+    ids: List[int] = Field(..., max_length=10000)
+
+class ReviewItem(BaseModel):
+    observation_id: int
+    timestamp: Optional[str] = None
+    temperature: float
+    humidity: float
+    frames: int
+    strength: int
+    varoa: bool
+    predicted_action: Optional[str] = None
+    confidence: Optional[float] = None
+    hive_id: Optional[str] = None
+    review_severity: float
+
+class ReviewInboxResponse(BaseModel):
+    items: List[ReviewItem]
+    # Proslijedi kao ?cursor= za sljedeću stranicu (None = kraj)
+    next_cursor: Optional[str] = None
+
 class AgentStatusResponse(BaseModel):
     is_running: bool
     processed_count: int
@@ -40,6 +66,20 @@ class AgentStatusResponse(BaseModel):
     queue_size: int = 0
     error: Optional[str] = None
 
+class SettingsRequest(BaseModel):
+    gold_threshold: Optional[int] = None
+    enable_retraining: Optional[bool] = None
+    exploration_rate: Optional[float] = None
+    # [{name, field, op, value}]; [] isključuje sva pravila za pregled, null ih ne mijenja
+    review_rules: Optional[List[dict]] = None
+
+class SettingsResponse(BaseModel):
+    gold_threshold: int
+    enable_retraining: bool
+    new_gold_since_last_train: int
+    exploration_rate: float
+    review_rules: List[dict] = []
+
 # Legacy (za backward compatibility)
 class PredictionResponse(BaseModel):
     obs_id: int
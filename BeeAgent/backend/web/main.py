@@ -1,76 +1,69 @@
 # backend/web/main.py
-from fastapi import FastAPI, BackgroundTasks, HTTPException, status
+from fastapi import FastAPI, BackgroundTasks, HTTPException, Header, Request, Response, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from contextlib import asynccontextmanager
 from pydantic import BaseModel
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Tuple
 import asyncio
-import time
+import dataclasses
+import math
+import uuid
 import logging
 from datetime import datetime
 
-# Setup logging
-logging.basicConfig(level=logging.INFO)
-logger = logging.getLogger(__name__)
+from core.logging_config import setup_logging
 
-# Globalni objekti 
-classifier = None
-queue_service = None
-scoring_service = None
-runner = None
-background_task = None
-agent_running = False
+# Setup logging: formatiranje i I/O u pozadinskom threadu (QueueListener)
+LOG_LEVEL = logging.INFO
+LOG_JSON = False
+setup_logging(LOG_LEVEL, LOG_JSON)
+logger = logging.getLogger(__name__)
 
 # Import DTO-ova
-from .dtos import ObservationRequest, FeedbackRequest
+from .dtos import ObservationRequest, FeedbackRequest, SettingsRequest, SettingsResponse
+from .dtos import PredictionQueryRequest, ReviewItem, ReviewInboxResponse
+from .packed import PACKED_CONTENT_TYPE, PackedFormatError, decode_packed
 
 # Import servisa i runnera
 from infrastructure.ml.classifier import BeeClassifier
-from infrastructure.database import init_database, save_feedback, get_connection
-from infrastructure.database import get_observation_status, get_observation_details
+from infrastructure.database import save_feedback
+from infrastructure.database import get_observation_status
+from infrastructure.database import get_observation_statuses, iter_processed_results
+from infrastructure.database import get_review_inbox, get_action_rollups, ROLLUP_GRANULARITIES
+from infrastructure.database import is_connectivity_error
 from domain.entities import Observation
-from application.services.queue_service import QueueService
-from application.services.scoring_service import ScoringService
-from application.runners.scoring_runner import ScoringAgentRunner
+from application.services.latency_service import summarize_windows
+from application.services.monitoring_service import without_histograms
+from application.runners.spool_runner import observation_to_record
+from application.runners.worker_runtime import WorkerRuntime
+from application.runners.worker_runtime import QUEUE_SHARDS, AGENT_CONSUMERS
+from application.runners.worker_runtime import WORKER_ROLE, LEADER_ELECTION
+from infrastructure import export as exporter
+from application.services.review_rules import ReviewRuleEngine, parse_rules
+
+# Spool: /predict piše lokalno kad baza ne odgovori u ENQUEUE_BUDGET_S
+ENQUEUE_BUDGET_S = 0.5
+# Isto kao IdempotencyKey NVARCHAR(128)
+IDEMPOTENCY_KEY_MAX_LENGTH = 128
+# Feed rezultata (GET /predictions): redova po odgovoru, default i gornja granica
+RESULTS_PAGE_SIZE = 1000
+MAX_RESULTS_PAGE_SIZE = 10000
+# Binarni batch s gateway-a (POST /predict/packed)
+MAX_PACKED_RECORDS = 2000
+PACKED_ENQUEUE_BUDGET_S = 2.0
+
+# Servisi, izbor leadera, agent i pozadinske petlje ovog workera
+runtime = WorkerRuntime()
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Lifecycle management za FastAPI"""
-    
-    global classifier, queue_service, scoring_service, runner, agent_running, background_task
-    
     logger.info("Inicijalizacija BeeAgent sistema...")
     
     try:
-        # 1. Inicijaliziraj bazu
-        logger.info("Inicijalizacija baze podataka...")
-        db_success = init_database()
-        if not db_success:
-            logger.error("Neuspješna inicijalizacija baze!")
-        else:
-            logger.info("Baza podataka spremna")
-        
-        # 2. Kreiraj ML klasu
-        logger.info("Učitavanje ML modela...")
-        classifier = BeeClassifier()
-        logger.info("ML model spreman")
-        
-        # 3. Kreiraj servise
-        logger.info("Kreiranje servisa...")
-        queue_service = QueueService()
-        scoring_service = ScoringService(classifier, exploration_rate=0.05)
-        
-        # 4. Kreiraj runnera (AGENT!)
-        logger.info("Kreiranje agent runnera...")
-        runner = ScoringAgentRunner(queue_service, scoring_service)
-        
-        # 5. Automatski pokreni agenta
-        logger.info("Pokretanje background agenta...")
-        agent_running = True
-        background_task = asyncio.create_task(run_agent_loop())
-        
+        await runtime.start()
         logger.info("BeeAgent sistema spreman!")
-        
     except Exception as e:
         logger.error(f"Greška pri inicijalizaciji sistema: {e}")
     
@@ -78,13 +71,14 @@ async def lifespan(app: FastAPI):
     
     # Shutdown
     logger.info("Gašenje BeeAgent sistema...")
-    agent_running = False
-    if background_task:
-        background_task.cancel()
-        try:
-            await background_task
-        except asyncio.CancelledError:
-            pass
+    await runtime.stop()
+
+async def _leader_snapshot() -> dict:
+    """API worker: zadnji snapshot leadera; 503 ako ga nema ili je zastario"""
+    snapshot = await runtime.leader_snapshot()
+    if snapshot is None:
+        raise HTTPException(status_code=503, detail="Leader (agent) trenutno nije dostupan")
+    return snapshot
 
 # Kreiraj FastAPI app sa lifespan-om
 app = FastAPI(
@@ -109,10 +103,25 @@ app.add_middleware(
 # ==============================================
 class QueueResponse(BaseModel):
     status: str
-    observation_id: int
+    observation_id: Optional[int] = None
+    message: str
+    timestamp: str
+    estimated_wait_time_ms: Optional[float] = None
+    duplicate: bool = False
+    # Spool: observation_id još ne postoji - ponovni POST s istim ključem ga vraća
+    idempotency_key: Optional[str] = None
+
+class PackedIngestResponse(BaseModel):
+    status: str
+    accepted: int
+    # Po ulaznom zapisu: Id opservacije, None za odbijene (ili dok je batch u spool-u)
+    observation_ids: List[Optional[int]] = []
+    rejected: List[dict] = []
     message: str
     timestamp: str
     estimated_wait_time_ms: Optional[float] = None
+    # Spool: ključevi po prihvaćenom zapisu - ponovni batch s istim ključevima vraća Id-ove
+    idempotency_keys: Optional[List[str]] = None
 
 class PredictionResultResponse(BaseModel):
     observation_id: int
@@ -122,12 +131,20 @@ class PredictionResultResponse(BaseModel):
     processed_at: Optional[str] = None
     processing_time_ms: Optional[float] = None
     error: Optional[str] = None
+    requires_review: Optional[bool] = None
+    review_severity: Optional[float] = None
+
+class PredictionQueryResponse(BaseModel):
+    results: List[PredictionResultResponse]
+    missing: List[int] = []
 
 class AgentStatusResponse(BaseModel):
     is_running: bool
     processed_count: int
     avg_processing_time_ms: float
     queue_size: int = 0
+    service_rate_per_s: Optional[float] = None
+    estimated_wait_time_ms: Optional[float] = None
 
 # ==============================================
 # ASINHRONI ENDPOINTI
@@ -144,27 +161,71 @@ async def root():
     }
 
 @app.post("/predict", response_model=QueueResponse)
-async def predict(obs: ObservationRequest):
+async def predict(obs: ObservationRequest, request: Request,
+                  idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+                  client_id: Optional[str] = Header(None, alias="X-Client-Id")):
     """
-    PURE TRANSPORT LAYER: Stavi u queue i vrati status
+    PURE TRANSPORT LAYER: Stavi u queue i vrati status.
+    Idempotency-Key (header ili polje) - retry vraća originalnu opservaciju.
+    Preopterećenje: 429 (klijent prebrz) ili 503 (pun red) uz Retry-After.
     """
-    if not queue_service:
+    if not runtime.queue_service:
         raise HTTPException(status_code=503, detail="Sistema nije spreman")
+    if idempotency_key is not None and len(idempotency_key) > IDEMPOTENCY_KEY_MAX_LENGTH:
+        raise HTTPException(status_code=422,
+                            detail=f"Idempotency-Key je duži od {IDEMPOTENCY_KEY_MAX_LENGTH} znakova")
     
-    try:
-        # Mapiraj DTO na Domain entitet
-        observation = Observation.create_new(
-            temperature=obs.temperature,
-            humidity=obs.humidity,
-            frames=obs.frames,
-            strength=obs.strength,
-            varoa=obs.varoa
+    decision = runtime.admission.admit(
+        client_id or (request.client.host if request.client else "-"))
+    if not decision.admitted:
+        raise HTTPException(
+            status_code=decision.status_code,
+            detail=decision.reason,
+            headers={"Retry-After": str(decision.retry_after_s)}
         )
-        
-        # SAMO stavi u queue
-        saved_obs = queue_service.enqueue(observation)
-        
-        logger.info(f"Opservacija #{saved_obs.id} stavljena u queue")
+    
+    # Bez ključa klijenta ključ se generiše PRIJE upisa: enqueue prekinut timeout-om
+    # može ipak commit-ovati red, a replay spool-a ga onda prepoznaje po istom ključu
+    observation = Observation.create_new(
+        temperature=obs.temperature,
+        humidity=obs.humidity,
+        frames=obs.frames,
+        strength=obs.strength,
+        varoa=obs.varoa,
+        hive_id=obs.hive_id,
+        idempotency_key=idempotency_key or obs.idempotency_key or f"auto-{uuid.uuid4().hex}",
+        apiary_id=obs.apiary_id
+    )
+    
+    saved_obs = None
+    if runtime.db_breaker.allow():
+        try:
+            saved_obs, duplicate = await asyncio.wait_for(
+                asyncio.to_thread(runtime.queue_service.enqueue_idempotent, observation),
+                timeout=ENQUEUE_BUDGET_S
+            )
+            runtime.db_breaker.record_success()
+        except Exception as e:
+            if not is_connectivity_error(e):
+                # Baza je odgovorila - greška je u podacima, ne ide u spool
+                runtime.db_breaker.record_success()
+                logger.warning(f"Opservacija odbijena u /predict: {e!r}")
+                raise HTTPException(status_code=422, detail="Opservacija nije prihvaćena")
+            runtime.db_breaker.record_failure()
+            logger.warning(f"Baza nedostupna za /predict, opservacija ide u spool: {e!r}")
+    
+    if saved_obs is None:
+        return await _spool_observation(observation)
+    
+    try:
+        if duplicate:
+            return QueueResponse(
+                status=saved_obs.status.value,
+                observation_id=saved_obs.id,
+                message="Duplicate request - original observation returned",
+                timestamp=datetime.now().isoformat(),
+                duplicate=True
+            )
         
         # Vrati SAMO status
         return QueueResponse(
@@ -172,13 +233,113 @@ async def predict(obs: ObservationRequest):
             observation_id=saved_obs.id,
             message="Observation queued for processing by agent",
             timestamp=datetime.now().isoformat(),
-            estimated_wait_time_ms=100.0  
+            estimated_wait_time_ms=decision.estimated_wait_ms
         )
         
     except Exception as e:
         logger.error(f"Greška u /predict: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/predict/packed", response_model=PackedIngestResponse)
+async def predict_packed(request: Request,
+                         content_type: Optional[str] = Header(None),
+                         client_id: Optional[str] = Header(None, alias="X-Client-Id")):
+    """
+    Batch opservacija u binarnom formatu (web/packed.py) za gateway-e:
+    dekodiranje i validacija opsega nad cijelim batch-om odjednom, jedan
+    bulk insert. Neispravni zapisi se vraćaju u `rejected`, ostali idu u red.
+    """
+    if not runtime.queue_service:
+        raise HTTPException(status_code=503, detail="Sistema nije spreman")
+    if (content_type or "").split(";")[0].strip() != PACKED_CONTENT_TYPE:
+        raise HTTPException(status_code=415, detail=f"Očekivan {PACKED_CONTENT_TYPE}")
+    
+    try:
+        batch = decode_packed(await request.body(), MAX_PACKED_RECORDS)
+    except PackedFormatError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    decision = runtime.admission.admit(
+        client_id or (request.client.host if request.client else "-"),
+        count=max(1, batch.accepted))
+    if not decision.admitted:
+        raise HTTPException(
+            status_code=decision.status_code,
+            detail=decision.reason,
+            headers={"Retry-After": str(decision.retry_after_s)}
+        )
+    
+    observations = batch.to_observations()
+    positions = batch.accepted_indices
+    observation_ids: List[Optional[int]] = [None] * len(batch)
+    
+    saved = False
+    if observations and runtime.db_breaker.allow():
+        try:
+            ids = await asyncio.wait_for(
+                asyncio.to_thread(runtime.queue_service.enqueue_batch, observations),
+                timeout=PACKED_ENQUEUE_BUDGET_S
+            )
+            runtime.db_breaker.record_success()
+            for position, observation_id in zip(positions, ids):
+                observation_ids[position] = observation_id
+            saved = True
+        except Exception as e:
+            if not is_connectivity_error(e):
+                # Baza je odgovorila - batch se odbija, breaker ostaje zatvoren
+                runtime.db_breaker.record_success()
+                logger.warning(f"Batch odbijen u /predict/packed: {e!r}")
+                raise HTTPException(status_code=422, detail="Batch nije prihvaćen")
+            runtime.db_breaker.record_failure()
+            logger.warning(f"Baza nedostupna za /predict/packed, batch ide u spool: {e!r}")
+    
+    if observations and not saved:
+        try:
+            await asyncio.to_thread(runtime.spool.append_many,
+                                    [observation_to_record(obs) for obs in observations])
+        except Exception as e:
+            logger.error(f"Greška pri upisu batch-a u spool: {e}")
+            raise HTTPException(status_code=503, detail="Baza i spool nedostupni",
+                                headers={"Retry-After": "5"})
+        return PackedIngestResponse(
+            status="spooled",
+            accepted=len(observations),
+            observation_ids=observation_ids,
+            rejected=batch.rejected,
+            message="Database unavailable - batch stored locally and will be queued",
+            timestamp=datetime.now().isoformat(),
+            idempotency_keys=[obs.idempotency_key for obs in observations]
+        )
+    
+    return PackedIngestResponse(
+        status="queued",
+        accepted=len(observations),
+        observation_ids=observation_ids,
+        rejected=batch.rejected,
+        message=f"{len(observations)} observations queued, {len(batch.rejected)} rejected",
+        timestamp=datetime.now().isoformat(),
+        estimated_wait_time_ms=decision.estimated_wait_ms
+    )
+
+async def _spool_observation(observation: Observation) -> QueueResponse:
+    """
+    Lokalni durable spool; replayer ga upisuje u bazu kad se oporavi.
+    Opservacija već ima ključ - replay dedupira i red koji je prekinuti enqueue upisao.
+    """
+    try:
+        await asyncio.to_thread(runtime.spool.append, observation_to_record(observation))
+    except Exception as e:
+        logger.error(f"Greška pri upisu u spool: {e}")
+        raise HTTPException(status_code=503, detail="Baza i spool nedostupni",
+                            headers={"Retry-After": "5"})
+    
+    return QueueResponse(
+        status="spooled",
+        message="Database unavailable - observation stored locally and will be queued",
+        timestamp=datetime.now().isoformat(),
+        idempotency_key=observation.idempotency_key
+    )
+
 @app.get("/predictions/{observation_id}", response_model=PredictionResultResponse)
 async def get_prediction_result(observation_id: int):
     """
@@ -191,30 +352,7 @@ async def get_prediction_result(observation_id: int):
         if not obs_status:
             raise HTTPException(status_code=404, detail="Observation not found")
         
-        # Ako je još u queue ili se procesira
-        if obs_status['status'] in ['queued', 'processing']:
-            return PredictionResultResponse(
-                observation_id=observation_id,
-                status=obs_status['status'],
-                message=f"Observation is {obs_status['status']}"
-            )
-        
-        # Ako je obrađeno
-        if obs_status['status'] == 'processed':
-            return PredictionResultResponse(
-                observation_id=observation_id,
-                status='processed',
-                predicted_action=obs_status['predicted_action'],
-                confidence=obs_status['confidence'],
-                processed_at=obs_status['timestamp'].isoformat() if obs_status['timestamp'] else None
-            )
-        
-        # Neočekivani status
-        return PredictionResultResponse(
-            observation_id=observation_id,
-            status=obs_status['status'],
-            error=f"Unexpected status: {obs_status['status']}"
-        )
+        return _to_result_response(obs_status)
         
     except HTTPException:
         raise
@@ -222,34 +360,144 @@ async def get_prediction_result(observation_id: int):
         logger.error(f"Greška: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+def _to_result_response(obs_status: Dict[str, Any]) -> PredictionResultResponse:
+    """Red iz baze -> odgovor (isti format za pojedinačni i bulk upit)"""
+    observation_id = obs_status['id']
+    
+    # Ako je još u queue ili se procesira
+    if obs_status['status'] in ['queued', 'processing']:
+        return PredictionResultResponse(
+            observation_id=observation_id,
+            status=obs_status['status']
+        )
+    
+    # Ako je obrađeno
+    if obs_status['status'] == 'processed':
+        return PredictionResultResponse(
+            observation_id=observation_id,
+            status='processed',
+            predicted_action=obs_status['predicted_action'],
+            confidence=obs_status['confidence'],
+            processed_at=obs_status['processed_at'].isoformat() if obs_status['processed_at'] else None,
+            processing_time_ms=obs_status['time_to_result_ms'],
+            requires_review=obs_status['review_severity'] is not None,
+            review_severity=obs_status['review_severity']
+        )
+    
+    # Neočekivani status
+    return PredictionResultResponse(
+        observation_id=observation_id,
+        status=obs_status['status'],
+        error=f"Unexpected status: {obs_status['status']}"
+    )
+
+@app.post("/predictions/query", response_model=PredictionQueryResponse)
+async def query_predictions(req: PredictionQueryRequest):
+    """Status za više opservacija jednim zahtjevom (umjesto jednog GET-a po Id-u)"""
+    try:
+        statuses = await asyncio.to_thread(get_observation_statuses, req.ids)
+    except Exception as e:
+        logger.error(f"Greška u /predictions/query: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    return PredictionQueryResponse(
+        results=[_to_result_response(statuses[i]) for i in req.ids if i in statuses],
+        missing=[i for i in dict.fromkeys(req.ids) if i not in statuses]
+    )
+
+@app.get("/predictions")
+async def stream_predictions(after_id: int = 0, limit: int = RESULTS_PAGE_SIZE):
+    """
+    Feed obrađenih rezultata kao NDJSON (jedan JSON po liniji), keyset po Id.
+    Klijent nastavlja sa after_id = Id zadnje primljene linije.
+    """
+    if not 1 <= limit <= MAX_RESULTS_PAGE_SIZE:
+        raise HTTPException(status_code=422,
+                            detail=f"limit mora biti u [1, {MAX_RESULTS_PAGE_SIZE}]")
+    
+    def ndjson_lines():
+        for obs_status in iter_processed_results(after_id, limit):
+            yield _to_result_response(obs_status).model_dump_json() + "\n"
+    
+    return StreamingResponse(ndjson_lines(), media_type="application/x-ndjson")
+
+@app.get("/reviews", response_model=ReviewInboxResponse)
+async def get_reviews(limit: int = 50, cursor: Optional[str] = None):
+    """
+    Inbox za ljudski pregled: neriješene označene opservacije, najteže prvo.
+    Feedback na opservaciju je uklanja iz inbox-a.
+    """
+    if not 1 <= limit <= 500:
+        raise HTTPException(status_code=422, detail="limit mora biti u [1, 500]")
+    
+    after_severity, after_id = _decode_review_cursor(cursor) if cursor else (None, None)
+    
+    try:
+        rows = await asyncio.to_thread(get_review_inbox, limit, after_severity, after_id)
+    except Exception as e:
+        logger.error(f"Greška u /reviews: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    items = [ReviewItem(
+        observation_id=row['id'],
+        timestamp=row['timestamp'].isoformat() if row['timestamp'] else None,
+        temperature=row['temperature'],
+        humidity=row['humidity'],
+        frames=row['frames'],
+        strength=row['strength'],
+        varoa=row['varoa'],
+        predicted_action=row['predicted_action'],
+        confidence=row['confidence'],
+        hive_id=row['hive_id'],
+        review_severity=row['review_severity']
+    ) for row in rows]
+    
+    next_cursor = _encode_review_cursor(rows[-1]) if len(rows) == limit else None
+    return ReviewInboxResponse(items=items, next_cursor=next_cursor)
+
+def _encode_review_cursor(row: Dict[str, Any]) -> str:
+    """Keyset inbox-a (severity, id) zadnjeg reda stranice -> 'severity:id'"""
+    return f"{row['review_severity']!r}:{row['id']}"
+
+def _decode_review_cursor(cursor: str) -> Tuple[float, int]:
+    """'severity:id' -> (severity, id); neispravan cursor -> 400"""
+    try:
+        severity_part, id_part = cursor.split(":")
+        after_severity, after_id = float(severity_part), int(id_part)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Neispravan cursor")
+    if not math.isfinite(after_severity):
+        raise HTTPException(status_code=400, detail="Neispravan cursor")
+    return after_severity, after_id
+
 @app.post("/feedback")
 async def feedback(fb: FeedbackRequest):
     """Primi feedback za kasnije učenje"""
     try:
-        success = save_feedback(
+        feedback_id = await asyncio.to_thread(
+            save_feedback,
             observation_id=fb.obs_id,
             user_label=fb.user_label,
             correct=fb.correct,
             comment=fb.comment
         )
         
-        if not success:
+        if not feedback_id:
             raise HTTPException(status_code=500, detail="Failed to save feedback")
         
-        # Treniraj model ako je predikcija netočna
-        if not fb.correct and classifier:
+        if runtime.settings_repo:
             try:
-                obs_details = get_observation_details(fb.obs_id)
-                if obs_details:
-                    features = [
-                        obs_details['temperature'],
-                        obs_details['humidity'],
-                        obs_details['frames'],
-                        obs_details['strength'],
-                        int(obs_details['varoa'])
-                    ]
-                    classifier.train_single(features, fb.user_label)
-                    logger.info(f"Model treniran sa feedbackom")
+                await asyncio.to_thread(runtime.settings_repo.increment_new_gold)
+            except Exception as e:
+                logger.warning(f"Nije moguće ažurirati gold brojač: {e}")
+        
+        # Samo leader drži sklearn model i training set; na API workerima
+        # feedback ulazi u retrening preko gold brojača i sinhronizacije seta.
+        # Lock training seta (sync/kompakcija) ne smije blokirati event loop.
+        if runtime.training_service and isinstance(runtime.classifier, BeeClassifier):
+            try:
+                await asyncio.to_thread(runtime.learn_from_feedback, feedback_id, fb.obs_id,
+                                        fb.user_label, fb.correct)
             except Exception as e:
                 logger.warning(f"Nije moguće trenirati model: {e}")
         
@@ -263,23 +511,29 @@ async def feedback(fb: FeedbackRequest):
 async def get_agent_status():
     """Status background agenta"""
     try:
-        queue_size = 0
-        try:
-            conn = get_connection()
-            cursor = conn.cursor()
-            cursor.execute("SELECT COUNT(*) FROM Observations WHERE Status = 'queued'")
-            queue_size = cursor.fetchone()[0]
-            conn.close()
-        except:
-            queue_size = 0
+        # Dubinu reda osvježava run_depth_refresh_loop - bez upita na bazu ovdje
+        queue_size = runtime.admission.depth if runtime.admission else 0
+        
+        status_info = None
+        if runtime.runner:
+            status_info = runtime.runner.get_status()
+        elif runtime.worker_running:
+            # API worker: brojači agenta iz snapshot-a leadera
+            try:
+                status_info = (await _leader_snapshot())["runner"]
+            except HTTPException:
+                status_info = None
         
-        if runner:
-            status_info = runner.get_status()
+        if status_info:
             return AgentStatusResponse(
-                is_running=agent_running,
+                is_running=True,
                 processed_count=status_info.get("processed_count", 0),
                 avg_processing_time_ms=status_info.get("avg_processing_time_ms", 0),
-                queue_size=queue_size
+                queue_size=queue_size,
+                service_rate_per_s=(runtime.admission.service_rate
+                                    if runtime.admission else None),
+                estimated_wait_time_ms=(runtime.admission.estimated_wait_ms()
+                                        if runtime.admission else None)
             )
         
         return AgentStatusResponse(
@@ -298,36 +552,219 @@ async def get_agent_status():
             queue_size=0
         )
 
-# ==============================================
-# BACKGROUND AGENT LOOP
-# ==============================================
+@app.get("/settings", response_model=SettingsResponse)
+async def get_settings():
+    """Trenutne postavke sistema (iz memorije)"""
+    if not runtime.settings_repo:
+        raise HTTPException(status_code=503, detail="Sistema nije spreman")
+    
+    settings = runtime.settings_repo.get_system_settings()
+    # API worker nema scoring servis - pravila čita iz istog snapshot-a postavki
+    review_engine = (runtime.scoring_service.review_rules if runtime.scoring_service
+                     else ReviewRuleEngine.from_json(settings.review_rules))
+    return SettingsResponse(
+        gold_threshold=settings.gold_threshold,
+        enable_retraining=settings.enable_retraining,
+        new_gold_since_last_train=settings.new_gold_since_last_train,
+        exploration_rate=settings.exploration_rate,
+        review_rules=[dataclasses.asdict(rule) for rule in review_engine.rules]
+    )
 
-async def run_agent_loop():
-    """Glavna petlja agenta - radi u pozadini"""
-    logger.info("Background agent loop pokrenut")
+@app.put("/settings", response_model=SettingsResponse)
+async def update_settings(req: SettingsRequest):
+    """Admin izmjena postavki - primjenjuje se odmah, bez restarta"""
+    if not runtime.settings_repo:
+        raise HTTPException(status_code=503, detail="Sistema nije spreman")
+    
+    if req.exploration_rate is not None and not 0 <= req.exploration_rate <= 1:
+        raise HTTPException(status_code=422, detail="exploration_rate mora biti u [0, 1]")
+    if req.gold_threshold is not None and req.gold_threshold < 1:
+        raise HTTPException(status_code=422, detail="gold_threshold mora biti >= 1")
+    review_rules = None
+    if req.review_rules is not None:
+        try:
+            review_rules = parse_rules(req.review_rules)
+        except ValueError as e:
+            raise HTTPException(status_code=422, detail=str(e))
+    
+    settings = runtime.settings_repo.get_system_settings()
+    if req.gold_threshold is not None:
+        settings.gold_threshold = req.gold_threshold
+    if req.enable_retraining is not None:
+        settings.enable_retraining = req.enable_retraining
+    if req.exploration_rate is not None:
+        settings.exploration_rate = req.exploration_rate
+    if review_rules is not None:
+        # Prazna lista se čuva kao "[]" (sva pravila isključena); NULL = podrazumijevana
+        settings.review_rules = ReviewRuleEngine(review_rules).to_json()
     
     try:
-        while agent_running and runner:
-            try:
-                # Pokreni JEDAN tick (Sense→Think→Act)
-                result = runner.step()
-                
-                if result:
-                    logger.info(f"Agent procesirao opservaciju #{result.observation_id}")
-                    await asyncio.sleep(0.05)  # Kratka pauza
-                else:
-                    await asyncio.sleep(2)  # Nema posla - duža pauza
-                    
-            except Exception as e:
-                logger.error(f"Greška u agent loopu: {e}")
-                await asyncio.sleep(5)
-                
-    except asyncio.CancelledError:
-        logger.info("Agent loop prekinut")
+        await asyncio.to_thread(runtime.settings_repo.save_settings, settings)
     except Exception as e:
-        logger.error(f"Kritična greška: {e}")
-    finally:
-        logger.info("Agent loop završen")
+        logger.error(f"Greška pri čuvanju postavki: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    return await get_settings()
+
+@app.get("/metrics/latency")
+async def get_latency_metrics(slo_ms: Optional[float] = None):
+    """
+    Percentili vremena u redu i vremena do rezultata (1 min / 5 min / 1 h),
+    iz memorije leadera. slo_ms -> udio opservacija obrađenih unutar SLO-a.
+    """
+    if runtime.latency_tracker:
+        return runtime.latency_tracker.get_summary(slo_ms)
+    return summarize_windows((await _leader_snapshot())["latency"], slo_ms)
+
+@app.get("/metrics/drift")
+async def get_drift_metrics(histograms: bool = False):
+    """
+    Drift feature-a (1 h / 24 h) u odnosu na training set trenutnog modela:
+    srednja vrijednost, std, pomak u referentnim std i PSI po feature-u.
+    """
+    if runtime.model_monitor:
+        return runtime.model_monitor.get_drift_summary(histograms)
+    drift = (await _leader_snapshot())["drift"]
+    return drift if histograms else without_histograms(drift)
+
+@app.get("/metrics/accuracy")
+async def get_accuracy_metrics():
+    """Tačnost po verziji modela iz feedbacka (zadnjih N ishoda i ukupno)"""
+    if runtime.model_monitor:
+        return runtime.model_monitor.get_accuracy_summary(
+            runtime.scoring_service.model_version)
+    return (await _leader_snapshot())["accuracy"]
+
+@app.get("/analytics/rollups")
+async def get_rollups(granularity: str = "hour", since: Optional[datetime] = None,
+                      until: Optional[datetime] = None, action: Optional[str] = None,
+                      by_action: bool = True):
+    """
+    Akcije, pregledi i tačnost feedbacka po satu/danu iz ActionRollups
+    (inkrementalno održavan) - bez GROUP BY nad Observations i Feedback.
+    """
+    if granularity not in ROLLUP_GRANULARITIES:
+        raise HTTPException(status_code=400,
+                            detail=f"granularity: {', '.join(ROLLUP_GRANULARITIES)}")
+    try:
+        series = await asyncio.to_thread(get_action_rollups, granularity, since, until,
+                                         action, by_action)
+    except Exception as e:
+        logger.error(f"Greška pri čitanju rollup-a: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+    return {"granularity": granularity, "series": series}
+
+@app.get("/agent/spool")
+async def get_spool_status():
+    """Koliko opservacija čeka u lokalnom spool-u i stanje circuit breaker-a"""
+    if not runtime.spool:
+        raise HTTPException(status_code=503, detail="Sistema nije spreman")
+    return {**runtime.spool.get_info(), "breaker": runtime.db_breaker.get_status(),
+            "replayed": runtime.spool_runner.replayed_count,
+            "dead_lettered": runtime.spool_runner.dead_letter_count}
+
+@app.get("/agent/shards")
+async def get_shard_status():
+    """Dubina reda po shardu i koji consumer posjeduje koji shard"""
+    if not runtime.queue_service:
+        raise HTTPException(status_code=503, detail="Sistema nije spreman")
+    depths = await asyncio.to_thread(runtime.queue_service.shard_depths)
+    return {
+        "shards": QUEUE_SHARDS,
+        "consumers": AGENT_CONSUMERS,
+        "queued": {shard: {"queued": depths.get(shard, 0), "consumer": shard % AGENT_CONSUMERS}
+                   for shard in range(QUEUE_SHARDS)}
+    }
+
+@app.get("/agent/leader")
+async def get_leader_status():
+    """Uloga ovog workera, trenutni leader i model kojim leader skoruje"""
+    holder = (await asyncio.to_thread(runtime.leader_lease.get_holder)
+              if runtime.leader_lease else None)
+    model = runtime.classifier.get_model_info() if runtime.classifier else None
+    if model is None and runtime.worker_running:
+        try:
+            model = (await _leader_snapshot())["model"]
+        except HTTPException:
+            model = None
+    return {
+        "worker_id": runtime.worker_id,
+        "role": WORKER_ROLE,
+        "is_leader": runtime.agent_running,
+        "election": LEADER_ELECTION,
+        "leader": holder,
+        "model": model
+    }
+
+@app.get("/agent/admission")
+async def get_admission_status():
+    """Stanje admission control-a (dubina reda, brzina obrade, odbijeni zahtjevi)"""
+    if not runtime.admission:
+        raise HTTPException(status_code=503, detail="Sistema nije spreman")
+    return runtime.admission.get_status()
+
+@app.get("/shadow/summary")
+async def get_shadow_summary():
+    """Koliko se shadow modeli slažu s primarnim (iz memorije leadera)"""
+    if runtime.shadow_scorer:
+        return runtime.shadow_scorer.recorder.get_summary()
+    shadow = None if runtime.agent_running else (await _leader_snapshot())["shadow"]
+    return shadow or {"models": {}, "pending": 0, "dropped": 0}
+
+@app.get("/hives/state")
+async def get_hive_state():
+    """Broj košnica s rolling stanjem u memoriji leadera"""
+    if runtime.agent_running:
+        return runtime.hive_state_info()
+    return (await _leader_snapshot())["hives"]
+
+@app.get("/export/{table}")
+async def export_table_stream(table: str, after_id: int = 0, limit: Optional[int] = None):
+    """
+    Streaming Arrow IPC export (keyset po Id). Za inkrementalni export
+    klijent šalje zadnji primljeni Id kao after_id.
+    """
+    if table not in exporter.EXPORT_TABLES:
+        raise HTTPException(status_code=404, detail=f"Nepoznata tabela: {table}")
+    if exporter.pa is None:
+        raise HTTPException(status_code=503, detail="Export zahtijeva pyarrow")
+    
+    return StreamingResponse(
+        exporter.stream_arrow_ipc(table, after_id=after_id, limit=limit),
+        media_type="application/vnd.apache.arrow.stream"
+    )
+
+@app.get("/agent/training-set")
+async def get_training_set_info():
+    """Veličina training seta na disku leadera"""
+    if runtime.training_store:
+        return runtime.training_store.get_info()
+    return (await _leader_snapshot())["training_set"]
+
+@app.post("/agent/model-selection")
+async def run_model_selection(response: Response):
+    """
+    Pokreni selekciju modela (kandidati se treniraju u zasebnim procesima).
+    Na API workeru se zahtjev predaje leaderu (202) - rezultat je u snapshot-u leadera.
+    """
+    if not runtime.training_service:
+        snapshot = await _leader_snapshot()
+        try:
+            await runtime.request_model_selection()
+        except Exception as e:
+            logger.error(f"Zahtjev za selekciju modela nije predat leaderu: {e}")
+            raise HTTPException(status_code=503, detail=str(e))
+        response.status_code = status.HTTP_202_ACCEPTED
+        return {"status": "scheduled", "leader": snapshot["worker_id"],
+                "last_result": snapshot["model_selection"]}
+    
+    try:
+        return await runtime.select_model()
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except Exception as e:
+        logger.error(f"Greška pri selekciji modela: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
 
 # ==============================================
 # STARTUP
@@ -0,0 +1,152 @@
+# backend/web/packed.py
+import struct
+import uuid
+from datetime import datetime
+import numpy as np
+from typing import List, Optional
+from domain.entities import Observation
+
+# Binarni ingest za gateway-e (POST /predict/packed):
+#   header: [magic(4s) | verzija(uint16) | veličina zapisa(uint16) | broj zapisa(uint32)]
+#   zapisi: PACKED_RECORD_DTYPE, little-endian, bez razmaka između zapisa
+# Cijeli batch se mapira na structured niz (np.frombuffer) i validira maskama.
+PACKED_CONTENT_TYPE = "application/x-beeagent-packed"
+PACKED_MAGIC = b"BEEP"
+PACKED_VERSION = 1
+_HEADER = struct.Struct("<4sHHI")
+
+PACKED_RECORD_DTYPE = np.dtype([
+    # Vrijeme mjerenja (Unix ms); 0 -> vrijeme prijema
+    ("timestamp_ms", "<i8"),
+    ("temperature", "<f4"),
+    ("humidity", "<f4"),
+    ("frames", "<u2"),
+    ("strength", "<u1"),
+    ("varoa", "<u1"),
+    # UTF-8, dopunjeno nulama; prazno -> nema vrijednosti
+    ("hive_id", "S32"),
+    ("apiary_id", "S32"),
+    ("idempotency_key", "S40")
+])
+
+# Dozvoljeni opsezi (isti kao forma na frontendu), granice uključene
+FIELD_RANGES = {
+    "temperature": (-50.0, 60.0),
+    "humidity": (0.0, 100.0),
+    "frames": (1, 50),
+    "strength": (1, 10),
+    "varoa": (0, 1)
+}
+
+# Vrijeme mjerenja najviše ovoliko ispred sata servera (razlika satova gateway-a)
+MAX_CLOCK_SKEW_MS = 24 * 3600 * 1000
+
+class PackedFormatError(ValueError):
+    """Tijelo zahtjeva nije ispravan packed batch (cijeli zahtjev se odbija)"""
+
+class PackedBatch:
+    """Dekodiran batch: zapisi + maska ispravnih i razlozi odbijanja po indeksu"""
+
+    __slots__ = ("records", "valid", "rejected")
+
+    def __init__(self, records: np.ndarray, valid: np.ndarray, rejected: List[dict]):
+        self.records = records
+        self.valid = valid
+        self.rejected = rejected
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    @property
+    def accepted(self) -> int:
+        return int(self.valid.sum())
+
+    @property
+    def accepted_indices(self) -> List[int]:
+        """Pozicije ispravnih zapisa u ulaznom batch-u (redoslijed kao to_observations)"""
+        return np.flatnonzero(self.valid).tolist()
+
+    def to_observations(self, received_at: Optional[datetime] = None) -> list:
+        """Ispravni zapisi -> Observation (svaki dobija IdempotencyKey, kao na /predict)"""
+        received_at = received_at or datetime.now()
+        records = self.records[self.valid]
+        # Unix ms -> lokalno vrijeme (kao datetime.now()) za cijelu kolonu odjednom
+        offset_ms = int(received_at.astimezone().utcoffset().total_seconds() * 1000)
+        timestamps = (records["timestamp_ms"] + offset_ms).astype("M8[ms]").tolist()
+        # Automatski ključevi: jedan UUID po batch-u + pozicija
+        batch_key = uuid.uuid4().hex
+        keys = [key or f"auto-{batch_key}-{i}"
+                for i, key in enumerate(_decode_strings(records["idempotency_key"]))]
+        return [
+            Observation.create_new(
+                temperature=temperature,
+                humidity=humidity,
+                frames=frames,
+                strength=strength,
+                varoa=varoa,
+                hive_id=hive_id,
+                idempotency_key=key,
+                apiary_id=apiary_id,
+                timestamp=timestamp if ts else received_at
+            )
+            for ts, timestamp, temperature, humidity, frames, strength, varoa, hive_id, apiary_id, key
+            in zip(records["timestamp_ms"].tolist(), timestamps,
+                   records["temperature"].astype(float).round(3).tolist(),
+                   records["humidity"].astype(float).round(3).tolist(),
+                   records["frames"].tolist(), records["strength"].tolist(),
+                   records["varoa"].tolist(), _decode_strings(records["hive_id"]),
+                   _decode_strings(records["apiary_id"]), keys)
+        ]
+
+def _decode_strings(values: np.ndarray) -> List[Optional[str]]:
+    """S kolona -> str/None (nule na kraju otpadaju u tolist)"""
+    if not values.any():
+        return [None] * len(values)
+    return [value.decode("utf-8", "replace") or None for value in values.tolist()]
+
+def decode_packed(body: bytes, max_records: int, now_ms: Optional[int] = None) -> PackedBatch:
+    """
+    Jedan vektorizovan prolaz: bez kopiranja zapisa, opsezi kao maske nad kolonama.
+    Neispravni zapisi se odbijaju pojedinačno; neispravan header odbija cijeli batch.
+    now_ms: sat servera (Unix ms) za gornju granicu timestamp_ms.
+    """
+    if now_ms is None:
+        now_ms = int(datetime.now().timestamp() * 1000)
+    if len(body) < _HEADER.size:
+        raise PackedFormatError("Tijelo je kraće od headera")
+    magic, version, record_size, count = _HEADER.unpack_from(body)
+    if magic != PACKED_MAGIC:
+        raise PackedFormatError("Pogrešan magic")
+    if version != PACKED_VERSION:
+        raise PackedFormatError(f"Nepodržana verzija formata: {version}")
+    if record_size != PACKED_RECORD_DTYPE.itemsize:
+        raise PackedFormatError(f"Veličina zapisa {record_size}, očekivano "
+                                f"{PACKED_RECORD_DTYPE.itemsize}")
+    if count > max_records:
+        raise PackedFormatError(f"Najviše {max_records} zapisa po zahtjevu")
+    if len(body) != _HEADER.size + count * record_size:
+        raise PackedFormatError("Dužina tijela ne odgovara broju zapisa")
+
+    records = np.frombuffer(body, dtype=PACKED_RECORD_DTYPE, count=count, offset=_HEADER.size)
+
+    failures = {}
+    for field, (low, high) in FIELD_RANGES.items():
+        column = records[field]
+        bad = (column < low) | (column > high)
+        if column.dtype.kind == "f":
+            bad |= ~np.isfinite(column)
+        failures[field] = bad
+    timestamps = records["timestamp_ms"]
+    failures["timestamp_ms"] = (timestamps < 0) | (timestamps > now_ms + MAX_CLOCK_SKEW_MS)
+    invalid = np.logical_or.reduce(list(failures.values()))
+
+    # Razlozi samo za odbijene zapise (obično ih je malo)
+    rejected = [{"index": int(i), "fields": [field for field, bad in failures.items() if bad[i]]}
+                for i in np.flatnonzero(invalid)]
+    return PackedBatch(records, ~invalid, rejected)
+
+def encode_packed(records: np.ndarray) -> bytes:
+    """Zapisi (PACKED_RECORD_DTYPE) -> tijelo zahtjeva (gateway klijenti, testiranje)"""
+    records = np.ascontiguousarray(records, dtype=PACKED_RECORD_DTYPE)
+    return (_HEADER.pack(PACKED_MAGIC, PACKED_VERSION, PACKED_RECORD_DTYPE.itemsize, len(records))
+            + records.tobytes())
@@ -247,6 +247,13 @@ export default function App() {
 
       const data = await res.json();
 
+      if (data.status === 'spooled') {
+        // Baza trenutno nedostupna - podaci su sačuvani i biće obrađeni kasnije
+        setInfo(`Baza trenutno nije dostupna. Podaci su sačuvani (ključ: ${data.idempotency_key}) i biće obrađeni kasnije.`);
+        setProgress(100);
+        return;
+      }
+
       if (data.status !== 'queued') {
         throw new Error(`Neočekivani odgovor: ${JSON.stringify(data)}`);
       }